@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import TokenRevocado, RevocacionUsuario
 
-# Register your models here.
+
+@admin.register(TokenRevocado)
+class TokenRevocadoAdmin(admin.ModelAdmin):
+    list_display = ['jti', 'usuario', 'expira', 'creado']
+    search_fields = ['jti', 'usuario__username']
+    list_select_related = ['usuario']
+
+
+@admin.register(RevocacionUsuario)
+class RevocacionUsuarioAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'emitidos_antes', 'expira']
+    search_fields = ['usuario__username']
+    list_select_related = ['usuario']
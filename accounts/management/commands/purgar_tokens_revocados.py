@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from accounts.revocacion import purgar_revocaciones_expiradas
+
+
+class Command(BaseCommand):
+    help = 'Elimina las revocaciones de tokens que ya expiraron'
+
+    def handle(self, *args, **options):
+        total = purgar_revocaciones_expiradas()
+        self.stdout.write(self.style.SUCCESS(f'{total} revocaciones expiradas eliminadas.'))
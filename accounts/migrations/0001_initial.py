@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevocacionUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('emitidos_antes', models.DateTimeField()),
+                ('expira', models.DateTimeField(db_index=True, help_text='Momento en que expira el último token afectado')),
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='revocacion_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Revocación de Usuario',
+                'verbose_name_plural': 'Revocaciones de Usuario',
+            },
+        ),
+        migrations.CreateModel(
+            name='TokenRevocado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True)),
+                ('expira', models.DateTimeField(db_index=True, help_text='Expiración original del token')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tokens_revocados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Token Revocado',
+                'verbose_name_plural': 'Tokens Revocados',
+                'ordering': ['-creado'],
+            },
+        ),
+    ]
@@ -1,3 +1,51 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class TokenRevocado(models.Model):
+    """
+    Token JWT revocado antes de su expiración (por ejemplo al cerrar sesión).
+
+    Solo se conserva hasta que el token expira; a partir de ese momento ya no
+    es válido de todos modos y el registro puede purgarse.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='tokens_revocados'
+    )
+    expira = models.DateTimeField(db_index=True, help_text="Expiración original del token")
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Token Revocado'
+        verbose_name_plural = 'Tokens Revocados'
+        ordering = ['-creado']
+
+    def __str__(self):
+        return f"{self.jti} (expira {self.expira})"
+
+
+class RevocacionUsuario(models.Model):
+    """
+    Corte de validez de los tokens de un usuario: se rechazan todos los
+    emitidos hasta `emitidos_antes` (cambio de contraseña, cierre de todas
+    las sesiones).
+    """
+    usuario = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='revocacion_tokens'
+    )
+    emitidos_antes = models.DateTimeField()
+    expira = models.DateTimeField(db_index=True, help_text="Momento en que expira el último token afectado")
+
+    class Meta:
+        verbose_name = 'Revocación de Usuario'
+        verbose_name_plural = 'Revocaciones de Usuario'
+
+    def __str__(self):
+        return f"Tokens de {self.usuario_id} emitidos antes de {self.emitidos_antes}"
@@ -0,0 +1,187 @@
+"""Lista de revocación de tokens JWT en memoria.
+
+Las revocaciones se guardan en TokenRevocado (por jti) y RevocacionUsuario
+(corte por usuario) y cada proceso mantiene una copia en memoria: un
+diccionario jti -> expiración y otro usuario -> corte. Comprobar un token
+es una búsqueda en diccionario, sin E/S.
+
+Para que los demás procesos se enteren de una revocación, cada una publica
+un sello con dos partes:
+
+- la fecha de modificación de un archivo (REVOCACION_TOKENS['ARCHIVO_SELLO']),
+  que comparten los workers de una misma máquina aunque la caché sea local;
+- un contador de versión en la caché de Django, que con un backend
+  compartido (Redis, Memcached) llega también a los workers de otras
+  máquinas, como la versión de usuario de config.authentication.
+
+Cada proceso revisa el sello como mucho una vez por INTERVALO_SINCRONIZACION
+segundos y, si cambió alguna de sus partes, recarga la lista desde la base
+de datos. La recarga descarta lo expirado, igual que la purga de los
+registros persistidos.
+"""
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenRevocado, RevocacionUsuario
+
+REVOCACION_TOKENS_POR_DEFECTO = {
+    'ARCHIVO_SELLO': Path(settings.BASE_DIR) / '.revocacion_tokens',
+    'INTERVALO_SINCRONIZACION': 1.0,
+}
+
+
+def configuracion_revocacion():
+    """Configuración efectiva de REVOCACION_TOKENS con sus valores por defecto"""
+    return {**REVOCACION_TOKENS_POR_DEFECTO, **getattr(settings, 'REVOCACION_TOKENS', {})}
+
+
+CLAVE_VERSION = 'revocacion:version'
+
+
+def _desde_timestamp(valor):
+    return datetime.fromtimestamp(valor, tz=dt_timezone.utc)
+
+
+class ListaRevocacion:
+    """Copia en memoria de las revocaciones, sincronizada mediante el sello"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Descarta la copia en memoria; se recargará en la próxima comprobación"""
+        with self._lock:
+            self._jtis = {}
+            self._cortes = {}
+            self._sello = None
+            self._proxima_revision = 0.0
+            self._proxima_expiracion = math.inf
+
+    def _leer_sello(self, ruta):
+        """(modificación del archivo de sello, versión en la caché)"""
+        try:
+            modificado = os.stat(ruta).st_mtime_ns
+        except FileNotFoundError:
+            modificado = 0
+        return modificado, cache.get(CLAVE_VERSION)
+
+    def _tocar_sello(self, ruta):
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.touch()
+        os.utime(ruta, ns=(time.time_ns(), time.time_ns()))
+        try:
+            cache.incr(CLAVE_VERSION)
+        except ValueError:
+            # Se parte de un valor único para no reutilizar versiones tras un desalojo
+            cache.set(CLAVE_VERSION, time.time_ns(), timeout=None)
+        return self._leer_sello(ruta)
+
+    def _cargar(self):
+        """Reconstruye la lista desde la base de datos, sin lo ya expirado"""
+        ahora = timezone.now()
+        jtis = {
+            jti: expira.timestamp()
+            for jti, expira in TokenRevocado.objects.filter(expira__gt=ahora).values_list('jti', 'expira')
+        }
+        cortes = {
+            str(usuario_id): (emitidos_antes.timestamp(), expira.timestamp())
+            for usuario_id, emitidos_antes, expira in (
+                RevocacionUsuario.objects.filter(expira__gt=ahora)
+                .values_list('usuario_id', 'emitidos_antes', 'expira')
+            )
+        }
+        self._jtis = jtis
+        self._cortes = cortes
+        expiraciones = list(jtis.values()) + [expira for _, expira in cortes.values()]
+        self._proxima_expiracion = min(expiraciones, default=math.inf)
+
+    def sincronizar(self, forzar=False):
+        ahora = time.monotonic()
+        if not forzar and ahora < self._proxima_revision:
+            return
+
+        configuracion = configuracion_revocacion()
+        with self._lock:
+            if not forzar and ahora < self._proxima_revision:
+                return
+            self._proxima_revision = ahora + configuracion['INTERVALO_SINCRONIZACION']
+            sello = self._leer_sello(configuracion['ARCHIVO_SELLO'])
+            if forzar or sello != self._sello or time.time() >= self._proxima_expiracion:
+                self._cargar()
+                self._sello = sello
+
+    def requiere_sincronizacion(self):
+        """Indica si la próxima comprobación revisaría el sello"""
+        return time.monotonic() >= self._proxima_revision
+
+    def revocado(self, token, sincronizar=True):
+        """Indica si el token (validado) fue revocado por jti o por corte de su usuario"""
+        if sincronizar:
+            self.sincronizar()
+        if token.get(api_settings.JTI_CLAIM) in self._jtis:
+            return True
+        corte = self._cortes.get(str(token.get(api_settings.USER_ID_CLAIM)))
+        return corte is not None and token.get('iat', 0) < corte[0]
+
+    def _publicar(self, actualizar):
+        """Aplica un cambio local y avisa al resto de procesos mediante el sello"""
+        self.sincronizar()
+        with self._lock:
+            actualizar()
+            self._sello = self._tocar_sello(configuracion_revocacion()['ARCHIVO_SELLO'])
+
+    def revocar_token(self, token, usuario_id=None):
+        """Revoca un token concreto hasta su expiración"""
+        jti = token[api_settings.JTI_CLAIM]
+        expira = token['exp']
+        TokenRevocado.objects.bulk_create(
+            [TokenRevocado(jti=jti, usuario_id=usuario_id, expira=_desde_timestamp(expira))],
+            ignore_conflicts=True
+        )
+
+        def actualizar():
+            self._jtis[jti] = expira
+            self._proxima_expiracion = min(self._proxima_expiracion, expira)
+
+        self._publicar(actualizar)
+
+    def revocar_usuario(self, usuario_id, emitidos_antes=None):
+        """Revoca todos los tokens del usuario emitidos antes de ahora (o de `emitidos_antes`)"""
+        # `iat` tiene resolución de segundos: el corte se trunca para no revocar
+        # los tokens que se emitan justo después (p. ej. al volver a iniciar sesión)
+        emitidos_antes = (emitidos_antes or timezone.now()).replace(microsecond=0)
+        # Ningún token emitido antes del corte sigue vigente pasada su vida máxima
+        vida_maxima = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+        expira = emitidos_antes + vida_maxima
+        RevocacionUsuario.objects.update_or_create(
+            usuario_id=usuario_id,
+            defaults={'emitidos_antes': emitidos_antes, 'expira': expira}
+        )
+
+        def actualizar():
+            self._cortes[str(usuario_id)] = (emitidos_antes.timestamp(), expira.timestamp())
+            self._proxima_expiracion = min(self._proxima_expiracion, expira.timestamp())
+
+        self._publicar(actualizar)
+
+
+lista_revocacion = ListaRevocacion()
+
+
+def purgar_revocaciones_expiradas():
+    """Elimina los registros de revocación cuyos tokens ya expiraron"""
+    ahora = timezone.now()
+    tokens, _ = TokenRevocado.objects.filter(expira__lte=ahora).delete()
+    usuarios, _ = RevocacionUsuario.objects.filter(expira__lte=ahora).delete()
+    return tokens + usuarios
@@ -3,6 +3,9 @@ from rest_framework import serializers
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from .revocacion import lista_revocacion
 
 
 
@@ -56,3 +59,18 @@ class SetNewPasswordSerializer(serializers.Serializer):
         if attrs['password'] != attrs['password2']:
             raise serializers.ValidationError("Las contraseñas no coinciden")
         return attrs
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+    todos = serializers.BooleanField(required=False, default=False)
+
+
+class TokenRefreshRevocableSerializer(TokenRefreshSerializer):
+    """Refresco de tokens que rechaza los refresh revocados"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if lista_revocacion.revocado(refresh):
+            raise InvalidToken('El token fue revocado.')
+        return super().validate(attrs)
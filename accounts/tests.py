@@ -1,3 +1,216 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from config.authentication import usuarios_cacheados
+from .models import TokenRevocado, RevocacionUsuario
+from .revocacion import ListaRevocacion, lista_revocacion, purgar_revocaciones_expiradas
 
-# Create your tests here.
+
+class RevocacionAislada:
+    """Usa un archivo de sello temporal y una lista de revocación vacía en cada test"""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.sello = Path(directorio.name) / 'sello'
+        ajustes = self.settings(REVOCACION_TOKENS={'ARCHIVO_SELLO': self.sello, 'INTERVALO_SINCRONIZACION': 0})
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        lista_revocacion.reiniciar()
+        self.addCleanup(lista_revocacion.reiniciar)
+
+
+class CachedJWTAuthenticationTestCase(RevocacionAislada, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        usuarios_cacheados.limpiar()
+        self.user = User.objects.create_user(
+            username='tester', email='tester@example.com', password='clave-segura-123'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def consultas_usuario(self, url='/api/zonas/'):
+        """Hace un GET y devuelve la respuesta y las consultas a la tabla de usuarios"""
+        with CaptureQueriesContext(connection) as contexto:
+            resp = self.client.get(url)
+        return resp, [consulta for consulta in contexto.captured_queries if 'auth_user' in consulta['sql']]
+
+    def test_segunda_peticion_no_consulta_el_usuario(self):
+        resp, consultas = self.consultas_usuario()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(consultas), 1)
+
+        resp, consultas = self.consultas_usuario()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(consultas, [])
+
+    def test_desactivar_usuario_invalida_la_cache(self):
+        self.consultas_usuario()
+
+        self.user.is_active = False
+        self.user.save()
+
+        resp, consultas = self.consultas_usuario()
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(consultas), 1)
+
+    def test_set_new_password_invalida_la_cache(self):
+        self.consultas_usuario()
+
+        resp = APIClient().post('/auth/set-password/', {
+            'uid': urlsafe_base64_encode(force_bytes(self.user.pk)),
+            'token': PasswordResetTokenGenerator().make_token(self.user),
+            'password': 'otra-clave-segura-456',
+            'password2': 'otra-clave-segura-456',
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        # Un token emitido tras el cambio es válido y vuelve a cargar el usuario
+        self.user.refresh_from_db()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        resp, consultas = self.consultas_usuario()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(consultas), 1)
+
+    @override_settings(AUTENTICACION_CACHE={'COMPARTIDA': True})
+    def test_nivel_compartido_entre_procesos(self):
+        self.consultas_usuario()
+        # Simula otro worker: memoria local vacía, misma caché compartida
+        usuarios_cacheados.limpiar()
+
+        _, consultas = self.consultas_usuario()
+        self.assertEqual(consultas, [])
+
+        # La caché compartida no guarda la contraseña: se carga de la base si se pide
+        datos = cache.get(usuarios_cacheados._clave_compartida(str(self.user.pk)))
+        self.assertEqual(datos, {
+            'id': self.user.pk, 'username': 'tester', 'is_active': True, 'is_staff': False, 'is_superuser': False,
+        })
+        usuario = usuarios_cacheados.obtener(str(self.user.pk))
+        self.assertIn('password', usuario.get_deferred_fields())
+        self.assertEqual(usuario.email, 'tester@example.com')
+        usuario.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('clave-segura-123'))
+
+        # Con CHECK_REVOKE_TOKEN viaja la huella de la contraseña, no el hash
+        with mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+            self.consultas_usuario()
+            usuarios_cacheados.limpiar()
+            resp, consultas = self.consultas_usuario()
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(consultas, [])
+            datos = cache.get(usuarios_cacheados._clave_compartida(str(self.user.pk)))
+            self.assertNotIn(self.user.password, datos.values())
+            self.assertIn('huella_contrasena', datos)
+
+        # Una escritura en el usuario cambia su versión y descarta la copia compartida
+        self.user.first_name = 'Tester'
+        self.user.save()
+        usuarios_cacheados.limpiar()
+
+        _, consultas = self.consultas_usuario()
+        self.assertEqual(len(consultas), 1)
+
+
+class RevocacionTokensTestCase(RevocacionAislada, TestCase):
+    def setUp(self):
+        super().setUp()
+        usuarios_cacheados.limpiar()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        # Emitidos en un segundo anterior al de cualquier corte del test
+        self.refresh = RefreshToken.for_user(self.user)
+        self.refresh.set_iat(at_time=timezone.now() - timedelta(seconds=5))
+        self.acceso = self.refresh.access_token
+        self.acceso.set_iat(at_time=timezone.now() - timedelta(seconds=5))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.acceso}')
+
+    def test_logout_revoca_acceso_y_refresh(self):
+        otro_acceso = AccessToken.for_user(self.user)
+
+        resp = self.client.post('/auth/logout/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get('/api/zonas/').status_code, status.HTTP_401_UNAUTHORIZED)
+        resp = APIClient().post('/auth/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Los demás tokens del usuario siguen siendo válidos
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {otro_acceso}')
+        self.assertEqual(cliente.get('/api/zonas/').status_code, status.HTTP_200_OK)
+        self.assertEqual(TokenRevocado.objects.count(), 2)
+
+    def test_cambio_de_contrasena_revoca_tokens_anteriores(self):
+        resp = APIClient().post('/auth/set-password/', {
+            'uid': urlsafe_base64_encode(force_bytes(self.user.pk)),
+            'token': PasswordResetTokenGenerator().make_token(self.user),
+            'password': 'otra-clave-segura-456',
+            'password2': 'otra-clave-segura-456',
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get('/api/zonas/').status_code, status.HTTP_401_UNAUTHORIZED)
+        resp = APIClient().post('/auth/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertFalse(lista_revocacion.revocado(AccessToken.for_user(self.user)))
+
+    def test_otro_proceso_se_sincroniza_con_el_sello(self):
+        otro_proceso = ListaRevocacion()
+        self.assertFalse(otro_proceso.revocado(self.acceso))
+
+        lista_revocacion.revocar_token(self.acceso, self.user.pk)
+
+        self.assertTrue(otro_proceso.revocado(self.acceso))
+
+    def test_otra_maquina_se_sincroniza_con_la_cache(self):
+        # Otra máquina: su propio archivo de sello, la misma caché compartida
+        otro_sello = self.sello.with_name('otro_sello')
+        otra_maquina = ListaRevocacion()
+        with self.settings(REVOCACION_TOKENS={'ARCHIVO_SELLO': otro_sello, 'INTERVALO_SINCRONIZACION': 0}):
+            self.assertFalse(otra_maquina.revocado(self.acceso))
+
+        lista_revocacion.revocar_token(self.acceso, self.user.pk)
+
+        with self.settings(REVOCACION_TOKENS={'ARCHIVO_SELLO': otro_sello, 'INTERVALO_SINCRONIZACION': 0}):
+            self.assertTrue(otra_maquina.revocado(self.acceso))
+        self.assertFalse(otro_sello.exists())
+
+    def test_consulta_sin_e_s_dentro_del_intervalo(self):
+        lista_revocacion.revocar_token(AccessToken.for_user(self.user), self.user.pk)
+        with self.settings(REVOCACION_TOKENS={'ARCHIVO_SELLO': self.sello, 'INTERVALO_SINCRONIZACION': 60}):
+            lista_revocacion.revocado(self.acceso)
+            with self.assertNumQueries(0), mock.patch.object(lista_revocacion, '_leer_sello') as leer_sello:
+                for _ in range(1000):
+                    self.assertFalse(lista_revocacion.revocado(self.acceso))
+
+        leer_sello.assert_not_called()
+
+    def test_purga_y_recarga_descartan_lo_expirado(self):
+        vencido = timezone.now() - timedelta(minutes=1)
+        TokenRevocado.objects.create(jti='vencido', expira=vencido)
+        RevocacionUsuario.objects.create(usuario=self.user, emitidos_antes=vencido, expira=vencido)
+
+        lista_revocacion.sincronizar(forzar=True)
+        self.assertFalse(lista_revocacion.revocado({'jti': 'vencido', 'user_id': self.user.pk, 'iat': 0}))
+
+        self.assertEqual(purgar_revocaciones_expiradas(), 2)
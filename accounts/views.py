@@ -2,6 +2,10 @@ from django.shortcuts import render
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
@@ -12,8 +16,11 @@ from django.utils.encoding import force_str
 from .serializers import (
     PasswordResetRequestSerializer,
     RegisterSerializer,
-    SetNewPasswordSerializer
+    SetNewPasswordSerializer,
+    LogoutSerializer
 )
+from .revocacion import lista_revocacion
+from config.authentication import CachedJWTAuthentication
 
 
 # Create your views here.
@@ -21,6 +28,7 @@ from .serializers import (
 
 class PasswordResetRequestView(generics.GenericAPIView):
     serializer_class = PasswordResetRequestSerializer
+    permission_classes = [AllowAny]
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -31,12 +39,14 @@ class PasswordResetRequestView(generics.GenericAPIView):
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
+    permission_classes = [AllowAny]
 
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 
 class SetNewPasswordView(generics.GenericAPIView):
     serializer_class = SetNewPasswordSerializer
+    permission_classes = [AllowAny]
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -54,5 +64,38 @@ class SetNewPasswordView(generics.GenericAPIView):
 
         user.set_password(password)
         user.save()
+        # Los tokens emitidos con la contraseña anterior dejan de ser válidos
+        lista_revocacion.revocar_usuario(user.pk)
 
         return Response({"message": "Contraseña cambiada correctamente"})
+
+
+class LogoutView(generics.GenericAPIView):
+    """
+    Cierra la sesión revocando el token de acceso usado y, si se envía, el
+    refresh token. Con `todos` se revocan todos los tokens del usuario.
+    """
+    serializer_class = LogoutSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if serializer.validated_data['todos']:
+            lista_revocacion.revocar_usuario(request.user.pk)
+            return Response({"message": "Se cerraron todas las sesiones"})
+
+        refresh = serializer.validated_data.get('refresh')
+        if refresh:
+            try:
+                refresh = RefreshToken(refresh)
+            except TokenError as exc:
+                return Response({"error": str(exc)}, status=400)
+            if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                return Response({"error": "El refresh token no pertenece al usuario"}, status=400)
+            lista_revocacion.revocar_token(refresh, request.user.pk)
+
+        lista_revocacion.revocar_token(request.auth, request.user.pk)
+        return Response({"message": "Sesión cerrada"})
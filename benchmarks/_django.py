@@ -0,0 +1,23 @@
+"""Inicialización de Django para los scripts de benchmarks.
+
+Los scripts se ejecutan desde la raíz del proyecto, por ejemplo::
+
+    python benchmarks/bench_decisiones.py
+"""
+import os
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def configurar():
+    """Añade la raíz del proyecto al path e inicializa Django"""
+    if str(RAIZ) not in sys.path:
+        sys.path.insert(0, str(RAIZ))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    # Un solo proceso: la caché local basta para los snapshots y los ETag
+    os.environ.setdefault('CACHE_COMPARTIDA', 'True')
+
+    import django
+    django.setup()
@@ -0,0 +1,177 @@
+"""Prueba de carga: capacidad concurrente por proceso, WSGI frente a ASGI.
+
+Envía las mismas peticiones autenticadas a las estadísticas de un sensor
+por dos caminos dentro de un único proceso:
+
+- WSGI: ``config.wsgi`` (vista sync) con un pool de ``--hilos`` hilos, como
+  un worker gthread de gunicorn.
+- ASGI: ``config.asgi`` (vista async ``/api/async/...``) con hasta
+  ``--concurrencia`` peticiones en vuelo en el event loop, como un worker
+  de uvicorn.
+
+Para que el resultado refleje una base de datos remota se añade a cada
+consulta una latencia fija (``--latencia-ms``). Se usa una base de datos de
+prueba temporal, que se elimina al terminar.
+
+    python benchmarks/bench_async.py --peticiones 400 --hilos 4 --concurrencia 64
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from _django import configurar
+
+configurar()
+
+from django.db import connection  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+
+def agregar_latencia(segundos):
+    """Añade `segundos` de espera a cada consulta de todas las conexiones nuevas"""
+    def retardo(execute, sql, params, many, context):
+        time.sleep(segundos)
+        return execute(sql, params, many, context)
+
+    def al_conectar(sender, connection, **kwargs):
+        # Al principio de la lista: los execute_wrapper() activos se retiran con pop()
+        if retardo not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, retardo)
+
+    connection_created.connect(al_conectar, weak=False)
+
+
+def preparar_datos(lecturas):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import AccessToken
+    from sensores.models import Sensor, Lectura
+
+    usuario = User.objects.create_user(username='bench', password='clave-segura-123')
+    sensor = Sensor.objects.create(nombre='Sensor bench', tipo='HUMEDAD')
+    ahora = timezone.now()
+    Lectura.objects.bulk_create([
+        Lectura(sensor=sensor, humedad=20 + indice % 60, fecha_hora=ahora - timezone.timedelta(minutes=indice))
+        for indice in range(lecturas)
+    ])
+    return sensor.id, f'Bearer {AccessToken.for_user(usuario)}'
+
+
+def peticion_wsgi(aplicacion, ruta, token):
+    environ = {'PATH_INFO': ruta, 'HTTP_AUTHORIZATION': token, 'HTTP_HOST': 'testserver'}
+    setup_testing_defaults(environ)
+    estado = []
+    cuerpo = aplicacion(environ, lambda status, headers, exc_info=None: estado.append(status))
+    try:
+        b''.join(cuerpo)
+    finally:
+        cuerpo.close()
+    return int(estado[0].split()[0])
+
+
+async def peticion_asgi(aplicacion, ruta, token):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': ruta, 'raw_path': ruta.encode(),
+        'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', token.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    cuerpo_enviado = False
+    estado = []
+
+    async def receive():
+        nonlocal cuerpo_enviado
+        if not cuerpo_enviado:
+            cuerpo_enviado = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # El cliente no se desconecta; Django cancela esta espera al responder
+        await asyncio.Event().wait()
+
+    async def send(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            estado.append(mensaje['status'])
+
+    await aplicacion(scope, receive, send)
+    return estado[0]
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    estado = funcion()
+    return estado, time.perf_counter() - inicio
+
+
+def carga_wsgi(ruta, token, peticiones, hilos):
+    from config.wsgi import application
+
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        inicio = time.perf_counter()
+        resultados = list(ejecutor.map(
+            lambda _: cronometrar(lambda: peticion_wsgi(application, ruta, token)), range(peticiones)
+        ))
+    return resultados, time.perf_counter() - inicio
+
+
+async def carga_asgi(ruta, token, peticiones, concurrencia):
+    from config.asgi import application
+
+    limite = asyncio.Semaphore(concurrencia)
+
+    async def una():
+        async with limite:
+            inicio = time.perf_counter()
+            estado = await peticion_asgi(application, ruta, token)
+            return estado, time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(una() for _ in range(peticiones)))
+    return resultados, time.perf_counter() - inicio
+
+
+def informar(nombre, resultados, total):
+    estados = {estado for estado, _ in resultados}
+    latencias = sorted(duracion * 1000 for _, duracion in resultados)
+    p95 = latencias[int(len(latencias) * 0.95) - 1]
+    print(
+        f'{nombre:>5}: {len(resultados) / total:7.1f} pet/s  '
+        f'p50={statistics.median(latencias):.1f} ms  p95={p95:.1f} ms  estados={sorted(estados)}'
+    )
+    return len(resultados) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--peticiones', type=int, default=400)
+    parser.add_argument('--hilos', type=int, default=4, help='Hilos del worker WSGI')
+    parser.add_argument('--concurrencia', type=int, default=64, help='Peticiones en vuelo en el worker ASGI')
+    parser.add_argument('--latencia-ms', type=float, default=20.0, help='Latencia añadida a cada consulta')
+    parser.add_argument('--lecturas', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        sensor_id, token = preparar_datos(args.lecturas)
+        agregar_latencia(args.latencia_ms / 1000)
+
+        print(f'peticiones={args.peticiones} latencia por consulta={args.latencia_ms} ms')
+        resultados, total = carga_wsgi(f'/api/sensores/{sensor_id}/estadisticas/', token, args.peticiones, args.hilos)
+        wsgi = informar('wsgi', resultados, total)
+        resultados, total = asyncio.run(carga_asgi(
+            f'/api/async/sensores/{sensor_id}/estadisticas/', token, args.peticiones, args.concurrencia
+        ))
+        asgi = informar('asgi', resultados, total)
+        print(f'capacidad ASGI/WSGI por proceso: x{asgi / wsgi:.1f}')
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
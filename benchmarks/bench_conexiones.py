@@ -0,0 +1,143 @@
+"""Benchmark de latencia por petición según la reutilización de conexiones.
+
+Envía las mismas peticiones autenticadas (``GET /api/zonas/``) por
+``config.wsgi`` desde ``--hilos`` hilos, como un worker gthread, en tres
+modos:
+
+- nueva: una conexión por petición (CONN_MAX_AGE = 0, el comportamiento
+  por defecto).
+- persistente: CONN_MAX_AGE = 600 con CONN_HEALTH_CHECKS.
+- pool: backend ``config.backends.mysql`` (config/pool.py).
+
+Necesita el MySQL configurado en .env (crea y elimina una base de datos de
+prueba). ``--latencia-conexion-ms`` añade una espera a cada conexión física
+nueva para simular un servidor remoto (TLS, red entre zonas...).
+
+    python benchmarks/bench_conexiones.py --peticiones 500 --hilos 8
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from _django import configurar
+
+configurar()
+
+from django.db import connection, connections  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+from config.pool import cerrar_pools, metricas_pools  # noqa: E402
+
+MODOS = {
+    'nueva': {'ENGINE': 'django.db.backends.mysql', 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistente': {'ENGINE': 'django.db.backends.mysql', 'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+    'pool': {'ENGINE': 'config.backends.mysql', 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+}
+
+
+def agregar_latencia_conexion(segundos):
+    """Añade `segundos` de espera a cada conexión física nueva a MySQL"""
+    from django.db.backends.mysql import base
+
+    conectar = base.Database.connect
+
+    def conectar_con_retardo(*args, **kwargs):
+        time.sleep(segundos)
+        return conectar(*args, **kwargs)
+
+    base.Database.connect = conectar_con_retardo
+
+
+def preparar_datos(zonas):
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import AccessToken
+    from zonas_riego.models import Zona
+
+    usuario = User.objects.create_user(username='bench', password='clave-segura-123')
+    Zona.objects.bulk_create([
+        Zona(nombre=f'Zona bench {indice}', area_m2=100, capacidad_agua_litros=5000)
+        for indice in range(zonas)
+    ])
+    return f'Bearer {AccessToken.for_user(usuario)}'
+
+
+def peticion_wsgi(aplicacion, ruta, token):
+    environ = {'PATH_INFO': ruta, 'HTTP_AUTHORIZATION': token, 'HTTP_HOST': 'testserver'}
+    setup_testing_defaults(environ)
+    estado = []
+    inicio = time.perf_counter()
+    cuerpo = aplicacion(environ, lambda status, headers, exc_info=None: estado.append(status))
+    try:
+        b''.join(cuerpo)
+    finally:
+        # close() emite request_finished: ahí Django cierra o devuelve la conexión
+        cuerpo.close()
+    return int(estado[0].split()[0]), time.perf_counter() - inicio
+
+
+def medir_modo(ruta, token, peticiones, hilos):
+    from config.wsgi import application
+
+    # Hilos nuevos en cada modo: cada uno crea su DatabaseWrapper con el ENGINE vigente
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        inicio = time.perf_counter()
+        resultados = list(ejecutor.map(lambda _: peticion_wsgi(application, ruta, token), range(peticiones)))
+        total = time.perf_counter() - inicio
+        # Cierra las conexiones persistentes de cada hilo antes del siguiente modo
+        list(ejecutor.map(lambda _: connections.close_all(), range(hilos)))
+    return resultados, total
+
+
+def informar(nombre, resultados, total):
+    estados = {estado for estado, _ in resultados}
+    latencias = sorted(duracion * 1000 for _, duracion in resultados)
+    p95 = latencias[int(len(latencias) * 0.95) - 1]
+    print(
+        f'{nombre:>11}: {len(resultados) / total:7.1f} pet/s  '
+        f'p50={statistics.median(latencias):.2f} ms  p95={p95:.2f} ms  estados={sorted(estados)}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--peticiones', type=int, default=500)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--zonas', type=int, default=20)
+    parser.add_argument('--latencia-conexion-ms', type=float, default=0.0)
+    parser.add_argument('--modos', default=','.join(MODOS), help='Modos a medir, separados por comas')
+    args = parser.parse_args()
+
+    if connection.vendor != 'mysql':
+        raise SystemExit('Este benchmark necesita DB_ENGINE=django.db.backends.mysql')
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        token = preparar_datos(args.zonas)
+        if args.latencia_conexion_ms:
+            agregar_latencia_conexion(args.latencia_conexion_ms / 1000)
+
+        print(f'peticiones={args.peticiones} hilos={args.hilos} latencia de conexión={args.latencia_conexion_ms} ms')
+        for nombre in args.modos.split(','):
+            # settings_dict de cada DatabaseWrapper es este mismo diccionario
+            connections.settings['default'].update(MODOS[nombre])
+            resultados, total = medir_modo('/api/zonas/', token, args.peticiones, args.hilos)
+            informar(nombre, resultados, total)
+            if nombre == 'pool':
+                metricas = metricas_pools()['default']
+                print(
+                    f'{"":>11}  pool: creadas={metricas["creadas"]} reutilizadas={metricas["reutilizadas"]} '
+                    f'esperas={metricas["esperas"]} espera máxima={metricas["espera_maxima_ms"]:.1f} ms'
+                )
+    finally:
+        cerrar_pools()
+        connections.settings['default'].update(MODOS['nueva'])
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
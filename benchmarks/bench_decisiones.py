@@ -0,0 +1,74 @@
+"""Benchmark de un tick del motor de decisiones de riego.
+
+Mide evaluar_tick (la pasada vectorizada, sin base de datos) sobre datos
+sintéticos con una programación por zona que empieza dentro de la ventana y
+varias lecturas recientes por zona. El objetivo es < 100 ms para 5.000 zonas.
+
+    python benchmarks/bench_decisiones.py --zonas 5000 --lecturas 12
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import time as hora, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from _django import configurar
+
+configurar()
+
+from django.utils import timezone  # noqa: E402
+
+from programaciones.decisiones import DECISIONES, evaluar_tick  # noqa: E402
+
+OBJETIVO_MS = 100
+
+
+def datos_sinteticos(n_zonas, lecturas_por_zona, ahora, semilla=0):
+    """Filas con el mismo formato que devuelve cargar_datos_tick"""
+    aleatorio = random.Random(semilla)
+    fecha = ahora.date()
+    programaciones = []
+    lecturas = []
+    for zona_id in range(1, n_zonas + 1):
+        minuto = aleatorio.randrange(60)
+        inicio = ahora + timedelta(minutes=minuto)
+        programaciones.append((
+            zona_id, zona_id, hora(inicio.hour, inicio.minute), aleatorio.randint(10, 60),
+            Decimal('10.00'), Decimal('5000.00'), 'diaria', [], fecha - timedelta(days=30), None
+        ))
+        humedad = aleatorio.uniform(15, 85)
+        for paso in range(lecturas_por_zona, 0, -1):
+            # Las fechas llegan de la base de datos en UTC
+            fecha_hora = (ahora - timedelta(minutes=30 * paso)).astimezone(dt_timezone.utc)
+            lecturas.append((zona_id, fecha_hora, round(humedad, 2)))
+            humedad += aleatorio.uniform(-1.5, 0.5)
+    return programaciones, lecturas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--zonas', type=int, default=5000)
+    parser.add_argument('--lecturas', type=int, default=12, help='Lecturas por zona')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    ahora = timezone.localtime().replace(hour=6, minute=0, second=0, microsecond=0)
+    programaciones, lecturas = datos_sinteticos(args.zonas, args.lecturas, ahora)
+
+    tiempos = []
+    for _ in range(args.repeticiones):
+        inicio = time.perf_counter()
+        resultado = evaluar_tick(programaciones, lecturas, ahora)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    conteo = {codigo: int((resultado['decision'] == indice).sum()) for indice, codigo in enumerate(DECISIONES)}
+    mediana = statistics.median(tiempos)
+    print(f'zonas={args.zonas} lecturas={len(lecturas)} ocurrencias={resultado["decision"].size}')
+    print(f'decisiones: {conteo}')
+    print(f'min={min(tiempos):.1f} ms  mediana={mediana:.1f} ms  max={max(tiempos):.1f} ms')
+    print('OK' if mediana < OBJETIVO_MS else f'LENTO: objetivo {OBJETIVO_MS} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark del cálculo de requerimientos hídricos de una temporada.
+
+Mide requerimiento_litros y duraciones_sugeridas (sin base de datos) con una
+programación por zona. El objetivo es < 500 ms para 5.000 zonas y 180 días.
+
+    python benchmarks/bench_evapotranspiracion.py --zonas 5000 --dias 180
+"""
+import argparse
+import statistics
+import time
+
+from _django import configurar
+
+configurar()
+
+import numpy as np  # noqa: E402
+
+from zonas_riego.evapotranspiracion import duraciones_sugeridas, requerimiento_litros  # noqa: E402
+
+OBJETIVO_MS = 500
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--zonas', type=int, default=5000)
+    parser.add_argument('--dias', type=int, default=180)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    et0 = rng.uniform(2, 7, args.dias)
+    lluvia = np.zeros(args.dias)
+    coeficientes = rng.uniform(0.6, 1.1, args.zonas)
+    area = rng.uniform(10, 500, args.zonas)
+
+    tiempos = []
+    for _ in range(args.repeticiones):
+        comienzo = time.perf_counter()
+        litros = requerimiento_litros(et0, lluvia, coeficientes, area, 0.85)
+        sugeridas = duraciones_sugeridas(
+            litros.sum(axis=1), np.arange(args.zonas), np.full(args.zonas, 90), np.full(args.zonas, 10.0),
+            np.full(args.zonas, 30.0), np.full(args.zonas, 50000.0)
+        )
+        tiempos.append((time.perf_counter() - comienzo) * 1000)
+
+    mediana = statistics.median(tiempos)
+    print(f'zonas={args.zonas} dias={args.dias} litros={litros.sum():.0f}')
+    print(f'duración sugerida media: {sugeridas.mean():.1f} min')
+    print(f'min={min(tiempos):.1f} ms  mediana={mediana:.1f} ms  max={max(tiempos):.1f} ms')
+    print('OK' if mediana < OBJETIVO_MS else f'LENTO: objetivo {OBJETIVO_MS} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark de serialización y renderizado de una página grande de lecturas.
+
+Compara, sobre la misma lista de instancias Lectura en memoria (sin base de
+datos), el camino de DRF (ListSerializer + JSONRenderer) con el rápido
+(ListaRapidaSerializer + JSONRapidoRenderer) y verifica que ambos producen
+exactamente los mismos bytes.
+
+    python benchmarks/bench_render.py --filas 10000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from _django import configurar
+
+configurar()
+
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.serializers import ListSerializer  # noqa: E402
+
+from config.renderers import JSONRapidoRenderer  # noqa: E402
+from sensores.models import Lectura  # noqa: E402
+from sensores.serializers import LecturaSerializer  # noqa: E402
+
+
+def lecturas_sinteticas(filas, semilla=0):
+    aleatorio = random.Random(semilla)
+    ahora = timezone.now()
+    return [
+        Lectura(
+            id=indice,
+            sensor_id=aleatorio.randint(1, 200),
+            humedad=Decimal(f'{aleatorio.uniform(0, 100):.2f}'),
+            fecha_hora=ahora - timedelta(minutes=indice),
+            nota='' if indice % 5 else 'Lectura manual',
+        )
+        for indice in range(1, filas + 1)
+    ]
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    lecturas = lecturas_sinteticas(args.filas)
+    caminos = {
+        'drf': lambda: JSONRenderer().render(ListSerializer(lecturas, child=LecturaSerializer()).data),
+        'rapido': lambda: JSONRapidoRenderer().render(LecturaSerializer(lecturas, many=True).data),
+    }
+
+    resultados = {}
+    for nombre, funcion in caminos.items():
+        mediana, contenido = medir(funcion, args.repeticiones)
+        resultados[nombre] = (mediana, contenido)
+        print(
+            f'{nombre:>6}: mediana={mediana * 1000:.1f} ms  '
+            f'{args.filas / mediana:,.0f} filas/s  {len(contenido) / 1024:.0f} KiB'
+        )
+
+    if resultados['drf'][1] != resultados['rapido'][1]:
+        raise SystemExit('ERROR: las salidas difieren')
+    print(f'aceleración x{resultados["drf"][0] / resultados["rapido"][0]:.1f} (salidas idénticas)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark del simulador de balance hídrico.
+
+Mide expandir_programaciones y simular (sin base de datos) sobre programaciones
+sintéticas repartidas entre las zonas. El objetivo es < 1 s para 1.000 zonas
+y 30 días.
+
+    python benchmarks/bench_simulacion.py --zonas 1000 --dias 30
+"""
+import argparse
+import statistics
+import time
+from datetime import date, time as hora
+
+from _django import configurar
+
+configurar()
+
+import numpy as np  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from zonas_riego.simulacion import expandir_programaciones, simular  # noqa: E402
+
+OBJETIVO_MS = 1000
+FRECUENCIAS = ['diaria', 'semanal', 'quincenal', 'mensual']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--zonas', type=int, default=1000)
+    parser.add_argument('--dias', type=int, default=30)
+    parser.add_argument('--programaciones', type=int, default=5000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    programaciones = [
+        (indice % args.zonas, hora(int(rng.integers(0, 24)), 30), 45, 10.0,
+         FRECUENCIAS[indice % 4], [0, 3], date(2025, 1, 1), None)
+        for indice in range(args.programaciones)
+    ]
+    zona_indices = {indice: indice for indice in range(args.zonas)}
+    inicio = timezone.localtime().replace(minute=0, second=0, microsecond=0)
+    area = rng.uniform(50, 500, args.zonas)
+
+    tiempos = []
+    for _ in range(args.repeticiones):
+        comienzo = time.perf_counter()
+        litros = expandir_programaciones(programaciones, zona_indices, inicio, args.dias * 24)
+        resultado = simular(
+            np.full(args.zonas, 50.0), area, np.full(args.zonas, 0.9), np.ones(args.zonas),
+            litros, 30, inicio.hour
+        )
+        tiempos.append((time.perf_counter() - comienzo) * 1000)
+
+    mediana = statistics.median(tiempos)
+    print(f'zonas={args.zonas} horas={args.dias * 24} programaciones={len(programaciones)}')
+    print(f'zonas bajo el umbral: {int((resultado["cruce_umbral"] >= 0).sum())}')
+    print(f'min={min(tiempos):.1f} ms  mediana={mediana:.1f} ms  max={max(tiempos):.1f} ms')
+    print('OK' if mediana < OBJETIVO_MS else f'LENTO: objetivo {OBJETIVO_MS} ms')
+
+
+if __name__ == '__main__':
+    main()
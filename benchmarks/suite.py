@@ -0,0 +1,319 @@
+"""Suite de benchmarks de los endpoints de la API con líneas base.
+
+Recorre los endpoints de zonas, programaciones, sensores, lecturas,
+medidores, consumos y autenticación (login y refresh) con el cliente de
+pruebas de Django, que pasa por todo el stack de middlewares, sobre datos
+de ``generar_datos`` de varios tamaños (``--tamanos``, en zonas). Por
+escenario registra la latencia p50/p95/p99, las consultas SQL por petición
+y, en los de ingesta, las filas por segundo.
+
+Usa la base de datos configurada (SQLite o el MySQL de .env) creando una
+base de prueba temporal. Los resultados se comparan con una línea base en
+JSON (por defecto ``benchmarks/baselines/<motor>.json``, en el repositorio
+la de SQLite) y el script termina con código 1 si algún escenario responde
+con un código de estado fuera de los esperados (haya o no línea base) o si
+empeora frente a la base:
+
+- latencia p50 o p95 más de ``--umbral`` (20 %) y más de
+  ``--tolerancia-ms`` por encima de la base,
+- más consultas por petición que la base (se comparan exactas),
+- menos filas/s de ingesta que la base menos ``--umbral``,
+- un código de estado distinto.
+
+Flujo habitual: guardar la base en la rama principal y comparar en la rama
+con cambios, en la misma máquina::
+
+    python benchmarks/suite.py --tamanos 10,100 --guardar
+    python benchmarks/suite.py --tamanos 10,100
+"""
+import argparse
+import fnmatch
+import io
+import json
+import platform
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+from _django import RAIZ, configurar
+
+configurar()
+
+import numpy as np  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from config.instrumentation import RegistroConsultas  # noqa: E402
+
+DIRECTORIO_BASES = RAIZ / 'benchmarks' / 'baselines'
+CLAVE = 'clave-segura-123'
+
+
+@dataclass
+class Escenario:
+    """Una petición que se repite; `ruta` y `cuerpo` reciben el contexto y el número de petición"""
+    nombre: str
+    ruta: object
+    metodo: str = 'get'
+    cuerpo: object = None
+    # Filas insertadas por petición, para los escenarios de ingesta
+    filas: int = 0
+    # Tope de peticiones para los escenarios caros (hash de contraseña)
+    max_peticiones: int = None
+    autenticado: bool = True
+    estados: set = field(default_factory=lambda: {200})
+
+
+def _programaciones_importar(contexto, indice, filas=100):
+    return [
+        {
+            'zona': contexto['zona'], 'nombre': f'Importada {indice}-{fila}', 'hora_inicio': '06:00',
+            'duracion_minutos': 10, 'frecuencia': 'diaria', 'fecha_inicio': '2025-01-01',
+            'caudal_litros_minuto': 1,
+        }
+        for fila in range(filas)
+    ]
+
+
+ESCENARIOS = [
+    Escenario('auth:login', '/auth/login/', 'post', lambda c, i: {'username': 'bench', 'password': CLAVE},
+              max_peticiones=10, autenticado=False),
+    Escenario('auth:refresh', '/auth/refresh/', 'post', lambda c, i: {'refresh': c['refresh']()}, autenticado=False),
+    Escenario('zonas:listar', lambda c, i: '/api/zonas/'),
+    Escenario('zonas:detalle', lambda c, i: f'/api/zonas/{c["zona"]}/'),
+    Escenario('zonas:resumen', lambda c, i: f'/api/zonas/{c["zona"]}/resumen/'),
+    Escenario('zonas:estadisticas', lambda c, i: '/api/zonas/estadisticas/'),
+    Escenario('zonas:tablero', lambda c, i: '/api/zonas/tablero/'),
+    Escenario('programaciones:listar', lambda c, i: '/api/programaciones/'),
+    Escenario('programaciones:detalle', lambda c, i: f'/api/programaciones/{c["programacion"]}/'),
+    Escenario('programaciones:vigentes', lambda c, i: '/api/programaciones/vigentes/'),
+    Escenario('programaciones:estadisticas', lambda c, i: '/api/programaciones/estadisticas/'),
+    Escenario('programaciones:importar', lambda c, i: '/api/programaciones/importar/', 'post',
+              _programaciones_importar, filas=100, estados={201}),
+    Escenario('sensores:listar', lambda c, i: '/api/sensores/'),
+    Escenario('sensores:detalle', lambda c, i: f'/api/sensores/{c["sensor"]}/'),
+    Escenario('sensores:estadisticas', lambda c, i: f'/api/sensores/{c["sensor"]}/estadisticas/'),
+    Escenario('lecturas:listar', lambda c, i: '/api/lecturas/'),
+    Escenario('lecturas:por_sensor', lambda c, i: f'/api/lecturas/?sensor={c["sensor"]}'),
+    Escenario('lecturas:crear', lambda c, i: '/api/lecturas/', 'post', lambda c, i: {
+        'sensor': c['sensor'], 'humedad': 40 + i % 20,
+        'fecha_hora': (c['ahora'] - timedelta(seconds=i)).isoformat(),
+    }, filas=1, estados={201}),
+    Escenario('medidores:listar', lambda c, i: '/api/medidores/'),
+    Escenario('medidores:total_consumo', lambda c, i: f'/api/medidores/{c["medidor"]}/total_consumo/'),
+    Escenario('consumos:listar', lambda c, i: '/api/consumos/'),
+    Escenario('consumos:crear', lambda c, i: '/api/consumos/', 'post', lambda c, i: {
+        # Fechas anteriores a los datos generados: (medidor, fecha) es única
+        'medidor': c['medidor'], 'fecha': (date(2000, 1, 1) + timedelta(days=c['siguiente']())).isoformat(),
+        'volumen_m3': '1.50',
+    }, filas=1, estados={201}),
+]
+
+
+ESCENARIOS_POR_NOMBRE = {escenario.nombre: escenario for escenario in ESCENARIOS}
+
+
+def percentil(valores, p):
+    return float(np.percentile(valores, p)) if valores else 0.0
+
+
+def preparar_tamano(zonas, args):
+    """Regenera los datos para `zonas` zonas y devuelve el contexto de los escenarios"""
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from consumo_agua.models import Medidor
+    from programaciones.models import Programacion
+    from sensores.models import Sensor
+
+    call_command(
+        'generar_datos', zonas=zonas, dias=args.dias, intervalo=args.intervalo,
+        semilla=args.semilla, limpiar=True, stdout=io.StringIO(),
+    )
+    usuario, creado = User.objects.get_or_create(username='bench')
+    if creado:
+        usuario.set_password(CLAVE)
+        usuario.save()
+
+    sensor = Sensor.objects.filter(nombre__startswith='GEN Sensor ').order_by('id').first()
+    medidor = Medidor.objects.filter(numero_serie__startswith='GEN-MED-').order_by('id').first()
+    contador = iter(range(10 ** 9))
+    return {
+        'usuario': usuario,
+        'zona': sensor.zona_id,
+        'sensor': sensor.id,
+        'medidor': medidor.id,
+        'programacion': Programacion.objects.filter(zona_id=sensor.zona_id).order_by('id').first().id,
+        'ahora': timezone.now(),
+        'refresh': lambda: str(RefreshToken.for_user(usuario)),
+        'siguiente': lambda: next(contador),
+        'token': f'Bearer {RefreshToken.for_user(usuario).access_token}',
+    }
+
+
+def medir(escenario, contexto, args):
+    cliente = Client()
+    cabeceras = {'HTTP_AUTHORIZATION': contexto['token']} if escenario.autenticado else {}
+    peticiones = min(args.peticiones, escenario.max_peticiones or args.peticiones)
+    calentamiento = min(args.calentamiento, peticiones)
+
+    latencias, consultas, estados = [], [], set()
+    for indice in range(calentamiento + peticiones):
+        ruta = escenario.ruta if isinstance(escenario.ruta, str) else escenario.ruta(contexto, indice)
+        cuerpo = escenario.cuerpo(contexto, indice) if escenario.cuerpo else None
+        kwargs = {'data': json.dumps(cuerpo), 'content_type': 'application/json'} if cuerpo is not None else {}
+
+        with RegistroConsultas() as registro:
+            inicio = time.perf_counter()
+            respuesta = getattr(cliente, escenario.metodo)(ruta, **kwargs, **cabeceras)
+            duracion = time.perf_counter() - inicio
+        if indice < calentamiento:
+            continue
+        latencias.append(duracion * 1000)
+        consultas.append(registro.total)
+        estados.add(respuesta.status_code)
+
+    resultado = {
+        'peticiones': len(latencias),
+        'p50_ms': round(percentil(latencias, 50), 3),
+        'p95_ms': round(percentil(latencias, 95), 3),
+        'p99_ms': round(percentil(latencias, 99), 3),
+        'consultas': max(consultas),
+        'estados': sorted(estados),
+    }
+    if escenario.filas:
+        resultado['filas_s'] = round(escenario.filas * len(latencias) / (sum(latencias) / 1000), 1)
+    return resultado
+
+
+def ejecutar(args):
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    resultados = {}
+    try:
+        for tamano in args.tamanos:
+            contexto = preparar_tamano(tamano, args)
+            for escenario in ESCENARIOS:
+                clave = f'{tamano}/{escenario.nombre}'
+                if args.solo and not any(fnmatch.fnmatch(escenario.nombre, patron) for patron in args.solo):
+                    continue
+                resultados[clave] = medir(escenario, contexto, args)
+                informar(clave, resultados[clave], escenario)
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+    return resultados
+
+
+def informar(clave, resultado, escenario):
+    filas = f'  {resultado["filas_s"]:9.1f} filas/s' if 'filas_s' in resultado else ''
+    aviso = '' if set(resultado['estados']) <= escenario.estados else f'  estados={resultado["estados"]}'
+    print(
+        f'{clave:<36} p50={resultado["p50_ms"]:8.2f} p95={resultado["p95_ms"]:8.2f} '
+        f'p99={resultado["p99_ms"]:8.2f} ms  consultas={resultado["consultas"]:3d}{filas}{aviso}'
+    )
+
+
+def estados_inesperados(resultados):
+    """Escenarios que respondieron con códigos de estado fuera de `Escenario.estados`"""
+    errores = []
+    for clave, resultado in resultados.items():
+        esperados = ESCENARIOS_POR_NOMBRE[clave.split('/', 1)[1]].estados
+        if not set(resultado['estados']) <= esperados:
+            errores.append(f'{clave}: estados {resultado["estados"]}, se esperaba {sorted(esperados)}')
+    return errores
+
+
+def comparar(base, actual, umbral, tolerancia_ms):
+    """Lista de regresiones de `actual` frente a `base` (resultados por escenario)"""
+    regresiones = []
+    for clave, medido in actual.items():
+        referencia = base.get(clave)
+        if referencia is None:
+            continue
+        for metrica in ('p50_ms', 'p95_ms'):
+            limite = max(referencia[metrica] * (1 + umbral), referencia[metrica] + tolerancia_ms)
+            if medido[metrica] > limite:
+                regresiones.append(f'{clave}: {metrica} {referencia[metrica]:.2f} -> {medido[metrica]:.2f}')
+        if medido['consultas'] > referencia['consultas']:
+            regresiones.append(f'{clave}: consultas {referencia["consultas"]} -> {medido["consultas"]}')
+        if 'filas_s' in referencia and medido.get('filas_s', 0) < referencia['filas_s'] * (1 - umbral):
+            regresiones.append(f'{clave}: filas/s {referencia["filas_s"]:.1f} -> {medido.get("filas_s", 0):.1f}')
+        if medido['estados'] != referencia['estados']:
+            regresiones.append(f'{clave}: estados {referencia["estados"]} -> {medido["estados"]}')
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanos', default='10,100', help='Tamaños del conjunto de datos, en zonas')
+    parser.add_argument('--peticiones', type=int, default=50, help='Peticiones medidas por escenario')
+    parser.add_argument('--calentamiento', type=int, default=3, help='Peticiones previas que no se miden')
+    parser.add_argument('--dias', type=int, default=7, help='Días de lecturas y consumo generados')
+    parser.add_argument('--intervalo', type=int, default=60, help='Minutos entre lecturas generadas')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--solo', action='append', help='Patrón de escenarios a medir (p. ej. "lecturas:*")')
+    parser.add_argument('--base', type=Path, help='Archivo de la línea base (por defecto baselines/<motor>.json)')
+    parser.add_argument('--guardar', action='store_true', help='Guarda los resultados como nueva línea base')
+    parser.add_argument('--salida', type=Path, help='Guarda además los resultados en este archivo')
+    parser.add_argument('--umbral', type=float, default=0.2, help='Empeoramiento relativo tolerado (0.2 = 20 %%)')
+    parser.add_argument('--tolerancia-ms', type=float, default=2.0, help='Diferencia de latencia siempre tolerada')
+    args = parser.parse_args()
+    args.tamanos = [int(tamano) for tamano in args.tamanos.split(',')]
+
+    ruta_base = args.base or DIRECTORIO_BASES / f'{connection.vendor}.json'
+    print(f'motor={connection.vendor} tamaños={args.tamanos} peticiones={args.peticiones}')
+    resultados = ejecutar(args)
+    documento = {
+        'meta': {
+            'motor': connection.vendor,
+            'python': platform.python_version(),
+            'maquina': platform.node(),
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'peticiones': args.peticiones,
+            'dias': args.dias,
+            'intervalo': args.intervalo,
+            'semilla': args.semilla,
+        },
+        'resultados': resultados,
+    }
+    if args.salida:
+        args.salida.write_text(json.dumps(documento, indent=2, ensure_ascii=False))
+
+    errores = estados_inesperados(resultados)
+    for error in errores:
+        print(f'ERROR {error}')
+
+    if args.guardar:
+        if errores:
+            print('No se guarda la línea base: hay escenarios con estados inesperados')
+            return 1
+        ruta_base.parent.mkdir(parents=True, exist_ok=True)
+        if ruta_base.exists():
+            # Se conservan los escenarios que no se midieron esta vez (--solo, --tamanos)
+            anterior = json.loads(ruta_base.read_text())['resultados']
+            documento['resultados'] = {**anterior, **resultados}
+        ruta_base.write_text(json.dumps(documento, indent=2, ensure_ascii=False))
+        print(f'Línea base guardada en {ruta_base}')
+        return 0
+
+    if not ruta_base.exists():
+        print(f'No hay línea base en {ruta_base}: ejecute con --guardar para crearla')
+        return 1 if errores else 0
+    base = json.loads(ruta_base.read_text())
+    if base['meta'].get('peticiones') != args.peticiones:
+        print('Aviso: la línea base se midió con otro número de peticiones')
+    regresiones = comparar(base['resultados'], resultados, args.umbral, args.tolerancia_ms)
+    for regresion in regresiones:
+        print(f'REGRESIÓN {regresion}')
+    print(f'{len(regresiones)} regresiones frente a {ruta_base}')
+    return 1 if regresiones or errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
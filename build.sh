@@ -3,5 +3,8 @@
 set -o errexit
 
 pip install -r requirements.txt
+# Esquema OpenAPI pregenerado que sirve la documentación (config/esquema.py,
+# comando en config/management/commands/generar_esquema.py)
+python manage.py generar_esquema
 python manage.py collectstatic --noinput
 python manage.py migrate
@@ -0,0 +1,122 @@
+"""Soporte para las vistas asíncronas de lectura bajo ASGI.
+
+Las vistas async de las aplicaciones (``/api/async/...``) usan el ORM
+asíncrono de Django, de modo que una consulta lenta no ocupa un worker:
+bajo ASGI cada petición tiene su propio hilo para el SQL y el event loop
+sigue atendiendo otras peticiones.
+
+- vista_jwt_async: autentica con CachedJWTAuthentication.aauthenticate y
+  responde 401 con el mismo cuerpo que DRF.
+- paginar_async: paginación con el formato de PageNumberPagination.
+- respuesta_json: renderiza con JSONRapidoRenderer, igual que la API.
+- WhiteNoiseAsincronoMiddleware: WhiteNoise admite solo el modo síncrono y
+  obligaría a Django a ejecutar toda la cadena en un único hilo; esta
+  variante admite ambos modos.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .authentication import CachedJWTAuthentication
+from .renderers import JSONRapidoRenderer
+
+
+def respuesta_json(datos, status=200, headers=None):
+    return HttpResponse(
+        JSONRapidoRenderer().render(datos),
+        content_type='application/json',
+        status=status,
+        headers=headers,
+    )
+
+
+def _respuesta_error(exc):
+    detalle = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+    headers = None
+    if exc.status_code == 401:
+        headers = {'WWW-Authenticate': CachedJWTAuthentication().authenticate_header(None)}
+    return respuesta_json(detalle, status=exc.status_code, headers=headers)
+
+
+def vista_jwt_async(vista):
+    """Decorador para vistas async que exige un JWT válido (equivale a IsAuthenticated)"""
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        try:
+            resultado = await CachedJWTAuthentication().aauthenticate(request)
+            if resultado is None:
+                raise exceptions.NotAuthenticated()
+        except exceptions.APIException as exc:
+            return _respuesta_error(exc)
+
+        request.user, request.auth = resultado
+        return await vista(request, *args, **kwargs)
+    return envoltura
+
+
+async def paginar_async(request, queryset, serializer_class):
+    """
+    Página pedida (?page=) del queryset serializada con el formato de
+    PageNumberPagination: count, next, previous y results. Devuelve la
+    respuesta completa (404 si la página no existe).
+    """
+    tamano = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 10
+    try:
+        pagina = int(request.GET.get('page', 1))
+    except ValueError:
+        pagina = 0
+    total = await queryset.acount()
+    paginas = max(1, -(-total // tamano))
+    if not 1 <= pagina <= paginas:
+        return respuesta_json({'detail': 'Página inválida.'}, status=404)
+
+    inicio = (pagina - 1) * tamano
+    objetos = [objeto async for objeto in queryset[inicio:inicio + tamano]]
+
+    url = request.build_absolute_uri()
+    siguiente = replace_query_param(url, 'page', pagina + 1) if pagina < paginas else None
+    if pagina <= 1:
+        anterior = None
+    elif pagina == 2:
+        anterior = remove_query_param(url, 'page')
+    else:
+        anterior = replace_query_param(url, 'page', pagina - 1)
+
+    return respuesta_json({
+        'count': total,
+        'next': siguiente,
+        'previous': anterior,
+        'results': serializer_class(objetos, many=True).data,
+    })
+
+
+class WhiteNoiseAsincronoMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware que no obliga a ejecutar la cadena en modo síncrono"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _archivo_estatico(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        archivo = self._archivo_estatico(request)
+        if archivo is not None:
+            return self.serve(archivo, request)
+        return await self.get_response(request)
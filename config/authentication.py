@@ -0,0 +1,253 @@
+"""Autenticación JWT con caché del usuario resuelto.
+
+JWTAuthentication carga el usuario del token desde la base de datos en cada
+petición. CachedJWTAuthentication lo guarda en dos niveles:
+
+- Un LRU en memoria del proceso con un TTL corto, que no hace ninguna E/S.
+- Opcionalmente, la caché compartida de Django (AUTENTICACION_CACHE
+  ['COMPARTIDA']), con claves que incluyen una versión por usuario. Ahí
+  solo se guardan los campos que usa la autenticación, nunca el hash de la
+  contraseña; el usuario se reconstruye con el resto de campos diferidos.
+
+La versión de cada usuario se incrementa con post_save/post_delete del
+modelo de usuario (cambio de contraseña, desactivación, SetNewPasswordView),
+lo que invalida de inmediato la caché compartida y la entrada local del
+proceso que hizo el cambio. En los demás procesos la entrada local caduca a
+lo sumo tras el TTL.
+
+Además, los tokens revocados (cierre de sesión, cambio de contraseña) se
+rechazan consultando la lista en memoria de accounts.revocacion.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from accounts.revocacion import lista_revocacion
+
+from .metricas import registrar_cache
+
+AUTENTICACION_CACHE_POR_DEFECTO = {
+    'ACTIVA': True,
+    'TTL': 30,
+    'MAX_ENTRADAS': 1024,
+    'COMPARTIDA': False,
+    'TTL_COMPARTIDA': 300,
+}
+
+
+def configuracion_autenticacion():
+    """Configuración efectiva de AUTENTICACION_CACHE con sus valores por defecto"""
+    return {**AUTENTICACION_CACHE_POR_DEFECTO, **getattr(settings, 'AUTENTICACION_CACHE', {})}
+
+
+# Campos del usuario que se guardan en la caché compartida (además de la clave primaria)
+CAMPOS_COMPARTIDOS = ('username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _clave_version(user_id):
+    return f'auth:usuario:{user_id}:version'
+
+
+def version_usuario(user_id):
+    """Versión actual de un usuario en la caché compartida"""
+    clave = _clave_version(user_id)
+    version = cache.get(clave)
+    if version is None:
+        # Se parte de un valor único para no reutilizar versiones tras un desalojo
+        cache.add(clave, time.time_ns(), timeout=None)
+        version = cache.get(clave)
+    return version
+
+
+class CacheUsuarios:
+    """LRU en memoria con TTL y, opcionalmente, respaldo en la caché compartida"""
+
+    def __init__(self):
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _clave_compartida(self, user_id):
+        return f'auth:usuario:{user_id}:{version_usuario(user_id)}'
+
+    def _a_compartido(self, usuario):
+        """Campos del usuario que viajan a la caché compartida, sin la contraseña"""
+        opciones = usuario._meta
+        datos = {opciones.pk.attname: usuario.pk}
+        for campo in CAMPOS_COMPARTIDOS:
+            if hasattr(usuario, campo):
+                datos[campo] = getattr(usuario, campo)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            datos['huella_contrasena'] = get_md5_hash_password(usuario.password)
+        return datos
+
+    def _desde_compartido(self, datos):
+        """Usuario con los campos de la caché compartida; el resto se carga si se pide"""
+        datos = dict(datos)
+        huella = datos.pop('huella_contrasena', None)
+        modelo = get_user_model()
+        # from_db espera los valores en el orden de los campos del modelo
+        campos = [campo.attname for campo in modelo._meta.concrete_fields if campo.attname in datos]
+        usuario = modelo.from_db(None, campos, [datos[campo] for campo in campos])
+        if huella is not None:
+            usuario.huella_contrasena = huella
+        return usuario
+
+    def _guardar_local(self, user_id, usuario, configuracion):
+        with self._lock:
+            self._entradas[user_id] = (usuario, time.monotonic() + configuracion['TTL'])
+            self._entradas.move_to_end(user_id)
+            while len(self._entradas) > configuracion['MAX_ENTRADAS']:
+                self._entradas.popitem(last=False)
+
+    def obtener(self, user_id):
+        """Usuario cacheado o None"""
+        configuracion = configuracion_autenticacion()
+        with self._lock:
+            entrada = self._entradas.get(user_id)
+            if entrada is not None:
+                if entrada[1] > time.monotonic():
+                    self._entradas.move_to_end(user_id)
+                    registrar_cache('usuario_jwt', True)
+                    return entrada[0]
+                del self._entradas[user_id]
+
+        if configuracion['COMPARTIDA']:
+            datos = cache.get(self._clave_compartida(user_id))
+            if datos is not None:
+                usuario = self._desde_compartido(datos)
+                self._guardar_local(user_id, usuario, configuracion)
+                registrar_cache('usuario_jwt', True)
+                return usuario
+        registrar_cache('usuario_jwt', False)
+        return None
+
+    def guardar(self, user_id, usuario):
+        configuracion = configuracion_autenticacion()
+        self._guardar_local(user_id, usuario, configuracion)
+        if configuracion['COMPARTIDA']:
+            cache.set(self._clave_compartida(user_id), self._a_compartido(usuario), configuracion['TTL_COMPARTIDA'])
+
+    def invalidar(self, user_id):
+        with self._lock:
+            self._entradas.pop(user_id, None)
+        try:
+            cache.incr(_clave_version(user_id))
+        except ValueError:
+            cache.set(_clave_version(user_id), time.time_ns(), timeout=None)
+
+    def limpiar(self):
+        """Vacía el nivel en memoria de este proceso"""
+        with self._lock:
+            self._entradas.clear()
+
+
+usuarios_cacheados = CacheUsuarios()
+
+
+def _invalidar_usuario(sender, instance, **kwargs):
+    usuarios_cacheados.invalidar(str(getattr(instance, api_settings.USER_ID_FIELD)))
+
+
+def registrar_invalidacion_usuarios():
+    """Conecta las escrituras del modelo de usuario con la invalidación de la caché"""
+    modelo = get_user_model()
+    post_save.connect(_invalidar_usuario, sender=modelo, dispatch_uid='invalidacion:usuarios')
+    post_delete.connect(_invalidar_usuario, sender=modelo, dispatch_uid='invalidacion:usuarios')
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que resuelve el usuario del token desde la caché y
+    solo consulta la base de datos en caso de fallo.
+
+    Las comprobaciones de usuario activo y de token revocado por cambio de
+    contraseña se aplican siempre, también sobre el usuario cacheado.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if lista_revocacion.revocado(token):
+            raise AuthenticationFailed(_('El token fue revocado.'), code='token_revoked')
+        return token
+
+    def _id_usuario(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from exc
+
+    def get_user(self, validated_token):
+        if not configuracion_autenticacion()['ACTIVA']:
+            return super().get_user(validated_token)
+
+        user_id = self._id_usuario(validated_token)
+        clave = str(user_id)
+        usuario = usuarios_cacheados.obtener(clave)
+        if usuario is None:
+            try:
+                usuario = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as exc:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found') from exc
+            usuarios_cacheados.guardar(clave, usuario)
+
+        return self.verificar_usuario(usuario, validated_token)
+
+    def verificar_usuario(self, usuario, validated_token):
+        """Comprueba que el usuario siga activo y que el token no sea anterior a su contraseña"""
+        if api_settings.CHECK_USER_IS_ACTIVE and not usuario.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Los usuarios de la caché compartida traen la huella en lugar de la contraseña
+            huella = getattr(usuario, 'huella_contrasena', None) or get_md5_hash_password(usuario.password)
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != huella:
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        # Cada petición recibe su propia copia para no compartir estado entre hilos
+        return copy.copy(usuario)
+
+    async def aauthenticate(self, request):
+        """
+        Variante asíncrona de authenticate() para vistas async: la validación
+        del token y la caché en memoria no hacen E/S; la recarga de la lista
+        de revocación y la carga del usuario (si no está en caché) usan el
+        ORM asíncrono o un hilo, sin bloquear el event loop.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        if lista_revocacion.requiere_sincronizacion():
+            await sync_to_async(lista_revocacion.sincronizar)()
+        validated_token = JWTAuthentication.get_validated_token(self, raw_token)
+        if lista_revocacion.revocado(validated_token, sincronizar=False):
+            raise AuthenticationFailed(_('El token fue revocado.'), code='token_revoked')
+
+        user_id = self._id_usuario(validated_token)
+        clave = str(user_id)
+        activa = configuracion_autenticacion()['ACTIVA']
+        usuario = usuarios_cacheados.obtener(clave) if activa else None
+        if usuario is None:
+            try:
+                usuario = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as exc:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found') from exc
+            if activa:
+                usuarios_cacheados.guardar(clave, usuario)
+
+        return self.verificar_usuario(usuario, validated_token), validated_token
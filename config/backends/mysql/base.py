@@ -0,0 +1,11 @@
+"""Backend MySQL de Django con pool de conexiones (config/pool.py).
+
+Se activa con ``DB_POOL=True``; funciona con mysqlclient y con PyMySQL.
+"""
+from django.db.backends.mysql import base
+
+from config.pool import ConexionesEnPoolMixin
+
+
+class DatabaseWrapper(ConexionesEnPoolMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,150 @@
+"""Snapshots cacheados e invalidados por escrituras en los modelos.
+
+Cada modelo registrado tiene un contador de versión en la caché que se
+incrementa con post_save/post_delete (y explícitamente en las operaciones
+masivas que no emiten señales). La clave de un snapshot incluye las
+versiones de los modelos de los que depende, de modo que cualquier escritura
+lo invalida sin necesidad de borrar claves. Junto a la versión se guarda el
+instante de la última escritura, que sirve de Last-Modified.
+
+Los modelos de alto volumen que se borran en cascada (Lectura, Consumo) no
+escuchan post_delete, que desactivaría su borrado rápido (un DELETE sin
+cargar las filas): su versión se incrementa en el post_delete del modelo
+padre y, en los borrados directos, explícitamente en la vista.
+
+Los contadores solo sirven si todos los workers ven la misma caché. Si
+CACHE_COMPARTIDA es falso (por defecto con LocMemCache, una caché por
+proceso) los snapshots se calculan en cada llamada, las respuestas no llevan
+ETag ni Last-Modified (config.condicional) y el chequeo config.W001 lo avisa
+al arrancar.
+"""
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .metricas import registrar_cache
+from .replicas import leer_de_primaria
+
+SNAPSHOT_TIMEOUT = 300
+
+
+def cache_compartida():
+    """Indica si CACHES['default'] la ven todos los workers (CACHE_COMPARTIDA)"""
+    return getattr(settings, 'CACHE_COMPARTIDA', False)
+
+
+@checks.register(checks.Tags.caches)
+def comprobar_cache_compartida(app_configs, **kwargs):
+    if cache_compartida():
+        return []
+    return [checks.Warning(
+        'CACHES["default"] no es compartida entre workers: los snapshots no se '
+        'cachean y las respuestas no llevan ETag ni Last-Modified.',
+        hint='Configure CACHE_BACKEND con un backend compartido (Redis, Memcached) '
+             'o CACHE_COMPARTIDA=True si la aplicación corre en un solo proceso.',
+        id='config.W001',
+    )]
+
+
+def _clave_version(modelo):
+    return f'version:{modelo._meta.label_lower}'
+
+
+def version_modelo(modelo):
+    """Versión actual de un modelo; se inicializa si no existe en la caché"""
+    clave = _clave_version(modelo)
+    version = cache.get(clave)
+    if version is None:
+        # Se parte de un valor único para no reutilizar versiones tras un desalojo
+        cache.add(clave, time.time_ns(), timeout=None)
+        version = cache.get(clave)
+    return version
+
+
+def _clave_modificacion(modelo):
+    return f'modificado:{modelo._meta.label_lower}'
+
+
+def ultima_modificacion(*modelos):
+    """
+    Instante (timestamp) de la última escritura registrada en los modelos.
+    Si no hay registro se toma el momento de la consulta, que es una cota
+    superior válida.
+    """
+    instantes = []
+    for modelo in modelos:
+        clave = _clave_modificacion(modelo)
+        instante = cache.get(clave)
+        if instante is None:
+            cache.add(clave, time.time(), timeout=None)
+            instante = cache.get(clave)
+        instantes.append(instante)
+    return max(instantes, default=None)
+
+
+def incrementar_version(*modelos):
+    """Invalida los snapshots que dependen de los modelos indicados"""
+    ahora = time.time()
+    for modelo in modelos:
+        clave = _clave_version(modelo)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, time.time_ns(), timeout=None)
+        cache.set(_clave_modificacion(modelo), ahora, timeout=None)
+
+
+# Modelo -> modelos borrados en cascada cuya versión se incrementa con él
+_DEPENDIENTES = {}
+
+
+def _invalidar(sender, **kwargs):
+    incrementar_version(sender)
+
+
+def _invalidar_borrado(sender, **kwargs):
+    incrementar_version(sender, *_DEPENDIENTES.get(sender, ()))
+
+
+def registrar_invalidacion(*modelos, dependientes=()):
+    """
+    Conecta las señales de escritura de los modelos con su contador de versión.
+
+    `dependientes` son modelos que se borran en cascada con los anteriores;
+    solo escuchan post_save para conservar su borrado rápido.
+    """
+    for modelo in modelos:
+        uid = f'invalidacion:{modelo._meta.label_lower}'
+        _DEPENDIENTES[modelo] = tuple(dependientes)
+        post_save.connect(_invalidar, sender=modelo, dispatch_uid=uid)
+        post_delete.connect(_invalidar_borrado, sender=modelo, dispatch_uid=uid)
+    for modelo in dependientes:
+        post_save.connect(_invalidar, sender=modelo, dispatch_uid=f'invalidacion:{modelo._meta.label_lower}')
+
+
+def snapshot(nombre, modelos, calcular, partes=(), timeout=SNAPSHOT_TIMEOUT):
+    """
+    Devuelve el resultado cacheado de `calcular()` para la versión actual de
+    `modelos`. `partes` añade a la clave otros valores de los que depende el
+    resultado (por ejemplo la fecha del día). Se calcula con la primaria: una
+    réplica atrasada dejaría datos viejos bajo la versión nueva. Sin una
+    caché compartida no se cachea.
+    """
+    if not cache_compartida():
+        with leer_de_primaria():
+            return calcular()
+
+    versiones = ':'.join(str(version_modelo(modelo)) for modelo in modelos)
+    sufijo = ':'.join(str(parte) for parte in partes)
+    clave = f'snapshot:{nombre}:{versiones}:{sufijo}'
+
+    resultado = cache.get(clave)
+    registrar_cache('snapshot', resultado is not None)
+    if resultado is None:
+        with leer_de_primaria():
+            resultado = calcular()
+        cache.set(clave, resultado, timeout)
+    return resultado
@@ -0,0 +1,180 @@
+"""Selección de campos (?fields= / ?omit=) y expansión de relaciones (?expand=).
+
+CamposDinamicosSerializerMixin recorta los campos de un serializer según los
+parámetros de la petición y reemplaza las claves foráneas pedidas en
+``expand`` por el serializer anidado declarado en ``Meta.expandibles``.
+
+CamposDinamicosViewSetMixin traduce los campos que quedan a las columnas
+del modelo y aplica ``only()`` al queryset, de modo que tampoco se leen de la
+base de datos las columnas que no se van a devolver. ``select_related`` se
+limita a las relaciones que realmente se serializan (nombres de relaciones
+como ``zona_nombre`` o expansiones).
+
+Los campos calculados declaran las columnas que usan en
+``Meta.dependencias``; si algún campo no se puede traducir a columnas el
+queryset se deja completo.
+
+Ejemplos::
+
+    GET /api/zonas/?fields=id,nombre,estado
+    GET /api/programaciones/?omit=descripcion,dias_semana&expand=zona
+"""
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+
+PARAMETRO_CAMPOS = 'fields'
+PARAMETRO_OMITIR = 'omit'
+PARAMETRO_EXPANDIR = 'expand'
+
+_DISPLAY = re.compile(r'get_(\w+)_display')
+
+
+def _lista_parametro(query_params, nombre):
+    valor = query_params.get(nombre)
+    if valor is None:
+        return None
+    return {campo.strip() for campo in valor.split(',') if campo.strip()}
+
+
+def parametros_campos(request):
+    """(campos, omitir, expandir) pedidos en la petición; None si no se indicó el parámetro"""
+    if request is None or request.method != 'GET':
+        return None, None, None
+    return (
+        _lista_parametro(request.query_params, PARAMETRO_CAMPOS),
+        _lista_parametro(request.query_params, PARAMETRO_OMITIR),
+        _lista_parametro(request.query_params, PARAMETRO_EXPANDIR),
+    )
+
+
+def _ruta_valida(modelo, ruta):
+    """Indica si `ruta` (con __) recorre campos concretos del modelo"""
+    partes = ruta.split('__')
+    for indice, parte in enumerate(partes):
+        try:
+            campo = modelo._meta.get_field(parte)
+        except FieldDoesNotExist:
+            return False
+        if not campo.concrete:
+            return False
+        if indice < len(partes) - 1:
+            if not campo.is_relation:
+                return False
+            modelo = campo.related_model
+    return True
+
+
+class CamposDinamicosSerializerMixin:
+    """
+    Mixin para ModelSerializer con ?fields=, ?omit= y ?expand=.
+
+    Meta admite:
+    - expandibles: {campo: SerializerAnidado} para las claves foráneas que
+      se pueden expandir.
+    - dependencias: {campo_calculado: [columnas]} para los campos que no
+      corresponden a una columna.
+
+    Los parámetros se leen de la petición del contexto (solo en GET) o se
+    pasan explícitamente con los argumentos `campos`, `omitir` y `expandir`.
+    """
+
+    def __init__(self, *args, campos=None, omitir=None, expandir=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if campos is None and omitir is None and expandir is None:
+            campos, omitir, expandir = parametros_campos(self.context.get('request'))
+
+        self.expandidos = set()
+        expandibles = getattr(self.Meta, 'expandibles', {})
+        for nombre in (expandir or ()):
+            if nombre in expandibles and nombre in self.fields:
+                self.fields[nombre] = expandibles[nombre](read_only=True, expandir=())
+                self.expandidos.add(nombre)
+
+        if campos:
+            for nombre in set(self.fields) - campos - self.expandidos:
+                self.fields.pop(nombre)
+        for nombre in (omitir or ()):
+            self.fields.pop(nombre, None)
+
+    def columnas_modelo(self):
+        """
+        Columnas (con notación __) y relaciones para select_related que
+        necesitan los campos actuales, o None si alguno no se puede resolver.
+        """
+        modelo = self.Meta.model
+        dependencias = getattr(self.Meta, 'dependencias', {})
+        columnas = {modelo._meta.pk.name}
+        relaciones = set()
+
+        for nombre, campo in self.fields.items():
+            if nombre in dependencias:
+                columnas.update(dependencias[nombre])
+                continue
+
+            if isinstance(campo, CamposDinamicosSerializerMixin):
+                anidado = campo.columnas_modelo()
+                if anidado is None:
+                    return None
+                columnas.add(campo.source)
+                columnas.update(f'{campo.source}__{columna}' for columna in anidado[0])
+                relaciones.add(campo.source)
+                relaciones.update(f'{campo.source}__{relacion}' for relacion in anidado[1])
+                continue
+
+            if campo.source == '*':
+                return None
+            partes = campo.source.split('.')
+            display = _DISPLAY.fullmatch(partes[-1])
+            if display:
+                partes[-1] = display.group(1)
+            ruta = '__'.join(partes)
+            if not _ruta_valida(modelo, ruta):
+                return None
+            columnas.add(ruta)
+            # Cada tramo de una ruta anidada es una relación que se recorre
+            for indice in range(1, len(partes)):
+                relacion = '__'.join(partes[:indice])
+                columnas.add(relacion)
+                relaciones.add(relacion)
+
+        return columnas, relaciones
+
+
+class CamposDinamicosViewSetMixin:
+    """
+    Mixin para ModelViewSet que ajusta el queryset de list/retrieve a los
+    campos pedidos: only() con las columnas necesarias y select_related solo
+    para las relaciones que se serializan.
+    """
+    acciones_campos_dinamicos = ('list', 'retrieve')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'action', None) not in self.acciones_campos_dinamicos:
+            return queryset
+
+        campos, omitir, expandir = parametros_campos(self.request)
+        if campos is None and omitir is None and not expandir:
+            return queryset
+
+        serializer = self.get_serializer()
+        if not isinstance(serializer, CamposDinamicosSerializerMixin):
+            return queryset
+        plan = serializer.columnas_modelo()
+        if plan is None:
+            if serializer.expandidos:
+                queryset = queryset.select_related(*serializer.expandidos)
+            return queryset
+
+        columnas, relaciones = plan
+        if campos is None and omitir is None:
+            return queryset.select_related(*relaciones)
+        queryset = queryset.select_related(None)
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        return queryset.only(*columnas)
+
+    def seleccion_de_campos(self):
+        """Indica si la petición eligió campos con ?fields="""
+        return bool(parametros_campos(self.request)[0])
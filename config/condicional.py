@@ -0,0 +1,88 @@
+"""GET condicional (ETag / Last-Modified) para los ViewSets.
+
+GetCondicionalMixin calcula los validadores de list/retrieve a partir de los
+contadores de versión de config.cache y, si el cliente ya tiene la
+representación vigente (If-None-Match o If-Modified-Since), responde
+304 Not Modified antes de consultar ni serializar los objetos.
+
+El contador se incrementa en cada escritura del modelo (señales y
+operaciones masivas), por lo que también cubre a los modelos sin marca de
+tiempo como Lectura o Consumo. El ETag combina la ruta completa (filtros,
+orden y página), el formato de respuesta y las versiones de los modelos que
+aparecen en la representación; el Last-Modified es la última escritura
+registrada en esos modelos. Las representaciones con campos que dependen
+del día (como Programacion.esta_vigente) marcan `depende_de_fecha`: su ETag
+incluye la fecha local y su Last-Modified no es anterior al inicio del día,
+para que pasada la medianoche no se responda 304. Las respuestas leídas de
+una réplica se envían sin validadores: podrían estar atrasadas respecto de
+las versiones del ETag. Sin una caché compartida entre workers
+(config.cache.cache_compartida) no se envían validadores: otro worker
+no vería las escrituras y respondería 304 con datos viejos.
+"""
+import hashlib
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import cache_compartida, ultima_modificacion, version_modelo
+from .replicas import leyo_de_replica
+
+
+class GetCondicionalMixin:
+    """
+    Mixin para ModelViewSet que añade ETag/Last-Modified a list y retrieve
+    y responde 304 Not Modified antes de la serialización.
+
+    `modelos_condicionales` lista los modelos de los que depende la
+    representación; por defecto, solo el modelo del queryset.
+    `depende_de_fecha` indica que la representación cambia con el día.
+    """
+    modelos_condicionales = None
+    depende_de_fecha = False
+
+    def get_modelos_condicionales(self):
+        if self.modelos_condicionales is not None:
+            return self.modelos_condicionales
+        return [self.queryset.model]
+
+    def get_validadores(self, request):
+        """Devuelve (etag, ultima_modificacion) de la petición actual, sin consultas SQL"""
+        modelos = self.get_modelos_condicionales()
+        partes = [
+            request.get_full_path(),
+            getattr(request.accepted_renderer, 'format', ''),
+            *(version_modelo(modelo) for modelo in modelos),
+        ]
+        ultima = ultima_modificacion(*modelos)
+        if self.depende_de_fecha:
+            hoy = timezone.localdate()
+            partes.append(hoy.isoformat())
+            ultima = max(ultima, timezone.make_aware(datetime.combine(hoy, time.min)).timestamp())
+        resumen = hashlib.md5(':'.join(str(parte) for parte in partes).encode()).hexdigest()
+        return f'W/{quote_etag(resumen)}', int(ultima)
+
+    def _respuesta_condicional(self, request, obtener_respuesta):
+        if not cache_compartida():
+            return obtener_respuesta()
+        etag, ultima = self.get_validadores(request)
+        respuesta = get_conditional_response(request, etag=etag, last_modified=ultima)
+        if respuesta is None:
+            respuesta = obtener_respuesta()
+            if respuesta.status_code != 200 or leyo_de_replica():
+                return respuesta
+
+        respuesta['ETag'] = etag
+        respuesta['Last-Modified'] = http_date(ultima)
+        return respuesta
+
+    def list(self, request, *args, **kwargs):
+        return self._respuesta_condicional(
+            request, lambda: super(GetCondicionalMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._respuesta_condicional(
+            request, lambda: super(GetCondicionalMixin, self).retrieve(request, *args, **kwargs)
+        )
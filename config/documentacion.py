@@ -0,0 +1,31 @@
+"""Decoradores de documentación de la API (drf_yasg) para las vistas.
+
+Las vistas importan ``swagger_auto_schema`` y ``openapi`` de este módulo y
+no de drf_yasg. Con API_DOCUMENTACION activa son los de drf_yasg; si está
+desactivada, drf_yasg no se importa: ``swagger_auto_schema`` devuelve la
+vista sin cambios y ``openapi`` acepta cualquier atributo o llamada sin
+hacer nada, de modo que los workers arrancan sin cargar drf_yasg.
+"""
+from django.conf import settings
+
+if settings.API_DOCUMENTACION:
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+    class _OpenAPIInerte:
+        """Sustituto de drf_yasg.openapi: atributos y llamadas devuelven el propio objeto"""
+
+        def __getattr__(self, nombre):
+            return self
+
+        def __call__(self, *args, **kwargs):
+            return self
+
+    openapi = _OpenAPIInerte()
+
+    def swagger_auto_schema(*args, **kwargs):
+        """Decorador que deja la vista tal cual"""
+        def decorador(vista):
+            return vista
+        return decorador
+
@@ -0,0 +1,210 @@
+"""Esquema OpenAPI pregenerado.
+
+Generar el esquema con drf_yasg recorre todos los viewsets y serializers,
+y la documentación lo pedía en cada visita. Ahora se genera una sola vez:
+
+- Al construir (build.sh) con ``python manage.py generar_esquema``, que
+  escribe ``openapi.json`` y ``openapi.yaml`` en ESQUEMA_API['DIRECTORIO'],
+  cada uno con su versión comprimida ``.gz``.
+- Si faltan los archivos (desarrollo), se genera en el primer acceso y se
+  guarda en memoria para el resto de la vida del proceso.
+
+vista_esquema sirve los bytes ya comprimidos a los clientes que aceptan
+gzip, con un ETag del contenido, y responde 304 cuando el cliente ya tiene
+esa versión. Swagger UI y ReDoc leen el esquema de esta vista (SPEC_URL).
+
+Este módulo importa drf_yasg: solo se carga si API_DOCUMENTACION está
+activa o al construir el esquema.
+"""
+import gzip
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+logger = logging.getLogger(__name__)
+
+ESQUEMA_API_POR_DEFECTO = {
+    'DIRECTORIO': 'esquema',
+    # Sin archivos pregenerados, generar en el primer acceso (si no, 404)
+    'GENERAR_SI_FALTA': True,
+}
+
+FORMATOS = {
+    'json': (OpenAPICodecJson, 'application/json'),
+    'yaml': (OpenAPICodecYaml, 'application/yaml'),
+}
+
+INFO_API = openapi.Info(
+    title="🌱 API de Gestión de Riego Automatizado",
+    default_version='v1',
+    description="""
+    API REST completa para el sistema de gestión de riego automatizado.
+
+    ## 🎯 Características principales:
+    - **Zonas de Riego**: Gestión completa de zonas de riego
+    - **Programaciones**: Configuración de horarios y frecuencias de riego
+    - **Sensores**: Monitoreo de humedad y temperatura
+    - **Consumo de Agua**: Control y seguimiento del consumo de agua
+    - **Estadísticas**: Endpoints de análisis y reportes
+
+    ## 📦 Aplicaciones:
+
+    ### 🌳 Zonas de Riego (`/api/zonas/`)
+    - Gestión de zonas de riego
+    - Tipos: jardín, huerto, césped, cultivo, ornamental
+    - Estados: activa, inactiva, mantenimiento
+    - Filtros por tipo, estado, área y capacidad
+    - Estadísticas y resúmenes detallados
+
+    ### 📅 Programaciones (`/api/programaciones/`)
+    - Programación de riegos automáticos
+    - Frecuencias: diaria, semanal, quincenal, mensual, personalizada
+    - Sistema de prioridades (1-10)
+    - Control de vigencia y ejecución
+    - Simulación de riegos
+
+    ### 📊 Sensores (`/api/sensores/` y `/api/lecturas/`)
+    - Gestión de sensores de humedad y temperatura
+    - Registro de lecturas en tiempo real
+    - Consulta de histórico de lecturas
+    - Filtros por sensor, fecha y tipo
+
+    ### 💧 Consumo de Agua (`/api/medidores/` y `/api/consumos/`)
+    - Gestión de medidores de agua
+    - Registro de consumo diario (m³)
+    - Seguimiento por medidor y fecha
+    - Análisis de consumo histórico
+
+    ## 🔍 Filtrado y Búsqueda:
+    Todos los endpoints de listado soportan filtrado avanzado mediante query parameters.
+
+    ## 📄 Paginación:
+    Los resultados están paginados (10 items por página por defecto).
+    """,
+    terms_of_service="https://www.example.com/terms/",
+    contact=openapi.Contact(email="contact@riego.local"),
+    license=openapi.License(name="MIT License"),
+)
+
+_esquemas = {}
+_lock = threading.Lock()
+
+
+def configuracion_esquema():
+    """Configuración efectiva de ESQUEMA_API con sus valores por defecto"""
+    return {**ESQUEMA_API_POR_DEFECTO, **getattr(settings, 'ESQUEMA_API', {})}
+
+
+def directorio_esquema():
+    directorio = Path(configuracion_esquema()['DIRECTORIO'])
+    if not directorio.is_absolute():
+        directorio = Path(settings.BASE_DIR) / directorio
+    return directorio
+
+
+class Esquema:
+    """Contenido de un formato del esquema, comprimido y con su ETag"""
+
+    def __init__(self, contenido, comprimido=None):
+        self.contenido = contenido
+        # mtime=0: el mismo esquema produce siempre los mismos bytes
+        self.comprimido = comprimido if comprimido is not None else gzip.compress(contenido, mtime=0)
+        resumen = hashlib.sha256(contenido).hexdigest()[:32]
+        # Un ETag por representación: la comprimida es otra secuencia de bytes
+        self.etag = f'"{resumen}"'
+        self.etag_gzip = f'"{resumen}-gzip"'
+
+
+def generar(formato, swagger=None):
+    """Esquema completo de la API (público) codificado en `formato`"""
+    if swagger is None:
+        swagger = OpenAPISchemaGenerator(INFO_API).get_schema(request=None, public=True)
+    codec, _ = FORMATOS[formato]
+    return codec(validators=[]).encode(swagger)
+
+
+def escribir_esquemas(directorio=None):
+    """Genera y escribe todos los formatos con su versión .gz; devuelve las rutas escritas"""
+    directorio = Path(directorio) if directorio else directorio_esquema()
+    directorio.mkdir(parents=True, exist_ok=True)
+    rutas = []
+    swagger = OpenAPISchemaGenerator(INFO_API).get_schema(request=None, public=True)
+    for formato in FORMATOS:
+        esquema = Esquema(generar(formato, swagger))
+        ruta = directorio / f'openapi.{formato}'
+        ruta.write_bytes(esquema.contenido)
+        ruta.with_name(f'{ruta.name}.gz').write_bytes(esquema.comprimido)
+        rutas.append(ruta)
+    olvidar_esquemas()
+    return rutas
+
+
+def cargar_esquema(formato):
+    """Esquema del formato: de memoria, de los archivos pregenerados o generado ahora"""
+    esquema = _esquemas.get(formato)
+    if esquema is not None:
+        return esquema
+    with _lock:
+        esquema = _esquemas.get(formato)
+        if esquema is None:
+            esquema = _leer(formato)
+            if esquema is None:
+                if not configuracion_esquema()['GENERAR_SI_FALTA']:
+                    return None
+                logger.info('Esquema OpenAPI (%s) sin pregenerar: se genera en este proceso', formato)
+                esquema = Esquema(generar(formato))
+            _esquemas[formato] = esquema
+    return esquema
+
+
+def _leer(formato):
+    ruta = directorio_esquema() / f'openapi.{formato}'
+    if not ruta.exists():
+        return None
+    comprimido = ruta.with_name(f'{ruta.name}.gz')
+    return Esquema(ruta.read_bytes(), comprimido.read_bytes() if comprimido.exists() else None)
+
+
+def olvidar_esquemas():
+    """Descarta los esquemas en memoria (tras regenerarlos y en tests)"""
+    with _lock:
+        _esquemas.clear()
+
+
+def _acepta_gzip(request):
+    codificaciones = request.headers.get('Accept-Encoding', '')
+    return any(parte.split(';')[0].strip() == 'gzip' for parte in codificaciones.split(','))
+
+
+@require_safe
+def vista_esquema(request, formato='json'):
+    """Esquema OpenAPI pregenerado, comprimido si el cliente lo acepta y con ETag"""
+    esquema = cargar_esquema(formato)
+    if esquema is None:
+        return HttpResponse('Esquema no generado: ejecute manage.py generar_esquema', status=404,
+                            content_type='text/plain; charset=utf-8')
+
+    comprimir = _acepta_gzip(request)
+    etag = esquema.etag_gzip if comprimir else esquema.etag
+    etags = {etag.strip() for etag in request.headers.get('If-None-Match', '').split(',')}
+    if etags & {esquema.etag, esquema.etag_gzip, '*'}:
+        response = HttpResponseNotModified()
+    elif comprimir:
+        response = HttpResponse(esquema.comprimido, content_type=FORMATOS[formato][1])
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(esquema.contenido, content_type=FORMATOS[formato][1])
+    response['ETag'] = etag
+    # Se puede guardar, pero se revalida siempre: un despliegue cambia el esquema
+    response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,144 @@
+"""Instrumentación de consultas SQL por petición.
+
+RegistroConsultas envuelve la ejecución de SQL de todas las conexiones con
+``connection.execute_wrapper`` para contar consultas, medir su tiempo y
+agrupar las plantillas repetidas (síntoma típico de un N+1).
+ConsultasSQLMiddleware lo aplica a cada petición y, en desarrollo, expone
+los resultados en las cabeceras de la respuesta. Solo está activo con
+INSTRUMENTACION_SQL['ACTIVA'] (por defecto, con DEBUG): normalizar cada
+consulta encarece todas las peticiones.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDERS = re.compile(r'(%s|\?)(\s*,\s*(%s|\?))+')
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACIOS = re.compile(r'\s+')
+
+INSTRUMENTACION_SQL_POR_DEFECTO = {
+    'ACTIVA': False,
+    'CABECERAS': False,
+    'UMBRAL_N_MAS_UNO': 5,
+}
+
+
+def configuracion_instrumentacion():
+    """Configuración efectiva de INSTRUMENTACION_SQL con sus valores por defecto"""
+    return {**INSTRUMENTACION_SQL_POR_DEFECTO, **getattr(settings, 'INSTRUMENTACION_SQL', {})}
+
+
+def normalizar_sql(sql):
+    """Reduce una consulta a su plantilla: sin literales y con listas IN colapsadas"""
+    plantilla = _LITERALES.sub('?', sql)
+    plantilla = _PLACEHOLDERS.sub('?, ...', plantilla)
+    return _ESPACIOS.sub(' ', plantilla).strip()
+
+
+class RegistroConsultas:
+    """
+    Context manager que registra las consultas ejecutadas en todas las
+    conexiones de base de datos mientras está activo.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.tiempo = 0.0
+        self.plantillas = Counter()
+        self._pila = None
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.total += 1
+            self.plantillas[normalizar_sql(sql)] += 1
+
+    def __enter__(self):
+        self._pila = ExitStack()
+        for alias in connections:
+            self._pila.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pila.close()
+        self._pila = None
+
+    @property
+    def tiempo_ms(self):
+        return self.tiempo * 1000
+
+    def repetidas(self, umbral):
+        """Plantillas ejecutadas al menos `umbral` veces, de mayor a menor"""
+        return [(sql, veces) for sql, veces in self.plantillas.most_common() if veces >= umbral]
+
+
+class ConsultasSQLMiddleware:
+    """
+    Registra cantidad y tiempo de las consultas SQL de cada petición.
+
+    Con INSTRUMENTACION_SQL['CABECERAS'] activo (por defecto en DEBUG) añade
+    X-DB-Query-Count, X-DB-Query-Time-ms y X-DB-N-Plus-One a la respuesta.
+    Las plantillas repetidas UMBRAL_N_MAS_UNO o más veces se registran como
+    posible N+1 en el logger ``config.instrumentation``.
+
+    Bajo ASGI el SQL de cada petición (vistas sync y ORM asíncrono) se
+    ejecuta en un hilo propio de la petición, así que el registro se
+    activa en ese hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        configuracion = configuracion_instrumentacion()
+        if not configuracion['ACTIVA']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cabeceras = configuracion['CABECERAS']
+        self.umbral = configuracion['UMBRAL_N_MAS_UNO']
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with RegistroConsultas() as registro:
+            response = self.get_response(request)
+        return self.procesar(request, response, registro)
+
+    async def __acall__(self, request):
+        registro = RegistroConsultas()
+        await sync_to_async(registro.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(registro.__exit__)(None, None, None)
+        return self.procesar(request, response, registro)
+
+    def procesar(self, request, response, registro):
+        # Para las métricas por vista (config/metricas.py)
+        request.consultas_sql = registro
+        repetidas = registro.repetidas(self.umbral)
+        for sql, veces in repetidas:
+            logger.warning(
+                'Posible N+1 en %s %s: %d ejecuciones de %s',
+                request.method, request.path, veces, sql
+            )
+
+        if self.cabeceras:
+            response['X-DB-Query-Count'] = str(registro.total)
+            response['X-DB-Query-Time-ms'] = f'{registro.tiempo_ms:.2f}'
+            response['X-DB-N-Plus-One'] = str(len(repetidas))
+
+        return response
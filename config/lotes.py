@@ -0,0 +1,247 @@
+"""Endpoint de lotes: varias peticiones a la API en una sola.
+
+Un tablero que carga zonas, programaciones vigentes, estadísticas,
+sensores y consumos hacía una petición por recurso, y cada una pagaba la
+autenticación JWT y la cadena de middlewares. ``POST /api/batch/`` recibe
+la lista de subpeticiones::
+
+    {"peticiones": [
+        {"id": "zonas", "ruta": "/api/zonas/?page=2"},
+        {"id": "vigentes", "ruta": "/api/programaciones/vigentes/"},
+        {"id": "pausar", "metodo": "PATCH", "ruta": "/api/programaciones/7/", "cuerpo": {"activa": false}}
+    ]}
+
+y responde ``{"respuestas": [{"id", "estado", "cuerpo"}, ...]}`` en el mismo
+orden, cada una con su propio código de estado (un 404 o un 400 no hace
+fallar el lote).
+
+- Una sola autenticación: las subpeticiones se resuelven con el resolver de
+  URLs y llaman directamente a la vista, con el usuario del lote ya
+  autenticado (la autenticación forzada de DRF). No pasan por los
+  middlewares.
+- Solo rutas de LOTE_API['PREFIJOS'] (la API), y nunca el propio lote.
+- Las lecturas (GET, HEAD) consecutivas se ejecutan en paralelo en un pool
+  de LOTE_API['HILOS'] hilos; cada escritura espera a las lecturas previas
+  y se ejecuta sola, en orden, de modo que las lecturas posteriores ven su
+  efecto. Dentro de una transacción (ATOMIC_REQUESTS, tests) todo se
+  ejecuta en el hilo de la petición: otro hilo usaría otra conexión y no
+  vería los cambios sin confirmar.
+- Los cuerpos de las respuestas de DRF se incluyen sin renderizarlos por
+  separado: el lote completo se renderiza una sola vez.
+
+Las consultas de los hilos del pool no aparecen en las cabeceras de
+ConsultasSQLMiddleware ni en el perfilado, que miden el hilo de la petición.
+"""
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, connections
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .authentication import CachedJWTAuthentication
+from .documentacion import swagger_auto_schema
+
+LOTE_API_POR_DEFECTO = {
+    'MAX_PETICIONES': 20,
+    # Hilos para las lecturas en paralelo; 1 ejecuta todo en orden
+    'HILOS': 4,
+    'PREFIJOS': ('/api/',),
+}
+
+METODOS_LECTURA = frozenset({'GET', 'HEAD'})
+METODOS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Cabeceras del lote que no se trasladan a las subpeticiones
+_META_EXCLUIDAS = frozenset({
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+    'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE', 'HTTP_COOKIE',
+})
+
+_ejecutor = None
+_pid_ejecutor = None
+_lock_ejecutor = threading.Lock()
+
+
+def configuracion_lotes():
+    """Configuración efectiva de LOTE_API con sus valores por defecto"""
+    return {**LOTE_API_POR_DEFECTO, **getattr(settings, 'LOTE_API', {})}
+
+
+def ejecutor_lotes(hilos):
+    """Pool de hilos compartido por los lotes de este proceso (uno nuevo tras un fork)"""
+    global _ejecutor, _pid_ejecutor
+    if _ejecutor is not None and _pid_ejecutor == os.getpid():
+        return _ejecutor
+    with _lock_ejecutor:
+        if _ejecutor is None or _pid_ejecutor != os.getpid():
+            _ejecutor = ThreadPoolExecutor(hilos, thread_name_prefix='lote-api')
+            _pid_ejecutor = os.getpid()
+        return _ejecutor
+
+
+class SubpeticionSerializer(serializers.Serializer):
+    id = serializers.CharField(required=False, max_length=100, help_text='Identificador que se devuelve en la respuesta')
+    metodo = serializers.ChoiceField(choices=METODOS, default='GET')
+    ruta = serializers.CharField(max_length=2000, help_text='Ruta con su query string, p. ej. /api/zonas/?page=2')
+    cuerpo = serializers.JSONField(required=False, help_text='Cuerpo JSON de las escrituras')
+
+    def validate_ruta(self, value):
+        ruta = urlsplit(value).path
+        if not ruta.startswith(tuple(configuracion_lotes()['PREFIJOS'])):
+            raise serializers.ValidationError('Ruta no permitida en un lote.')
+        return value
+
+
+class LoteSerializer(serializers.Serializer):
+    peticiones = SubpeticionSerializer(many=True, allow_empty=False)
+
+    def validate_peticiones(self, value):
+        maximo = configuracion_lotes()['MAX_PETICIONES']
+        if len(value) > maximo:
+            raise serializers.ValidationError(f'Un lote admite como mucho {maximo} peticiones.')
+        return value
+
+
+def crear_subpeticion(request, peticion):
+    """HttpRequest de una subpetición, con el usuario ya autenticado del lote"""
+    partes = urlsplit(peticion['ruta'])
+    cuerpo = b''
+    if 'cuerpo' in peticion and peticion['metodo'] not in METODOS_LECTURA:
+        cuerpo = json.dumps(peticion['cuerpo']).encode()
+
+    original = request._request
+    environ = {
+        clave: valor for clave, valor in original.META.items()
+        if isinstance(valor, str) and clave not in _META_EXCLUIDAS
+    }
+    environ.update({
+        'REQUEST_METHOD': peticion['metodo'],
+        'SCRIPT_NAME': original.META.get('SCRIPT_NAME', ''),
+        'PATH_INFO': partes.path,
+        'QUERY_STRING': partes.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(cuerpo)),
+        'wsgi.input': BytesIO(cuerpo),
+        'wsgi.url_scheme': original.scheme,
+    })
+    subpeticion = WSGIRequest(environ)
+    subpeticion.user = request.user
+    # DRF usa ForcedAuthentication con estos atributos: no se vuelve a validar el JWT
+    subpeticion._force_auth_user = request.user
+    subpeticion._force_auth_token = request.auth
+    return subpeticion
+
+
+def despachar(request, peticion, indice):
+    """Ejecuta una subpetición y devuelve su resultado para la respuesta del lote"""
+    identificador = peticion.get('id', str(indice))
+    subpeticion = crear_subpeticion(request, peticion)
+    try:
+        coincidencia = resolve(subpeticion.path_info)
+    except Resolver404:
+        return {'id': identificador, 'estado': 404, 'cuerpo': {'detail': 'No encontrado.'}}
+    if coincidencia.func is vista_lote:
+        return {'id': identificador, 'estado': 400, 'cuerpo': {'detail': 'Un lote no puede contener otro lote.'}}
+
+    subpeticion.resolver_match = coincidencia
+    vista = coincidencia.func
+    if iscoroutinefunction(vista):
+        vista = async_to_sync(vista)
+    try:
+        response = vista(subpeticion, *coincidencia.args, **coincidencia.kwargs)
+    except Exception as exc:
+        # Mismo tratamiento (404, 403, 500 con su registro) que en una petición normal
+        response = response_for_exception(subpeticion, exc)
+    return {'id': identificador, 'estado': response.status_code, 'cuerpo': _cuerpo(response, peticion)}
+
+
+def _cuerpo(response, peticion):
+    if peticion['metodo'] == 'HEAD' or response.status_code == 204:
+        return None
+    if isinstance(response, Response):
+        # Los datos de DRF se renderizan una sola vez, con el lote
+        return response.data
+    if hasattr(response, 'render'):
+        response.render()
+    contenido = b''.join(response) if response.streaming else response.content
+    if response.get('Content-Type', '').startswith('application/json'):
+        try:
+            return json.loads(contenido) if contenido else None
+        except ValueError:
+            pass
+    return contenido.decode(response.charset, errors='replace')
+
+
+def _en_hilo(contexto, request, peticion, indice):
+    close_old_connections()
+    try:
+        # Variables de contexto de la petición (réplicas, perfilado) en el hilo del pool
+        return contexto.run(despachar, request, peticion, indice)
+    finally:
+        close_old_connections()
+
+
+def ejecutar_lote(request, peticiones):
+    """Resultados de las subpeticiones en orden, con las lecturas consecutivas en paralelo"""
+    configuracion = configuracion_lotes()
+    paralelo = configuracion['HILOS'] > 1 and not any(
+        conexion.in_atomic_block for conexion in connections.all(initialized_only=True)
+    )
+    resultados = [None] * len(peticiones)
+    lecturas = []
+
+    def ejecutar_lecturas():
+        if len(lecturas) == 1:
+            resultados[lecturas[0]] = despachar(request, peticiones[lecturas[0]], lecturas[0])
+        elif lecturas:
+            ejecutor = ejecutor_lotes(configuracion['HILOS'])
+            futuros = [
+                (indice, ejecutor.submit(_en_hilo, contextvars.copy_context(), request, peticiones[indice], indice))
+                for indice in lecturas
+            ]
+            for indice, futuro in futuros:
+                resultados[indice] = futuro.result()
+        lecturas.clear()
+
+    for indice, peticion in enumerate(peticiones):
+        if paralelo and peticion['metodo'] in METODOS_LECTURA:
+            lecturas.append(indice)
+            continue
+        ejecutar_lecturas()
+        resultados[indice] = despachar(request, peticion, indice)
+    ejecutar_lecturas()
+    return resultados
+
+
+class LoteAPIView(APIView):
+    """Ejecuta varias peticiones a la API con una sola autenticación (ver módulo)"""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description=(
+            'Ejecuta varias peticiones a la API en una sola. Las lecturas consecutivas se '
+            'ejecutan en paralelo y las escrituras en orden; cada respuesta trae su propio estado.'
+        ),
+        request_body=LoteSerializer,
+    )
+    def post(self, request):
+        serializer = LoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'respuestas': ejecutar_lote(request, serializer.validated_data['peticiones'])})
+
+
+vista_lote = LoteAPIView.as_view()
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera el esquema OpenAPI (openapi.json y openapi.yaml, con su versión .gz) que sirve '
+        'la documentación de la API; se ejecuta al construir (build.sh)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directorio',
+            help='Directorio de salida (por defecto ESQUEMA_API["DIRECTORIO"])'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.API_DOCUMENTACION:
+            # Sin documentación las vistas no llevan los decoradores de drf_yasg
+            # (config/documentacion.py) y el esquema saldría incompleto
+            self.stdout.write('API_DOCUMENTACION desactivada: no se genera el esquema.')
+            return
+
+        # Importado aquí: drf_yasg solo se carga al generar con la documentación activa
+        from config.esquema import escribir_esquemas
+
+        for ruta in escribir_esquemas(options['directorio']):
+            self.stdout.write(f'{ruta} ({ruta.stat().st_size} bytes)')
+        self.stdout.write(self.style.SUCCESS('Esquema OpenAPI generado.'))
@@ -0,0 +1,428 @@
+"""Operaciones masivas para los ModelViewSets.
+
+OperacionesMasivasMixin añade al ViewSet la ruta ``masivo/``:
+
+- ``POST`` con una lista de objetos: los valida con el serializer del
+  ViewSet (many=True) y los inserta con bulk_create.
+- ``PATCH`` con una lista de objetos con su ``id``: actualización parcial
+  de cada uno, guardada con bulk_update.
+- ``PATCH`` con un objeto y filtros en la query string: aplica los mismos
+  cambios a todos los objetos filtrados.
+- ``DELETE`` con filtros en la query string: elimina los objetos filtrados.
+
+Ejemplos::
+
+    POST   /api/zonas/masivo/                     [{"nombre": ...}, ...]
+    PATCH  /api/programaciones/masivo/            [{"id": 3, "hora_inicio": "06:30"}, ...]
+    PATCH  /api/programaciones/masivo/?zona=4     {"activa": false}
+    DELETE /api/sensores/masivo/?ids=7,8,9
+
+Los filtros son los del FilterSet del ViewSet (``filterset_masivo`` o, si
+no se indica, ``filterset_class``) más ``ids``, una lista de ids separados
+por comas. La actualización y el borrado por filtros exigen al menos un
+filtro: sin filtros afectarían a la tabla completa.
+
+Cada fila pasa por las mismas reglas que una escritura individual: las del
+serializer y las del modelo (full_clean, que incluye el clean() de Zona y
+Programacion), ya que bulk_create y bulk_update no llaman a save(). Si
+alguna fila no es válida no se guarda ninguna y se devuelven los errores
+de todas. Las claves foráneas y los campos únicos de todas las filas se
+validan con una consulta por campo (Precarga), no con una por fila. La
+escritura se hace en una sola transacción y, como las
+operaciones masivas no emiten señales, se invalidan a mano los snapshots y
+validadores del modelo (config.cache).
+
+Con MySQL bulk_create no devuelve los ids, por lo que la respuesta de la
+creación los trae vacíos.
+"""
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from .cache import incrementar_version
+from .documentacion import openapi, swagger_auto_schema
+
+PARAMETRO_IDS = 'ids'
+
+
+def _errores_modelo(exc):
+    return exc.message_dict if hasattr(exc, 'error_dict') else {'non_field_errors': exc.messages}
+
+
+def _es_id(valor):
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def campos_auto_now(modelo):
+    """Campos con auto_now, que bulk_update no actualiza por sí solo"""
+    return [campo for campo in modelo._meta.concrete_fields if getattr(campo, 'auto_now', False)]
+
+
+def _es_unico(validador):
+    return isinstance(validador, UniqueValidator) and validador.lookup == 'exact'
+
+
+class RelacionPrecargada:
+    """
+    Sustituye al queryset de un PrimaryKeyRelatedField: resuelve
+    get(pk=...) con los objetos ya cargados, sin consultas.
+    """
+
+    def __init__(self, modelo, objetos):
+        self.modelo = modelo
+        self.objetos = objetos
+
+    def get(self, pk):
+        try:
+            clave = self.modelo._meta.pk.to_python(pk)
+        except ValidationError:
+            raise ValueError(pk)
+        if clave not in self.objetos:
+            raise self.modelo.DoesNotExist
+        return self.objetos[clave]
+
+
+class Precarga:
+    """
+    Validación de todas las filas de una operación masiva sin consultas por
+    fila: las claves foráneas se cargan con una consulta por relación y los
+    campos únicos se comprueban con una consulta por campo (validar_unicos)
+    en lugar del UniqueValidator de cada fila.
+    """
+
+    def __init__(self, campos, filas):
+        self.relaciones = {}
+        self.unicos = {}
+        for nombre, campo in campos.items():
+            if campo.read_only:
+                continue
+            if isinstance(campo, PrimaryKeyRelatedField) and campo.pk_field is None and campo.queryset is not None:
+                queryset = campo.get_queryset()
+                pks = set()
+                for fila in filas:
+                    valor = fila.get(nombre) if isinstance(fila, dict) else None
+                    if valor is None or isinstance(valor, bool):
+                        continue
+                    try:
+                        pks.add(queryset.model._meta.pk.to_python(valor))
+                    except ValidationError:
+                        continue
+                self.relaciones[nombre] = RelacionPrecargada(queryset.model, queryset.in_bulk(pks))
+            validadores = [validador for validador in campo.validators if _es_unico(validador)]
+            if validadores:
+                self.unicos[nombre] = (campo.source, validadores[0])
+
+    def aplicar(self, serializer):
+        """Prepara los campos de `serializer` para validar con lo precargado"""
+        campos = serializer.fields
+        for nombre, relacion in self.relaciones.items():
+            campos[nombre].queryset = relacion
+        for nombre in self.unicos:
+            campos[nombre].validators = [
+                validador for validador in campos[nombre].validators if not _es_unico(validador)
+            ]
+        return serializer
+
+    def validar_unicos(self, validas):
+        """
+        Errores de unicidad de una lista de (clave del error, instancia o
+        None, datos validados), contra la base de datos y dentro del lote.
+        Las filas con error se quitan de `validas`.
+        """
+        errores = {}
+        for nombre, (fuente, validador) in self.unicos.items():
+            valores = [
+                (indice, datos[fuente]) for indice, (_, _, datos) in enumerate(validas)
+                if datos.get(fuente) is not None
+            ]
+            if not valores:
+                continue
+            existentes = dict(
+                validador.queryset
+                .filter(**{f'{fuente}__in': {valor for _, valor in valores}})
+                .values_list(fuente, 'pk')
+            )
+            repetidos = Counter(valor for _, valor in valores)
+            for indice, valor in valores:
+                instancia = validas[indice][1]
+                propio = instancia.pk if instancia is not None else None
+                if existentes.get(valor, propio) != propio or repetidos[valor] > 1:
+                    errores.setdefault(indice, {})[nombre] = [validador.message]
+        resultado = [{**validas[indice][0], 'errores': errores[indice]} for indice in sorted(errores)]
+        validas[:] = [fila for indice, fila in enumerate(validas) if indice not in errores]
+        return resultado
+
+
+class OperacionesMasivasMixin:
+    """
+    Mixin para ModelViewSet con creación, actualización y borrado masivos
+    en ``masivo/`` (ver módulo).
+    """
+    filterset_masivo = None
+    MASIVO_MAX_FILAS = 1000
+    MASIVO_TAMANO_LOTE = 500
+
+    def get_filterset_masivo(self):
+        return self.filterset_masivo or getattr(self, 'filterset_class', None)
+
+    @swagger_auto_schema(
+        methods=['post'],
+        operation_description=(
+            "Crear objetos en bloque a partir de una lista. Se validan todas las filas con las mismas "
+            "reglas que la creación individual y, si son válidas, se insertan en una sola transacción."
+        ),
+        request_body=openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+        responses={201: 'Objetos creados', 400: 'Errores por fila'}
+    )
+    @swagger_auto_schema(
+        methods=['patch'],
+        operation_description=(
+            "Actualizar en bloque. Con una lista de objetos con `id`, cada uno recibe sus cambios; con "
+            "un objeto, los cambios se aplican a todos los objetos que cumplen los filtros de la query "
+            "string (obligatorios, incluido `ids`). Se guarda todo o nada."
+        ),
+        request_body=openapi.Schema(type=openapi.TYPE_OBJECT),
+        responses={
+            200: openapi.Response(description="Objetos actualizados", examples={"application/json": {"actualizados": 25}}),
+            400: 'Errores por fila o sin filtros'
+        }
+    )
+    @swagger_auto_schema(
+        methods=['delete'],
+        operation_description=(
+            "Eliminar en bloque los objetos que cumplen los filtros de la query string "
+            "(obligatorios, incluido `ids`: lista de ids separados por comas)."
+        ),
+        responses={
+            200: openapi.Response(description="Objetos eliminados", examples={"application/json": {"eliminados": 25}}),
+            400: 'Sin filtros o filtros inválidos'
+        }
+    )
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def masivo(self, request):
+        """Endpoint de creación, actualización y borrado masivos"""
+        if request.method == 'POST':
+            return self.crear_masivo(request)
+        if request.method == 'PATCH':
+            if isinstance(request.data, list):
+                return self.actualizar_masivo(request)
+            return self.actualizar_filtrados(request)
+        return self.eliminar_filtrados(request)
+
+    def _error(self, mensaje):
+        return Response({'error': mensaje}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _validar_lista(self, filas, nombre):
+        if not isinstance(filas, list) or not filas:
+            return self._error(f'Debe enviar una lista de {nombre}.')
+        if len(filas) > self.MASIVO_MAX_FILAS:
+            return self._error(f'No se pueden procesar más de {self.MASIVO_MAX_FILAS} {nombre} por petición.')
+        return None
+
+    def _limpiar(self, instancia):
+        """
+        full_clean de la instancia. Las relaciones no se vuelven a consultar
+        (las nuevas las resolvió el serializer y las demás ya están
+        guardadas) y la unicidad la comprueba validar_unicos.
+        """
+        relaciones = [campo.name for campo in instancia._meta.concrete_fields if campo.is_relation]
+        instancia.full_clean(exclude=relaciones, validate_unique=False, validate_constraints=False)
+
+    def _guardar(self, escribir):
+        modelo = self.get_queryset().model
+        try:
+            with transaction.atomic():
+                resultado = escribir()
+        except IntegrityError:
+            return None, self._error('Los datos violan una restricción de unicidad o integridad.')
+        incrementar_version(modelo)
+        return resultado, None
+
+    def _respuesta_errores(self, errores):
+        return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+
+    def crear_masivo(self, request):
+        """Valida la lista con el serializer del ViewSet y la inserta con bulk_create"""
+        filas = request.data
+        error = self._validar_lista(filas, 'objetos')
+        if error:
+            return error
+
+        serializer = self.get_serializer(data=filas, many=True)
+        precarga = Precarga(serializer.child.fields, filas)
+        precarga.aplicar(serializer.child)
+        if not serializer.is_valid():
+            return self._respuesta_errores([
+                {'fila': indice, 'errores': errores}
+                for indice, errores in enumerate(serializer.errors) if errores
+            ])
+
+        modelo = self.get_queryset().model
+        validas = [({'fila': indice}, None, datos) for indice, datos in enumerate(serializer.validated_data)]
+        errores = precarga.validar_unicos(validas)
+        instancias = []
+        for clave, _, datos in validas:
+            instancia = modelo(**datos)
+            try:
+                self._limpiar(instancia)
+            except ValidationError as exc:
+                errores.append({**clave, 'errores': _errores_modelo(exc)})
+                continue
+            instancias.append(instancia)
+        if errores:
+            return self._respuesta_errores(sorted(errores, key=lambda error: error['fila']))
+
+        creadas, error = self._guardar(
+            lambda: modelo.objects.bulk_create(instancias, batch_size=self.MASIVO_TAMANO_LOTE)
+        )
+        if error:
+            return error
+        return Response(self.get_serializer(creadas, many=True).data, status=status.HTTP_201_CREATED)
+
+    def _actualizar(self, cambios, precarga, errores=None):
+        """
+        Valida y guarda con bulk_update una lista de (clave del error,
+        instancia, datos), sumando los `errores` ya detectados. Devuelve la
+        respuesta.
+        """
+        validas = []
+        errores = list(errores or ())
+        for clave, instancia, datos in cambios:
+            serializer = precarga.aplicar(self.get_serializer(instancia, data=datos, partial=True))
+            if serializer.is_valid():
+                validas.append((clave, instancia, serializer.validated_data))
+            else:
+                errores.append({**clave, 'errores': serializer.errors})
+        errores.extend(precarga.validar_unicos(validas))
+
+        campos = set()
+        for clave, instancia, datos in validas:
+            for atributo, valor in datos.items():
+                setattr(instancia, atributo, valor)
+            try:
+                self._limpiar(instancia)
+            except ValidationError as exc:
+                errores.append({**clave, 'errores': _errores_modelo(exc)})
+            campos.update(datos)
+        if errores:
+            return self._respuesta_errores(errores)
+
+        instancias = [instancia for _, instancia, _ in validas]
+        if not instancias or not campos:
+            return Response({'actualizados': 0})
+        modelo = type(instancias[0])
+        auto_now = campos_auto_now(modelo)
+        for instancia in instancias:
+            for campo in auto_now:
+                campo.pre_save(instancia, add=False)
+        campos = sorted(campos | {campo.name for campo in auto_now})
+
+        actualizados, error = self._guardar(
+            lambda: modelo.objects.bulk_update(instancias, campos, batch_size=self.MASIVO_TAMANO_LOTE)
+        )
+        return error or Response({'actualizados': actualizados})
+
+    def actualizar_masivo(self, request):
+        """Actualización parcial de una lista de objetos identificados por su id"""
+        filas = request.data
+        error = self._validar_lista(filas, 'objetos')
+        if error:
+            return error
+
+        ids = [fila.get('id') if isinstance(fila, dict) else None for fila in filas]
+        existentes = self.get_queryset().in_bulk([pk for pk in ids if _es_id(pk)])
+
+        cambios = []
+        errores = []
+        vistos = set()
+        for indice, (pk, fila) in enumerate(zip(ids, filas)):
+            if not isinstance(fila, dict) or pk is None:
+                errores.append({'fila': indice, 'errores': {'id': ['Cada fila debe ser un objeto con su id.']}})
+            elif not _es_id(pk) or pk not in existentes:
+                errores.append({'fila': indice, 'id': pk, 'errores': {'id': ['No encontrado.']}})
+            elif pk in vistos:
+                errores.append({'fila': indice, 'id': pk, 'errores': {'id': ['Id repetido en el lote.']}})
+            else:
+                vistos.add(pk)
+                datos = {campo: valor for campo, valor in fila.items() if campo != 'id'}
+                cambios.append(({'fila': indice, 'id': pk}, existentes[pk], datos))
+
+        precarga = Precarga(self.get_serializer().fields, [datos for _, _, datos in cambios])
+        respuesta = self._actualizar(cambios, precarga, errores)
+        if 'errores' in respuesta.data:
+            respuesta.data['errores'].sort(key=lambda error: error['fila'])
+        return respuesta
+
+    def get_queryset_filtrado(self, request):
+        """
+        Queryset con los filtros de la query string; devuelve (queryset,
+        respuesta de error). Sin ningún filtro es un error.
+        """
+        queryset = self.get_queryset()
+        aplicados = False
+
+        valor_ids = request.query_params.get(PARAMETRO_IDS, '').strip()
+        if valor_ids:
+            try:
+                ids = [int(pk) for pk in valor_ids.split(',') if pk.strip()]
+            except ValueError:
+                return None, self._error(f'{PARAMETRO_IDS} debe ser una lista de ids separados por comas.')
+            queryset = queryset.filter(pk__in=ids)
+            aplicados = True
+
+        filterset_class = self.get_filterset_masivo()
+        if filterset_class is not None:
+            filterset = filterset_class(request.query_params, queryset=queryset, request=request)
+            if not filterset.is_valid():
+                return None, Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+            aplicados = aplicados or any(
+                request.query_params.get(nombre, '') != '' for nombre in filterset.filters
+            )
+            queryset = filterset.qs
+
+        if not aplicados:
+            return None, self._error('Las operaciones masivas por filtro requieren al menos un filtro.')
+        return queryset, None
+
+    def actualizar_filtrados(self, request):
+        """Aplica los mismos cambios a todos los objetos que cumplen los filtros"""
+        cambios = request.data
+        if not isinstance(cambios, dict) or not cambios:
+            return self._error('Debe enviar un objeto con los cambios o una lista de objetos con su id.')
+        if 'id' in cambios:
+            return self._error('No se puede cambiar el id en una actualización masiva.')
+
+        queryset, error = self.get_queryset_filtrado(request)
+        if error:
+            return error
+        instancias = list(queryset[:self.MASIVO_MAX_FILAS + 1])
+        if len(instancias) > self.MASIVO_MAX_FILAS:
+            return self._error(f'Los filtros seleccionan más de {self.MASIVO_MAX_FILAS} objetos.')
+
+        precarga = Precarga(self.get_serializer().fields, [cambios])
+        return self._actualizar(
+            [({'id': instancia.pk}, instancia, cambios) for instancia in instancias], precarga
+        )
+
+    def eliminar_filtrados(self, request):
+        """Elimina los objetos que cumplen los filtros (y sus dependientes en cascada)"""
+        queryset, error = self.get_queryset_filtrado(request)
+        if error:
+            return error
+        pks = list(queryset.values_list('pk', flat=True)[:self.MASIVO_MAX_FILAS + 1])
+        if len(pks) > self.MASIVO_MAX_FILAS:
+            return self._error(f'Los filtros seleccionan más de {self.MASIVO_MAX_FILAS} objetos.')
+
+        modelo = queryset.model
+        # delete() no admite querysets con distinct(), que pueden añadir los filtros
+        resultado, error = self._guardar(lambda: modelo.objects.filter(pk__in=pks).delete())
+        if error:
+            return error
+        _, por_modelo = resultado
+        return Response({'eliminados': por_modelo.get(modelo._meta.label, 0)})
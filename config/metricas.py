@@ -0,0 +1,510 @@
+"""Métricas de la aplicación en formato de texto de Prometheus.
+
+Cada proceso (worker de gunicorn) escribe sus métricas en su propio archivo
+mapeado en memoria, ``metricas_<pid>.db`` dentro de METRICAS['DIRECTORIO'];
+la vista ``/metrics`` lee los archivos de todos los workers y los suma al
+momento del scrape. No hay servicio de red ni bloqueo entre procesos: cada
+actualización toma un lock del propio proceso durante unos microsegundos.
+
+Formato del archivo: 8 bytes con los bytes usados y después entradas
+``[longitud uint32][clave utf-8][relleno][valor float64]`` con el valor
+alineado a 8 bytes. Una entrada nueva se escribe completa antes de
+actualizar la cabecera, así que un lector siempre ve un prefijo válido.
+
+- Contadores e histogramas se suman en todos los archivos, también los de
+  workers ya terminados, para que sigan siendo monótonos.
+- Los gauges (peticiones en curso, pool de conexiones) solo se suman en los
+  archivos de procesos vivos.
+- Al arrancar y en cada scrape, los contadores e histogramas de los workers
+  terminados se suman al archivo del proceso y sus archivos se borran
+  (fusionar_terminados), así que el directorio no crece con los reinicios:
+  tiene un archivo por worker vivo. Cada archivo se reclama con un rename
+  atómico antes de fusionarlo, de modo que solo lo suma un proceso.
+
+El PID de un worker nuevo que coincide con el de un archivo antiguo
+continúa sus contadores.
+
+Métricas:
+
+- riego_http_peticiones_total{metodo, vista, estado}
+- riego_http_duracion_segundos{metodo, vista} (histograma)
+- riego_http_peticiones_en_curso (cola de peticiones de los workers)
+- riego_db_consultas_total / riego_db_tiempo_segundos_total{vista}, con
+  INSTRUMENTACION_SQL activa
+- riego_ingesta_filas_total{tipo}: lecturas y consumos registrados
+- riego_cache_consultas_total{cache, resultado}: aciertos y fallos
+- riego_db_pool_*{alias}: conexiones del pool, peticiones esperando una
+  conexión y esperas acumuladas (config/pool.py)
+"""
+import bisect
+import hmac
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+METRICAS_POR_DEFECTO = {
+    'ACTIVO': True,
+    'DIRECTORIO': os.path.join(tempfile.gettempdir(), 'gestion-riego-metricas'),
+    # Si se define, /metrics exige "Authorization: Bearer <TOKEN>"; si no,
+    # solo responde con DEBUG y a las direcciones de IPS_PERMITIDAS (detrás
+    # de un proxy todas las peticiones llegan desde él)
+    'TOKEN': '',
+    'IPS_PERMITIDAS': ('127.0.0.1', '::1'),
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+}
+
+DEFINICIONES = {
+    'riego_http_peticiones_total': ('counter', 'Peticiones HTTP atendidas'),
+    'riego_http_duracion_segundos': ('histogram', 'Duración de las peticiones HTTP'),
+    'riego_http_peticiones_en_curso': ('gauge', 'Peticiones HTTP en curso en los workers'),
+    'riego_db_consultas_total': ('counter', 'Consultas SQL ejecutadas por las peticiones'),
+    'riego_db_tiempo_segundos_total': ('counter', 'Tiempo de las consultas SQL de las peticiones'),
+    'riego_ingesta_filas_total': ('counter', 'Filas de lecturas y consumos registradas'),
+    'riego_cache_consultas_total': ('counter', 'Consultas a las cachés de la aplicación'),
+    'riego_db_pool_conexiones': ('gauge', 'Conexiones abiertas del pool por estado'),
+    'riego_db_pool_esperando': ('gauge', 'Peticiones esperando una conexión del pool'),
+    'riego_db_pool_esperas_total': ('counter', 'Peticiones que esperaron una conexión del pool'),
+    'riego_db_pool_agotado_total': ('counter', 'Peticiones sin conexión tras la espera máxima'),
+}
+
+_CABECERA = struct.Struct('<Q')
+_LONGITUD = struct.Struct('<I')
+_VALOR = struct.Struct('<d')
+TAMANO_INICIAL = 64 * 1024
+_ARCHIVO_PID = re.compile(r'^metricas_(\d+)\.db$')
+
+
+def configuracion_metricas():
+    """Configuración efectiva de METRICAS con sus valores por defecto"""
+    return {**METRICAS_POR_DEFECTO, **getattr(settings, 'METRICAS', {})}
+
+
+def _entradas(datos, usados):
+    """(clave, valor, posición del valor) de las entradas de un archivo"""
+    posicion = _CABECERA.size
+    while posicion + _LONGITUD.size <= usados:
+        longitud = _LONGITUD.unpack_from(datos, posicion)[0]
+        inicio = posicion + _LONGITUD.size
+        clave = bytes(datos[inicio:inicio + longitud]).decode()
+        valor_en = inicio + longitud + (-(_LONGITUD.size + longitud) % 8)
+        yield clave, _VALOR.unpack_from(datos, valor_en)[0], valor_en
+        posicion = valor_en + _VALOR.size
+
+
+class ArchivoMetricas:
+    """Valores float64 por clave en un archivo mapeado en memoria (un escritor)"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = open(ruta, 'a+b')
+        tamano = os.fstat(self._archivo.fileno()).st_size
+        if tamano < TAMANO_INICIAL:
+            self._archivo.truncate(TAMANO_INICIAL)
+            tamano = TAMANO_INICIAL
+        self._mapa = mmap.mmap(self._archivo.fileno(), tamano)
+        self._usados = _CABECERA.unpack_from(self._mapa, 0)[0]
+        if self._usados == 0:
+            self._usados = _CABECERA.size
+            _CABECERA.pack_into(self._mapa, 0, self._usados)
+        self._posiciones = {clave: posicion for clave, _, posicion in _entradas(self._mapa, self._usados)}
+
+    def _posicion(self, clave):
+        posicion = self._posiciones.get(clave)
+        if posicion is None:
+            posicion = self._agregar(clave)
+        return posicion
+
+    def _agregar(self, clave):
+        codificada = clave.encode()
+        relleno = -(_LONGITUD.size + len(codificada)) % 8
+        tamano = _LONGITUD.size + len(codificada) + relleno + _VALOR.size
+        if self._usados + tamano > len(self._mapa):
+            self._crecer(self._usados + tamano)
+
+        inicio = self._usados
+        _LONGITUD.pack_into(self._mapa, inicio, len(codificada))
+        self._mapa[inicio + _LONGITUD.size:inicio + _LONGITUD.size + len(codificada)] = codificada
+        posicion = inicio + _LONGITUD.size + len(codificada) + relleno
+        _VALOR.pack_into(self._mapa, posicion, 0.0)
+        self._usados += tamano
+        # La cabecera se actualiza al final: la entrada ya es visible completa
+        _CABECERA.pack_into(self._mapa, 0, self._usados)
+        self._posiciones[clave] = posicion
+        return posicion
+
+    def _crecer(self, minimo):
+        tamano = len(self._mapa)
+        while tamano < minimo:
+            tamano *= 2
+        self._mapa.close()
+        self._archivo.truncate(tamano)
+        self._mapa = mmap.mmap(self._archivo.fileno(), tamano)
+
+    def incrementar(self, clave, valor):
+        posicion = self._posicion(clave)
+        _VALOR.pack_into(self._mapa, posicion, _VALOR.unpack_from(self._mapa, posicion)[0] + valor)
+
+    def fijar(self, clave, valor):
+        _VALOR.pack_into(self._mapa, self._posicion(clave), valor)
+
+    def cerrar(self):
+        self._mapa.close()
+        self._archivo.close()
+
+    @staticmethod
+    def leer(ruta):
+        with open(ruta, 'rb') as archivo:
+            datos = archivo.read()
+        if len(datos) < _CABECERA.size:
+            return []
+        usados = min(_CABECERA.unpack_from(datos, 0)[0], len(datos))
+        return [(clave, valor) for clave, valor, _ in _entradas(datos, usados)]
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _clave(nombre, etiquetas):
+    contenido = ','.join(f'{etiqueta}="{_escapar(valor)}"' for etiqueta, valor in etiquetas)
+    return f'{nombre}{{{contenido}}}'
+
+
+class Registro:
+    """Métricas de este proceso"""
+
+    def __init__(self, directorio, buckets):
+        self.pid = os.getpid()
+        self.buckets = tuple(sorted(buckets))
+        Path(directorio).mkdir(parents=True, exist_ok=True)
+        self.archivo = ArchivoMetricas(os.path.join(directorio, f'metricas_{self.pid}.db'))
+        self._lock = threading.Lock()
+        self._claves = {}
+        self.pool_actualizado = 0.0
+
+    def _clave(self, nombre, etiquetas):
+        identificador = (nombre, tuple(sorted(etiquetas.items())))
+        clave = self._claves.get(identificador)
+        if clave is None:
+            clave = self._claves[identificador] = _clave(nombre, identificador[1])
+        return clave
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = self._clave(nombre, etiquetas)
+        with self._lock:
+            self.archivo.incrementar(clave, valor)
+
+    def fijar(self, nombre, valor, **etiquetas):
+        clave = self._clave(nombre, etiquetas)
+        with self._lock:
+            self.archivo.fijar(clave, valor)
+
+    def observar(self, nombre, valor, **etiquetas):
+        indice = bisect.bisect_left(self.buckets, valor)
+        limite = self.buckets[indice] if indice < len(self.buckets) else '+Inf'
+        identificador = (f'{nombre}_bucket', tuple(sorted(etiquetas.items())), limite)
+        bucket = self._claves.get(identificador)
+        if bucket is None:
+            # 'le' va siempre al final para separarlo al exportar
+            bucket = self._claves[identificador] = _clave(
+                identificador[0], identificador[1] + (('le', limite),)
+            )
+        suma = self._clave(f'{nombre}_sum', etiquetas)
+        cuenta = self._clave(f'{nombre}_count', etiquetas)
+        with self._lock:
+            self.archivo.incrementar(bucket, 1)
+            self.archivo.incrementar(suma, valor)
+            self.archivo.incrementar(cuenta, 1)
+
+
+_registro = (None, None)
+_lock_registro = threading.Lock()
+
+
+def registro():
+    """Registro de este proceso, o None si las métricas están desactivadas"""
+    pid, actual = _registro
+    if pid == os.getpid():
+        return actual
+    return _crear_registro()
+
+
+def _crear_registro():
+    global _registro
+    with _lock_registro:
+        pid, actual = _registro
+        if pid != os.getpid():
+            configuracion = configuracion_metricas()
+            actual = None
+            if configuracion['ACTIVO']:
+                actual = Registro(configuracion['DIRECTORIO'], configuracion['BUCKETS'])
+                fusionar_terminados(actual, configuracion['DIRECTORIO'])
+            _registro = (os.getpid(), actual)
+        return actual
+
+
+def reiniciar():
+    """Vuelve a leer la configuración en la próxima métrica (tests)"""
+    global _registro
+    with _lock_registro:
+        _, actual = _registro
+        if actual is not None:
+            actual.archivo.cerrar()
+        _registro = (None, None)
+
+
+def incrementar(nombre, valor=1, **etiquetas):
+    actual = registro()
+    if actual is not None:
+        actual.incrementar(nombre, valor, **etiquetas)
+
+
+def registrar_ingesta(tipo, filas=1):
+    """Suma filas ingeridas de `tipo` (lectura, consumo); para inserciones masivas"""
+    incrementar('riego_ingesta_filas_total', filas, tipo=tipo)
+
+
+def registrar_cache(cache, acierto):
+    incrementar('riego_cache_consultas_total', cache=cache, resultado='acierto' if acierto else 'fallo')
+
+
+def _contar_ingesta(sender, created, **kwargs):
+    if created:
+        registrar_ingesta(sender._meta.model_name)
+
+
+def registrar_ingesta_modelos(*modelos):
+    """Cuenta como ingesta cada fila nueva de los modelos (post_save)"""
+    from django.db.models.signals import post_save
+
+    for modelo in modelos:
+        post_save.connect(_contar_ingesta, sender=modelo, dispatch_uid=f'metricas:{modelo._meta.label_lower}')
+
+
+def actualizar_pool(actual):
+    """Copia al archivo las métricas de los pools de conexiones (como mucho una vez por segundo)"""
+    ahora = time.monotonic()
+    if ahora - actual.pool_actualizado < 1:
+        return
+    actual.pool_actualizado = ahora
+    from .pool import metricas_pools
+
+    for alias, datos in metricas_pools().items():
+        actual.fijar('riego_db_pool_conexiones', datos['en_uso'], alias=alias, estado='en_uso')
+        actual.fijar('riego_db_pool_conexiones', datos['libres'], alias=alias, estado='libre')
+        actual.fijar('riego_db_pool_esperando', datos['esperando'], alias=alias)
+        actual.fijar('riego_db_pool_esperas_total', datos['esperas'], alias=alias)
+        actual.fijar('riego_db_pool_agotado_total', datos['agotado'], alias=alias)
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _partir(clave):
+    nombre, _, etiquetas = clave.partition('{')
+    return nombre, etiquetas[:-1]
+
+
+def _base(nombre):
+    for sufijo in ('_bucket', '_sum', '_count'):
+        if nombre.endswith(sufijo) and nombre[:-len(sufijo)] in DEFINICIONES:
+            return nombre[:-len(sufijo)]
+    return nombre
+
+
+def _es_gauge(clave):
+    return DEFINICIONES.get(_base(_partir(clave)[0]), ('counter',))[0] == 'gauge'
+
+
+def _archivos_workers(directorio):
+    """(ruta, pid) de los archivos de métricas de los workers"""
+    for ruta in Path(directorio).glob('metricas_*.db'):
+        coincidencia = _ARCHIVO_PID.match(ruta.name)
+        if coincidencia is not None:
+            yield ruta, int(coincidencia.group(1))
+
+
+def fusionar_terminados(actual, directorio):
+    """
+    Suma al archivo de `actual` los contadores e histogramas de los workers
+    terminados y borra sus archivos; sus gauges se descartan.
+    """
+    for ruta, pid in _archivos_workers(directorio):
+        if pid == actual.pid or _proceso_vivo(pid):
+            continue
+        reclamado = ruta.with_name(f'fusion_{actual.pid}_{ruta.name}')
+        try:
+            os.rename(ruta, reclamado)
+        except FileNotFoundError:
+            # Lo reclamó otro proceso
+            continue
+        entradas = [(clave, valor) for clave, valor in ArchivoMetricas.leer(reclamado) if not _es_gauge(clave)]
+        with actual._lock:
+            for clave, valor in entradas:
+                actual.archivo.incrementar(clave, valor)
+        reclamado.unlink()
+
+
+def agregar(directorio):
+    """Suma por clave los valores de los archivos de todos los workers"""
+    totales = defaultdict(float)
+    for ruta, pid in _archivos_workers(directorio):
+        vivo = _proceso_vivo(pid)
+        for clave, valor in ArchivoMetricas.leer(ruta):
+            if _es_gauge(clave) and not vivo:
+                continue
+            totales[clave] += valor
+    return totales
+
+
+def _separar_le(clave):
+    """Clave de un bucket sin la etiqueta le (y sin cerrar) y su límite"""
+    cabeza, _, limite = clave.rpartition('le="')
+    return cabeza.rstrip(','), limite[:-2]
+
+
+def _series_histograma(nombre, series, limites):
+    """Buckets acumulados (como espera Prometheus), _sum y _count de un histograma"""
+    buckets = defaultdict(lambda: dict.fromkeys(limites, 0.0))
+    resto = []
+    for clave, valor in series:
+        if _partir(clave)[0] == f'{nombre}_bucket':
+            cabeza, limite = _separar_le(clave)
+            buckets[cabeza][limite] = buckets[cabeza].get(limite, 0.0) + valor
+        else:
+            resto.append((clave, valor))
+
+    resultado = []
+    for cabeza, conteos in sorted(buckets.items()):
+        separador = '' if cabeza.endswith('{') else ','
+        acumulado = 0.0
+        for limite in sorted(conteos, key=float):
+            acumulado += conteos[limite]
+            resultado.append((f'{cabeza}{separador}le="{limite}"}}', acumulado))
+    return resultado + sorted(resto)
+
+
+def exportar(directorio=None):
+    """Texto de exposición de Prometheus (0.0.4) con las métricas agregadas"""
+    configuracion = configuracion_metricas()
+    directorio = directorio or configuracion['DIRECTORIO']
+    limites = [str(limite) for limite in sorted(configuracion['BUCKETS'])] + ['+Inf']
+
+    por_metrica = defaultdict(list)
+    for clave, valor in agregar(directorio).items():
+        por_metrica[_base(_partir(clave)[0])].append((clave, valor))
+
+    lineas = []
+    for nombre, (tipo, ayuda) in DEFINICIONES.items():
+        series = por_metrica.get(nombre)
+        if not series:
+            continue
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        if tipo == 'histogram':
+            series = _series_histograma(nombre, series, limites)
+        else:
+            series = sorted(series)
+        lineas.extend(f'{clave} {valor!r}' for clave, valor in series)
+    return '\n'.join(lineas) + '\n'
+
+
+def _acceso_permitido(request, configuracion):
+    if configuracion['TOKEN']:
+        esperado = f'Bearer {configuracion["TOKEN"]}'
+        return hmac.compare_digest(request.headers.get('Authorization', ''), esperado)
+    return settings.DEBUG and request.META.get('REMOTE_ADDR') in configuracion['IPS_PERMITIDAS']
+
+
+@require_GET
+def vista_metricas(request):
+    """GET /metrics: métricas de todos los workers para Prometheus"""
+    configuracion = configuracion_metricas()
+    if not _acceso_permitido(request, configuracion):
+        return HttpResponse('Acceso denegado\n', status=403, content_type='text/plain')
+    actual = registro()
+    if actual is not None:
+        fusionar_terminados(actual, configuracion['DIRECTORIO'])
+        actual.pool_actualizado = 0.0
+        actualizar_pool(actual)
+    return HttpResponse(exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricasMiddleware:
+    """
+    Cuenta y mide cada petición por vista (nombre de la URL resuelta) y
+    suma las consultas SQL que registró ConsultasSQLMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not configuracion_metricas()['ACTIVO']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        actual = registro()
+        if actual is None:
+            return self.get_response(request)
+        inicio = self.iniciar(actual)
+        try:
+            response = self.get_response(request)
+        finally:
+            actual.incrementar('riego_http_peticiones_en_curso', -1)
+        self.registrar(actual, request, response, inicio)
+        return response
+
+    async def __acall__(self, request):
+        actual = registro()
+        if actual is None:
+            return await self.get_response(request)
+        inicio = self.iniciar(actual)
+        try:
+            response = await self.get_response(request)
+        finally:
+            actual.incrementar('riego_http_peticiones_en_curso', -1)
+        self.registrar(actual, request, response, inicio)
+        return response
+
+    def iniciar(self, actual):
+        actual.incrementar('riego_http_peticiones_en_curso', 1)
+        return time.perf_counter()
+
+    def registrar(self, actual, request, response, inicio):
+        duracion = time.perf_counter() - inicio
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = (coincidencia.view_name or coincidencia.route) if coincidencia else 'sin_ruta'
+
+        actual.incrementar(
+            'riego_http_peticiones_total', metodo=request.method, vista=vista, estado=response.status_code
+        )
+        actual.observar('riego_http_duracion_segundos', duracion, metodo=request.method, vista=vista)
+        consultas = getattr(request, 'consultas_sql', None)
+        if consultas is not None and consultas.total:
+            actual.incrementar('riego_db_consultas_total', consultas.total, vista=vista)
+            actual.incrementar('riego_db_tiempo_segundos_total', consultas.tiempo, vista=vista)
+        actualizar_pool(actual)
@@ -0,0 +1,232 @@
+"""Perfilado bajo demanda de una petición.
+
+Un usuario staff puede pedir el perfil de una petición concreta con la
+cabecera ``X-Perfilar`` o el parámetro ``?perfilar=``:
+
+- ``1``: la respuesta incluye ``Server-Timing`` con las fases auth
+  (autenticación de DRF), serialize (``serializer.data``), render
+  (``Response.rendered_content``), db (tiempo en SQL, que se solapa con las
+  demás) y total. Los navegadores lo muestran en la pestaña de red.
+- ``cprofile``: además guarda un perfil cProfile de la petición en
+  PERFILADO['DIRECTORIO'] (se lee con ``python -m pstats`` o snakeviz) y
+  devuelve su nombre en ``X-Perfil-Archivo``. Solo en modo síncrono
+  (WSGI): bajo ASGI la vista se ejecuta en otro hilo.
+
+El usuario se resuelve con la sesión o con el JWT de la cabecera
+Authorization; las peticiones de otros usuarios se atienden sin perfilar.
+Las fases se miden envolviendo los métodos de DRF en todo el proceso, así
+que el perfilado es opcional (PERFILADO['ACTIVO'], por defecto con DEBUG):
+desactivado, el middleware no se carga y DRF queda intacto. Activado, sin
+la marca el coste es leer una cabecera y un parámetro y, en cada fase,
+consultar una variable de contexto. desinstalar_medidores() restaura los
+métodos originales.
+"""
+import cProfile
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework import exceptions
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+from .authentication import CachedJWTAuthentication
+from .instrumentation import RegistroConsultas
+
+PERFILADO_POR_DEFECTO = {
+    'ACTIVO': False,
+    'CABECERA': 'X-Perfilar',
+    'PARAMETRO': 'perfilar',
+    'DIRECTORIO': 'perfiles',
+    # Perfiles que se conservan en DIRECTORIO; los más antiguos se borran
+    'MAX_ARCHIVOS': 50,
+}
+
+FASES = ('auth', 'serialize', 'render', 'db', 'total')
+
+_perfil = ContextVar('perfil_peticion', default=None)
+# (clase, atributo) -> original de los métodos envueltos por instalar_medidores
+_originales = {}
+_NO_ALFANUMERICO = re.compile(r'[^A-Za-z0-9]+')
+
+
+def configuracion_perfilado():
+    """Configuración efectiva de PERFILADO con sus valores por defecto"""
+    return {**PERFILADO_POR_DEFECTO, **getattr(settings, 'PERFILADO', {})}
+
+
+class Perfil:
+    """Tiempos acumulados por fase de una petición"""
+
+    def __init__(self):
+        self.fases = defaultdict(float)
+        self._profundidad = Counter()
+
+    @contextmanager
+    def medir(self, fase):
+        # Las llamadas anidadas (serializers dentro de serializers) cuentan una vez
+        if self._profundidad[fase]:
+            yield
+            return
+        self._profundidad[fase] += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[fase] += time.perf_counter() - inicio
+            self._profundidad[fase] -= 1
+
+    def server_timing(self, consultas):
+        partes = []
+        for fase in FASES:
+            if fase in self.fases:
+                descripcion = f';desc="{consultas} consultas"' if fase == 'db' else ''
+                partes.append(f'{fase};dur={self.fases[fase] * 1000:.2f}{descripcion}')
+        return ', '.join(partes)
+
+
+def _medido(fase, funcion):
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        perfil = _perfil.get()
+        if perfil is None:
+            return funcion(*args, **kwargs)
+        with perfil.medir(fase):
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+def instalar_medidores():
+    """Envuelve las fases de DRF que se miden (una sola vez por proceso)"""
+    if _originales:
+        return
+    _originales.update({
+        (APIView, 'perform_authentication'): APIView.perform_authentication,
+        (BaseSerializer, 'data'): BaseSerializer.data,
+        (Response, 'rendered_content'): Response.rendered_content,
+    })
+    APIView.perform_authentication = _medido('auth', APIView.perform_authentication)
+    BaseSerializer.data = property(_medido('serialize', BaseSerializer.data.fget))
+    Response.rendered_content = property(_medido('render', Response.rendered_content.fget))
+
+
+def desinstalar_medidores():
+    """Restaura los métodos de DRF envueltos por instalar_medidores"""
+    for (clase, atributo), original in _originales.items():
+        setattr(clase, atributo, original)
+    _originales.clear()
+
+
+def _es_staff(usuario):
+    return usuario is not None and usuario.is_active and usuario.is_staff
+
+
+class PerfiladoMiddleware:
+    """Mide las peticiones de usuarios staff que lo piden (ver módulo)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        configuracion = configuracion_perfilado()
+        if not configuracion['ACTIVO']:
+            raise MiddlewareNotUsed
+        instalar_medidores()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def marca(self, request):
+        configuracion = configuracion_perfilado()
+        valor = request.headers.get(configuracion['CABECERA']) or request.GET.get(configuracion['PARAMETRO'])
+        return (valor or '').strip().lower(), configuracion
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        marca, configuracion = self.marca(request)
+        if not marca or not _es_staff(self.usuario(request)):
+            return self.get_response(request)
+
+        perfil = Perfil()
+        perfilador = cProfile.Profile() if marca == 'cprofile' else None
+        token = _perfil.set(perfil)
+        inicio = time.perf_counter()
+        try:
+            with RegistroConsultas() as registro:
+                if perfilador is None:
+                    response = self.get_response(request)
+                else:
+                    response = perfilador.runcall(self.get_response, request)
+        finally:
+            _perfil.reset(token)
+        perfil.fases['total'] = time.perf_counter() - inicio
+        return self.procesar(request, response, perfil, registro, perfilador, configuracion)
+
+    async def __acall__(self, request):
+        marca, configuracion = self.marca(request)
+        if not marca or not _es_staff(await self.ausuario(request)):
+            return await self.get_response(request)
+
+        perfil = Perfil()
+        registro = RegistroConsultas()
+        token = _perfil.set(perfil)
+        inicio = time.perf_counter()
+        await sync_to_async(registro.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(registro.__exit__)(None, None, None)
+            _perfil.reset(token)
+        perfil.fases['total'] = time.perf_counter() - inicio
+        return self.procesar(request, response, perfil, registro, None, configuracion)
+
+    def usuario(self, request):
+        usuario = getattr(request, 'user', None)
+        if usuario is not None and usuario.is_authenticated:
+            return usuario
+        try:
+            resultado = CachedJWTAuthentication().authenticate(request)
+        except exceptions.APIException:
+            return None
+        return resultado[0] if resultado else None
+
+    async def ausuario(self, request):
+        usuario = await request.auser() if hasattr(request, 'auser') else None
+        if usuario is not None and usuario.is_authenticated:
+            return usuario
+        try:
+            resultado = await CachedJWTAuthentication().aauthenticate(request)
+        except exceptions.APIException:
+            return None
+        return resultado[0] if resultado else None
+
+    def procesar(self, request, response, perfil, registro, perfilador, configuracion):
+        perfil.fases['db'] = registro.tiempo
+        response['Server-Timing'] = perfil.server_timing(registro.total)
+        if perfilador is not None:
+            response['X-Perfil-Archivo'] = self.guardar(request, perfilador, configuracion)
+        return response
+
+    def guardar(self, request, perfilador, configuracion):
+        directorio = Path(configuracion['DIRECTORIO'])
+        if not directorio.is_absolute():
+            directorio = Path(settings.BASE_DIR) / directorio
+        directorio.mkdir(parents=True, exist_ok=True)
+
+        ruta = _NO_ALFANUMERICO.sub('-', request.path).strip('-') or 'raiz'
+        nombre = f'{datetime.now():%Y%m%d-%H%M%S-%f}-{request.method}-{ruta}.prof'
+        perfilador.dump_stats(directorio / nombre)
+
+        archivos = sorted(directorio.glob('*.prof'), key=lambda archivo: archivo.stat().st_mtime)
+        for archivo in archivos[:-configuracion['MAX_ARCHIVOS']]:
+            archivo.unlink(missing_ok=True)
+        return nombre
@@ -0,0 +1,290 @@
+"""Pool de conexiones a la base de datos.
+
+Django solo trae pool para PostgreSQL. Para MySQL (mysqlclient o PyMySQL
+instalado como MySQLdb, ver config/__init__.py) el backend
+``config.backends.mysql`` toma las conexiones de un PoolConexiones por
+alias y proceso, en lugar de abrir una nueva en cada petición:
+
+- Acotado: como mucho TAMANO conexiones abiertas; si están todas en uso la
+  petición espera hasta ESPERA_MAXIMA segundos y después falla con
+  OperationalError. Bajo ASGI o con workers de hilos esto evita agotar el
+  max_connections del servidor.
+- Salud: una conexión que lleva más de VERIFICAR_TRAS segundos sin usarse
+  se comprueba con un ping antes de entregarla, y las que superan
+  VIDA_MAXIMA se cierran (conviene que sea menor que el wait_timeout del
+  servidor). Las conexiones con errores o cerradas dentro de una
+  transacción se descartan en lugar de devolverse.
+- Métricas: metricas_pools() devuelve, por alias, conexiones abiertas y
+  en uso, reutilizaciones, esperas y su duración. Las esperas de más de
+  AVISO_ESPERA_MS se registran en el logger ``config.pool``.
+
+Con el pool activo Django "cierra" la conexión al terminar cada petición
+(CONN_MAX_AGE = 0), lo que la devuelve al pool.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+POOL_CONEXIONES_POR_DEFECTO = {
+    # Solo informativo aquí: settings cambia el ENGINE a config.backends.mysql
+    'ACTIVO': False,
+    'TAMANO': 10,
+    'ESPERA_MAXIMA': 5.0,
+    'VIDA_MAXIMA': 1800,
+    'VERIFICAR_TRAS': 30,
+    'AVISO_ESPERA_MS': 100,
+}
+
+_pools = {}
+_lock_pools = threading.Lock()
+
+
+def configuracion_pool():
+    """Configuración efectiva de POOL_CONEXIONES con sus valores por defecto"""
+    return {**POOL_CONEXIONES_POR_DEFECTO, **getattr(settings, 'POOL_CONEXIONES', {})}
+
+
+class PoolAgotado(Exception):
+    """No se liberó ninguna conexión dentro de la espera máxima"""
+
+
+class PoolConexiones:
+    """
+    Pool acotado y seguro entre hilos de conexiones DB-API.
+
+    `cerrar(conexion)` cierra una conexión y `validar(conexion)` indica si
+    sigue utilizable; las conexiones se crean con la función que recibe
+    obtener().
+    """
+
+    def __init__(self, cerrar, validar, tamano=10, espera_maxima=5.0, vida_maxima=1800,
+                 verificar_tras=30, aviso_espera_ms=100, nombre='default'):
+        self.cerrar = cerrar
+        self.validar = validar
+        self.tamano = tamano
+        self.espera_maxima = espera_maxima
+        self.vida_maxima = vida_maxima
+        self.verificar_tras = verificar_tras
+        self.aviso_espera_ms = aviso_espera_ms
+        self.nombre = nombre
+        self.pid = os.getpid()
+
+        self._condicion = threading.Condition()
+        # (conexión, creada, devuelta); se reutiliza la última devuelta
+        self._libres = deque()
+        self._creadas = {}
+        self._abiertas = 0
+        self._esperando = 0
+        self._contadores = dict.fromkeys(
+            ('obtenidas', 'creadas', 'reutilizadas', 'descartadas', 'esperas', 'agotado'), 0
+        )
+        self._espera_total = 0.0
+        self._espera_maxima_observada = 0.0
+
+    def obtener(self, crear):
+        """Devuelve (conexión, reutilizada); crea una con `crear()` si hay sitio"""
+        inicio = time.monotonic()
+        limite = inicio + self.espera_maxima
+        espero = False
+        while True:
+            with self._condicion:
+                while not self._libres and self._abiertas >= self.tamano:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._contadores['agotado'] += 1
+                        raise PoolAgotado(
+                            f'Pool "{self.nombre}": {self.tamano} conexiones en uso '
+                            f'tras esperar {self.espera_maxima} s'
+                        )
+                    espero = True
+                    self._esperando += 1
+                    try:
+                        self._condicion.wait(restante)
+                    finally:
+                        self._esperando -= 1
+
+                if self._libres:
+                    conexion, creada, devuelta = self._libres.pop()
+                else:
+                    self._abiertas += 1
+                    conexion = None
+
+            if conexion is None:
+                try:
+                    conexion = crear()
+                except BaseException:
+                    self._liberar_plaza()
+                    raise
+                self._registrar(inicio, espero, creada=True)
+                with self._condicion:
+                    self._creadas[id(conexion)] = time.monotonic()
+                return conexion, False
+
+            if self._sana(conexion, creada, devuelta):
+                self._registrar(inicio, espero, creada=False)
+                return conexion, True
+            self.descartar(conexion)
+
+    def devolver(self, conexion):
+        """Deja la conexión disponible para otra petición"""
+        with self._condicion:
+            creada = self._creadas.get(id(conexion))
+            if creada is None:
+                return
+            self._libres.append((conexion, creada, time.monotonic()))
+            self._condicion.notify()
+
+    def descartar(self, conexion):
+        """Cierra la conexión y libera su plaza en el pool"""
+        with self._condicion:
+            if self._creadas.pop(id(conexion), None) is None:
+                return
+            self._contadores['descartadas'] += 1
+        try:
+            self.cerrar(conexion)
+        except Exception:
+            logger.debug('Error al cerrar una conexión descartada del pool "%s"', self.nombre, exc_info=True)
+        self._liberar_plaza()
+
+    def cerrar_todas(self):
+        """Cierra las conexiones libres (las que están en uso se descartan al devolverlas)"""
+        with self._condicion:
+            libres = [conexion for conexion, _, _ in self._libres]
+            self._libres.clear()
+        for conexion in libres:
+            self.descartar(conexion)
+
+    def metricas(self):
+        with self._condicion:
+            return {
+                **self._contadores,
+                'tamano': self.tamano,
+                'abiertas': self._abiertas,
+                'libres': len(self._libres),
+                'en_uso': self._abiertas - len(self._libres),
+                'esperando': self._esperando,
+                'espera_total_ms': self._espera_total * 1000,
+                'espera_maxima_ms': self._espera_maxima_observada * 1000,
+            }
+
+    def _sana(self, conexion, creada, devuelta):
+        ahora = time.monotonic()
+        if self.vida_maxima is not None and ahora - creada >= self.vida_maxima:
+            return False
+        if self.verificar_tras is not None and ahora - devuelta >= self.verificar_tras:
+            try:
+                return bool(self.validar(conexion))
+            except Exception:
+                return False
+        return True
+
+    def _liberar_plaza(self):
+        with self._condicion:
+            self._abiertas -= 1
+            self._condicion.notify()
+
+    def _registrar(self, inicio, espero, creada):
+        espera = time.monotonic() - inicio
+        with self._condicion:
+            self._contadores['obtenidas'] += 1
+            self._contadores['creadas' if creada else 'reutilizadas'] += 1
+            if espero:
+                self._contadores['esperas'] += 1
+                self._espera_total += espera
+                self._espera_maxima_observada = max(self._espera_maxima_observada, espera)
+        if espero and espera * 1000 >= self.aviso_espera_ms:
+            logger.warning(
+                'Pool "%s": se esperaron %.0f ms por una conexión (%d en uso)',
+                self.nombre, espera * 1000, self.tamano
+            )
+
+
+def pool_para(alias, cerrar, validar):
+    """PoolConexiones del alias en este proceso (uno nuevo tras un fork)"""
+    pool = _pools.get(alias)
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _lock_pools:
+        pool = _pools.get(alias)
+        # Las conexiones heredadas del proceso padre no se cierran: el socket
+        # es compartido y cerrarlo aquí cortaría las del padre
+        if pool is None or pool.pid != os.getpid():
+            configuracion = configuracion_pool()
+            pool = _pools[alias] = PoolConexiones(
+                cerrar, validar,
+                tamano=configuracion['TAMANO'],
+                espera_maxima=configuracion['ESPERA_MAXIMA'],
+                vida_maxima=configuracion['VIDA_MAXIMA'],
+                verificar_tras=configuracion['VERIFICAR_TRAS'],
+                aviso_espera_ms=configuracion['AVISO_ESPERA_MS'],
+                nombre=alias,
+            )
+        return pool
+
+
+def metricas_pools():
+    """Métricas de los pools de este proceso, por alias"""
+    return {alias: pool.metricas() for alias, pool in list(_pools.items()) if pool.pid == os.getpid()}
+
+
+def cerrar_pools():
+    """Cierra las conexiones libres de todos los pools de este proceso"""
+    for pool in list(_pools.values()):
+        if pool.pid == os.getpid():
+            pool.cerrar_todas()
+
+
+class ConexionesEnPoolMixin:
+    """
+    Mixin para el DatabaseWrapper de un backend de Django: connect() toma la
+    conexión del pool del alias y close() la devuelve.
+    """
+    conexion_reutilizada = False
+
+    def pool(self):
+        return pool_para(self.alias, self.cerrar_conexion, self.validar_conexion)
+
+    def cerrar_conexion(self, conexion):
+        conexion.close()
+
+    def validar_conexion(self, conexion):
+        # Sin reconexión implícita (PyMySQL reconecta por defecto), que
+        # perdería el estado de sesión de init_command
+        conexion.ping(False)
+        return True
+
+    def get_new_connection(self, conn_params):
+        crear = super().get_new_connection
+        try:
+            conexion, self.conexion_reutilizada = self.pool().obtener(lambda: crear(conn_params))
+        except PoolAgotado as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+        return conexion
+
+    def init_connection_state(self):
+        # El estado de sesión se fijó al crear la conexión y se conserva
+        if not self.conexion_reutilizada:
+            super().init_connection_state()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        conexion = self.connection
+        pool = self.pool()
+        # Cerrada a mitad de una transacción o con errores: no se reutiliza
+        if self.in_atomic_block or (self.errors_occurred and not self.is_usable()):
+            pool.descartar(conexion)
+            return
+        if not self.get_autocommit():
+            try:
+                conexion.rollback()
+            except Exception:
+                pool.descartar(conexion)
+                return
+        pool.devolver(conexion)
@@ -0,0 +1,70 @@
+"""Renderer y parser JSON rápidos basados en orjson.
+
+JSONRapidoRenderer produce exactamente el mismo JSON que el JSONRenderer de
+DRF (compacto, UTF-8 sin escapar) pero codifica en C. Los tipos que orjson
+no conoce o que DRF representa de otra forma (Decimal como número,
+datetime con sufijo Z, time, timedelta, QuerySet, cadenas perezosas...) se
+delegan en el JSONEncoder de DRF, de modo que la salida no cambia al
+activarlo. Las respuestas con sangría (``Accept: application/json;
+indent=4``) las genera DRF: orjson solo sangra a 2 espacios y con otros
+separadores.
+
+Si orjson no está instalado ambas clases se comportan como las de DRF.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+if orjson is not None:
+    OPCIONES_ORJSON = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_SERIALIZE_NUMPY
+    )
+else:  # pragma: no cover
+    OPCIONES_ORJSON = 0
+
+_codificador_drf = JSONEncoder()
+
+
+def _por_defecto(valor):
+    """Convierte los valores que orjson no serializa como lo haría DRF"""
+    return _codificador_drf.default(valor)
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """JSONRenderer de DRF con codificación orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        try:
+            return orjson.dumps(data, default=_por_defecto, option=OPCIONES_ORJSON)
+        except TypeError:
+            # Enteros fuera de 64 bits y otros casos que orjson rechaza
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class JSONRapidoParser(JSONParser):
+    """JSONParser de DRF con decodificación orjson"""
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,212 @@
+"""Réplicas de lectura de la base de datos.
+
+RouterReplicas envía a una réplica las lecturas de las peticiones de solo
+lectura (GET, HEAD, OPTIONS): listados, detalles, estadísticas y
+exportaciones. Todo lo demás (escrituras, lecturas de peticiones que
+escriben, comandos de gestión, tareas fuera de una petición) usa
+``default``, la primaria.
+
+- Lectura de lo propio escrito: en cuanto una petición escribe, el resto
+  de sus lecturas van a la primaria, y la respuesta fija al cliente a la
+  primaria durante FIJAR_SEGUNDOS mediante una cookie, para que no lea una
+  réplica que aún no recibió su escritura. Los clientes que no guardan
+  cookies (los de la API con JWT) reciben el mismo plazo en la cabecera
+  CABECERA (``X-BD-Primaria``, un timestamp Unix) y lo reenvían en sus
+  peticiones siguientes.
+- Salud: la réplica elegida se conecta antes de usarla; si falla queda
+  suspendida SUSPENSION_SEGUNDOS y la petición lee de otra réplica o de la
+  primaria.
+- Las apps de APPS_PRIMARIA (usuarios, sesiones...) siempre leen de la
+  primaria: un cambio de contraseña o una desactivación se aplica de
+  inmediato a la autenticación.
+- Cachés: una réplica atrasada puede devolver datos anteriores a la versión
+  actual de config.cache. Los snapshots se calculan dentro de
+  leer_de_primaria() y las respuestas leídas de una réplica no llevan
+  ETag ni Last-Modified (leyo_de_replica()), para que nada guarde datos
+  atrasados bajo una versión nueva.
+
+ReplicasMiddleware decide el destino de cada petición; el router lo
+consulta en cada consulta a través de una variable de contexto, de modo
+que funciona igual con vistas sync, con el ORM asíncrono y con hilos.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+REPLICAS_LECTURA_POR_DEFECTO = {
+    # Alias de DATABASES que son réplicas de 'default'
+    'ALIAS': (),
+    'FIJAR_SEGUNDOS': 5,
+    'COOKIE': 'bd_primaria',
+    'CABECERA': 'X-BD-Primaria',
+    'SUSPENSION_SEGUNDOS': 30,
+    'APPS_PRIMARIA': ('auth', 'admin', 'contenttypes', 'sessions'),
+}
+
+METODOS_LECTURA = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+_peticion = ContextVar('replicas_peticion', default=None)
+_suspendidas = {}
+_lock = threading.Lock()
+
+
+def configuracion_replicas():
+    """Configuración efectiva de REPLICAS_LECTURA con sus valores por defecto"""
+    return {**REPLICAS_LECTURA_POR_DEFECTO, **getattr(settings, 'REPLICAS_LECTURA', {})}
+
+
+class EstadoPeticion:
+    """Destino de las lecturas de una petición"""
+
+    def __init__(self, en_replica):
+        self.en_replica = en_replica
+        self.escribio = False
+        self.alias = None
+
+
+def suspender(alias, segundos):
+    with _lock:
+        _suspendidas[alias] = time.monotonic() + segundos
+
+
+def reactivar_replicas():
+    """Olvida las suspensiones por fallo (tests y diagnóstico)"""
+    with _lock:
+        _suspendidas.clear()
+
+
+def replica_disponible(configuracion=None):
+    """Alias de una réplica que acepta conexiones, o None si no queda ninguna"""
+    configuracion = configuracion or configuracion_replicas()
+    ahora = time.monotonic()
+    candidatas = [alias for alias in configuracion['ALIAS'] if _suspendidas.get(alias, 0) <= ahora]
+    random.shuffle(candidatas)
+    for alias in candidatas:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            suspender(alias, configuracion['SUSPENSION_SEGUNDOS'])
+            continue
+        return alias
+    return None
+
+
+@contextmanager
+def leer_de_primaria():
+    """Envía a la primaria las lecturas del bloque, aunque la petición use una réplica"""
+    token = _peticion.set(None)
+    try:
+        yield
+    finally:
+        _peticion.reset(token)
+
+
+def leyo_de_replica():
+    """Indica si la petición actual ya leyó de una réplica"""
+    estado = _peticion.get()
+    return estado is not None and estado.alias not in (None, DEFAULT_DB_ALIAS)
+
+
+class RouterReplicas:
+    """Router de DATABASE_ROUTERS: lecturas a réplicas, escrituras a la primaria"""
+
+    def db_for_read(self, model, **hints):
+        estado = _peticion.get()
+        if estado is None or not estado.en_replica or estado.escribio:
+            return DEFAULT_DB_ALIAS
+        configuracion = configuracion_replicas()
+        if model._meta.app_label in configuracion['APPS_PRIMARIA']:
+            return DEFAULT_DB_ALIAS
+        # Una sola réplica por petición: el conteo y la página ven los mismos datos
+        if estado.alias is None:
+            estado.alias = replica_disponible(configuracion) or DEFAULT_DB_ALIAS
+        return estado.alias
+
+    def db_for_write(self, model, **hints):
+        estado = _peticion.get()
+        if estado is not None:
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas contienen los mismos datos que la primaria
+        bases = {DEFAULT_DB_ALIAS, *configuracion_replicas()['ALIAS']}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicasMiddleware:
+    """
+    Marca cada petición de solo lectura para que lea de una réplica, salvo
+    que el cliente esté fijado a la primaria por una escritura reciente, y
+    fija al cliente tras las peticiones que escriben.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        configuracion = configuracion_replicas()
+        if not configuracion['ALIAS']:
+            return self.get_response(request)
+
+        estado = self.estado_inicial(request, configuracion)
+        token = _peticion.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _peticion.reset(token)
+        return self.fijar(response, estado, configuracion)
+
+    async def __acall__(self, request):
+        configuracion = configuracion_replicas()
+        if not configuracion['ALIAS']:
+            return await self.get_response(request)
+
+        estado = self.estado_inicial(request, configuracion)
+        token = _peticion.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _peticion.reset(token)
+        return self.fijar(response, estado, configuracion)
+
+    def estado_inicial(self, request, configuracion):
+        fijado = configuracion['COOKIE'] in request.COOKIES or self.fijado_por_cabecera(request, configuracion)
+        return EstadoPeticion(request.method in METODOS_LECTURA and not fijado)
+
+    def fijado_por_cabecera(self, request, configuracion):
+        try:
+            hasta = float(request.headers.get(configuracion['CABECERA'], ''))
+        except ValueError:
+            return False
+        # Acotado a FIJAR_SEGUNDOS: un valor lejano no fija al cliente para siempre
+        ahora = time.time()
+        return ahora < hasta <= ahora + configuracion['FIJAR_SEGUNDOS']
+
+    def fijar(self, response, estado, configuracion):
+        if estado.escribio and configuracion['FIJAR_SEGUNDOS'] > 0:
+            response[configuracion['CABECERA']] = str(int(time.time()) + configuracion['FIJAR_SEGUNDOS'])
+            response.set_cookie(
+                configuracion['COOKIE'], '1',
+                max_age=configuracion['FIJAR_SEGUNDOS'],
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
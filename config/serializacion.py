@@ -0,0 +1,143 @@
+"""Serialización rápida de listados grandes.
+
+ListaRapidaSerializer es un ListSerializer que calcula una sola vez, por
+listado, cómo obtener cada campo y produce diccionarios planos. Para las
+columnas del modelo cuyo valor ya es la representación final (cadenas,
+enteros, booleanos, claves foráneas y Decimal con la escala del campo) o
+que se formatean directamente (fechas con hora en ISO 8601) evita
+get_attribute/to_representation; el resto de campos pasa por el camino
+normal de DRF, por lo que la salida es idéntica.
+
+Se activa con ``Meta.list_serializer_class = ListaRapidaSerializer``.
+"""
+from collections.abc import Mapping
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import ISO_8601, fields, relations, serializers
+from rest_framework.settings import api_settings
+
+# Campos de DRF cuyo to_representation es la identidad para valores de ese tipo
+_IDENTIDAD = (
+    (fields.BooleanField, bool),
+    (fields.IntegerField, int),
+    (fields.CharField, str),
+)
+
+
+def _campo_modelo(serializer, atributo):
+    modelo = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if modelo is None:
+        return None
+    try:
+        campo = modelo._meta.get_field(atributo)
+    except FieldDoesNotExist:
+        return None
+    return campo if campo.concrete else None
+
+
+def _conversor_generico(campo):
+    def convertir(instancia):
+        valor = campo.get_attribute(instancia)
+        if isinstance(valor, relations.PKOnlyObject):
+            return None if valor.pk is None else campo.to_representation(valor)
+        return None if valor is None else campo.to_representation(valor)
+    return convertir
+
+
+def _conversor_identidad(campo, atributo, tipo):
+    def convertir(instancia):
+        valor = getattr(instancia, atributo)
+        if valor is None or type(valor) is tipo:
+            return valor
+        return campo.to_representation(valor)
+    return convertir
+
+
+def _conversor_decimal(campo, atributo):
+    exponente = -campo.decimal_places
+
+    def convertir(instancia):
+        valor = getattr(instancia, atributo)
+        if valor is None:
+            return None
+        if type(valor) is Decimal and valor.as_tuple().exponent == exponente:
+            return f'{valor:f}'
+        return campo.to_representation(valor)
+    return convertir
+
+
+def _conversor_fecha_hora(campo, atributo):
+    # La zona horaria se resuelve una vez por listado y no por valor
+    zona = campo.timezone if hasattr(campo, 'timezone') else campo.default_timezone()
+
+    def convertir(instancia):
+        valor = getattr(instancia, atributo)
+        if valor is None:
+            return None
+        if zona is None or type(valor) is not datetime or valor.utcoffset() is None:
+            return campo.to_representation(valor)
+        texto = valor.astimezone(zona).isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+    return convertir
+
+
+def conversor(serializer, campo):
+    """Función instancia -> representación del campo dentro de `serializer`"""
+    if campo.source == '*' or len(campo.source_attrs) != 1:
+        return _conversor_generico(campo)
+
+    atributo = campo.source_attrs[0]
+    campo_modelo = _campo_modelo(serializer, atributo)
+    if campo_modelo is None:
+        return _conversor_generico(campo)
+
+    if isinstance(campo, relations.PrimaryKeyRelatedField):
+        if campo.pk_field is None and campo.use_pk_only_optimization():
+            attname = campo_modelo.attname
+            return lambda instancia: getattr(instancia, attname)
+        return _conversor_generico(campo)
+
+    if (
+        type(campo).to_representation is fields.DecimalField.to_representation
+        and getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        and campo.decimal_places is not None
+        and not campo.localize
+        and not campo.normalize_output
+    ):
+        return _conversor_decimal(campo, atributo)
+
+    if (
+        type(campo).to_representation is fields.DateTimeField.to_representation
+        and getattr(campo, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601
+    ):
+        return _conversor_fecha_hora(campo, atributo)
+
+    for clase, tipo in _IDENTIDAD:
+        if isinstance(campo, clase) and type(campo).to_representation is clase.to_representation:
+            return _conversor_identidad(campo, atributo, tipo)
+    return _conversor_generico(campo)
+
+
+class ListaRapidaSerializer(serializers.ListSerializer):
+    """ListSerializer que genera diccionarios planos con conversores precalculados"""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        hijo = self.child
+        if type(hijo).to_representation is not serializers.Serializer.to_representation:
+            return [hijo.to_representation(item) for item in iterable]
+
+        plan = [(campo.field_name, conversor(hijo, campo)) for campo in hijo._readable_fields]
+        filas = []
+        for item in iterable:
+            if isinstance(item, Mapping):
+                filas.append(hijo.to_representation(item))
+                continue
+            try:
+                filas.append({nombre: convertir(item) for nombre, convertir in plan})
+            except fields.SkipField:
+                filas.append(hijo.to_representation(item))
+        return filas
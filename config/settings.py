@@ -20,6 +20,7 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=120),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshRevocableSerializer',
 }
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -47,29 +48,46 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'drf_spectacular',
     'django_filters',
     'sensores',
     'consumo_agua',
-    'drf_yasg',
     'corsheaders',
     # Local apps
     'zonas_riego',
     'programaciones',
-    'accounts'
+    'accounts',
+    # Comandos de gestión del proyecto (config/management), p. ej. generar_esquema
+    'config',
 ]
 
+# Documentación de la API en /, /swagger/ y /redoc/. Desactivada, drf_yasg no
+# se registra ni se importan sus vistas: arranque más rápido y menos memoria
+# por worker
+API_DOCUMENTACION = config('API_DOCS', default=True, cast=bool)
+if API_DOCUMENTACION:
+    INSTALLED_APPS.append('drf_yasg')
+
+# Esquema OpenAPI pregenerado (config/esquema.py, manage.py generar_esquema)
+ESQUEMA_API = {
+    'DIRECTORIO': config('API_DOCS_DIRECTORIO', default=str(BASE_DIR / 'esquema')),
+    'GENERAR_SI_FALTA': config('API_DOCS_GENERAR_SI_FALTA', default=True, cast=bool),
+}
+
 
 MIDDLEWARE = [
+    'config.metricas.MetricasMiddleware',
+    'config.instrumentation.ConsultasSQLMiddleware',
+    'config.replicas.ReplicasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.perfilado.PerfiladoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
+    'config.asincrono.WhiteNoiseAsincronoMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -106,28 +124,72 @@ DATABASES = {
         'OPTIONS': {
             'init_command': config('DB_OPTIONS_INIT_COMMAND', default="SET sql_mode='STRICT_TRANS_TABLES'"),
             'charset': config('DB_OPTIONS_CHARSET', default='utf8mb4'),
-        }
+        },
+        # Segundos que se reutiliza la conexión entre peticiones (0: una por petición)
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+        # Comprueba una conexión persistente antes de reutilizarla
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
-# Django REST Framework + drf-spectacular
-REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ),
-    'DEFAULT_PERMISSION_CLASSES': (
-        'rest_framework.permissions.IsAuthenticated',
-    ),
+# Pool de conexiones para MySQL (config/pool.py), útil con workers de hilos o
+# ASGI. Sustituye a CONN_MAX_AGE: la conexión vuelve al pool tras cada petición
+POOL_CONEXIONES = {
+    'ACTIVO': config('DB_POOL', default=False, cast=bool),
+    'TAMANO': config('DB_POOL_TAMANO', default=10, cast=int),
+    # Segundos que una petición espera una conexión libre antes de fallar
+    'ESPERA_MAXIMA': config('DB_POOL_ESPERA_MAXIMA', default=5.0, cast=float),
+    # Menor que el wait_timeout del servidor MySQL
+    'VIDA_MAXIMA': config('DB_POOL_VIDA_MAXIMA', default=1800, cast=int),
+    'VERIFICAR_TRAS': config('DB_POOL_VERIFICAR_TRAS', default=30, cast=int),
+    'AVISO_ESPERA_MS': config('DB_POOL_AVISO_ESPERA_MS', default=100, cast=int),
 }
 
+if POOL_CONEXIONES['ACTIVO'] and DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+    DATABASES['default']['ENGINE'] = 'config.backends.mysql'
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Réplicas de lectura (config/replicas.py). DB_REPLICAS lista el host de cada
+# réplica (con SQLite, su archivo); el resto de la configuración es la de
+# 'default'. En los tests apuntan a la base de datos de prueba de 'default'
+_CLAVE_REPLICA = 'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'
+for _indice, _destino in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica{_indice}'] = {
+        **DATABASES['default'],
+        _CLAVE_REPLICA: _destino,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['config.replicas.RouterReplicas']
 
-SPECTACULAR_SETTINGS = {
-    'TITLE': 'Gestión de Riego - API',
-    'DESCRIPTION': 'API para proyecto de gestión de riego automatizado',
-    'VERSION': '1.0.0',
+REPLICAS_LECTURA = {
+    'ALIAS': [alias for alias in DATABASES if alias != 'default'],
+    # Segundos que un cliente lee de la primaria después de escribir
+    'FIJAR_SEGUNDOS': config('DB_REPLICAS_FIJAR_SEGUNDOS', default=5, cast=int),
+    # Segundos sin usar una réplica que rechazó la conexión
+    'SUSPENSION_SEGUNDOS': config('DB_REPLICAS_SUSPENSION', default=30, cast=int),
+}
+
+# Caché (snapshots de estadísticas y ETag, config/cache.py). Con varios workers
+# hace falta un backend compartido, p. ej. django.core.cache.backends.redis.RedisCache
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='gestion-riego'),
+    }
 }
+# Los snapshots y los ETag se basan en contadores de CACHES['default']: con
+# una caché por proceso (LocMemCache) un worker no vería las escrituras de
+# otro, así que se desactivan. CACHE_COMPARTIDA=True los activa igualmente
+# cuando hay un solo proceso
+CACHE_COMPARTIDA = config(
+    'CACHE_COMPARTIDA',
+    default=CACHES['default']['BACKEND'] not in (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.dummy.DummyCache',
+    ),
+    cast=bool,
+)
 
 
 # Password validation
@@ -175,7 +237,16 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Django REST Framework
+# Renderer y parser JSON con orjson (config/renderers.py); False usa los de DRF
+API_JSON_RAPIDO = config('API_JSON_RAPIDO', default=True, cast=bool)
+
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'config.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_PERMISSION_CLASSES': (
+        'rest_framework.permissions.IsAuthenticated',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
@@ -184,9 +255,14 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'config.renderers.JSONRapidoRenderer' if API_JSON_RAPIDO else 'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.JSONRapidoParser' if API_JSON_RAPIDO else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 # CORS Settings
@@ -197,6 +273,67 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # Solo en desarrollo
 
+# Instrumentación de consultas SQL por petición (config/instrumentation.py).
+# Normalizar cada consulta tiene un costo: en producción se activa a propósito
+INSTRUMENTACION_SQL = {
+    'ACTIVA': config('SQL_INSTRUMENTACION', default=DEBUG, cast=bool),
+    'CABECERAS': config('SQL_INSTRUMENTACION_CABECERAS', default=DEBUG, cast=bool),
+    'UMBRAL_N_MAS_UNO': config('SQL_UMBRAL_N_MAS_UNO', default=5, cast=int),
+}
+
+# Métricas para Prometheus en /metrics (config/metricas.py). Cada worker
+# escribe en un archivo propio del directorio, que se vacía al desplegar
+METRICAS = {
+    'ACTIVO': config('METRICAS', default=True, cast=bool),
+    'DIRECTORIO': config('METRICAS_DIRECTORIO', default=str(BASE_DIR / '.metricas')),
+    # Con token, el scraper envía "Authorization: Bearer <token>"; sin él,
+    # solo se aceptan scrapes desde la propia máquina y con DEBUG
+    'TOKEN': config('METRICAS_TOKEN', default=''),
+}
+
+# Lotes de peticiones en /api/batch/ (config/lotes.py): las lecturas
+# consecutivas de un lote se ejecutan en paralelo en HILOS hilos por worker
+LOTE_API = {
+    'MAX_PETICIONES': config('LOTE_API_MAX_PETICIONES', default=20, cast=int),
+    'HILOS': config('LOTE_API_HILOS', default=4, cast=int),
+}
+
+# Perfilado bajo demanda para usuarios staff (config/perfilado.py):
+# cabecera X-Perfilar o ?perfilar= con 1 (Server-Timing) o cprofile. Envuelve
+# métodos de DRF en todo el proceso: por defecto solo con DEBUG
+PERFILADO = {
+    'ACTIVO': config('PERFILADO', default=DEBUG, cast=bool),
+    'DIRECTORIO': config('PERFILADO_DIRECTORIO', default=str(BASE_DIR / 'perfiles')),
+    'MAX_ARCHIVOS': config('PERFILADO_MAX_ARCHIVOS', default=50, cast=int),
+}
+
+# Caché del usuario autenticado por JWT (config/authentication.py)
+AUTENTICACION_CACHE = {
+    'ACTIVA': config('AUTH_CACHE', default=True, cast=bool),
+    # Segundos que un usuario permanece en la caché en memoria de cada proceso
+    'TTL': config('AUTH_CACHE_TTL', default=30, cast=int),
+    'MAX_ENTRADAS': config('AUTH_CACHE_MAX_ENTRADAS', default=1024, cast=int),
+    # Segundo nivel en CACHES['default'], útil con una caché compartida entre workers
+    'COMPARTIDA': config('AUTH_CACHE_COMPARTIDA', default=False, cast=bool),
+    'TTL_COMPARTIDA': config('AUTH_CACHE_TTL_COMPARTIDA', default=300, cast=int),
+}
+
+# Lista de revocación de tokens (accounts/revocacion.py). Los workers de una
+# misma máquina comparten el archivo de sello para enterarse de las revocaciones;
+# los de otras máquinas, el contador de versión de CACHES si es compartida
+REVOCACION_TOKENS = {
+    'ARCHIVO_SELLO': config('REVOCACION_ARCHIVO_SELLO', default=str(BASE_DIR / '.revocacion_tokens')),
+    'INTERVALO_SINCRONIZACION': config('REVOCACION_INTERVALO', default=1.0, cast=float),
+}
+
+# Cálculo de requerimientos hídricos por evapotranspiración (zonas_riego/evapotranspiracion.py)
+EVAPOTRANSPIRACION = {
+    # Latitud en grados (negativa al sur) para la radiación extraterrestre de Hargreaves
+    'LATITUD': config('ET_LATITUD', default=-33.45, cast=float),
+    # Fracción del agua aplicada que aprovecha el cultivo
+    'EFICIENCIA_RIEGO': config('ET_EFICIENCIA_RIEGO', default=0.85, cast=float),
+}
+
 # Swagger Settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -205,5 +342,10 @@ SWAGGER_SETTINGS = {
         }
     },
     'USE_SESSION_AUTH': False,
+    # Swagger UI y ReDoc leen el esquema pregenerado en lugar de generarlo
+    'SPEC_URL': ('schema-json', {'formato': 'json'}),
+}
+REDOC_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'formato': 'json'}),
 }
 
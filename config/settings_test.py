@@ -0,0 +1,19 @@
+"""
+Ajustes de los tests: los de config/settings.py más la base de datos
+``replica_prueba``, CACHE_COMPARTIDA y el perfilado desactivado.
+``manage.py test`` los usa por defecto y pytest-django los toma de
+pytest.ini.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, PERFILADO
+
+# Réplica de los tests de config/replicas.py: un espejo de la base de prueba
+# de 'default', fuera de REPLICAS_LECTURA['ALIAS'] para que el resto de los
+# tests lea de la primaria
+DATABASES['replica_prueba'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+# Los tests del perfilado lo activan y restauran DRF al terminar
+PERFILADO = {**PERFILADO, 'ACTIVO': False}
+
+# Los tests corren en un solo proceso: la caché local vale como compartida
+CACHE_COMPARTIDA = True
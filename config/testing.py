@@ -0,0 +1,32 @@
+"""Utilidades compartidas por los tests de las aplicaciones."""
+from contextlib import contextmanager
+
+from .instrumentation import RegistroConsultas, configuracion_instrumentacion
+
+
+class PresupuestoConsultasMixin:
+    """
+    Mixin para TestCase que permite fijar un presupuesto de consultas SQL
+    por endpoint y detectar plantillas repetidas (N+1).
+
+    Uso::
+
+        with self.assertPresupuestoConsultas(2):
+            self.client.get('/api/zonas/')
+    """
+
+    @contextmanager
+    def assertPresupuestoConsultas(self, maximo, umbral_n_mas_uno=None):
+        if umbral_n_mas_uno is None:
+            umbral_n_mas_uno = configuracion_instrumentacion()['UMBRAL_N_MAS_UNO']
+
+        with RegistroConsultas() as registro:
+            yield registro
+
+        detalle = '\n'.join(f'{veces}x {sql}' for sql, veces in registro.plantillas.most_common())
+        self.assertLessEqual(
+            registro.total, maximo,
+            f'Se ejecutaron {registro.total} consultas, presupuesto {maximo}:\n{detalle}'
+        )
+        repetidas = registro.repetidas(umbral_n_mas_uno)
+        self.assertFalse(repetidas, f'Posible N+1:\n{detalle}')
@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class APIAutenticadaTestCase(TestCase):
+    """
+    TestCase con un usuario ``tester`` y un APIClient autenticado como él.
+
+    Los tests que necesitan pasar por la autenticación JWT real llaman a
+    ``autenticar_con_jwt()``.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+
+    def autenticar_con_jwt(self, user=None):
+        """Cambia el cliente a un token JWT de ``user`` (por defecto, el de prueba)"""
+        self.token = f'Bearer {AccessToken.for_user(user or self.user)}'
+        self.client.force_authenticate(user=None)
+        self.client.credentials(HTTP_AUTHORIZATION=self.token)
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from consumo_agua.models import Medidor, Consumo
+from sensores.models import Sensor, Lectura
+from .base import APIAutenticadaTestCase
+
+
+class VistasAsincronasTestCase(APIAutenticadaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.autenticar_con_jwt()
+        self.sensor = Sensor.objects.create(nombre='Sensor 1', tipo='HUMEDAD')
+        ahora = timezone.now()
+        Lectura.objects.bulk_create([
+            Lectura(sensor=self.sensor, humedad=30 + indice, fecha_hora=ahora - timezone.timedelta(hours=indice))
+            for indice in range(15)
+        ])
+
+    def test_lecturas_igual_que_la_vista_sincrona(self):
+        sincrona = self.client.get(f'/api/lecturas/?sensor={self.sensor.id}&page=2').json()
+        asincrona = self.client.get(f'/api/async/lecturas/?sensor={self.sensor.id}&page=2').json()
+        self.assertEqual(asincrona['count'], 15)
+        self.assertEqual(asincrona['results'], sincrona['results'])
+        self.assertIsNotNone(asincrona['previous'])
+        self.assertIsNone(asincrona['next'])
+
+        resp = self.client.get('/api/async/lecturas/?sensor=9999')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get('/api/async/lecturas/?page=9')
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requiere_jwt(self):
+        resp = APIClient().get('/api/async/lecturas/')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('Bearer', resp['WWW-Authenticate'])
+
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION='Bearer token-invalido')
+        resp = cliente.get(f'/api/async/sensores/{self.sensor.id}/estadisticas/')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(resp.json()['code'], 'token_not_valid')
+
+        resp = self.client.post('/api/async/lecturas/')
+        self.assertEqual(resp.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_peticiones_concurrentes(self):
+        medidor = await Medidor.objects.acreate(numero_serie='M-1', instalado=date(2025, 1, 1))
+        await Consumo.objects.acreate(medidor=medidor, fecha=date(2025, 1, 2), volumen_m3=Decimal('1.25'))
+        await Consumo.objects.acreate(medidor=medidor, fecha=date(2025, 1, 3), volumen_m3=Decimal('2.50'))
+
+        cliente = AsyncClient()
+        cabeceras = {'Authorization': self.token}
+        estadisticas, vigentes, consumo, inexistente = await asyncio.gather(
+            cliente.get(f'/api/async/sensores/{self.sensor.id}/estadisticas/', headers=cabeceras),
+            cliente.get('/api/async/programaciones/vigentes/', headers=cabeceras),
+            cliente.get(f'/api/async/medidores/{medidor.id}/total_consumo/', headers=cabeceras),
+            cliente.get('/api/async/sensores/9999/estadisticas/', headers=cabeceras),
+        )
+        self.assertEqual(estadisticas.json(), {'sensor': self.sensor.id, 'avg_humedad': 37.0})
+        self.assertEqual(vigentes.json(), [])
+        self.assertEqual(consumo.json(), {'medidor': 'M-1', 'total_consumo_m3': 3.75})
+        self.assertEqual(inexistente.status_code, status.HTTP_404_NOT_FOUND)
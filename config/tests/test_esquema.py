@@ -0,0 +1,79 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from rest_framework import status
+from config import esquema
+
+
+class EsquemaAPITestCase(SimpleTestCase):
+    def setUp(self):
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        self.directorio = temporal.name
+        ajustes = self.settings(ESQUEMA_API={'DIRECTORIO': self.directorio})
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        esquema.olvidar_esquemas()
+        self.addCleanup(esquema.olvidar_esquemas)
+
+    def test_se_genera_una_vez_y_se_sirve_comprimido_con_etag(self):
+        with mock.patch.object(esquema, 'generar', wraps=esquema.generar) as generar:
+            resp = self.client.get('/swagger.json', HTTP_ACCEPT_ENCODING='gzip, br')
+            self.client.get('/swagger.json')
+        self.assertEqual(generar.call_count, 1)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        documento = json.loads(gzip.decompress(resp.content))
+        self.assertIn('/api/zonas/', documento['paths'])
+
+        resp = self.client.get('/swagger.json', HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp.content, b'')
+
+    def test_comando_pregenera_los_archivos(self):
+        call_command('generar_esquema', stdout=StringIO())
+        self.assertEqual(
+            sorted(os.listdir(self.directorio)),
+            ['openapi.json', 'openapi.json.gz', 'openapi.yaml', 'openapi.yaml.gz'],
+        )
+
+        with mock.patch.object(esquema, 'generar') as generar:
+            resp = self.client.get('/swagger.yaml')
+        generar.assert_not_called()
+        self.assertEqual(resp['Content-Type'], 'application/yaml')
+        with open(os.path.join(self.directorio, 'openapi.yaml'), 'rb') as archivo:
+            self.assertEqual(resp.content, archivo.read())
+
+    def test_sin_archivos_ni_generacion_perezosa(self):
+        with self.settings(ESQUEMA_API={'DIRECTORIO': self.directorio, 'GENERAR_SI_FALTA': False}):
+            self.assertEqual(self.client.get('/swagger.json').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sin_documentacion_no_se_carga_drf_yasg(self):
+        # Proceso aparte: en este ya están importados drf_yasg y las vistas
+        codigo = (
+            'import sys, django; django.setup(); import config.urls; '
+            'from zonas_riego.views import ZonaViewSet; '
+            'assert "drf_yasg" not in sys.modules, "drf_yasg cargado"; '
+            'assert callable(ZonaViewSet.resumen), "vista perdida"'
+        )
+        resultado = subprocess.run(
+            [sys.executable, '-c', codigo],
+            env={**os.environ, 'API_DOCS': 'False'},
+            capture_output=True, text=True, timeout=60,
+        )
+        self.assertEqual(resultado.returncode, 0, resultado.stderr)
+
+        with self.settings(API_DOCUMENTACION=False):
+            salida = StringIO()
+            call_command('generar_esquema', stdout=salida)
+        self.assertIn('no se genera', salida.getvalue())
+        self.assertEqual(os.listdir(self.directorio), [])
@@ -0,0 +1,96 @@
+import threading
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from config import lotes
+from config.authentication import CachedJWTAuthentication
+from sensores.models import Sensor, Lectura
+from .base import APIAutenticadaTestCase
+
+
+class LoteAPITestCase(APIAutenticadaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sensor = Sensor.objects.create(nombre='Sensor 1', tipo='HUMEDAD')
+        self.autenticar_con_jwt()
+
+    def lote(self, *peticiones):
+        return self.client.post('/api/batch/', {'peticiones': list(peticiones)}, format='json')
+
+    def test_lecturas_y_escrituras_con_una_autenticacion(self):
+        fecha = timezone.now().isoformat()
+        with mock.patch.object(CachedJWTAuthentication, 'authenticate', autospec=True,
+                               side_effect=CachedJWTAuthentication.authenticate) as autenticar:
+            resp = self.lote(
+                {'id': 'sensores', 'ruta': '/api/sensores/'},
+                {'id': 'falta', 'ruta': '/api/zonas/999999/'},
+                {'id': 'nueva', 'metodo': 'POST', 'ruta': '/api/lecturas/',
+                 'cuerpo': {'sensor': self.sensor.id, 'humedad': '41.50', 'fecha_hora': fecha}},
+                {'id': 'invalida', 'metodo': 'POST', 'ruta': '/api/lecturas/',
+                 'cuerpo': {'sensor': self.sensor.id, 'humedad': '150', 'fecha_hora': fecha}},
+                {'ruta': f'/api/lecturas/?sensor={self.sensor.id}'},
+            )
+        self.assertEqual(autenticar.call_count, 1)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        respuestas = resp.json()['respuestas']
+        self.assertEqual([r['id'] for r in respuestas], ['sensores', 'falta', 'nueva', 'invalida', '4'])
+        self.assertEqual([r['estado'] for r in respuestas], [200, 404, 201, 400, 200])
+        self.assertEqual(respuestas[0]['cuerpo']['results'][0]['nombre'], 'Sensor 1')
+        self.assertIn('humedad', respuestas[3]['cuerpo'])
+        # La lectura posterior ve la escritura anterior del mismo lote
+        self.assertEqual(respuestas[4]['cuerpo']['count'], 1)
+
+    def test_vistas_asincronas(self):
+        Lectura.objects.create(sensor=self.sensor, humedad=30, fecha_hora=timezone.now())
+        resp = self.lote({'ruta': f'/api/async/sensores/{self.sensor.id}/estadisticas/'})
+        self.assertEqual(resp.json()['respuestas'][0], {
+            'id': '0', 'estado': 200, 'cuerpo': {'sensor': self.sensor.id, 'avg_humedad': 30.0},
+        })
+
+    def test_validaciones(self):
+        self.assertEqual(self.lote({'ruta': '/admin/'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.lote().status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(LOTE_API={'MAX_PETICIONES': 1}):
+            resp = self.lote({'ruta': '/api/sensores/'}, {'ruta': '/api/zonas/'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        resp = self.lote({'metodo': 'POST', 'ruta': '/api/batch/', 'cuerpo': {'peticiones': []}})
+        self.assertEqual(resp.json()['respuestas'][0]['estado'], 400)
+
+        resp = APIClient().post('/api/batch/', {'peticiones': [{'ruta': '/api/sensores/'}]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LoteAPIParaleloTestCase(TransactionTestCase):
+    def test_lecturas_consecutivas_en_paralelo_y_escrituras_en_orden(self):
+        user = User.objects.create_user(username='tester', password='clave-segura-123')
+        sensor = Sensor.objects.create(nombre='Sensor 1', tipo='HUMEDAD')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+        hilos = {}
+        despachar = lotes.despachar
+
+        def registrar(request, peticion, indice):
+            hilos[indice] = threading.current_thread().name
+            return despachar(request, peticion, indice)
+
+        with mock.patch.object(lotes, 'despachar', side_effect=registrar):
+            resp = client.post('/api/batch/', {'peticiones': [
+                {'ruta': '/api/sensores/'},
+                {'ruta': f'/api/sensores/{sensor.id}/'},
+                {'metodo': 'PATCH', 'ruta': f'/api/sensores/{sensor.id}/', 'cuerpo': {'nombre': 'Renombrado'}},
+                {'ruta': f'/api/sensores/{sensor.id}/'},
+                {'ruta': '/api/zonas/'},
+            ]}, format='json')
+
+        self.assertEqual([r['estado'] for r in resp.json()['respuestas']], [200, 200, 200, 200, 200])
+        self.assertEqual(resp.json()['respuestas'][3]['cuerpo']['nombre'], 'Renombrado')
+        principal = threading.current_thread().name
+        self.assertEqual(hilos[2], principal)
+        self.assertTrue(all(hilos[indice].startswith('lote-api') for indice in (0, 1, 3, 4)))
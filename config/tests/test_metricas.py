@@ -0,0 +1,94 @@
+import os
+import tempfile
+from django.utils import timezone
+from rest_framework import status
+from config import metricas
+from sensores.models import Sensor, Lectura
+from .base import APIAutenticadaTestCase
+
+
+class MetricasTestCase(APIAutenticadaTestCase):
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        ajustes = self.settings(
+            METRICAS={'DIRECTORIO': self.directorio, 'BUCKETS': (0.1, 1.0), 'TOKEN': 'secreto'},
+            INSTRUMENTACION_SQL={'ACTIVA': True},
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        metricas.reiniciar()
+        self.addCleanup(metricas.reiniciar)
+        self.sensor = Sensor.objects.create(nombre='Sensor 1', tipo='HUMEDAD')
+
+    def series(self):
+        resp = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return dict(
+            linea.rsplit(' ', 1) for linea in resp.content.decode().splitlines() if not linea.startswith('#')
+        )
+
+    def test_peticiones_consultas_e_ingesta(self):
+        self.client.get('/api/sensores/')
+        self.client.get('/api/sensores/')
+        resp = self.client.post('/api/lecturas/', {
+            'sensor': self.sensor.id, 'humedad': '40.00', 'fecha_hora': timezone.now().isoformat()
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        Lectura.objects.create(sensor=self.sensor, humedad=41, fecha_hora=timezone.now())
+
+        series = self.series()
+        self.assertEqual(series['riego_http_peticiones_total{estado="200",metodo="GET",vista="sensor-list"}'], '2.0')
+        etiquetas = 'metodo="GET",vista="sensor-list"'
+        self.assertEqual(series[f'riego_http_duracion_segundos_count{{{etiquetas}}}'], '2.0')
+        self.assertEqual(series[f'riego_http_duracion_segundos_bucket{{{etiquetas},le="+Inf"}}'], '2.0')
+        self.assertIn(f'riego_http_duracion_segundos_bucket{{{etiquetas},le="0.1"}}', series)
+        self.assertGreater(float(series['riego_db_consultas_total{vista="sensor-list"}']), 0)
+        self.assertEqual(series['riego_ingesta_filas_total{tipo="lectura"}'], '2.0')
+        # La petición a /metrics sigue en curso durante el scrape
+        self.assertEqual(series['riego_http_peticiones_en_curso{}'], '1.0')
+
+    def test_agrega_los_archivos_de_todos_los_workers(self):
+        metricas.registrar_ingesta('consumo', 3)
+        # Un worker terminado: cuentan sus contadores pero no sus gauges
+        otro = metricas.ArchivoMetricas(os.path.join(self.directorio, 'metricas_999999999.db'))
+        otro.incrementar('riego_ingesta_filas_total{tipo="consumo"}', 4)
+        otro.incrementar('riego_http_peticiones_en_curso{}', 7)
+        otro.cerrar()
+
+        series = self.series()
+        self.assertEqual(series['riego_ingesta_filas_total{tipo="consumo"}'], '7.0')
+        self.assertEqual(series['riego_http_peticiones_en_curso{}'], '1.0')
+
+        # Sus contadores pasan al archivo de este proceso y su archivo se borra
+        self.assertEqual(os.listdir(self.directorio), [f'metricas_{os.getpid()}.db'])
+        self.assertEqual(self.series()['riego_ingesta_filas_total{tipo="consumo"}'], '7.0')
+
+    def test_al_arrancar_fusiona_los_workers_terminados(self):
+        metricas.reiniciar()
+        for pid in (999999998, 999999999):
+            otro = metricas.ArchivoMetricas(os.path.join(self.directorio, f'metricas_{pid}.db'))
+            otro.incrementar('riego_ingesta_filas_total{tipo="lectura"}', 2)
+            otro.cerrar()
+
+        metricas.registrar_ingesta('lectura')
+
+        self.assertEqual(os.listdir(self.directorio), [f'metricas_{os.getpid()}.db'])
+        self.assertEqual(metricas.agregar(self.directorio)['riego_ingesta_filas_total{tipo="lectura"}'], 5.0)
+
+    def test_acceso(self):
+        resp = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        resp = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        # Sin token solo se aceptan scrapes locales y con DEBUG
+        with self.settings(METRICAS={'DIRECTORIO': self.directorio}):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+            with self.settings(DEBUG=True):
+                self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_200_OK)
+                resp = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7')
+                self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,71 @@
+import os
+import pstats
+import tempfile
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+from config.perfilado import desinstalar_medidores
+from sensores.models import Sensor
+from .base import APIAutenticadaTestCase
+
+
+class PerfiladoTestCase(APIAutenticadaTestCase):
+    def setUp(self):
+        super().setUp()
+        ajustes = self.settings(PERFILADO={'ACTIVO': True})
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.addCleanup(desinstalar_medidores)
+        self.staff = User.objects.create_user(username='staff', password='clave-segura-123', is_staff=True)
+        self.sensor = Sensor.objects.create(nombre='Sensor 1', tipo='HUMEDAD')
+        self.autenticar_con_jwt(self.staff)
+
+    def test_server_timing_para_staff(self):
+        resp = self.client.get('/api/sensores/', HTTP_X_PERFILAR='1')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        fases = [parte.split(';')[0] for parte in resp['Server-Timing'].split(', ')]
+        self.assertEqual(fases, ['auth', 'serialize', 'render', 'db', 'total'])
+        self.assertNotIn('X-Perfil-Archivo', resp)
+
+        # Sin la marca o sin ser staff la petición no se perfila
+        self.assertNotIn('Server-Timing', self.client.get('/api/sensores/'))
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        resp = cliente.get('/api/sensores/?perfilar=1')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', resp)
+
+    def test_drf_intacto_sin_perfilado(self):
+        original = APIView.perform_authentication
+        with self.settings(PERFILADO={'ACTIVO': False}):
+            self.assertNotIn('Server-Timing', self.client.get('/api/sensores/?perfilar=1'))
+        self.assertIs(APIView.perform_authentication, original)
+
+        self.assertIn('Server-Timing', APIClient(HTTP_AUTHORIZATION=self.token).get('/api/sensores/?perfilar=1'))
+        self.assertIsNot(APIView.perform_authentication, original)
+        desinstalar_medidores()
+        self.assertIs(APIView.perform_authentication, original)
+
+    def test_cprofile_a_archivo(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            with self.settings(PERFILADO={'ACTIVO': True, 'DIRECTORIO': directorio, 'MAX_ARCHIVOS': 1}):
+                self.client.get('/api/sensores/?perfilar=cprofile')
+                resp = self.client.get(f'/api/sensores/{self.sensor.id}/?perfilar=cprofile')
+            self.assertIn('Server-Timing', resp)
+            archivos = os.listdir(directorio)
+            self.assertEqual(archivos, [resp['X-Perfil-Archivo']])
+            self.assertTrue(archivos[0].endswith(f'-GET-api-sensores-{self.sensor.id}.prof'))
+            estadisticas = pstats.Stats(os.path.join(directorio, archivos[0]))
+            self.assertTrue(estadisticas.total_calls)
+
+    async def test_server_timing_asgi(self):
+        staff = await User.objects.aget(username='staff')
+        resp = await AsyncClient().get(
+            f'/api/async/sensores/{self.sensor.id}/estadisticas/',
+            headers={'Authorization': f'Bearer {AccessToken.for_user(staff)}', 'X-Perfilar': '1'},
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertRegex(resp['Server-Timing'], r'^db;dur=[\d.]+;desc="2 consultas", total;dur=')
@@ -0,0 +1,66 @@
+import threading
+import time as reloj
+from django.test import SimpleTestCase
+from config.pool import PoolAgotado, PoolConexiones
+
+
+class ConexionFalsa:
+    def __init__(self):
+        self.cerrada = False
+        self.utilizable = True
+
+
+class PoolConexionesTestCase(SimpleTestCase):
+    def crear_pool(self, **opciones):
+        def cerrar(conexion):
+            conexion.cerrada = True
+        return PoolConexiones(cerrar, lambda conexion: conexion.utilizable, **opciones)
+
+    def test_reutiliza_conexiones(self):
+        pool = self.crear_pool(tamano=2)
+        conexion, reutilizada = pool.obtener(ConexionFalsa)
+        self.assertFalse(reutilizada)
+        pool.devolver(conexion)
+        self.assertEqual(pool.obtener(ConexionFalsa), (conexion, True))
+
+        metricas = pool.metricas()
+        self.assertEqual((metricas['creadas'], metricas['reutilizadas'], metricas['en_uso']), (1, 1, 1))
+
+    def test_acotado_espera_y_agota(self):
+        pool = self.crear_pool(tamano=1, espera_maxima=0.05)
+        conexion, _ = pool.obtener(ConexionFalsa)
+        with self.assertRaises(PoolAgotado):
+            pool.obtener(ConexionFalsa)
+
+        pool.espera_maxima = 5
+        threading.Timer(0.05, pool.devolver, [conexion]).start()
+        self.assertEqual(pool.obtener(ConexionFalsa), (conexion, True))
+
+        metricas = pool.metricas()
+        self.assertEqual((metricas['abiertas'], metricas['esperas'], metricas['agotado']), (1, 1, 1))
+        self.assertGreaterEqual(metricas['espera_maxima_ms'], 40)
+
+    def test_descarta_conexiones_no_utilizables_o_viejas(self):
+        pool = self.crear_pool(tamano=1, verificar_tras=0)
+        conexion, _ = pool.obtener(ConexionFalsa)
+        conexion.utilizable = False
+        pool.devolver(conexion)
+        nueva, reutilizada = pool.obtener(ConexionFalsa)
+        self.assertFalse(reutilizada)
+        self.assertTrue(conexion.cerrada)
+
+        pool.vida_maxima = 0.01
+        pool.devolver(nueva)
+        reloj.sleep(0.02)
+        self.assertIsNot(pool.obtener(ConexionFalsa)[0], nueva)
+        self.assertEqual(pool.metricas()['descartadas'], 2)
+
+    def test_error_al_crear_libera_la_plaza(self):
+        pool = self.crear_pool(tamano=1, espera_maxima=0.05)
+
+        def fallar():
+            raise ConnectionError('sin servidor')
+
+        with self.assertRaises(ConnectionError):
+            pool.obtener(fallar)
+        self.assertFalse(pool.obtener(ConexionFalsa)[1])
@@ -0,0 +1,63 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import numpy as np
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+from config.renderers import JSONRapidoRenderer
+from sensores.models import Sensor, Lectura
+from sensores.serializers import LecturaSerializer
+from .base import APIAutenticadaTestCase
+
+
+class JSONRapidoTestCase(APIAutenticadaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sensor = Sensor.objects.create(nombre='Sensor ñandú', tipo='HUMEDAD')
+        ahora = timezone.now()
+        Lectura.objects.bulk_create([
+            Lectura(sensor=self.sensor, humedad=Decimal(valor), fecha_hora=ahora - timezone.timedelta(minutes=indice))
+            for indice, valor in enumerate(['45.5', '0', '100.00', '12.34'])
+        ])
+
+    def test_lista_rapida_igual_a_drf(self):
+        lecturas = Lectura.objects.all()
+        rapida = LecturaSerializer(lecturas, many=True).data
+        clasica = ListSerializer(lecturas, child=LecturaSerializer()).data
+        self.assertEqual(rapida, clasica)
+        self.assertEqual({fila['humedad'] for fila in rapida}, {'45.50', '0.00', '100.00', '12.34'})
+
+    def test_renderer_igual_a_drf(self):
+        datos = {
+            'decimal': Decimal('12.50'),
+            'fecha_hora': datetime(2025, 1, 1, 8, 30, tzinfo=dt_timezone.utc),
+            'fecha': date(2025, 1, 1),
+            'hora': time(8, 30),
+            'duracion': timedelta(minutes=5),
+            'texto': 'Zona ñandú',
+            'lista': np.array([1.5, 2.0]),
+            1: None,
+        }
+        self.assertEqual(JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))
+
+        for indent in (2, 4):
+            contexto = {'indent': indent}
+            self.assertEqual(
+                JSONRapidoRenderer().render(datos, 'application/json', contexto),
+                JSONRenderer().render(datos, 'application/json', contexto),
+            )
+        media = 'application/json; indent=4'
+        self.assertEqual(JSONRapidoRenderer().render(datos, media), JSONRenderer().render(datos, media))
+
+    def test_peticion_json(self):
+        resp = self.client.get('/api/lecturas/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json()['count'], 4)
+
+        resp = self.client.post('/api/sensores/', b'{"nombre": "Sensor X", ', content_type='application/json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('JSON parse error', resp.json()['detail'])
+
+        resp = self.client.post('/api/sensores/', {'nombre': 'Sensor X', 'tipo': 'HUMEDAD'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 class ConsumoAguaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'consumo_agua'
+
+    def ready(self):
+        from config.cache import registrar_invalidacion
+        from config.metricas import registrar_ingesta_modelos
+        registrar_invalidacion(self.get_model('Medidor'), dependientes=[self.get_model('Consumo')])
+        registrar_ingesta_modelos(self.get_model('Consumo'))
@@ -1,12 +1,24 @@
 from django_filters import rest_framework as filters
-from .models import Consumo
+from .models import Consumo, Medidor
+
+class MedidorFilter(filters.FilterSet):
+    numero_serie = filters.CharFilter(lookup_expr='istartswith')
+    ubicacion = filters.CharFilter(lookup_expr='icontains')
+    sin_zona = filters.BooleanFilter(field_name='zona', lookup_expr='isnull')
+    instalado_desde = filters.DateFilter(field_name='instalado', lookup_expr='gte')
+    instalado_hasta = filters.DateFilter(field_name='instalado', lookup_expr='lte')
+
+    class Meta:
+        model = Medidor
+        fields = ['numero_serie', 'zona', 'ubicacion', 'sin_zona', 'instalado_desde', 'instalado_hasta']
 
 class ConsumoFilter(filters.FilterSet):
     fecha_min = filters.DateFilter(field_name='fecha', lookup_expr='gte')
     fecha_max = filters.DateFilter(field_name='fecha', lookup_expr='lte')
     volumen_min = filters.NumberFilter(field_name='volumen_m3', lookup_expr='gte')
     volumen_max = filters.NumberFilter(field_name='volumen_m3', lookup_expr='lte')
+    zona = filters.NumberFilter(field_name='medidor__zona')
 
     class Meta:
         model = Consumo
-        fields = ['medidor', 'fecha_min', 'fecha_max', 'volumen_min', 'volumen_max']
+        fields = ['medidor', 'zona', 'fecha_min', 'fecha_max', 'volumen_min', 'volumen_max']
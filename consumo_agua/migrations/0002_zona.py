@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _normalizar(texto):
+    return ' '.join((texto or '').split()).casefold()
+
+
+def asignar_zona_por_ubicacion(apps, schema_editor):
+    """Asocia cada medidor a la zona cuya ubicación (o nombre) coincide con su ubicación"""
+    Zona = apps.get_model('zonas_riego', 'Zona')
+    Medidor = apps.get_model('consumo_agua', 'Medidor')
+
+    filas = list(Zona.objects.values_list('id', 'nombre', 'ubicacion'))
+    zonas = {_normalizar(nombre): zona_id for zona_id, nombre, _ in filas}
+    # La ubicación de la zona tiene prioridad sobre su nombre
+    zonas.update({_normalizar(ubicacion): zona_id for zona_id, _, ubicacion in filas if _normalizar(ubicacion)})
+
+    medidores = []
+    for medidor in Medidor.objects.exclude(ubicacion='').only('id', 'ubicacion'):
+        zona_id = zonas.get(_normalizar(medidor.ubicacion))
+        if zona_id is not None:
+            medidor.zona_id = zona_id
+            medidores.append(medidor)
+    Medidor.objects.bulk_update(medidores, ['zona'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consumo_agua', '0001_initial'),
+        ('zonas_riego', '0002_delete_sensor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medidor',
+            name='zona',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='medidores', to='zonas_riego.zona'),
+        ),
+        migrations.RunPython(asignar_zona_por_ubicacion, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,13 @@ from django.db import models
 class Medidor(models.Model):
     numero_serie = models.CharField(max_length=100, unique=True)
     ubicacion = models.CharField(max_length=200, blank=True)
+    zona = models.ForeignKey(
+        'zonas_riego.Zona',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='medidores'
+    )
     instalado = models.DateField()
 
     def __str__(self):
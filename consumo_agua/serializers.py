@@ -1,15 +1,22 @@
 from rest_framework import serializers
 from .models import Medidor, Consumo
+from zonas_riego.serializers import ZonaSimpleSerializer
+from config.campos import CamposDinamicosSerializerMixin
+from config.serializacion import ListaRapidaSerializer
 
-class MedidorSerializer(serializers.ModelSerializer):
+class MedidorSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Medidor
         fields = '__all__'
+        expandibles = {'zona': ZonaSimpleSerializer}
+        list_serializer_class = ListaRapidaSerializer
 
-class ConsumoSerializer(serializers.ModelSerializer):
+class ConsumoSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Consumo
         fields = '__all__'
+        expandibles = {'medidor': MedidorSerializer}
+        list_serializer_class = ListaRapidaSerializer
 
     def validate_volumen_m3(self, value):
         if value < 0:
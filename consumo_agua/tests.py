@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from config.testing import PresupuestoConsultasMixin
+from .models import Medidor, Consumo
+
+
+class ConsumoAguaAPITestCase(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        hoy = date.today()
+        self.medidores = [
+            Medidor.objects.create(numero_serie=f'MED-{indice:03d}', instalado=hoy - timedelta(days=365))
+            for indice in range(6)
+        ]
+        Consumo.objects.bulk_create([
+            Consumo(medidor=medidor, fecha=hoy - timedelta(days=dia), volumen_m3=1 + dia)
+            for medidor in self.medidores
+            for dia in range(3)
+        ])
+
+    def test_presupuesto_consultas_medidores(self):
+        medidor = self.medidores[0]
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/medidores/')
+        self.assertEqual(resp.data['count'], 6)
+
+        with self.assertPresupuestoConsultas(1):
+            self.client.get(f'/api/medidores/{medidor.id}/')
+
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get(f'/api/medidores/{medidor.id}/total_consumo/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['total_consumo_m3'], 6)
+
+    def test_presupuesto_consultas_consumos(self):
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/consumos/')
+        self.assertEqual(resp.data['count'], 18)
+
+        # El filtro por FK valida que el objeto exista
+        with self.assertPresupuestoConsultas(3):
+            resp = self.client.get(f'/api/consumos/?medidor={self.medidores[0].id}')
+        self.assertEqual(resp.data['count'], 3)
@@ -1,8 +1,11 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import MedidorViewSet, ConsumoViewSet
+from .views import MedidorViewSet, ConsumoViewSet, total_consumo_async
 
 router = DefaultRouter()
 router.register('medidores', MedidorViewSet)
 router.register('consumos', ConsumoViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('async/medidores/<int:pk>/total_consumo/', total_consumo_async, name='medidor-total-consumo-async'),
+] + router.urls
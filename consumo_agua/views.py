@@ -3,14 +3,22 @@ from django.db.models import Sum
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Medidor, Consumo
 from .serializers import MedidorSerializer, ConsumoSerializer
-from .filters import ConsumoFilter
+from .filters import ConsumoFilter, MedidorFilter
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from config.authentication import CachedJWTAuthentication
+from config.cache import incrementar_version
+from config.condicional import GetCondicionalMixin
+from config.campos import CamposDinamicosViewSetMixin
+from config.masivo import OperacionesMasivasMixin
+from config.asincrono import vista_jwt_async, respuesta_json
+from django.views.decorators.http import require_GET
 
-class MedidorViewSet(viewsets.ModelViewSet):
+class MedidorViewSet(OperacionesMasivasMixin, GetCondicionalMixin, CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     queryset = Medidor.objects.all()
     serializer_class = MedidorSerializer
-    authentication_classes = [JWTAuthentication]
+    # Filtros de /api/medidores/masivo/
+    filterset_masivo = MedidorFilter
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
 
@@ -27,10 +35,34 @@ class MedidorViewSet(viewsets.ModelViewSet):
         total = qs.aggregate(total=Sum('volumen_m3'))['total']
         return response.Response({'medidor': medidor.numero_serie, 'total_consumo_m3': total})
 
-class ConsumoViewSet(viewsets.ModelViewSet):
+class ConsumoViewSet(GetCondicionalMixin, CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     queryset = Consumo.objects.all()
     serializer_class = ConsumoSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = ConsumoFilter
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
+
+    def perform_destroy(self, instance):
+        # Consumo no escucha post_delete para conservar el borrado rápido
+        super().perform_destroy(instance)
+        incrementar_version(Consumo)
+
+
+@require_GET
+@vista_jwt_async
+async def total_consumo_async(request, pk):
+    """GET /api/async/medidores/{id}/total_consumo/ - Igual que /api/medidores/{id}/total_consumo/"""
+    try:
+        medidor = await Medidor.objects.aget(pk=pk)
+    except Medidor.DoesNotExist:
+        return respuesta_json({'detail': 'No encontrado.'}, status=404)
+    qs = medidor.consumos.all()
+    fecha_min = request.GET.get('fecha_min')
+    fecha_max = request.GET.get('fecha_max')
+    if fecha_min:
+        qs = qs.filter(fecha__gte=fecha_min)
+    if fecha_max:
+        qs = qs.filter(fecha__lte=fecha_max)
+    total = (await qs.aaggregate(total=Sum('volumen_m3')))['total']
+    return respuesta_json({'medidor': medidor.numero_serie, 'total_consumo_m3': total})
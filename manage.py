@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    # Los tests usan config/settings_test.py (base de datos de réplica de prueba)
+    ajustes = 'config.settings_test' if sys.argv[1:2] == ['test'] else 'config.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', ajustes)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
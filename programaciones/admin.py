@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Programacion
+from .models import Programacion, EjecucionRiego, ResumenDiarioRiego, DecisionRiego
 
 
 @admin.register(Programacion)
@@ -28,3 +28,37 @@ class ProgramacionAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(EjecucionRiego)
+class EjecucionRiegoAdmin(admin.ModelAdmin):
+    list_display = ['programacion', 'zona', 'inicio', 'duracion_minutos', 'consumo_litros']
+    list_filter = ['zona']
+    list_select_related = ['programacion', 'zona']
+    
+    # El log de ejecuciones es de solo inserción
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ResumenDiarioRiego)
+class ResumenDiarioRiegoAdmin(admin.ModelAdmin):
+    list_display = ['zona', 'fecha', 'ejecuciones', 'minutos', 'litros']
+    list_filter = ['zona']
+    date_hierarchy = 'fecha'
+    list_select_related = ['zona']
+
+
+@admin.register(DecisionRiego)
+class DecisionRiegoAdmin(admin.ModelAdmin):
+    list_display = [
+        'programacion', 'zona', 'inicio_previsto', 'decision',
+        'humedad_proyectada', 'duracion_programada', 'duracion_ajustada'
+    ]
+    list_filter = ['decision', 'zona']
+    date_hierarchy = 'evaluada_en'
+    list_select_related = ['programacion', 'zona']
+    
+    # Las decisiones son un log de solo inserción
+    def has_change_permission(self, request, obj=None):
+        return False
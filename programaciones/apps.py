@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProgramacionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'programaciones'
+
+    def ready(self):
+        from config.cache import registrar_invalidacion
+        registrar_invalidacion(self.get_model('Programacion'))
@@ -0,0 +1,298 @@
+"""Motor de decisiones de riego en lazo cerrado.
+
+En cada tick se evalúan a la vez todas las ocurrencias de programaciones
+vigentes que empiezan dentro de la ventana [ahora, ahora + ventana). La
+humedad de cada zona se proyecta al inicio del riego a partir de su última
+lectura y de la tendencia reciente (pendiente por mínimos cuadrados) y, según
+el resultado, la ocurrencia se ejecuta tal cual, se omite, se acorta o se
+extiende sin salir de los límites de duracion_minutos de la programación.
+
+Los datos se cargan con dos consultas (programaciones vigentes y lecturas
+recientes) y la evaluación se hace con arreglos de NumPy.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from sensores.models import Lectura
+from .models import Programacion, EjecucionRiego, DecisionRiego
+from .ocurrencias import duraciones_maximas, matriz_ocurrencias
+from .services import registrar_ejecuciones
+
+# Humedad proyectada (%) a partir de la cual se omite el riego
+UMBRAL_OMITIR = 70.0
+# Por encima de la humedad objetivo se acorta el riego y por debajo del
+# umbral de extensión se alarga, en ambos casos de forma proporcional
+HUMEDAD_OBJETIVO = 50.0
+UMBRAL_EXTENDER = 30.0
+FACTOR_MINIMO = 0.5
+FACTOR_MAXIMO = 1.5
+
+VENTANA_MINUTOS = 60
+HORAS_TENDENCIA = 6
+
+DECISIONES = [codigo for codigo, _ in DecisionRiego.DECISION_CHOICES]
+EJECUTAR = DECISIONES.index('ejecutar')
+OMITIR = DECISIONES.index('omitir')
+ACORTAR = DECISIONES.index('acortar')
+EXTENDER = DECISIONES.index('extender')
+
+
+def tendencia_zonas(zona_idx, horas, humedad, n_zonas):
+    """
+    Última humedad, antigüedad de esa lectura (horas, <= 0) y pendiente en %
+    por hora de cada zona.
+
+    Recibe las lecturas ordenadas por zona y tiempo con `horas` relativas al
+    momento del tick. Las zonas sin lecturas quedan con humedad NaN.
+    """
+    ultima = np.full(n_zonas, np.nan)
+    antiguedad = np.zeros(n_zonas)
+    pendiente = np.zeros(n_zonas)
+    if zona_idx.size == 0:
+        return ultima, antiguedad, pendiente
+
+    fin = np.r_[zona_idx[1:] != zona_idx[:-1], True]
+    ultima[zona_idx[fin]] = humedad[fin]
+    antiguedad[zona_idx[fin]] = horas[fin]
+
+    # Regresión lineal por zona a partir de sumas acumuladas
+    n = np.bincount(zona_idx, minlength=n_zonas)
+    suma_t = np.bincount(zona_idx, weights=horas, minlength=n_zonas)
+    suma_h = np.bincount(zona_idx, weights=humedad, minlength=n_zonas)
+    suma_tt = np.bincount(zona_idx, weights=horas * horas, minlength=n_zonas)
+    suma_th = np.bincount(zona_idx, weights=horas * humedad, minlength=n_zonas)
+    denominador = n * suma_tt - suma_t ** 2
+    validas = (n >= 2) & (denominador > 1e-9)
+    pendiente[validas] = (n * suma_th - suma_t * suma_h)[validas] / denominador[validas]
+    return ultima, antiguedad, pendiente
+
+
+def decidir(humedad, pendiente, horas_hasta, duracion, duracion_maxima):
+    """
+    Decide cada ocurrencia a partir de arreglos paralelos.
+
+    `humedad` es la última lectura de la zona (NaN si no hay datos, en cuyo
+    caso se ejecuta sin cambios) y `horas_hasta` el tiempo entre esa lectura
+    y el inicio del riego. Devuelve (códigos de DECISIONES, duración ajustada
+    en minutos, humedad proyectada).
+    """
+    con_datos = ~np.isnan(humedad)
+    proyectada = np.clip(humedad + pendiente * horas_hasta, 0, 100)
+
+    exceso = (proyectada - HUMEDAD_OBJETIVO) / (UMBRAL_OMITIR - HUMEDAD_OBJETIVO)
+    deficit = (UMBRAL_EXTENDER - proyectada) / UMBRAL_EXTENDER
+    factor_acortar = 1 - exceso * (1 - FACTOR_MINIMO)
+    factor_extender = 1 + deficit * (FACTOR_MAXIMO - 1)
+    factor = np.select(
+        [proyectada > HUMEDAD_OBJETIVO, proyectada < UMBRAL_EXTENDER],
+        [factor_acortar, factor_extender],
+        1.0
+    )
+    factor = np.where(con_datos, factor, 1.0)
+
+    maxima = np.maximum(duracion_maxima, 1)
+    ajustada = np.clip(np.rint(duracion * factor), 1, maxima).astype(np.int64)
+    omitir = con_datos & (proyectada >= UMBRAL_OMITIR)
+    codigos = np.select(
+        [omitir, ajustada < duracion, ajustada > duracion],
+        [OMITIR, ACORTAR, EXTENDER],
+        EJECUTAR
+    )
+    ajustada[omitir] = 0
+    return codigos, ajustada, proyectada
+
+
+def evaluar_tick(programaciones, lecturas, ahora, ventana_minutos=VENTANA_MINUTOS):
+    """
+    Evalúa en una sola pasada las ocurrencias que empiezan en la ventana.
+
+    `programaciones` son tuplas (id, zona_id, hora_inicio, duracion_minutos,
+    caudal_litros_minuto, capacidad_agua_litros, frecuencia, dias_semana,
+    fecha_inicio, fecha_fin) y `lecturas` tuplas (zona_id, fecha_hora,
+    humedad) ordenadas por zona y fecha; la humedad llega ya como float desde
+    la consulta para no convertir Decimals fila a fila. Devuelve un diccionario de arreglos
+    con una posición por ocurrencia.
+    """
+    ahora = timezone.localtime(ahora)
+    vacio = np.zeros(0, dtype=np.int64)
+    resultado = {
+        'programacion': vacio, 'zona': vacio, 'inicio_minutos': vacio.astype(float),
+        'humedad': vacio.astype(float), 'tendencia': vacio.astype(float),
+        'humedad_proyectada': vacio.astype(float), 'decision': vacio,
+        'duracion': vacio, 'duracion_ajustada': vacio,
+    }
+    if not programaciones:
+        return resultado
+
+    fechas = [ahora.date() + timedelta(days=offset) for offset in range(ventana_minutos // 1440 + 2)]
+    ocurre = matriz_ocurrencias(
+        [fila[6] for fila in programaciones],
+        [fila[7] for fila in programaciones],
+        [fila[8] for fila in programaciones],
+        [fila[9] for fila in programaciones],
+        fechas
+    )
+    minuto_dia = np.array([fila[2].hour * 60 + fila[2].minute + fila[2].second / 60 for fila in programaciones])
+    minuto_ahora = ahora.hour * 60 + ahora.minute + ahora.second / 60
+
+    programacion_idx, dia_idx = np.nonzero(ocurre)
+    inicio_minutos = dia_idx * 1440 + minuto_dia[programacion_idx] - minuto_ahora
+    en_ventana = (inicio_minutos >= 0) & (inicio_minutos < ventana_minutos)
+    programacion_idx = programacion_idx[en_ventana]
+    inicio_minutos = inicio_minutos[en_ventana]
+    if programacion_idx.size == 0:
+        return resultado
+
+    ids = np.array([fila[0] for fila in programaciones], dtype=np.int64)
+    zona_ids = np.array([fila[1] for fila in programaciones], dtype=np.int64)
+    duracion = np.array([fila[3] for fila in programaciones], dtype=np.int64)
+    caudal = np.array([float(fila[4]) for fila in programaciones])
+    capacidad = np.array([float(fila[5]) for fila in programaciones])
+    # El consumo de un riego no puede superar la capacidad de la zona
+    duracion_maxima = duraciones_maximas(caudal, capacidad).astype(np.int64)
+
+    zonas, zona_programacion = np.unique(zona_ids, return_inverse=True)
+    n_zonas = zonas.size
+    if lecturas:
+        zona_lectura = np.array([fila[0] for fila in lecturas], dtype=np.int64)
+        posicion = np.minimum(np.searchsorted(zonas, zona_lectura), n_zonas - 1)
+        conocidas = zonas[posicion] == zona_lectura
+        referencia = ahora.timestamp()
+        horas = (np.array([fila[1].timestamp() for fila in lecturas]) - referencia) / 3600
+        humedad = np.array([fila[2] for fila in lecturas], dtype=float)
+        ultima, antiguedad, pendiente = tendencia_zonas(
+            posicion[conocidas], horas[conocidas], humedad[conocidas], n_zonas
+        )
+    else:
+        ultima, antiguedad, pendiente = tendencia_zonas(vacio, vacio, vacio, n_zonas)
+
+    zona_ocurrencia = zona_programacion[programacion_idx]
+    humedad_ocurrencia = ultima[zona_ocurrencia]
+    pendiente_ocurrencia = pendiente[zona_ocurrencia]
+    horas_hasta = inicio_minutos / 60 - antiguedad[zona_ocurrencia]
+    codigos, ajustada, proyectada = decidir(
+        humedad_ocurrencia,
+        pendiente_ocurrencia,
+        horas_hasta,
+        duracion[programacion_idx],
+        duracion_maxima[programacion_idx]
+    )
+
+    resultado.update({
+        'programacion': ids[programacion_idx],
+        'zona': zona_ids[programacion_idx],
+        'inicio_minutos': inicio_minutos,
+        'humedad': humedad_ocurrencia,
+        'tendencia': np.where(np.isnan(humedad_ocurrencia), np.nan, pendiente_ocurrencia),
+        'humedad_proyectada': proyectada,
+        'decision': codigos,
+        'duracion': duracion[programacion_idx],
+        'duracion_ajustada': ajustada,
+    })
+    return resultado
+
+
+def cargar_datos_tick(ahora, ventana_minutos=VENTANA_MINUTOS, horas_tendencia=HORAS_TENDENCIA, zona_ids=None):
+    """Programaciones vigentes y lecturas recientes de humedad: una consulta cada una"""
+    ahora = timezone.localtime(ahora)
+    fin = ahora + timedelta(minutes=ventana_minutos)
+
+    programaciones = (
+        Programacion.objects
+        .filter(activa=True, zona__activa=True, fecha_inicio__lte=fin.date())
+        .filter(Q(fecha_fin__gte=ahora.date()) | Q(fecha_fin__isnull=True))
+    )
+    lecturas = Lectura.objects.filter(
+        sensor__tipo='HUMEDAD',
+        sensor__zona__activa=True,
+        fecha_hora__gte=ahora - timedelta(hours=horas_tendencia),
+        fecha_hora__lte=ahora,
+    )
+    if zona_ids:
+        programaciones = programaciones.filter(zona_id__in=zona_ids)
+        lecturas = lecturas.filter(sensor__zona_id__in=zona_ids)
+
+    programaciones = list(programaciones.order_by().values_list(
+        'id', 'zona_id', 'hora_inicio', 'duracion_minutos', 'caudal_litros_minuto',
+        'zona__capacidad_agua_litros', 'frecuencia', 'dias_semana', 'fecha_inicio', 'fecha_fin'
+    ))
+    lecturas = list(
+        lecturas
+        .annotate(humedad_float=Cast('humedad', FloatField()))
+        .order_by('sensor__zona_id', 'fecha_hora')
+        .values_list('sensor__zona_id', 'fecha_hora', 'humedad_float')
+    )
+    return programaciones, lecturas
+
+
+def _decimal(valor):
+    return None if np.isnan(valor) else Decimal(f'{valor:.2f}')
+
+
+def ejecutar_tick(ahora=None, ventana_minutos=VENTANA_MINUTOS, horas_tendencia=HORAS_TENDENCIA,
+                  zona_ids=None, registrar=True, ejecutar=False):
+    """
+    Ejecuta un tick del motor: carga los datos, decide todas las ocurrencias
+    de la ventana y, opcionalmente, registra las decisiones en DecisionRiego
+    y las ejecuciones no omitidas con registrar_ejecuciones.
+
+    Para que cada ocurrencia se evalúe una sola vez, el tick debe lanzarse
+    cada `ventana_minutos`. Devuelve la lista de DecisionRiego.
+    """
+    ahora = timezone.localtime(ahora)
+    programaciones, lecturas = cargar_datos_tick(ahora, ventana_minutos, horas_tendencia, zona_ids)
+    resultado = evaluar_tick(programaciones, lecturas, ahora, ventana_minutos)
+    referencia = ahora.replace(microsecond=0)
+
+    decisiones = [
+        DecisionRiego(
+            programacion_id=int(programacion_id),
+            zona_id=int(zona_id),
+            evaluada_en=ahora,
+            inicio_previsto=referencia + timedelta(seconds=round(float(inicio_minutos) * 60)),
+            decision=DECISIONES[codigo],
+            humedad_actual=_decimal(humedad),
+            tendencia=None if np.isnan(tendencia) else round(float(tendencia), 3),
+            humedad_proyectada=_decimal(proyectada),
+            duracion_programada=int(duracion),
+            duracion_ajustada=int(ajustada),
+        )
+        for programacion_id, zona_id, inicio_minutos, humedad, tendencia, proyectada, codigo, duracion, ajustada
+        in zip(
+            resultado['programacion'], resultado['zona'], resultado['inicio_minutos'],
+            resultado['humedad'], resultado['tendencia'], resultado['humedad_proyectada'],
+            resultado['decision'], resultado['duracion'], resultado['duracion_ajustada']
+        )
+    ]
+
+    if not decisiones or not (registrar or ejecutar):
+        return decisiones
+
+    with transaction.atomic():
+        if registrar:
+            DecisionRiego.objects.bulk_create(decisiones, batch_size=1000)
+
+        if ejecutar:
+            caudales = {fila[0]: fila[4] for fila in programaciones}
+            registrar_ejecuciones(
+                EjecucionRiego(
+                    programacion_id=decision.programacion_id,
+                    zona_id=decision.zona_id,
+                    inicio=decision.inicio_previsto,
+                    hora_inicio=timezone.localtime(decision.inicio_previsto).time(),
+                    duracion_minutos=decision.duracion_ajustada,
+                    caudal_litros_minuto=caudales[decision.programacion_id],
+                    consumo_litros=caudales[decision.programacion_id] * decision.duracion_ajustada,
+                    observaciones=f'Decisión automática: {decision.get_decision_display().lower()}',
+                )
+                for decision in decisiones
+                if decision.decision != 'omitir'
+            )
+
+    return decisiones
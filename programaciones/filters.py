@@ -1,5 +1,5 @@
 import django_filters
-from .models import Programacion
+from .models import Programacion, EjecucionRiego, ResumenDiarioRiego, DecisionRiego
 
 
 class ProgramacionFilter(django_filters.FilterSet):
@@ -27,3 +27,40 @@ class ProgramacionFilter(django_filters.FilterSet):
             'duracion_min', 'duracion_max',
             'prioridad_min', 'prioridad_max'
         ]
+
+
+
+class EjecucionRiegoFilter(django_filters.FilterSet):
+    """Filtros para el log de ejecuciones de riego"""
+    zona = django_filters.NumberFilter(field_name='zona_id')
+    programacion = django_filters.NumberFilter(field_name='programacion_id')
+    inicio_desde = django_filters.DateTimeFilter(field_name='inicio', lookup_expr='gte')
+    inicio_hasta = django_filters.DateTimeFilter(field_name='inicio', lookup_expr='lte')
+    
+    class Meta:
+        model = EjecucionRiego
+        fields = ['zona', 'programacion', 'inicio_desde', 'inicio_hasta']
+
+
+class ResumenDiarioRiegoFilter(django_filters.FilterSet):
+    """Filtros para los resúmenes diarios de riego"""
+    zona = django_filters.NumberFilter(field_name='zona_id')
+    fecha_desde = django_filters.DateFilter(field_name='fecha', lookup_expr='gte')
+    fecha_hasta = django_filters.DateFilter(field_name='fecha', lookup_expr='lte')
+    
+    class Meta:
+        model = ResumenDiarioRiego
+        fields = ['zona', 'fecha_desde', 'fecha_hasta']
+
+
+class DecisionRiegoFilter(django_filters.FilterSet):
+    """Filtros para el log de decisiones del motor de riego"""
+    zona = django_filters.NumberFilter(field_name='zona_id')
+    programacion = django_filters.NumberFilter(field_name='programacion_id')
+    decision = django_filters.ChoiceFilter(choices=DecisionRiego.DECISION_CHOICES)
+    evaluada_desde = django_filters.DateTimeFilter(field_name='evaluada_en', lookup_expr='gte')
+    evaluada_hasta = django_filters.DateTimeFilter(field_name='evaluada_en', lookup_expr='lte')
+    
+    class Meta:
+        model = DecisionRiego
+        fields = ['zona', 'programacion', 'decision', 'evaluada_desde', 'evaluada_hasta']
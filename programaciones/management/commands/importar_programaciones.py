@@ -0,0 +1,57 @@
+import csv
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from programaciones.services import importar_programaciones
+
+
+def _leer_csv(ruta):
+    """Lee un CSV con cabecera; dias_semana admite JSON o valores separados por ';'"""
+    filas = []
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        for fila in csv.DictReader(archivo):
+            fila = {clave: valor for clave, valor in fila.items() if valor not in (None, '')}
+            dias = fila.get('dias_semana')
+            if dias is not None:
+                dias = dias.strip()
+                if dias.startswith('['):
+                    fila['dias_semana'] = json.loads(dias)
+                else:
+                    fila['dias_semana'] = [int(dia) for dia in dias.split(';') if dia.strip()]
+            filas.append(fila)
+    return filas
+
+
+class Command(BaseCommand):
+    help = 'Importa programaciones en bloque desde un archivo JSON (lista de objetos) o CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .json o .csv')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Cantidad de filas por inserción masiva (por defecto 500)'
+        )
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        if not ruta.exists():
+            raise CommandError(f'No existe el archivo {ruta}')
+
+        try:
+            if ruta.suffix.lower() == '.csv':
+                filas = _leer_csv(ruta)
+            else:
+                filas = json.loads(ruta.read_text(encoding='utf-8'))
+        except (ValueError, csv.Error) as exc:
+            raise CommandError(f'No se pudo leer {ruta}: {exc}')
+
+        if not isinstance(filas, list):
+            raise CommandError('El archivo debe contener una lista de programaciones.')
+
+        creadas, errores = importar_programaciones(filas, chunk_size=options['chunk_size'])
+
+        for error in errores:
+            self.stderr.write(f"Fila {error['fila']}: {json.dumps(error['errores'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f'{creadas} programaciones importadas, {len(errores)} filas con errores.'
+        ))
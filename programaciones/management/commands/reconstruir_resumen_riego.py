@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from programaciones.services import reconstruir_resumen_diario
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los resúmenes diarios de riego a partir del log de ejecuciones'
+
+    def handle(self, *args, **options):
+        total = reconstruir_resumen_diario()
+        self.stdout.write(self.style.SUCCESS(f'{total} resúmenes diarios recalculados.'))
@@ -0,0 +1,46 @@
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from programaciones.decisiones import HORAS_TENDENCIA, VENTANA_MINUTOS, ejecutar_tick
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta un tick del motor de decisiones de riego. Debe programarse (cron, systemd) '
+        'con la misma periodicidad que --ventana para evaluar cada ocurrencia una sola vez'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ventana', type=int, default=VENTANA_MINUTOS,
+            help=f'Minutos hacia adelante que cubre el tick (por defecto {VENTANA_MINUTOS})'
+        )
+        parser.add_argument(
+            '--horas-tendencia', type=int, default=HORAS_TENDENCIA,
+            help=f'Horas de lecturas usadas para estimar la tendencia (por defecto {HORAS_TENDENCIA})'
+        )
+        parser.add_argument(
+            '--ejecutar', action='store_true',
+            help='Registra como ejecuciones los riegos que no se omiten'
+        )
+        parser.add_argument(
+            '--sin-registro', action='store_true',
+            help='No guarda las decisiones en el log'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        decisiones = ejecutar_tick(
+            ventana_minutos=options['ventana'],
+            horas_tendencia=options['horas_tendencia'],
+            registrar=not options['sin_registro'],
+            ejecutar=options['ejecutar'],
+        )
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        conteo = Counter(decision.decision for decision in decisiones)
+        detalle = ', '.join(f'{codigo}: {cantidad}' for codigo, cantidad in sorted(conteo.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(decisiones)} ocurrencias evaluadas en {duracion_ms:.1f} ms'
+            + (f' ({detalle})' if detalle else '')
+        ))
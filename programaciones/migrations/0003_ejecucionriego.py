@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programaciones', '0002_delete_historialriego'),
+        ('zonas_riego', '0002_delete_sensor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionRiego',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateTimeField(default=django.utils.timezone.now, help_text='Momento en que se ejecutó el riego')),
+                ('hora_inicio', models.TimeField(help_text='Hora de inicio informada para el riego')),
+                ('duracion_minutos', models.PositiveIntegerField(help_text='Duración real del riego en minutos')),
+                ('caudal_litros_minuto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('consumo_litros', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('observaciones', models.TextField(blank=True)),
+                ('programacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ejecuciones', to='programaciones.programacion')),
+                ('zona', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ejecuciones', to='zonas_riego.zona')),
+            ],
+            options={
+                'verbose_name': 'Ejecución de Riego',
+                'verbose_name_plural': 'Ejecuciones de Riego',
+                'ordering': ['-inicio'],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programaciones', '0003_ejecucionriego'),
+        ('zonas_riego', '0002_delete_sensor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioRiego',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('ejecuciones', models.PositiveIntegerField(default=0)),
+                ('minutos', models.PositiveBigIntegerField(default=0)),
+                ('litros', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Riego',
+                'verbose_name_plural': 'Resúmenes Diarios de Riego',
+                'ordering': ['-fecha', 'zona'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ejecucionriego',
+            index=models.Index(fields=['zona', 'inicio'], name='ejecucion_zona_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ejecucionriego',
+            index=models.Index(fields=['programacion', 'inicio'], name='ejecucion_prog_inicio_idx'),
+        ),
+        migrations.AddField(
+            model_name='resumendiarioriego',
+            name='zona',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_riego', to='zonas_riego.zona'),
+        ),
+        migrations.AddIndex(
+            model_name='resumendiarioriego',
+            index=models.Index(fields=['fecha'], name='resumen_riego_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiarioriego',
+            constraint=models.UniqueConstraint(fields=('zona', 'fecha'), name='resumen_riego_zona_fecha_unico'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programaciones', '0004_resumendiarioriego'),
+        ('zonas_riego', '0002_delete_sensor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DecisionRiego',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evaluada_en', models.DateTimeField(help_text='Momento del tick que tomó la decisión')),
+                ('inicio_previsto', models.DateTimeField(help_text='Inicio de la ocurrencia evaluada')),
+                ('decision', models.CharField(choices=[('ejecutar', 'Ejecutar'), ('omitir', 'Omitir'), ('acortar', 'Acortar'), ('extender', 'Extender')], max_length=10)),
+                ('humedad_actual', models.DecimalField(blank=True, decimal_places=2, help_text='Última humedad de la zona (%), vacía si no hay lecturas recientes', max_digits=5, null=True)),
+                ('tendencia', models.FloatField(blank=True, help_text='Variación de humedad en % por hora', null=True)),
+                ('humedad_proyectada', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('duracion_programada', models.PositiveIntegerField()),
+                ('duracion_ajustada', models.PositiveIntegerField(help_text='0 si la ocurrencia se omite')),
+                ('programacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='decisiones', to='programaciones.programacion')),
+                ('zona', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='decisiones_riego', to='zonas_riego.zona')),
+            ],
+            options={
+                'verbose_name': 'Decisión de Riego',
+                'verbose_name_plural': 'Decisiones de Riego',
+                'ordering': ['-evaluada_en', 'inicio_previsto'],
+                'indexes': [models.Index(fields=['zona', 'evaluada_en'], name='decision_zona_evaluada_idx'), models.Index(fields=['programacion', 'inicio_previsto'], name='decision_prog_inicio_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programaciones', '0005_decisionriego'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='decisionriego',
+            name='programacion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='decisiones', to='programaciones.programacion'),
+        ),
+        migrations.AlterField(
+            model_name='ejecucionriego',
+            name='programacion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ejecuciones', to='programaciones.programacion'),
+        ),
+    ]
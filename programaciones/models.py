@@ -1,3 +1,5 @@
+import calendar
+from datetime import datetime, timedelta
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
@@ -5,6 +7,18 @@ from zonas_riego.models import Zona
 from django.utils import timezone
 
 
+def indices_dias_semana(dias_semana):
+    """Convierte una lista de días (0-6 o nombres en español) a índices 0 (lunes) a 6 (domingo)"""
+    nombres = [dia for dia, _ in Programacion.DIAS_SEMANA_CHOICES]
+    indices = set()
+    for dia in dias_semana or []:
+        if isinstance(dia, int) and 0 <= dia <= 6:
+            indices.add(dia)
+        elif dia in nombres:
+            indices.add(nombres.index(dia))
+    return indices
+
+
 class Programacion(models.Model):
     """
     Modelo para representar programaciones de riego
@@ -125,3 +139,161 @@ class Programacion(models.Model):
         if self.fecha_fin and hoy > self.fecha_fin:
             return False
         return True
+    
+    @property
+    def dias_semana_indices(self):
+        """Días de la semana como índices 0 (lunes) a 6 (domingo)"""
+        return indices_dias_semana(self.dias_semana)
+    
+    def ocurre_en(self, fecha):
+        """Indica si la programación tiene un riego previsto en la fecha dada"""
+        if not self.activa or fecha < self.fecha_inicio:
+            return False
+        if self.fecha_fin and fecha > self.fecha_fin:
+            return False
+        
+        if self.frecuencia == 'semanal':
+            return fecha.weekday() in self.dias_semana_indices
+        if self.frecuencia == 'quincenal':
+            return (fecha - self.fecha_inicio).days % 14 == 0
+        if self.frecuencia == 'mensual':
+            # En meses más cortos se riega el último día del mes
+            ultimo_dia = calendar.monthrange(fecha.year, fecha.month)[1]
+            return fecha.day == min(self.fecha_inicio.day, ultimo_dia)
+        if self.frecuencia == 'personalizada' and self.dias_semana:
+            return fecha.weekday() in self.dias_semana_indices
+        return True
+    
+    def proxima_ejecucion(self, desde=None, max_dias=62):
+        """Próximo inicio de riego (datetime con zona horaria) a partir de `desde`"""
+        desde = timezone.localtime(desde)
+        for offset in range(max_dias + 1):
+            fecha = desde.date() + timedelta(days=offset)
+            if self.fecha_fin and fecha > self.fecha_fin:
+                return None
+            if not self.ocurre_en(fecha):
+                continue
+            inicio = timezone.make_aware(datetime.combine(fecha, self.hora_inicio))
+            if inicio >= desde:
+                return inicio
+        return None
+
+
+class EjecucionRiego(models.Model):
+    """
+    Registro de una ejecución de riego de una programación.
+
+    Es un log de solo inserción: cada ejecución se acumula además en
+    ResumenDiarioRiego (por zona) para que los totales no recorran el log
+    completo. Borrar la programación no borra sus ejecuciones: quedan sin
+    programación y siguen cuadrando con el resumen.
+    """
+    programacion = models.ForeignKey(
+        Programacion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ejecuciones'
+    )
+    zona = models.ForeignKey(
+        Zona,
+        on_delete=models.CASCADE,
+        related_name='ejecuciones'
+    )
+    inicio = models.DateTimeField(default=timezone.now, help_text="Momento en que se ejecutó el riego")
+    hora_inicio = models.TimeField(help_text="Hora de inicio informada para el riego")
+    duracion_minutos = models.PositiveIntegerField(help_text="Duración real del riego en minutos")
+    caudal_litros_minuto = models.DecimalField(max_digits=10, decimal_places=2)
+    consumo_litros = models.DecimalField(max_digits=12, decimal_places=2)
+    observaciones = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'Ejecución de Riego'
+        verbose_name_plural = 'Ejecuciones de Riego'
+        ordering = ['-inicio']
+        indexes = [
+            models.Index(fields=['zona', 'inicio'], name='ejecucion_zona_inicio_idx'),
+            models.Index(fields=['programacion', 'inicio'], name='ejecucion_prog_inicio_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ejecución {self.programacion_id} @ {self.inicio}"
+
+
+class ResumenDiarioRiego(models.Model):
+    """
+    Agregado diario e incremental de las ejecuciones de riego por zona
+    """
+    zona = models.ForeignKey(
+        Zona,
+        on_delete=models.CASCADE,
+        related_name='resumenes_riego'
+    )
+    fecha = models.DateField()
+    ejecuciones = models.PositiveIntegerField(default=0)
+    minutos = models.PositiveBigIntegerField(default=0)
+    litros = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumen Diario de Riego'
+        verbose_name_plural = 'Resúmenes Diarios de Riego'
+        ordering = ['-fecha', 'zona']
+        constraints = [
+            models.UniqueConstraint(fields=['zona', 'fecha'], name='resumen_riego_zona_fecha_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha'], name='resumen_riego_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Resumen {self.zona_id} - {self.fecha}: {self.ejecuciones} riegos"
+
+
+class DecisionRiego(models.Model):
+    """
+    Decisión del motor de riego en lazo cerrado sobre una ocurrencia prevista
+    de una programación, tomada a partir de la humedad del suelo de su zona.
+    Se conserva (sin programación) si la programación se borra.
+    """
+    DECISION_CHOICES = [
+        ('ejecutar', 'Ejecutar'),
+        ('omitir', 'Omitir'),
+        ('acortar', 'Acortar'),
+        ('extender', 'Extender'),
+    ]
+    
+    programacion = models.ForeignKey(
+        Programacion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='decisiones'
+    )
+    zona = models.ForeignKey(
+        Zona,
+        on_delete=models.CASCADE,
+        related_name='decisiones_riego'
+    )
+    evaluada_en = models.DateTimeField(help_text="Momento del tick que tomó la decisión")
+    inicio_previsto = models.DateTimeField(help_text="Inicio de la ocurrencia evaluada")
+    decision = models.CharField(max_length=10, choices=DECISION_CHOICES)
+    humedad_actual = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        help_text="Última humedad de la zona (%), vacía si no hay lecturas recientes"
+    )
+    tendencia = models.FloatField(null=True, blank=True, help_text="Variación de humedad en % por hora")
+    humedad_proyectada = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    duracion_programada = models.PositiveIntegerField()
+    duracion_ajustada = models.PositiveIntegerField(help_text="0 si la ocurrencia se omite")
+    
+    class Meta:
+        verbose_name = 'Decisión de Riego'
+        verbose_name_plural = 'Decisiones de Riego'
+        ordering = ['-evaluada_en', 'inicio_previsto']
+        indexes = [
+            models.Index(fields=['zona', 'evaluada_en'], name='decision_zona_evaluada_idx'),
+            models.Index(fields=['programacion', 'inicio_previsto'], name='decision_prog_inicio_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_decision_display()} {self.programacion_id} @ {self.inicio_previsto}"
@@ -0,0 +1,81 @@
+"""Expansión vectorizada de programaciones en ocurrencias por día.
+
+Aplica las mismas reglas que Programacion.ocurre_en sobre muchas
+programaciones y fechas a la vez, devolviendo una matriz booleana
+programaciones x días, y los mismos límites de duración que valida
+el modelo.
+"""
+import calendar
+
+import numpy as np
+from django.core.validators import MaxValueValidator
+
+from .models import Programacion, indices_dias_semana
+
+FRECUENCIAS = {codigo: indice for indice, (codigo, _) in enumerate(Programacion.FRECUENCIA_CHOICES)}
+
+# Límite superior de Programacion.duracion_minutos, el de su MaxValueValidator
+DURACION_MAXIMA_MINUTOS = next(
+    validador.limit_value
+    for validador in Programacion._meta.get_field('duracion_minutos').validators
+    if isinstance(validador, MaxValueValidator)
+)
+
+
+def matriz_ocurrencias(frecuencias, dias_semana, fechas_inicio, fechas_fin, fechas):
+    """
+    Matriz booleana (programaciones x fechas) con los días en que riega cada
+    programación activa.
+
+    `frecuencias`, `dias_semana`, `fechas_inicio` y `fechas_fin` son
+    secuencias paralelas con los campos de cada programación (fecha_fin
+    puede ser None); `fechas` es la lista de fechas a evaluar.
+    """
+    n_programaciones = len(frecuencias)
+    ordinal = np.array([fecha.toordinal() for fecha in fechas])
+    dia_semana = np.array([fecha.weekday() for fecha in fechas])
+    dia_mes = np.array([fecha.day for fecha in fechas])
+    ultimo_dia = np.array([calendar.monthrange(fecha.year, fecha.month)[1] for fecha in fechas])
+
+    frecuencia = np.array([FRECUENCIAS.get(codigo, FRECUENCIAS['diaria']) for codigo in frecuencias])
+    inicio = np.array([fecha.toordinal() for fecha in fechas_inicio])
+    sin_fin = np.iinfo(np.int64).max
+    fin = np.array([fecha.toordinal() if fecha else sin_fin for fecha in fechas_fin])
+    dia_inicio = np.array([fecha.day for fecha in fechas_inicio])
+    dias_mascara = np.zeros((n_programaciones, 7), dtype=bool)
+    tiene_dias = np.zeros(n_programaciones, dtype=bool)
+    # Pocas combinaciones distintas de días se repiten en muchas programaciones
+    convertidos = {}
+    for indice, dias in enumerate(dias_semana):
+        clave = tuple(dias or ())
+        indices = convertidos.get(clave)
+        if indices is None:
+            indices = convertidos[clave] = list(indices_dias_semana(dias))
+        dias_mascara[indice, indices] = True
+        tiene_dias[indice] = bool(indices)
+
+    vigente = (ordinal >= inicio[:, None]) & (ordinal <= fin[:, None])
+    por_dias = dias_mascara[:, dia_semana]
+    quincenal = (ordinal - inicio[:, None]) % 14 == 0
+    # En meses más cortos se riega el último día del mes
+    mensual = dia_mes == np.minimum(dia_inicio[:, None], ultimo_dia)
+
+    ocurre = np.ones_like(vigente)
+    ocurre = np.where((frecuencia == FRECUENCIAS['semanal'])[:, None], por_dias, ocurre)
+    ocurre = np.where((frecuencia == FRECUENCIAS['quincenal'])[:, None], quincenal, ocurre)
+    ocurre = np.where((frecuencia == FRECUENCIAS['mensual'])[:, None], mensual, ocurre)
+    personalizada = (frecuencia == FRECUENCIAS['personalizada']) & tiene_dias
+    ocurre = np.where(personalizada[:, None], por_dias, ocurre)
+    return ocurre & vigente
+
+
+def duraciones_maximas(caudal, capacidad):
+    """
+    Duración máxima (minutos) de cada programación: DURACION_MAXIMA_MINUTOS
+    y, con caudal, la que no supera la capacidad de su zona, como en
+    Programacion.clean. `caudal` y `capacidad` son arreglos paralelos.
+    """
+    maxima = np.full(caudal.size, DURACION_MAXIMA_MINUTOS, dtype=float)
+    con_caudal = caudal > 0
+    maxima[con_caudal] = np.minimum(np.floor(capacidad[con_caudal] / caudal[con_caudal]), DURACION_MAXIMA_MINUTOS)
+    return maxima
@@ -1,11 +1,14 @@
 from rest_framework import serializers
-from .models import Programacion
+from .models import Programacion, EjecucionRiego, ResumenDiarioRiego, DecisionRiego
 from zonas_riego.models import Zona
+from zonas_riego.serializers import ZonaSimpleSerializer
+from config.campos import CamposDinamicosSerializerMixin
+from config.serializacion import ListaRapidaSerializer
 from django.utils import timezone
 from datetime import datetime, time
 
 
-class ProgramacionSerializer(serializers.ModelSerializer):
+class ProgramacionSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """Serializer para el modelo Programacion"""
     zona_nombre = serializers.CharField(source='zona.nombre', read_only=True)
     frecuencia_display = serializers.CharField(source='get_frecuencia_display', read_only=True)
@@ -22,6 +25,12 @@ class ProgramacionSerializer(serializers.ModelSerializer):
             'esta_vigente'
         ]
         read_only_fields = ['fecha_creacion', 'fecha_actualizacion']
+        expandibles = {'zona': ZonaSimpleSerializer}
+        dependencias = {
+            'consumo_total_litros': ['duracion_minutos', 'caudal_litros_minuto'],
+            'esta_vigente': ['fecha_inicio', 'fecha_fin'],
+        }
+        list_serializer_class = ListaRapidaSerializer
     
     def validate_nombre(self, value):
         """Validación personalizada para el nombre"""
@@ -103,7 +112,7 @@ class ProgramacionSerializer(serializers.ModelSerializer):
         return data
 
 
-class ProgramacionSimpleSerializer(serializers.ModelSerializer):
+class ProgramacionSimpleSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """Serializer simple para listar programaciones sin detalles completos"""
     zona_nombre = serializers.CharField(source='zona.nombre', read_only=True)
     frecuencia_display = serializers.CharField(source='get_frecuencia_display', read_only=True)
@@ -111,3 +120,90 @@ class ProgramacionSimpleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Programacion
         fields = ['id', 'zona', 'zona_nombre', 'nombre', 'frecuencia', 'frecuencia_display', 'activa']
+        expandibles = {'zona': ZonaSimpleSerializer}
+        list_serializer_class = ListaRapidaSerializer
+
+
+class ZonaPrecargadaField(serializers.PrimaryKeyRelatedField):
+    """
+    Relación con Zona que se resuelve contra un diccionario {id: Zona}
+    recibido en el contexto, evitando una consulta por fila.
+    """
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        
+        zona = self.context.get('zonas', {}).get(pk)
+        if zona is None:
+            self.fail('does_not_exist', pk_value=data)
+        return zona
+
+
+class ProgramacionImportSerializer(ProgramacionSerializer):
+    """Serializer para validar filas de importación con las zonas ya precargadas"""
+    zona = ZonaPrecargadaField(queryset=Zona.objects.all())
+
+
+class EjecucionLoteSerializer(serializers.Serializer):
+    """Serializer para la petición de ejecución de programaciones en lote"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=500
+    )
+    duracion_real_minutos = serializers.IntegerField(required=False, min_value=1)
+    observaciones = serializers.CharField(required=False, allow_blank=True, default='')
+    registrar = serializers.BooleanField(required=False, default=False)
+
+
+class EjecucionRiegoSerializer(serializers.ModelSerializer):
+    """Serializer de solo lectura para el log de ejecuciones"""
+    zona_nombre = serializers.CharField(source='zona.nombre', read_only=True)
+    programacion_nombre = serializers.CharField(source='programacion.nombre', read_only=True, allow_null=True)
+    
+    class Meta:
+        model = EjecucionRiego
+        fields = [
+            'id', 'programacion', 'programacion_nombre', 'zona', 'zona_nombre', 'inicio',
+            'hora_inicio', 'duracion_minutos', 'caudal_litros_minuto', 'consumo_litros',
+            'observaciones'
+        ]
+        read_only_fields = fields
+
+
+class ResumenDiarioRiegoSerializer(serializers.ModelSerializer):
+    """Serializer para los agregados diarios de riego por zona"""
+    zona_nombre = serializers.CharField(source='zona.nombre', read_only=True)
+    
+    class Meta:
+        model = ResumenDiarioRiego
+        fields = ['zona', 'zona_nombre', 'fecha', 'ejecuciones', 'minutos', 'litros']
+        read_only_fields = fields
+
+
+class TickRiegoSerializer(serializers.Serializer):
+    """Parámetros de un tick del motor de decisiones de riego"""
+    ventana_minutos = serializers.IntegerField(required=False, default=60, min_value=1, max_value=1440)
+    horas_tendencia = serializers.IntegerField(required=False, default=6, min_value=1, max_value=72)
+    zona = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    registrar = serializers.BooleanField(required=False, default=True)
+    ejecutar = serializers.BooleanField(required=False, default=False)
+
+
+class DecisionRiegoSerializer(serializers.ModelSerializer):
+    """Serializer de solo lectura para las decisiones del motor de riego"""
+    
+    class Meta:
+        model = DecisionRiego
+        fields = [
+            'id', 'programacion', 'zona', 'evaluada_en', 'inicio_previsto', 'decision',
+            'humedad_actual', 'tendencia', 'humedad_proyectada',
+            'duracion_programada', 'duracion_ajustada'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,202 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+from config.cache import incrementar_version
+from zonas_riego.models import Zona
+from .models import Programacion, EjecucionRiego, ResumenDiarioRiego
+from .serializers import ProgramacionImportSerializer
+
+
+def validar_ejecutable(programacion):
+    """Devuelve el motivo por el que una programación no puede ejecutarse, o None"""
+    if not programacion.activa:
+        return 'La programación no está activa.'
+
+    if not programacion.zona.activa:
+        return 'La zona de riego no está activa.'
+
+    return None
+
+
+def simular_ejecucion(programacion, hora_inicio=None, duracion_minutos=None, observaciones=''):
+    """
+    Calcula los datos de una ejecución simulada de riego.
+
+    La programación debe traer su zona ya cargada (select_related) para no
+    disparar consultas adicionales al procesar lotes.
+    """
+    hora_inicio_real = hora_inicio or programacion.hora_inicio
+    if isinstance(hora_inicio_real, str):
+        hora_parseada = parse_time(hora_inicio_real)
+        if hora_parseada is None:
+            raise ValueError('La hora de inicio debe tener el formato HH:MM[:SS].')
+        hora_inicio_real = hora_parseada
+
+    # Un 0 explícito es un error, no la duración programada
+    duracion_real = int(programacion.duracion_minutos if duracion_minutos is None else duracion_minutos)
+    if duracion_real <= 0:
+        raise ValueError('La duración debe ser mayor que cero.')
+
+    consumo_litros = float(programacion.caudal_litros_minuto * duracion_real)
+
+    return {
+        'programacion_id': programacion.id,
+        'programacion_nombre': programacion.nombre,
+        'zona_id': programacion.zona_id,
+        'zona_nombre': programacion.zona.nombre,
+        'hora_inicio': str(hora_inicio_real),
+        'duracion_minutos': duracion_real,
+        'caudal_litros_minuto': float(programacion.caudal_litros_minuto),
+        'consumo_estimado_litros': consumo_litros,
+        'observaciones': observaciones,
+    }
+
+
+def construir_ejecucion(programacion, datos, inicio=None):
+    """Crea (sin guardar) el registro de ejecución correspondiente a una simulación"""
+    return EjecucionRiego(
+        programacion=programacion,
+        zona_id=programacion.zona_id,
+        inicio=inicio or timezone.now(),
+        hora_inicio=parse_time(datos['hora_inicio']),
+        duracion_minutos=datos['duracion_minutos'],
+        caudal_litros_minuto=programacion.caudal_litros_minuto,
+        consumo_litros=programacion.caudal_litros_minuto * Decimal(datos['duracion_minutos']),
+        observaciones=datos['observaciones'] or '',
+    )
+
+
+def registrar_ejecuciones(ejecuciones, batch_size=500):
+    """
+    Persiste los registros de ejecución con una inserción masiva y acumula
+    sus totales en el resumen diario dentro de la misma transacción.
+
+    Es el punto de entrada para cualquier proceso que ejecute riegos.
+    """
+    ejecuciones = list(ejecuciones)
+    if not ejecuciones:
+        return []
+
+    with transaction.atomic():
+        creadas = EjecucionRiego.objects.bulk_create(ejecuciones, batch_size=batch_size)
+        acumular_resumen_diario(creadas)
+    return creadas
+
+
+def acumular_resumen_diario(ejecuciones):
+    """
+    Suma las ejecuciones a ResumenDiarioRiego usando dos consultas por lote:
+    una inserción que ignora los (zona, fecha) ya existentes y una única
+    actualización con incrementos condicionales.
+    """
+    totales = defaultdict(lambda: [0, 0, Decimal('0')])
+    for ejecucion in ejecuciones:
+        clave = (ejecucion.zona_id, timezone.localdate(ejecucion.inicio))
+        totales[clave][0] += 1
+        totales[clave][1] += ejecucion.duracion_minutos
+        totales[clave][2] += Decimal(ejecucion.consumo_litros)
+
+    if not totales:
+        return
+
+    ResumenDiarioRiego.objects.bulk_create(
+        [ResumenDiarioRiego(zona_id=zona_id, fecha=fecha) for zona_id, fecha in totales],
+        ignore_conflicts=True
+    )
+
+    condiciones = Q()
+    incrementos = {'ejecuciones': [], 'minutos': [], 'litros': []}
+    for (zona_id, fecha), (cantidad, minutos, litros) in totales.items():
+        condicion = Q(zona_id=zona_id, fecha=fecha)
+        condiciones |= condicion
+        incrementos['ejecuciones'].append(When(condicion, then=Value(cantidad)))
+        incrementos['minutos'].append(When(condicion, then=Value(minutos)))
+        incrementos['litros'].append(When(condicion, then=Value(litros)))
+
+    ResumenDiarioRiego.objects.filter(condiciones).update(
+        ejecuciones=F('ejecuciones') + Case(*incrementos['ejecuciones'], default=Value(0)),
+        minutos=F('minutos') + Case(*incrementos['minutos'], default=Value(0)),
+        litros=F('litros') + Case(*incrementos['litros'], default=Value(Decimal('0'))),
+    )
+
+
+def reconstruir_resumen_diario():
+    """Recalcula desde cero el resumen diario a partir del log de ejecuciones"""
+    filas = (
+        EjecucionRiego.objects
+        .annotate(fecha=TruncDate('inicio'))
+        .values('zona_id', 'fecha')
+        .annotate(ejecuciones=Count('id'), minutos=Sum('duracion_minutos'), litros=Sum('consumo_litros'))
+        .order_by()
+    )
+    with transaction.atomic():
+        ResumenDiarioRiego.objects.all().delete()
+        resumenes = ResumenDiarioRiego.objects.bulk_create(
+            (ResumenDiarioRiego(**fila) for fila in filas.iterator()),
+            batch_size=1000
+        )
+    return len(resumenes)
+
+
+def _zona_ids(filas):
+    """Ids de zona referenciados por las filas, ignorando los que no son numéricos"""
+    ids = set()
+    for fila in filas:
+        try:
+            ids.add(int(fila.get('zona')))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return ids
+
+
+def importar_programaciones(filas, chunk_size=500):
+    """
+    Valida e inserta programaciones en bloque.
+
+    Las zonas referenciadas se cargan con una sola consulta y cada fila pasa
+    por las mismas reglas que una creación normal: las del serializer y las
+    de Programacion.clean() (fechas, días de la semana y capacidad de la zona).
+    Las filas válidas se insertan con bulk_create en bloques de `chunk_size`.
+
+    Devuelve una tupla (creadas, errores) donde errores es una lista de
+    {'fila': índice, 'errores': {...}}.
+    """
+    zonas = Zona.objects.in_bulk(_zona_ids(filas))
+    contexto = {'zonas': zonas}
+
+    validas = []
+    errores = []
+    for indice, fila in enumerate(filas):
+        if not isinstance(fila, dict):
+            errores.append({'fila': indice, 'errores': {'non_field_errors': ['La fila debe ser un objeto.']}})
+            continue
+
+        serializer = ProgramacionImportSerializer(data=fila, context=contexto)
+        if not serializer.is_valid():
+            errores.append({'fila': indice, 'errores': serializer.errors})
+            continue
+
+        programacion = Programacion(**serializer.validated_data)
+        try:
+            # La zona ya está validada y asignada desde el diccionario precargado
+            programacion.full_clean(exclude=['zona'], validate_unique=False, validate_constraints=False)
+        except ValidationError as exc:
+            errores.append({'fila': indice, 'errores': exc.message_dict})
+            continue
+
+        validas.append(programacion)
+
+    with transaction.atomic():
+        for inicio in range(0, len(validas), chunk_size):
+            Programacion.objects.bulk_create(validas[inicio:inicio + chunk_size])
+    
+    if validas:
+        # bulk_create no emite post_save
+        incrementar_version(Programacion)
+
+    return len(validas), errores
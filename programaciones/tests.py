@@ -1,3 +1,457 @@
+import random
+from unittest import mock
+from datetime import date, time, timedelta, timezone as dt_timezone
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from config.testing import PresupuestoConsultasMixin
+from sensores.models import Sensor, Lectura
+from zonas_riego.models import Zona
+from .decisiones import (
+    DECISIONES,
+    FACTOR_MAXIMO,
+    FACTOR_MINIMO,
+    HUMEDAD_OBJETIVO,
+    UMBRAL_EXTENDER,
+    UMBRAL_OMITIR,
+    ejecutar_tick,
+    evaluar_tick,
+)
+from .models import Programacion, EjecucionRiego, ResumenDiarioRiego, DecisionRiego
+from .ocurrencias import DURACION_MAXIMA_MINUTOS, duraciones_maximas
+from .services import construir_ejecucion, registrar_ejecuciones, reconstruir_resumen_diario, simular_ejecucion
 
-# Create your tests here.
+
+class ProgramacionesAPITestCase(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        self.zona = Zona.objects.create(nombre='Jardín Norte', area_m2=100, capacidad_agua_litros=5000)
+        self.zona_inactiva = Zona.objects.create(
+            nombre='Huerto Sur', area_m2=50, capacidad_agua_litros=2000, activa=False
+        )
+
+    def crear_programacion(self, zona=None, **kwargs):
+        datos = {
+            'zona': zona or self.zona,
+            'nombre': 'Riego mañana',
+            'hora_inicio': time(8, 0),
+            'duracion_minutos': 30,
+            'frecuencia': 'diaria',
+            'fecha_inicio': date(2025, 1, 1),
+            'caudal_litros_minuto': 5,
+        }
+        datos.update(kwargs)
+        return Programacion.objects.create(**datos)
+
+    def test_ejecutar_lote_por_ids(self):
+        activa = self.crear_programacion()
+        pausada = self.crear_programacion(nombre='Riego pausado', activa=False)
+        zona_inactiva = self.crear_programacion(zona=self.zona_inactiva, nombre='Riego huerto')
+
+        resp = self.client.post(
+            '/api/programaciones/ejecutar_lote/',
+            {'ids': [activa.id, pausada.id, zona_inactiva.id, 9999]},
+            format='json'
+        )
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['total'], 4)
+        self.assertEqual(resp.data['ejecutadas'], 1)
+        self.assertEqual(
+            [resultado['programacion_id'] for resultado in resp.data['resultados']],
+            [activa.id, pausada.id, zona_inactiva.id, 9999]
+        )
+        self.assertEqual(resp.data['resultados'][0]['datos']['consumo_estimado_litros'], 150.0)
+        self.assertEqual(resp.data['resultados'][2]['error'], 'La zona de riego no está activa.')
+        self.assertEqual(EjecucionRiego.objects.count(), 0)
+
+    def test_ejecutar_lote_por_filtro_registra_ejecuciones(self):
+        self.crear_programacion()
+        self.crear_programacion(nombre='Riego tarde', hora_inicio=time(18, 0))
+        self.crear_programacion(zona=self.zona_inactiva, nombre='Riego huerto')
+
+        with self.assertNumQueries(6):
+            resp = self.client.post(
+                f'/api/programaciones/ejecutar_lote/?zona={self.zona.id}',
+                {'registrar': True, 'duracion_real_minutos': 10},
+                format='json'
+            )
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['ejecutadas'], 2)
+        self.assertEqual(resp.data['registradas'], 2)
+        ejecuciones = EjecucionRiego.objects.all()
+        self.assertEqual(len(ejecuciones), 2)
+        self.assertTrue(all(ejecucion.consumo_litros == 50 for ejecucion in ejecuciones))
+
+    def test_ejecutar_lote_requiere_ids_o_filtro(self):
+        resp = self.client.post('/api/programaciones/ejecutar_lote/', {}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ejecutar_rechaza_duracion_cero(self):
+        programacion = self.crear_programacion()
+        resp = self.client.post(
+            f'/api/programaciones/{programacion.id}/ejecutar/', {'duracion_real_minutos': 0}, format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(EjecucionRiego.objects.exists())
+
+    def test_ejecutar_registra_ejecucion_y_resumen_diario(self):
+        programacion = self.crear_programacion()
+
+        for _ in range(2):
+            resp = self.client.post(f'/api/programaciones/{programacion.id}/ejecutar/', {}, format='json')
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(EjecucionRiego.objects.filter(programacion=programacion).count(), 2)
+        resumen = ResumenDiarioRiego.objects.get(zona=self.zona)
+        self.assertEqual(resumen.ejecuciones, 2)
+        self.assertEqual(resumen.minutos, 60)
+        self.assertEqual(resumen.litros, 300)
+
+        resp = self.client.get(f'/api/ejecuciones/totales/?zona={self.zona.id}')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['total_ejecuciones'], 2)
+        self.assertEqual(resp.data['total_minutos'], 60)
+
+        resp = self.client.get('/api/ejecuciones/por_dia/')
+        self.assertEqual(resp.data['count'], 1)
+        self.assertEqual(resp.data['results'][0]['ejecuciones'], 2)
+
+        for ruta in ('/api/ejecuciones/por_dia/', '/api/ejecuciones/totales/'):
+            resp = self.client.get(f'{ruta}?fecha_desde=ayer')
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('fecha_desde', resp.data)
+
+    def test_reconstruir_resumen_diario(self):
+        programacion = self.crear_programacion()
+        registrar_ejecuciones([
+            construir_ejecucion(programacion, simular_ejecucion(programacion)) for _ in range(3)
+        ])
+        ResumenDiarioRiego.objects.update(ejecuciones=0)
+
+        self.assertEqual(reconstruir_resumen_diario(), 1)
+        self.assertEqual(ResumenDiarioRiego.objects.get().ejecuciones, 3)
+
+    def test_borrar_programacion_conserva_el_log(self):
+        programacion = self.crear_programacion()
+        for _ in range(2):
+            self.client.post(f'/api/programaciones/{programacion.id}/ejecutar/', {}, format='json')
+        DecisionRiego.objects.create(
+            programacion=programacion, zona=self.zona, evaluada_en=timezone.now(),
+            inicio_previsto=timezone.now(), decision='ejecutar',
+            duracion_programada=30, duracion_ajustada=30,
+        )
+
+        resp = self.client.delete(f'/api/programaciones/{programacion.id}/')
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertEqual(EjecucionRiego.objects.filter(programacion=None, zona=self.zona).count(), 2)
+        self.assertEqual(DecisionRiego.objects.filter(programacion=None).count(), 1)
+        resp = self.client.get('/api/ejecuciones/')
+        self.assertEqual([fila['programacion_nombre'] for fila in resp.data['results']], [None, None])
+
+        # El resumen sigue cuadrando con el log
+        resp = self.client.get(f'/api/ejecuciones/totales/?zona={self.zona.id}')
+        self.assertEqual((resp.data['total_ejecuciones'], resp.data['total_minutos']), (2, 60))
+        reconstruir_resumen_diario()
+        resumen = ResumenDiarioRiego.objects.get(zona=self.zona)
+        self.assertEqual((resumen.ejecuciones, resumen.minutos, resumen.litros), (2, 60, 300))
+
+    def test_etag_cambia_con_el_dia(self):
+        programacion = self.crear_programacion(fecha_fin=timezone.localdate())
+        url = f'/api/programaciones/{programacion.id}/'
+        resp = self.client.get(url)
+        self.assertTrue(resp.data['esta_vigente'])
+
+        manana = timezone.now() + timedelta(days=1)
+        with mock.patch('django.utils.timezone.now', return_value=manana):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'], HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertFalse(resp.data['esta_vigente'])
+
+    def test_importar_programaciones_valida_por_fila(self):
+        base = {
+            'zona': self.zona.id,
+            'nombre': 'Riego importado',
+            'hora_inicio': '07:30:00',
+            'duracion_minutos': 20,
+            'frecuencia': 'diaria',
+            'fecha_inicio': '2025-01-01',
+            'caudal_litros_minuto': '5.00',
+        }
+        filas = [
+            base,
+            {**base, 'zona': 9999},
+            {**base, 'zona': self.zona_inactiva.id},
+            {**base, 'frecuencia': 'semanal', 'dias_semana': []},
+            {**base, 'fecha_fin': '2025-01-01'},
+            {**base, 'duracion_minutos': 400, 'caudal_litros_minuto': '20.00'},
+            {**base, 'nombre': 'Riego importado 2', 'frecuencia': 'semanal', 'dias_semana': [0, 3]},
+        ]
+
+        with self.assertNumQueries(4):
+            resp = self.client.post('/api/programaciones/importar/', filas, format='json')
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['creadas'], 2)
+        self.assertEqual([error['fila'] for error in resp.data['errores']], [1, 2, 3, 4, 5])
+        self.assertIn('duracion_minutos', resp.data['errores'][4]['errores'])
+        self.assertEqual(Programacion.objects.filter(nombre__startswith='Riego importado').count(), 2)
+
+    def test_campos_y_expansion(self):
+        for indice in range(4):
+            self.crear_programacion(nombre=f'Riego {indice}')
+
+        # Solo las columnas necesarias y sin JOIN a zonas
+        with self.assertPresupuestoConsultas(2) as registro:
+            resp = self.client.get('/api/programaciones/?fields=id,nombre,consumo_total_litros')
+        self.assertEqual(set(resp.data['results'][0]), {'id', 'nombre', 'consumo_total_litros'})
+        self.assertEqual(resp.data['results'][0]['consumo_total_litros'], 150.0)
+        sql = ' '.join(registro.plantillas)
+        self.assertNotIn('descripcion', sql)
+        self.assertNotIn('zonas_riego_zona', sql)
+
+        resp = self.client.get('/api/programaciones/?omit=zona_nombre,frecuencia_display')
+        self.assertEqual(set(resp.data['results'][0]), {'id', 'zona', 'nombre', 'frecuencia', 'activa'})
+
+        # La zona expandida se obtiene con select_related, sin N+1
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/programaciones/?expand=zona')
+        self.assertEqual(resp.data['results'][0]['zona']['nombre'], 'Jardín Norte')
+
+        # Los parámetros no afectan a la escritura
+        resp = self.client.post('/api/programaciones/?fields=id', {
+            'zona': self.zona.id, 'nombre': 'Riego tarde', 'hora_inicio': '18:00',
+            'duracion_minutos': 20, 'frecuencia': 'diaria', 'fecha_inicio': '2025-01-01',
+            'caudal_litros_minuto': 5,
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertIn('zona_nombre', resp.data)
+
+    def test_presupuesto_consultas_lectura(self):
+        for indice in range(6):
+            self.crear_programacion(nombre=f'Riego {indice}')
+        programacion = Programacion.objects.first()
+
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/programaciones/')
+        self.assertEqual(resp.data['count'], 6)
+        self.assertEqual(resp.data['results'][0]['zona_nombre'], 'Jardín Norte')
+
+        with self.assertPresupuestoConsultas(1):
+            self.client.get(f'/api/programaciones/{programacion.id}/')
+
+        with self.assertPresupuestoConsultas(1):
+            resp = self.client.get('/api/programaciones/vigentes/')
+        self.assertEqual(len(resp.data), 6)
+
+        with self.assertPresupuestoConsultas(1):
+            resp = self.client.get('/api/programaciones/estadisticas/')
+        self.assertEqual(resp.data['total_programaciones'], 6)
+        self.assertEqual(resp.data['programaciones_vigentes'], 6)
+        self.assertEqual(resp.data['programaciones_por_frecuencia'], {'diaria': 6})
+
+        with self.assertPresupuestoConsultas(0):
+            self.client.get('/api/programaciones/estadisticas/')
+
+        self.client.post('/api/programaciones/importar/', [{
+            'zona': self.zona.id, 'nombre': 'Riego importado', 'hora_inicio': '07:30:00',
+            'duracion_minutos': 20, 'frecuencia': 'mensual', 'fecha_inicio': '2025-01-01',
+            'caudal_litros_minuto': '5.00',
+        }], format='json')
+        resp = self.client.get('/api/programaciones/estadisticas/')
+        self.assertEqual(resp.data['programaciones_por_frecuencia'], {'diaria': 6, 'mensual': 1})
+
+        registrar_ejecuciones([
+            construir_ejecucion(programacion, simular_ejecucion(programacion)) for _ in range(6)
+        ])
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/ejecuciones/')
+        self.assertEqual(resp.data['count'], 6)
+
+        with self.assertPresupuestoConsultas(2):
+            self.client.get('/api/ejecuciones/por_dia/')
+
+        with self.assertPresupuestoConsultas(2):
+            self.client.get('/api/ejecuciones/totales/')
+
+    def test_ocurre_en_segun_frecuencia(self):
+        semanal = self.crear_programacion(frecuencia='semanal', dias_semana=[0, 'miercoles'])
+        quincenal = self.crear_programacion(frecuencia='quincenal')
+        mensual = self.crear_programacion(frecuencia='mensual', fecha_inicio=date(2025, 1, 31))
+
+        self.assertTrue(semanal.ocurre_en(date(2025, 3, 3)))   # lunes
+        self.assertTrue(semanal.ocurre_en(date(2025, 3, 5)))   # miércoles
+        self.assertFalse(semanal.ocurre_en(date(2025, 3, 4)))
+        self.assertTrue(quincenal.ocurre_en(date(2025, 1, 15)))
+        self.assertFalse(quincenal.ocurre_en(date(2025, 1, 8)))
+        self.assertTrue(mensual.ocurre_en(date(2025, 2, 28)))
+        self.assertFalse(mensual.ocurre_en(date(2024, 12, 31)))
+
+
+class DecisionesRiegoTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        self.ahora = timezone.localtime().replace(hour=7, minute=30, second=0, microsecond=0)
+
+    def crear_zona(self, nombre, humedades=(), capacidad=5000, caudal=5, hora_inicio=time(8, 0)):
+        """Zona con una programación diaria y lecturas cada 30 minutos hasta ahora"""
+        zona = Zona.objects.create(nombre=nombre, area_m2=100, capacidad_agua_litros=capacidad)
+        programacion = Programacion.objects.create(
+            zona=zona, nombre=f'Riego {nombre}', hora_inicio=hora_inicio, duracion_minutos=30,
+            frecuencia='diaria', fecha_inicio=date(2025, 1, 1), caudal_litros_minuto=caudal
+        )
+        if humedades:
+            sensor = Sensor.objects.create(nombre=f'Sensor {nombre}', tipo='HUMEDAD', zona=zona)
+            Lectura.objects.bulk_create([
+                Lectura(sensor=sensor, humedad=humedad, fecha_hora=self.ahora - timedelta(minutes=30 * indice))
+                for indice, humedad in enumerate(reversed(humedades))
+            ])
+        return programacion
+
+    def test_tick_decide_segun_humedad_y_tendencia(self):
+        humeda = self.crear_zona('Húmeda', [80, 80])
+        secandose = self.crear_zona('Secándose', [62, 61, 60, 59, 58, 57, 56])
+        seca = self.crear_zona('Seca', [5, 5], capacidad=200)
+        sin_sensor = self.crear_zona('Sin sensor')
+        fuera_de_ventana = self.crear_zona('Tarde', [80], hora_inicio=time(18, 0))
+
+        with self.assertNumQueries(2):
+            decisiones = ejecutar_tick(ahora=self.ahora, registrar=False)
+
+        por_programacion = {decision.programacion_id: decision for decision in decisiones}
+        self.assertNotIn(fuera_de_ventana.id, por_programacion)
+        self.assertEqual(por_programacion[humeda.id].decision, 'omitir')
+        self.assertEqual(por_programacion[humeda.id].duracion_ajustada, 0)
+
+        # Pierde 2 % por hora: a las 8:00 se proyecta 55 %
+        self.assertEqual(por_programacion[secandose.id].decision, 'acortar')
+        self.assertAlmostEqual(por_programacion[secandose.id].tendencia, -2.0)
+        self.assertEqual(por_programacion[secandose.id].humedad_proyectada, 55)
+        self.assertEqual(por_programacion[secandose.id].duracion_ajustada, 26)
+
+        # La extensión queda limitada por la capacidad de la zona (200 L / 5 L/min)
+        self.assertEqual(por_programacion[seca.id].decision, 'extender')
+        self.assertEqual(por_programacion[seca.id].duracion_ajustada, 40)
+
+        self.assertEqual(por_programacion[sin_sensor.id].decision, 'ejecutar')
+        self.assertIsNone(por_programacion[sin_sensor.id].humedad_actual)
+        self.assertEqual(por_programacion[sin_sensor.id].duracion_ajustada, 30)
+
+    def test_duraciones_maximas_segun_el_modelo(self):
+        self.assertEqual(DURACION_MAXIMA_MINUTOS, 1440)
+        maximas = duraciones_maximas(np.array([5.0, 0.0, 0.5]), np.array([200.0, 100.0, 10000.0]))
+        np.testing.assert_array_equal(maximas, [40, DURACION_MAXIMA_MINUTOS, DURACION_MAXIMA_MINUTOS])
+
+    def test_tick_registra_decisiones_y_ejecuciones(self):
+        self.crear_zona('Húmeda', [80, 80])
+        seca = self.crear_zona('Seca', [15, 15])
+
+        ejecutar_tick(ahora=self.ahora, ejecutar=True)
+
+        self.assertEqual(DecisionRiego.objects.count(), 2)
+        ejecucion = EjecucionRiego.objects.get()
+        self.assertEqual(ejecucion.programacion_id, seca.id)
+        self.assertEqual(ejecucion.duracion_minutos, 38)
+        self.assertEqual(timezone.localtime(ejecucion.inicio).time(), time(8, 0))
+        self.assertEqual(ResumenDiarioRiego.objects.get().minutos, 38)
+
+    def test_endpoint_decidir_y_log(self):
+        inicio = timezone.localtime() + timedelta(minutes=10)
+        self.crear_zona('Jardín', hora_inicio=time(inicio.hour, inicio.minute))
+
+        resp = self.client.post('/api/programaciones/decidir/', {'ventana_minutos': 30}, format='json')
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['evaluadas'], 1)
+        self.assertEqual(resp.data['por_decision']['ejecutar'], 1)
+        self.assertEqual(resp.data['minutos_ajustados'], 30)
+
+        resp = self.client.get('/api/decisiones/?decision=ejecutar')
+        self.assertEqual(resp.data['count'], 1)
+
+    def test_tick_coincide_con_referencia_escalar(self):
+        aleatorio = random.Random(0)
+        hoy = self.ahora.date()
+        programaciones = []
+        lecturas = []
+        for zona_id in range(1, 201):
+            frecuencia = aleatorio.choice(['diaria', 'semanal', 'quincenal', 'mensual'])
+            programaciones.append((
+                zona_id, zona_id, time(aleatorio.choice([7, 8]), aleatorio.randrange(60)),
+                aleatorio.randint(5, 120), aleatorio.choice([0.0, 5.0, 10.0]), aleatorio.uniform(100, 5000),
+                frecuencia, [hoy.weekday()] if zona_id % 3 else [], hoy - timedelta(days=aleatorio.randrange(30)), None
+            ))
+            humedad = aleatorio.uniform(10, 90)
+            for paso in range(aleatorio.randrange(6), 0, -1):
+                fecha_hora = (self.ahora - timedelta(minutes=30 * paso)).astimezone(dt_timezone.utc)
+                lecturas.append((zona_id, fecha_hora, humedad))
+                humedad += aleatorio.uniform(-4, 3)
+
+        resultado = evaluar_tick(programaciones, lecturas, self.ahora)
+        obtenido = {
+            int(programacion_id): (DECISIONES[codigo], int(ajustada))
+            for programacion_id, codigo, ajustada in zip(
+                resultado['programacion'], resultado['decision'], resultado['duracion_ajustada']
+            )
+        }
+
+        # Referencia fila a fila con Programacion.ocurre_en y mínimos cuadrados
+        esperado = {}
+        for programacion_id, zona_id, hora_inicio, duracion, caudal, capacidad, *ocurrencia in programaciones:
+            frecuencia, dias_semana, fecha_inicio, fecha_fin = ocurrencia
+            programacion = Programacion(
+                frecuencia=frecuencia, dias_semana=dias_semana, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin
+            )
+            inicio = (hora_inicio.hour * 60 + hora_inicio.minute) - (self.ahora.hour * 60 + self.ahora.minute)
+            if not programacion.ocurre_en(hoy) or not 0 <= inicio < 60:
+                continue
+            puntos = [
+                ((fecha_hora - self.ahora).total_seconds() / 3600, humedad)
+                for zona, fecha_hora, humedad in lecturas if zona == zona_id
+            ]
+            maxima = min(int(capacidad // caudal), DURACION_MAXIMA_MINUTOS) if caudal else DURACION_MAXIMA_MINUTOS
+            maxima = max(maxima, 1)
+            if not puntos:
+                ajustada = min(max(duracion, 1), maxima)
+                esperado[programacion_id] = (
+                    'ejecutar' if ajustada == duracion else 'acortar' if ajustada < duracion else 'extender', ajustada
+                )
+                continue
+            pendiente = 0.0
+            if len(puntos) >= 2:
+                media_t = sum(t for t, _ in puntos) / len(puntos)
+                media_h = sum(h for _, h in puntos) / len(puntos)
+                pendiente = (
+                    sum((t - media_t) * (h - media_h) for t, h in puntos)
+                    / sum((t - media_t) ** 2 for t, _ in puntos)
+                )
+            antiguedad, ultima = puntos[-1]
+            proyectada = min(max(ultima + pendiente * (inicio / 60 - antiguedad), 0), 100)
+            if proyectada >= UMBRAL_OMITIR:
+                esperado[programacion_id] = ('omitir', 0)
+                continue
+            if proyectada > HUMEDAD_OBJETIVO:
+                factor = 1 - (proyectada - HUMEDAD_OBJETIVO) / (UMBRAL_OMITIR - HUMEDAD_OBJETIVO) * (1 - FACTOR_MINIMO)
+            elif proyectada < UMBRAL_EXTENDER:
+                factor = 1 + (UMBRAL_EXTENDER - proyectada) / UMBRAL_EXTENDER * (FACTOR_MAXIMO - 1)
+            else:
+                factor = 1.0
+            ajustada = min(max(round(duracion * factor), 1), maxima)
+            esperado[programacion_id] = (
+                'ejecutar' if ajustada == duracion else 'acortar' if ajustada < duracion else 'extender', ajustada
+            )
+
+        self.assertGreater(len(esperado), 20)
+        self.assertEqual(obtenido, esperado)
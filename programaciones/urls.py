@@ -1,12 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProgramacionViewSet
+from .views import ProgramacionViewSet, EjecucionRiegoViewSet, DecisionRiegoViewSet, vigentes_async
 
 router = DefaultRouter()
 router.register(r'programaciones', ProgramacionViewSet, basename='programacion')
+router.register(r'ejecuciones', EjecucionRiegoViewSet, basename='ejecucion')
+router.register(r'decisiones', DecisionRiegoViewSet, basename='decision')
 
 app_name = 'programaciones'
 
 urlpatterns = [
+    path('async/programaciones/vigentes/', vigentes_async, name='vigentes-async'),
     path('', include(router.urls)),
 ]
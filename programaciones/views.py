@@ -4,16 +4,39 @@ from rest_framework.response import Response
 from django.db.models import Count, Avg, Sum, Q, F
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Programacion
-from .serializers import ProgramacionSerializer, ProgramacionSimpleSerializer
-from .filters import ProgramacionFilter
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from django_filters.rest_framework import DjangoFilterBackend
+from .models import Programacion, EjecucionRiego, ResumenDiarioRiego, DecisionRiego
+from zonas_riego.models import Zona
+from .serializers import (
+    ProgramacionSerializer,
+    ProgramacionSimpleSerializer,
+    EjecucionLoteSerializer,
+    EjecucionRiegoSerializer,
+    ResumenDiarioRiegoSerializer,
+    TickRiegoSerializer,
+    DecisionRiegoSerializer,
+)
+from .filters import ProgramacionFilter, EjecucionRiegoFilter, ResumenDiarioRiegoFilter, DecisionRiegoFilter
+from config.cache import snapshot
+from config.condicional import GetCondicionalMixin
+from config.campos import CamposDinamicosViewSetMixin
+from config.masivo import OperacionesMasivasMixin
+from config.asincrono import vista_jwt_async, respuesta_json
+from django.views.decorators.http import require_GET
+from .services import (
+    validar_ejecutable,
+    simular_ejecucion,
+    construir_ejecucion,
+    registrar_ejecuciones,
+    importar_programaciones,
+)
+from .decisiones import ejecutar_tick
+from config.documentacion import openapi, swagger_auto_schema
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from config.authentication import CachedJWTAuthentication
 
 
-class ProgramacionViewSet(viewsets.ModelViewSet):
+class ProgramacionViewSet(OperacionesMasivasMixin, GetCondicionalMixin, CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Programaciones de Riego
     
@@ -26,21 +49,31 @@ class ProgramacionViewSet(viewsets.ModelViewSet):
     - DELETE /api/programaciones/{id}/ - Eliminar una programación
     - GET /api/programaciones/vigentes/ - Listar programaciones vigentes
     - GET /api/programaciones/estadisticas/ - Estadísticas generales
-    - POST /api/programaciones/{id}/ejecutar/ - Simular ejecución de riego
+    - POST /api/programaciones/{id}/ejecutar/ - Simular y registrar la ejecución de riego
+    - POST /api/programaciones/ejecutar_lote/ - Simular la ejecución de varias programaciones
+    - POST /api/programaciones/importar/ - Importar programaciones en bloque
+    - POST /api/programaciones/decidir/ - Tick del motor de decisiones según la humedad del suelo
+    - POST/PATCH/DELETE /api/programaciones/masivo/ - Creación, actualización y borrado masivos
     """
-    queryset = Programacion.objects.all()
+    queryset = Programacion.objects.select_related('zona')
     serializer_class = ProgramacionSerializer
     filterset_class = ProgramacionFilter
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering_fields = ['nombre', 'hora_inicio', 'prioridad', 'fecha_creacion']
     ordering = ['-prioridad', 'hora_inicio']
-    authentication_classes = [JWTAuthentication]
+    # zona_nombre forma parte de la representación
+    modelos_condicionales = [Programacion, Zona]
+    # esta_vigente se calcula con la fecha de hoy
+    depende_de_fecha = True
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
+    IMPORTACION_MAX_FILAS = 10000
+    
     def get_serializer_class(self):
-        """Usar serializer simple para listado"""
-        if self.action == 'list':
+        """Usar serializer simple para listado, salvo que se elijan campos con ?fields="""
+        if self.action == 'list' and not self.seleccion_de_campos():
             return ProgramacionSimpleSerializer
         return ProgramacionSerializer
     
@@ -90,43 +123,51 @@ class ProgramacionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Endpoint para obtener estadísticas generales de programaciones"""
-        queryset = self.get_queryset()
         hoy = timezone.now().date()
+        stats = snapshot(
+            'programaciones:estadisticas',
+            [Programacion],
+            lambda: self.calcular_estadisticas(hoy),
+            partes=[hoy]
+        )
+        return Response(stats)
+    
+    def calcular_estadisticas(self, hoy):
+        """Calcula todas las estadísticas con una única consulta agregada"""
+        queryset = self.get_queryset()
         
-        # Contar programaciones vigentes
-        vigentes_count = queryset.filter(
-            activa=True,
-            fecha_inicio__lte=hoy
-        ).filter(
-            Q(fecha_fin__gte=hoy) | Q(fecha_fin__isnull=True)
-        ).count()
+        conteos_frecuencia = {
+            f'frecuencia_{frecuencia_key}': Count('id', filter=Q(frecuencia=frecuencia_key))
+            for frecuencia_key, _ in Programacion.FRECUENCIA_CHOICES
+        }
         
-        # Estadísticas básicas
         stats = queryset.aggregate(
             total_programaciones=Count('id'),
             programaciones_activas=Count('id', filter=Q(activa=True)),
             programaciones_inactivas=Count('id', filter=Q(activa=False)),
+            programaciones_vigentes=Count(
+                'id',
+                filter=Q(activa=True, fecha_inicio__lte=hoy) & (Q(fecha_fin__gte=hoy) | Q(fecha_fin__isnull=True))
+            ),
             consumo_total_estimado_litros=Sum(
                 F('caudal_litros_minuto') * F('duracion_minutos')
             ),
             duracion_total_minutos=Sum('duracion_minutos'),
             promedio_duracion=Avg('duracion_minutos'),
             promedio_caudal=Avg('caudal_litros_minuto'),
+            **conteos_frecuencia,
         )
         
-        stats['programaciones_vigentes'] = vigentes_count
-        
         # Programaciones por frecuencia
         programaciones_por_frecuencia = {}
-        for frecuencia_choice in Programacion.FRECUENCIA_CHOICES:
-            frecuencia_key = frecuencia_choice[0]
-            count = queryset.filter(frecuencia=frecuencia_key).count()
+        for frecuencia_key, _ in Programacion.FRECUENCIA_CHOICES:
+            count = stats.pop(f'frecuencia_{frecuencia_key}')
             if count > 0:
                 programaciones_por_frecuencia[frecuencia_key] = count
         
         stats['programaciones_por_frecuencia'] = programaciones_por_frecuencia
         
-        return Response(stats)
+        return stats
     
     @swagger_auto_schema(
         operation_description="Simular la ejecución de una programación de riego",
@@ -164,40 +205,364 @@ class ProgramacionViewSet(viewsets.ModelViewSet):
         """Endpoint para simular la ejecución de una programación"""
         programacion = self.get_object()
         
-        if not programacion.activa:
+        error = validar_ejecutable(programacion)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Datos de la ejecución simulada
+        try:
+            datos = simular_ejecucion(
+                programacion,
+                hora_inicio=request.data.get('hora_inicio_real'),
+                duracion_minutos=request.data.get('duracion_real_minutos'),
+                observaciones=request.data.get('observaciones', '')
+            )
+        except (TypeError, ValueError) as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        registrar_ejecuciones([construir_ejecucion(programacion, datos)])
+        
+        data = {
+            'success': True,
+            'mensaje': 'Ejecución de riego simulada exitosamente',
+            'datos': datos
+        }
+        
+        return Response(data)
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Simular la ejecución de varias programaciones a la vez. "
+            "Se indican por `ids` o, si se omiten, mediante los filtros de listado en la query string."
+        ),
+        request_body=EjecucionLoteSerializer,
+        responses={
+            200: openapi.Response(
+                description="Resultados de la ejecución en lote",
+                examples={
+                    "application/json": {
+                        "success": True,
+                        "total": 2,
+                        "ejecutadas": 1,
+                        "fallidas": 1,
+                        "registradas": 1,
+                        "resultados": [
+                            {
+                                "programacion_id": 1,
+                                "success": True,
+                                "datos": {"zona_nombre": "Jardín Principal", "consumo_estimado_litros": 150.0}
+                            },
+                            {
+                                "programacion_id": 2,
+                                "success": False,
+                                "error": "La zona de riego no está activa."
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: "Petición inválida"
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def ejecutar_lote(self, request):
+        """Endpoint para simular la ejecución de varias programaciones en una sola petición"""
+        serializer = EjecucionLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        
+        # Una sola consulta con la zona incluida
+        queryset = self.get_queryset()
+        ids = params.get('ids')
+        if ids:
+            queryset = queryset.filter(id__in=ids)
+        else:
+            filterset = ProgramacionFilter(request.query_params, queryset=queryset)
+            if not any(nombre in request.query_params for nombre in filterset.filters):
+                return Response(
+                    {'error': 'Debe indicar una lista de ids o al menos un filtro.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not filterset.is_valid():
+                return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+            queryset = filterset.qs
+        
+        programaciones = list(queryset)
+        if ids:
+            # Respetar el orden solicitado e informar los ids inexistentes
+            por_id = {programacion.id: programacion for programacion in programaciones}
+            programaciones = [por_id.get(programacion_id) for programacion_id in dict.fromkeys(ids)]
+            ids_ordenados = list(dict.fromkeys(ids))
+        else:
+            ids_ordenados = [programacion.id for programacion in programaciones]
+        
+        inicio = timezone.now()
+        resultados = []
+        ejecuciones = []
+        for programacion_id, programacion in zip(ids_ordenados, programaciones):
+            if programacion is None:
+                resultados.append({
+                    'programacion_id': programacion_id,
+                    'success': False,
+                    'error': 'La programación no existe.'
+                })
+                continue
+            
+            error = validar_ejecutable(programacion)
+            if error:
+                resultados.append({'programacion_id': programacion_id, 'success': False, 'error': error})
+                continue
+            
+            datos = simular_ejecucion(
+                programacion,
+                duracion_minutos=params.get('duracion_real_minutos'),
+                observaciones=params['observaciones']
+            )
+            resultados.append({'programacion_id': programacion_id, 'success': True, 'datos': datos})
+            if params['registrar']:
+                ejecuciones.append(construir_ejecucion(programacion, datos, inicio=inicio))
+        
+        if ejecuciones:
+            registrar_ejecuciones(ejecuciones)
+        
+        ejecutadas = sum(1 for resultado in resultados if resultado['success'])
+        return Response({
+            'success': ejecutadas > 0,
+            'total': len(resultados),
+            'ejecutadas': ejecutadas,
+            'fallidas': len(resultados) - ejecutadas,
+            'registradas': len(ejecuciones),
+            'resultados': resultados
+        })
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Importar programaciones en bloque. Recibe una lista de programaciones "
+            "(o un objeto con la clave `programaciones`) con los mismos campos que la creación "
+            "individual. Las filas válidas se crean y se devuelven los errores por fila."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_OBJECT)
+        ),
+        responses={
+            201: openapi.Response(
+                description="Resultado de la importación",
+                examples={
+                    "application/json": {
+                        "total": 3,
+                        "creadas": 2,
+                        "errores": [
+                            {"fila": 1, "errores": {"zona": ["Clave primaria \"99\" inválida - objeto no existe."]}}
+                        ]
+                    }
+                }
+            ),
+            400: "Petición inválida o ninguna fila válida"
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """Endpoint para importar programaciones en bloque"""
+        filas = request.data
+        if isinstance(filas, dict):
+            filas = filas.get('programaciones')
+        
+        if not isinstance(filas, list) or not filas:
             return Response(
-                {'error': 'La programación no está activa.'},
+                {'error': 'Debe enviar una lista de programaciones.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if not programacion.zona.activa:
+        if len(filas) > self.IMPORTACION_MAX_FILAS:
             return Response(
-                {'error': 'La zona de riego no está activa.'},
+                {'error': f'No se pueden importar más de {self.IMPORTACION_MAX_FILAS} programaciones por petición.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Datos de la ejecución simulada
-        hora_inicio_real = request.data.get('hora_inicio_real', programacion.hora_inicio)
-        duracion_real = request.data.get('duracion_real_minutos', programacion.duracion_minutos)
-        observaciones = request.data.get('observaciones', '')
+        creadas, errores = importar_programaciones(filas)
         
-        # Calcular consumo
-        consumo_litros = float(programacion.caudal_litros_minuto * duracion_real)
+        return Response(
+            {'total': len(filas), 'creadas': creadas, 'errores': errores},
+            status=status.HTTP_201_CREATED if creadas else status.HTTP_400_BAD_REQUEST
+        )
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Ejecutar un tick del motor de decisiones: evalúa las ocurrencias que empiezan en los "
+            "próximos `ventana_minutos` según la última humedad y la tendencia de cada zona y decide "
+            "ejecutar, omitir, acortar o extender cada riego. Con `ejecutar` se registran además las "
+            "ejecuciones no omitidas."
+        ),
+        request_body=TickRiegoSerializer,
+        responses={
+            200: openapi.Response(
+                description="Decisiones del tick",
+                examples={
+                    "application/json": {
+                        "evaluadas": 2,
+                        "por_decision": {"ejecutar": 0, "omitir": 1, "acortar": 0, "extender": 1},
+                        "minutos_programados": 60,
+                        "minutos_ajustados": 39,
+                        "decisiones": [
+                            {"programacion": 1, "zona": 1, "decision": "extender", "duracion_programada": 30, "duracion_ajustada": 39}
+                        ]
+                    }
+                }
+            ),
+            400: "Parámetros inválidos"
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def decidir(self, request):
+        """Endpoint para ejecutar un tick del motor de decisiones de riego"""
+        serializer = TickRiegoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
         
-        data = {
-            'success': True,
-            'mensaje': 'Ejecución de riego simulada exitosamente',
-            'datos': {
-                'programacion_id': programacion.id,
-                'programacion_nombre': programacion.nombre,
-                'zona_id': programacion.zona.id,
-                'zona_nombre': programacion.zona.nombre,
-                'hora_inicio': str(hora_inicio_real),
-                'duracion_minutos': duracion_real,
-                'caudal_litros_minuto': float(programacion.caudal_litros_minuto),
-                'consumo_estimado_litros': consumo_litros,
-                'observaciones': observaciones
-            }
+        decisiones = ejecutar_tick(
+            ventana_minutos=params['ventana_minutos'],
+            horas_tendencia=params['horas_tendencia'],
+            zona_ids=params.get('zona'),
+            registrar=params['registrar'],
+            ejecutar=params['ejecutar'],
+        )
+        
+        por_decision = {codigo: 0 for codigo, _ in DecisionRiego.DECISION_CHOICES}
+        for decision in decisiones:
+            por_decision[decision.decision] += 1
+        
+        return Response({
+            'evaluadas': len(decisiones),
+            'por_decision': por_decision,
+            'minutos_programados': sum(decision.duracion_programada for decision in decisiones),
+            'minutos_ajustados': sum(decision.duracion_ajustada for decision in decisiones),
+            'decisiones': DecisionRiegoSerializer(decisiones, many=True).data,
+        })
+
+
+class EjecucionRiegoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet de solo lectura para el log de ejecuciones de riego
+    
+    Endpoints:
+    - GET /api/ejecuciones/ - Listar ejecuciones registradas
+    - GET /api/ejecuciones/{id}/ - Detalle de una ejecución
+    - GET /api/ejecuciones/por_dia/ - Riegos, minutos y litros por zona y día
+    - GET /api/ejecuciones/totales/ - Totales de riegos, minutos y litros
+    
+    Los endpoints agregados se sirven desde ResumenDiarioRiego, que se
+    actualiza de forma incremental al registrar cada lote de ejecuciones.
+    """
+    queryset = EjecucionRiego.objects.select_related('zona', 'programacion')
+    serializer_class = EjecucionRiegoSerializer
+    filterset_class = EjecucionRiegoFilter
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    ordering_fields = ['inicio', 'duracion_minutos', 'consumo_litros']
+    ordering = ['-inicio']
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    
+    def get_resumenes(self, request):
+        """
+        Resúmenes diarios filtrados por zona y rango de fechas; devuelve
+        (queryset, respuesta de error) si los filtros no son válidos.
+        """
+        filterset = ResumenDiarioRiegoFilter(
+            request.query_params,
+            queryset=ResumenDiarioRiego.objects.all()
+        )
+        if not filterset.is_valid():
+            return None, Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        return filterset.qs, None
+    
+    @swagger_auto_schema(
+        operation_description="Riegos, minutos y litros por zona y día (filtros: zona, fecha_desde, fecha_hasta)",
+        responses={200: ResumenDiarioRiegoSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'])
+    def por_dia(self, request):
+        """Endpoint con los agregados diarios por zona"""
+        queryset, error = self.get_resumenes(request)
+        if error:
+            return error
+        queryset = queryset.select_related('zona')
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = ResumenDiarioRiegoSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = ResumenDiarioRiegoSerializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @swagger_auto_schema(
+        operation_description="Totales de riegos, minutos y litros (filtros: zona, fecha_desde, fecha_hasta)",
+        responses={
+            200: openapi.Response(
+                description="Totales calculados",
+                examples={
+                    "application/json": {
+                        "total_ejecuciones": 120,
+                        "total_minutos": 3600,
+                        "total_litros": 18000.0,
+                        "por_zona": [
+                            {"zona": 1, "zona__nombre": "Jardín Principal", "ejecuciones": 60, "minutos": 1800, "litros": 9000.0}
+                        ]
+                    }
+                }
+            )
         }
+    )
+    @action(detail=False, methods=['get'])
+    def totales(self, request):
+        """Endpoint con los totales acumulados de riego"""
+        queryset, error = self.get_resumenes(request)
+        if error:
+            return error
         
-        return Response(data)
+        stats = queryset.aggregate(
+            total_ejecuciones=Sum('ejecuciones'),
+            total_minutos=Sum('minutos'),
+            total_litros=Sum('litros'),
+        )
+        stats['por_zona'] = list(
+            queryset.values('zona', 'zona__nombre')
+            .annotate(ejecuciones=Sum('ejecuciones'), minutos=Sum('minutos'), litros=Sum('litros'))
+            .order_by('zona__nombre')
+        )
+        
+        return Response(stats)
+
+
+class DecisionRiegoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet de solo lectura para el log de decisiones del motor de riego
+    
+    Endpoints:
+    - GET /api/decisiones/ - Listar decisiones registradas
+    - GET /api/decisiones/{id}/ - Detalle de una decisión
+    """
+    queryset = DecisionRiego.objects.all()
+    serializer_class = DecisionRiegoSerializer
+    filterset_class = DecisionRiegoFilter
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    ordering_fields = ['evaluada_en', 'inicio_previsto', 'humedad_proyectada']
+    ordering = ['-evaluada_en', 'inicio_previsto']
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+
+@require_GET
+@vista_jwt_async
+async def vigentes_async(request):
+    """GET /api/async/programaciones/vigentes/ - Igual que /api/programaciones/vigentes/"""
+    hoy = timezone.now().date()
+    queryset = Programacion.objects.select_related('zona').filter(
+        activa=True,
+        fecha_inicio__lte=hoy
+    ).filter(
+        Q(fecha_fin__gte=hoy) | Q(fecha_fin__isnull=True)
+    )
+    programaciones = [programacion async for programacion in queryset]
+    return respuesta_json(ProgramacionSimpleSerializer(programaciones, many=True).data)
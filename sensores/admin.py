@@ -4,7 +4,8 @@ from .models import Sensor, Lectura
 
 @admin.register(Sensor)
 class SensorAdmin(admin.ModelAdmin):
-    list_display = ('id', 'nombre', 'tipo', 'ubicacion', 'creado')
+    list_display = ('id', 'nombre', 'tipo', 'zona', 'ubicacion', 'creado')
+    list_filter = ('tipo', 'zona')
 
 
 @admin.register(Lectura)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class SensoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sensores'
+
+    def ready(self):
+        from config.cache import registrar_invalidacion
+        from config.metricas import registrar_ingesta_modelos
+        registrar_invalidacion(self.get_model('Sensor'), dependientes=[self.get_model('Lectura')])
+        registrar_ingesta_modelos(self.get_model('Lectura'))
@@ -1,5 +1,15 @@
 from django_filters import rest_framework as filters
-from .models import Lectura
+from .models import Lectura, Sensor
+
+
+class SensorFilter(filters.FilterSet):
+    nombre = filters.CharFilter(lookup_expr='icontains')
+    ubicacion = filters.CharFilter(lookup_expr='icontains')
+    sin_zona = filters.BooleanFilter(field_name='zona', lookup_expr='isnull')
+
+    class Meta:
+        model = Sensor
+        fields = ['nombre', 'tipo', 'zona', 'ubicacion', 'sin_zona']
 
 
 class LecturaFilter(filters.FilterSet):
@@ -7,7 +17,8 @@ class LecturaFilter(filters.FilterSet):
     fecha_max = filters.DateTimeFilter(field_name='fecha_hora', lookup_expr='lte')
     humedad_min = filters.NumberFilter(field_name='humedad', lookup_expr='gte')
     humedad_max = filters.NumberFilter(field_name='humedad', lookup_expr='lte')
+    zona = filters.NumberFilter(field_name='sensor__zona')
 
     class Meta:
         model = Lectura
-        fields = ['sensor', 'fecha_min', 'fecha_max', 'humedad_min', 'humedad_max']
+        fields = ['sensor', 'zona', 'fecha_min', 'fecha_max', 'humedad_min', 'humedad_max']
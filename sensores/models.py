@@ -9,6 +9,13 @@ class Sensor(models.Model):
     nombre = models.CharField(max_length=120)
     ubicacion = models.CharField(max_length=200, blank=True)
     tipo = models.CharField(max_length=30, choices=TIPO_CHOICES)
+    zona = models.ForeignKey(
+        'zonas_riego.Zona',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sensores'
+    )
     creado = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -23,6 +30,9 @@ class Lectura(models.Model):
 
     class Meta:
         ordering = ['-fecha_hora']
+        indexes = [
+            models.Index(fields=['sensor', '-fecha_hora'], name='lectura_sensor_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Lectura {self.humedad} @ {self.fecha_hora}"
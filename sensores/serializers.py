@@ -1,18 +1,25 @@
 from rest_framework import serializers
 from .models import Sensor, Lectura
 from django.utils import timezone
+from zonas_riego.serializers import ZonaSimpleSerializer
+from config.campos import CamposDinamicosSerializerMixin
+from config.serializacion import ListaRapidaSerializer
 
 
-class SensorSerializer(serializers.ModelSerializer):
+class SensorSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Sensor
         fields = '__all__'
+        expandibles = {'zona': ZonaSimpleSerializer}
+        list_serializer_class = ListaRapidaSerializer
 
 
-class LecturaSerializer(serializers.ModelSerializer):
+class LecturaSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Lectura
         fields = '__all__'
+        expandibles = {'sensor': SensorSerializer}
+        list_serializer_class = ListaRapidaSerializer
 
     def validate_humedad(self, value):
         if value < 0 or value > 100:
@@ -1,9 +1,14 @@
+from django.contrib.auth.models import User
+from django.db.models.deletion import Collector
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from consumo_agua.models import Consumo
 from .models import Sensor, Lectura
 from django.utils import timezone
+from config.cache import version_modelo
+from config.testing import PresupuestoConsultasMixin
 
 
 class SensoresAPITestCase(TestCase):
@@ -24,3 +29,75 @@ class SensoresAPITestCase(TestCase):
         }
         resp = self.client.post('/api/lecturas/', data, format='json')
         self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SensoresPresupuestoConsultasTestCase(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        self.sensores = [Sensor.objects.create(nombre=f'Sensor {indice}', tipo='HUMEDAD') for indice in range(6)]
+        ahora = timezone.now()
+        Lectura.objects.bulk_create([
+            Lectura(sensor=sensor, humedad=40 + indice, fecha_hora=ahora - timezone.timedelta(hours=indice))
+            for sensor in self.sensores
+            for indice in range(3)
+        ])
+
+    def test_presupuesto_consultas_sensores(self):
+        sensor = self.sensores[0]
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/sensores/')
+        self.assertEqual(resp.data['count'], 6)
+
+        with self.assertPresupuestoConsultas(1):
+            self.client.get(f'/api/sensores/{sensor.id}/')
+
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get(f'/api/sensores/{sensor.id}/estadisticas/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_presupuesto_consultas_lecturas(self):
+        # El filtro por FK valida que el objeto exista
+        with self.assertPresupuestoConsultas(3):
+            resp = self.client.get(f'/api/lecturas/?sensor={self.sensores[0].id}')
+        self.assertEqual(resp.data['count'], 3)
+
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/lecturas/')
+        self.assertEqual(resp.data['count'], 18)
+
+    def test_get_condicional_lecturas(self):
+        resp = self.client.get('/api/lecturas/')
+        etag = resp['ETag']
+
+        with self.assertPresupuestoConsultas(0):
+            resp = self.client.get('/api/lecturas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Lectura no tiene marca de tiempo de modificación: la cubre su contador de escrituras
+        Lectura.objects.create(sensor=self.sensores[0], humedad=55, fecha_hora=timezone.now())
+        resp = self.client.get('/api/lecturas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['count'], 19)
+
+    def test_lecturas_conservan_borrado_rapido(self):
+        self.assertTrue(Collector(using='default').can_fast_delete(Lectura.objects.all()))
+        self.assertTrue(Collector(using='default').can_fast_delete(Consumo.objects.all()))
+
+        # Los borrados en cascada y los directos siguen invalidando las lecturas
+        version = version_modelo(Lectura)
+        self.sensores[0].delete()
+        self.assertNotEqual(version_modelo(Lectura), version)
+
+        version = version_modelo(Lectura)
+        resp = self.client.delete(f'/api/lecturas/{Lectura.objects.first().id}/')
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertNotEqual(version_modelo(Lectura), version)
+
+    def test_expandir_sensor_de_lecturas(self):
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/lecturas/?expand=sensor&fields=humedad,sensor')
+        fila = resp.data['results'][0]
+        self.assertEqual(set(fila), {'humedad', 'sensor'})
+        self.assertIn(fila['sensor']['nombre'], {sensor.nombre for sensor in self.sensores})
@@ -1,8 +1,12 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import SensorViewSet, LecturaViewSet
+from .views import SensorViewSet, LecturaViewSet, lecturas_async, estadisticas_sensor_async
 
 router = DefaultRouter()
 router.register('sensores', SensorViewSet)
 router.register('lecturas', LecturaViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('async/lecturas/', lecturas_async, name='lecturas-async'),
+    path('async/sensores/<int:pk>/estadisticas/', estadisticas_sensor_async, name='sensor-estadisticas-async'),
+] + router.urls
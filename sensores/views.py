@@ -1,19 +1,28 @@
 from rest_framework import viewsets, decorators, response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from config.authentication import CachedJWTAuthentication
+from config.cache import incrementar_version
+from config.condicional import GetCondicionalMixin
+from config.campos import CamposDinamicosViewSetMixin
+from config.masivo import OperacionesMasivasMixin
+from config.asincrono import vista_jwt_async, paginar_async, respuesta_json
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET
 from django.db.models import Avg
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Sensor, Lectura
 from .serializers import SensorSerializer, LecturaSerializer
-from .filters import LecturaFilter
+from .filters import LecturaFilter, SensorFilter
 
 
-class SensorViewSet(viewsets.ModelViewSet):
+class SensorViewSet(OperacionesMasivasMixin, GetCondicionalMixin, CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     queryset = Sensor.objects.all()
     serializer_class = SensorSerializer
+    # Filtros de /api/sensores/masivo/
+    filterset_masivo = SensorFilter
 
     # 🔐 Requerir JWT para acceder a todo el ViewSet
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @decorators.action(detail=True, methods=['get'])
@@ -39,12 +48,54 @@ class SensorViewSet(viewsets.ModelViewSet):
         })
 
 
-class LecturaViewSet(viewsets.ModelViewSet):
+class LecturaViewSet(GetCondicionalMixin, CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     queryset = Lectura.objects.all()
     serializer_class = LecturaSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = LecturaFilter
 
     # 🔐 También protegemos la API de lecturas
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
+
+    def perform_destroy(self, instance):
+        # Lectura no escucha post_delete para conservar el borrado rápido
+        super().perform_destroy(instance)
+        incrementar_version(Lectura)
+
+
+# Variantes asíncronas de las lecturas más frecuentes (ORM asíncrono, ASGI)
+
+@require_GET
+@vista_jwt_async
+async def lecturas_async(request):
+    """GET /api/async/lecturas/ - Igual que /api/lecturas/ (filtros y paginación)"""
+    filtro = LecturaFilter(request.GET, queryset=Lectura.objects.all())
+    # La validación de los filtros por FK consulta la base de datos
+    if not await sync_to_async(filtro.is_valid)():
+        return respuesta_json(filtro.errors, status=400)
+    return await paginar_async(request, filtro.qs, LecturaSerializer)
+
+
+@require_GET
+@vista_jwt_async
+async def estadisticas_sensor_async(request, pk):
+    """GET /api/async/sensores/{id}/estadisticas/ - Igual que /api/sensores/{id}/estadisticas/"""
+    try:
+        sensor = await Sensor.objects.aget(pk=pk)
+    except Sensor.DoesNotExist:
+        return respuesta_json({'detail': 'No encontrado.'}, status=404)
+
+    qs = sensor.lecturas.all()
+    fecha_min = request.GET.get('fecha_min')
+    fecha_max = request.GET.get('fecha_max')
+    if fecha_min:
+        qs = qs.filter(fecha_hora__gte=fecha_min)
+    if fecha_max:
+        qs = qs.filter(fecha_hora__lte=fecha_max)
+
+    agregados = await qs.aaggregate(avg=Avg('humedad'))
+    return respuesta_json({
+        'sensor': sensor.id,
+        'avg_humedad': agregados['avg']
+    })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Zona
+from .models import Zona, RegistroClima
 
 
 @admin.register(Zona)
@@ -25,3 +25,11 @@ class ZonaAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(RegistroClima)
+class RegistroClimaAdmin(admin.ModelAdmin):
+    list_display = ['fecha', 'temperatura_min', 'temperatura_max', 'precipitacion_mm', 'et0_mm', 'fuente']
+    date_hierarchy = 'fecha'
+    search_fields = ['fuente']
+    ordering = ['-fecha']
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ZonasRiegoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'zonas_riego'
+
+    def ready(self):
+        from config.cache import registrar_invalidacion
+        registrar_invalidacion(self.get_model('Zona'))
@@ -0,0 +1,269 @@
+"""Generación de datos sintéticos a escala de producción.
+
+Crea zonas, programaciones, sensores con sus lecturas y medidores con su
+consumo diario, con nombres que empiezan por un prefijo para poder
+identificarlos y borrarlos después. Todo se inserta con bulk_create en
+lotes; las lecturas, que son el grueso, pueden repartirse entre varios
+procesos.
+
+Con la misma semilla y los mismos parámetros se generan los mismos datos,
+sin importar el número de procesos: cada sensor usa su propio generador
+derivado de (semilla, índice del sensor).
+
+Las lecturas siguen una curva diaria de humedad del suelo: sube de golpe
+con el riego diario de la zona y después baja de forma exponencial con la
+evapotranspiración acumulada, que es mayor a mediodía que de noche. Cada
+día tiene un factor climático distinto y cada lectura un pequeño ruido.
+"""
+import math
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+import django
+import numpy as np
+from django.db import connections, transaction
+from django.utils import timezone
+
+# Horarios de riego habituales: de madrugada o al atardecer, en minutos
+VENTANAS_RIEGO = ((5 * 60, 9 * 60), (18 * 60, 22 * 60))
+FRECUENCIAS = ('diaria', 'diaria', 'diaria', 'semanal', 'quincenal', 'mensual')
+DIAS_SEMANA = ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo')
+TIPOS_ZONA = ('jardin', 'huerto', 'cesped', 'cultivo', 'ornamental')
+
+# Los modelos se importan dentro de las funciones: los procesos 'spawn'
+# importan este módulo antes de ejecutar django.setup()
+
+
+def nueva_semilla():
+    """Semilla aleatoria para cuando no se indica una (se informa para repetir la carga)"""
+    return int(np.random.SeedSequence().entropy % 2**63)
+
+
+def minuto_riego(rng):
+    inicio, fin = VENTANAS_RIEGO[rng.integers(len(VENTANAS_RIEGO))]
+    # En pasos de 15 minutos, como se suelen programar
+    return int(rng.integers(inicio // 15, fin // 15)) * 15
+
+
+def curva_humedad(rng, dias, intervalo_minutos, minuto_inicio):
+    """
+    Humedad (%) de un sensor cada `intervalo_minutos` durante `dias` días,
+    empezando en el riego diario (`minuto_inicio` desde medianoche).
+    Devuelve un array de forma (dias, lecturas por día).
+    """
+    pasos = 1440 // intervalo_minutos
+    minutos = minuto_inicio + np.arange(pasos) * intervalo_minutos
+    horas = (minutos / 60) % 24
+    # Evapotranspiración relativa: mínima de noche, máxima a mediodía
+    evaporacion = 0.15 + np.clip(np.sin(np.pi * (horas - 6) / 12), 0, None) ** 1.5
+    acumulada = np.cumsum(evaporacion) * intervalo_minutos / 60
+
+    piso = rng.uniform(10, 25)
+    secado = rng.uniform(0.05, 0.09)
+    techo = rng.uniform(70, 90, size=(dias, 1))
+    clima = rng.lognormal(0, 0.25, size=(dias, 1))
+
+    humedad = piso + (techo - piso) * np.exp(-secado * clima * acumulada)
+    humedad += rng.normal(0, 0.6, size=humedad.shape)
+    return np.round(np.clip(humedad, 0, 100), 2)
+
+
+def inicio_generacion(dias, hoy=None):
+    """Medianoche local del primer día generado, en UTC"""
+    hoy = hoy or timezone.localdate()
+    medianoche = timezone.make_aware(datetime.combine(hoy - timedelta(days=dias), time()))
+    return medianoche.astimezone(dt_timezone.utc)
+
+
+def generar_zonas(rng, prefijo, cantidad, lote):
+    from zonas_riego.models import Zona
+
+    zonas = []
+    for indice in range(cantidad):
+        area = round(float(rng.uniform(60, 5000)), 2)
+        zonas.append(Zona(
+            nombre=f'{prefijo} Zona {indice:06d}',
+            tipo_zona=TIPOS_ZONA[rng.integers(len(TIPOS_ZONA))],
+            area_m2=area,
+            capacidad_agua_litros=round(area * float(rng.uniform(20, 60)), 2),
+            ubicacion=f'Sector {indice // 100 + 1}',
+        ))
+    Zona.objects.bulk_create(zonas, batch_size=lote)
+    # MySQL no devuelve los ids de bulk_create
+    ids = dict(Zona.objects.filter(nombre__startswith=f'{prefijo} Zona ').values_list('nombre', 'id'))
+    return [(ids[zona.nombre], float(zona.capacidad_agua_litros)) for zona in zonas]
+
+
+def generar_programaciones(rng, zonas, por_zona, dias, lote):
+    """
+    Crea las programaciones. Devuelve el total y, por zona, (minuto del
+    primer riego, litros de las programaciones diarias).
+    """
+    from programaciones.models import Programacion
+
+    hoy = timezone.localdate()
+    total = 0
+    riego_zonas = []
+    pendientes = []
+    for zona_id, capacidad in zonas:
+        minutos = [minuto_riego(rng) for _ in range(por_zona)]
+        litros_diarios = 0.0
+        for indice, minuto in enumerate(minutos):
+            frecuencia = FRECUENCIAS[rng.integers(len(FRECUENCIAS))]
+            duracion = int(rng.integers(5, 61))
+            # El consumo de una ejecución no puede superar la capacidad de la zona
+            caudal = max(0.1, min(round(float(rng.uniform(2, 20)), 2), math.floor(capacidad / duracion * 100) / 100))
+            dias_semana = []
+            if frecuencia == 'semanal':
+                dias_semana = sorted(rng.choice(7, size=int(rng.integers(1, 4)), replace=False).tolist())
+                dias_semana = [DIAS_SEMANA[dia] for dia in dias_semana]
+            elif frecuencia == 'diaria':
+                litros_diarios += duracion * caudal
+            pendientes.append(Programacion(
+                zona_id=zona_id,
+                nombre=f'Riego {indice + 1}',
+                hora_inicio=time(minuto // 60, minuto % 60),
+                duracion_minutos=duracion,
+                frecuencia=frecuencia,
+                dias_semana=dias_semana,
+                fecha_inicio=hoy - timedelta(days=dias),
+                caudal_litros_minuto=caudal,
+                prioridad=int(rng.integers(1, 11)),
+            ))
+        riego_zonas.append((min(minutos) if minutos else minuto_riego(rng), litros_diarios))
+        if len(pendientes) >= lote:
+            Programacion.objects.bulk_create(pendientes, batch_size=lote)
+            total += len(pendientes)
+            pendientes = []
+    Programacion.objects.bulk_create(pendientes, batch_size=lote)
+    return total + len(pendientes), riego_zonas
+
+
+def generar_sensores(prefijo, zonas, por_zona, lote):
+    """Crea los sensores de humedad; devuelve [(sensor_id, índice de zona)] en orden"""
+    from sensores.models import Sensor
+
+    sensores = [
+        Sensor(
+            nombre=f'{prefijo} Sensor {indice_zona:06d}-{numero}',
+            ubicacion=f'Punto {numero + 1}',
+            tipo='HUMEDAD',
+            zona_id=zona_id,
+        )
+        for indice_zona, (zona_id, _) in enumerate(zonas)
+        for numero in range(por_zona)
+    ]
+    Sensor.objects.bulk_create(sensores, batch_size=lote)
+    ids = dict(Sensor.objects.filter(nombre__startswith=f'{prefijo} Sensor ').values_list('nombre', 'id'))
+    return [(ids[sensor.nombre], indice // por_zona) for indice, sensor in enumerate(sensores)]
+
+
+def generar_medidores(rng, prefijo, zonas, riego_zonas, dias, lote):
+    """Crea un medidor por zona y su consumo diario; devuelve (medidores, consumos)"""
+    from consumo_agua.models import Consumo, Medidor
+
+    hoy = timezone.localdate()
+    medidores = [
+        Medidor(
+            numero_serie=f'{prefijo}-MED-{indice:06d}',
+            ubicacion='Cabezal de riego',
+            zona_id=zona_id,
+            instalado=hoy - timedelta(days=dias),
+        )
+        for indice, (zona_id, _) in enumerate(zonas)
+    ]
+    Medidor.objects.bulk_create(medidores, batch_size=lote)
+    ids = dict(Medidor.objects.filter(numero_serie__startswith=f'{prefijo}-MED-').values_list('numero_serie', 'id'))
+
+    total = 0
+    consumos = []
+    fechas = [hoy - timedelta(days=dias - dia) for dia in range(dias)]
+    for medidor, (_, litros_diarios) in zip(medidores, riego_zonas):
+        volumenes = np.round(litros_diarios / 1000 * rng.uniform(0.8, 1.2, size=dias), 2)
+        medidor_id = ids[medidor.numero_serie]
+        consumos.extend(
+            Consumo(medidor_id=medidor_id, fecha=fecha, volumen_m3=volumen)
+            for fecha, volumen in zip(fechas, volumenes.tolist())
+        )
+        if len(consumos) >= lote:
+            Consumo.objects.bulk_create(consumos, batch_size=lote)
+            total += len(consumos)
+            consumos = []
+    Consumo.objects.bulk_create(consumos, batch_size=lote)
+    return len(medidores), total + len(consumos)
+
+
+def generar_lecturas(sensores, semilla, dias, intervalo_minutos, lote, inicio):
+    """
+    Inserta las lecturas de `sensores`, una lista de (índice global,
+    sensor_id, minuto de riego). Devuelve el número de filas insertadas.
+    """
+    from sensores.models import Lectura
+
+    total = 0
+    pendientes = []
+    # Desplazamientos desde el primer riego, comunes a todos los sensores
+    lecturas_sensor = dias * (1440 // intervalo_minutos)
+    desplazamientos = [timedelta(minutes=intervalo_minutos * orden) for orden in range(lecturas_sensor)]
+    for indice, sensor_id, minuto in sensores:
+        rng = np.random.default_rng([semilla, indice])
+        humedad = curva_humedad(rng, dias, intervalo_minutos, minuto).ravel().tolist()
+        primera = inicio + timedelta(minutes=minuto)
+        for desplazamiento, valor in zip(desplazamientos, humedad):
+            pendientes.append(Lectura(sensor_id=sensor_id, humedad=valor, fecha_hora=primera + desplazamiento))
+            if len(pendientes) >= lote:
+                Lectura.objects.bulk_create(pendientes)
+                total += len(pendientes)
+                pendientes = []
+    if pendientes:
+        Lectura.objects.bulk_create(pendientes)
+        total += len(pendientes)
+    return total
+
+
+def _inicializar_proceso():
+    # Procesos 'spawn': arrancan sin Django configurado ni conexiones heredadas
+    django.setup()
+
+
+def _generar_lecturas_proceso(argumentos):
+    try:
+        return generar_lecturas(*argumentos)
+    finally:
+        connections.close_all()
+
+
+def tareas_lecturas(sensores, riego_zonas, sensores_por_tarea):
+    """Reparte [(sensor_id, índice de zona)] en tareas de (índice, sensor_id, minuto de riego)"""
+    filas = [
+        (indice, sensor_id, riego_zonas[indice_zona][0])
+        for indice, (sensor_id, indice_zona) in enumerate(sensores)
+    ]
+    return [filas[inicio:inicio + sensores_por_tarea] for inicio in range(0, len(filas), sensores_por_tarea)]
+
+
+def ejecutar_tareas_lecturas(tareas, semilla, dias, intervalo_minutos, lote, procesos, progreso=None):
+    """Genera las lecturas de todas las tareas, en este proceso o en `procesos` procesos"""
+    inicio = inicio_generacion(dias)
+    argumentos = [(tarea, semilla, dias, intervalo_minutos, lote, inicio) for tarea in tareas]
+    total = 0
+    if procesos <= 1:
+        for argumento in argumentos:
+            with transaction.atomic():
+                total += generar_lecturas(*argumento)
+            if progreso:
+                progreso(total)
+        return total
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    # Cada proceso abre sus propias conexiones
+    connections.close_all()
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(procesos, mp_context=contexto, initializer=_inicializar_proceso) as ejecutor:
+        for futuro in as_completed([ejecutor.submit(_generar_lecturas_proceso, a) for a in argumentos]):
+            total += futuro.result()
+            if progreso:
+                progreso(total)
+    return total
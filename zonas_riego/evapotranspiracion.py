@@ -0,0 +1,302 @@
+"""Requerimiento hídrico de las zonas a partir de la evapotranspiración.
+
+La evapotranspiración de referencia (ET₀) de cada día sale de RegistroClima:
+se usa la medida si existe y, si no, se estima con la ecuación de Hargreaves
+(FAO-56) a partir de las temperaturas y de la radiación extraterrestre de la
+latitud configurada. La demanda de cada zona es Kc · ET₀ menos la
+precipitación efectiva, por su área y dividida por la eficiencia del riego;
+Kc sale de Zona.COEFICIENTE_CULTIVO según el tipo de zona.
+
+Todo el cálculo se hace con matrices zonas x días de NumPy, de modo que una
+temporada completa para miles de zonas se resuelve en milisegundos.
+"""
+import csv
+import io
+import json
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from programaciones.models import Programacion
+from programaciones.ocurrencias import duraciones_maximas, matriz_ocurrencias
+from .models import Zona, RegistroClima
+from .serializers import RegistroClimaImportSerializer
+from .simulacion import ET_REFERENCIA_MM_DIA
+
+EVAPOTRANSPIRACION_POR_DEFECTO = {
+    'LATITUD': -33.45,
+    'EFICIENCIA_RIEGO': 0.85,
+}
+
+# Constante solar (MJ m⁻² min⁻¹)
+CONSTANTE_SOLAR = 0.0820
+
+# Las lluvias menores que el umbral no llegan a la zona radicular; del resto
+# se aprovecha una fracción
+PRECIPITACION_UMBRAL_MM = 5.0
+PRECIPITACION_FRACCION_EFECTIVA = 0.8
+
+CAMPOS_CLIMA = ['fecha', 'temperatura_min', 'temperatura_max', 'precipitacion_mm', 'et0_mm', 'fuente']
+
+
+def configuracion_evapotranspiracion():
+    """Configuración efectiva de EVAPOTRANSPIRACION con sus valores por defecto"""
+    return {**EVAPOTRANSPIRACION_POR_DEFECTO, **getattr(settings, 'EVAPOTRANSPIRACION', {})}
+
+
+def radiacion_extraterrestre(dia_del_anio, latitud):
+    """Radiación extraterrestre diaria Ra en MJ m⁻² día⁻¹ (FAO-56, ecuación 21)"""
+    phi = np.radians(latitud)
+    angulo = 2 * np.pi * np.asarray(dia_del_anio, dtype=float) / 365
+    distancia_relativa = 1 + 0.033 * np.cos(angulo)
+    declinacion = 0.409 * np.sin(angulo - 1.39)
+    angulo_ocaso = np.arccos(np.clip(-np.tan(phi) * np.tan(declinacion), -1, 1))
+    return (24 * 60 / np.pi) * CONSTANTE_SOLAR * distancia_relativa * (
+        angulo_ocaso * np.sin(phi) * np.sin(declinacion)
+        + np.cos(phi) * np.cos(declinacion) * np.sin(angulo_ocaso)
+    )
+
+
+def et0_hargreaves(temperatura_min, temperatura_max, radiacion):
+    """ET₀ en mm/día con la ecuación de Hargreaves (FAO-56, ecuación 52)"""
+    temperatura_media = (temperatura_min + temperatura_max) / 2
+    amplitud = np.clip(temperatura_max - temperatura_min, 0, None)
+    # 0.408 convierte MJ m⁻² día⁻¹ a mm/día de agua evaporada
+    return 0.0023 * (temperatura_media + 17.8) * np.sqrt(amplitud) * 0.408 * radiacion
+
+
+def precipitacion_efectiva(precipitacion):
+    """Parte de la precipitación diaria (mm) que aprovecha el cultivo"""
+    return np.where(precipitacion >= PRECIPITACION_UMBRAL_MM, precipitacion * PRECIPITACION_FRACCION_EFECTIVA, 0.0)
+
+
+def requerimiento_litros(et0, lluvia_efectiva, coeficientes, area_m2, eficiencia):
+    """
+    Litros de riego necesarios por zona y día (matriz zonas x días).
+
+    1 mm de lámina sobre 1 m² equivale a 1 litro.
+    """
+    lamina = np.maximum(coeficientes[:, None] * et0[None, :] - lluvia_efectiva[None, :], 0)
+    return lamina * area_m2[:, None] / eficiencia
+
+
+def duraciones_sugeridas(litros_zona, zona_idx, ocurrencias, caudal, duracion, capacidad):
+    """
+    Duración sugerida (minutos) de cada programación para cubrir la demanda
+    de su zona en el período.
+
+    La demanda total de cada zona (`litros_zona`) se reparte entre sus
+    programaciones en proporción al volumen que hoy aportan (ocurrencias x
+    caudal x duración), lo que equivale a escalar todas sus duraciones por el
+    mismo factor requerido/programado. Las programaciones sin ocurrencias en
+    el período quedan en 0.
+    """
+    programado = ocurrencias * caudal * duracion
+    programado_zona = np.bincount(zona_idx, weights=programado, minlength=litros_zona.size)
+    factor = np.divide(
+        litros_zona, programado_zona, out=np.zeros_like(litros_zona), where=programado_zona > 0
+    )[zona_idx]
+
+    maxima = duraciones_maximas(caudal, capacidad)
+    con_caudal = caudal > 0
+    sugerida = np.clip(np.ceil(duracion * factor), 1, np.maximum(maxima, 1))
+    return np.where((ocurrencias > 0) & con_caudal, sugerida, 0).astype(np.int64)
+
+
+def serie_et0(fecha_inicio, fecha_fin, latitud):
+    """
+    ET₀ y precipitación efectiva de cada día del período con una consulta.
+
+    Devuelve (fechas, et0, lluvia_efectiva, dias_sin_clima); los días sin
+    registro usan ET_REFERENCIA_MM_DIA y precipitación nula.
+    """
+    dias = (fecha_fin - fecha_inicio).days + 1
+    fechas = [fecha_inicio + timedelta(days=offset) for offset in range(dias)]
+    registros = RegistroClima.objects.filter(fecha__range=(fecha_inicio, fecha_fin)).values_list(
+        'fecha', 'temperatura_min', 'temperatura_max', 'precipitacion_mm', 'et0_mm'
+    )
+
+    tmin = np.full(dias, np.nan)
+    tmax = np.full(dias, np.nan)
+    et0_medida = np.full(dias, np.nan)
+    lluvia = np.zeros(dias)
+    for fecha, temperatura_min, temperatura_max, precipitacion, et0 in registros:
+        indice = (fecha - fecha_inicio).days
+        tmin[indice] = temperatura_min
+        tmax[indice] = temperatura_max
+        lluvia[indice] = precipitacion
+        if et0 is not None:
+            et0_medida[indice] = et0
+
+    dia_del_anio = np.array([fecha.timetuple().tm_yday for fecha in fechas])
+    estimada = et0_hargreaves(tmin, tmax, radiacion_extraterrestre(dia_del_anio, latitud))
+    et0 = np.where(np.isnan(et0_medida), estimada, et0_medida)
+    sin_clima = np.isnan(et0)
+    et0[sin_clima] = ET_REFERENCIA_MM_DIA
+    return fechas, et0, precipitacion_efectiva(lluvia), int(sin_clima.sum())
+
+
+def calcular_requerimientos(fecha_inicio, fecha_fin, zona_ids=None, detalle=False):
+    """
+    Requerimiento hídrico de las zonas activas entre dos fechas (inclusive) y
+    duración sugerida de sus programaciones vigentes.
+
+    Carga clima, zonas y programaciones con una consulta cada una. Con
+    `detalle` se incluyen los litros de cada día por zona.
+    """
+    configuracion = configuracion_evapotranspiracion()
+    fechas, et0, lluvia_efectiva, dias_sin_clima = serie_et0(fecha_inicio, fecha_fin, configuracion['LATITUD'])
+
+    zonas = Zona.objects.filter(activa=True)
+    if zona_ids:
+        zonas = zonas.filter(id__in=zona_ids)
+    zonas = list(zonas.order_by('id').values_list(
+        'id', 'nombre', 'tipo_zona', 'area_m2', 'capacidad_agua_litros'
+    ))
+    resultado = {
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'dias': len(fechas),
+        'dias_sin_clima': dias_sin_clima,
+        'et0_total_mm': round(float(et0.sum()), 2),
+        'precipitacion_efectiva_mm': round(float(lluvia_efectiva.sum()), 2),
+        'zonas': [],
+    }
+    if not zonas:
+        return resultado
+
+    zona_indices = {fila[0]: indice for indice, fila in enumerate(zonas)}
+    coeficientes = np.array([Zona.COEFICIENTE_CULTIVO.get(fila[2], 1.0) for fila in zonas])
+    area = np.array([float(fila[3]) for fila in zonas])
+    capacidad_zona = np.array([float(fila[4]) for fila in zonas])
+    litros = requerimiento_litros(et0, lluvia_efectiva, coeficientes, area, configuracion['EFICIENCIA_RIEGO'])
+    litros_zona = litros.sum(axis=1)
+
+    programaciones = list(
+        Programacion.objects
+        .filter(zona_id__in=zona_indices, activa=True, fecha_inicio__lte=fecha_fin)
+        .filter(Q(fecha_fin__gte=fecha_inicio) | Q(fecha_fin__isnull=True))
+        .order_by('zona_id', 'hora_inicio')
+        .values_list(
+            'id', 'zona_id', 'nombre', 'duracion_minutos', 'caudal_litros_minuto',
+            'frecuencia', 'dias_semana', 'fecha_inicio', 'fecha_fin'
+        )
+    )
+    por_zona = [[] for _ in zonas]
+    if programaciones:
+        ocurrencias = matriz_ocurrencias(
+            [fila[5] for fila in programaciones],
+            [fila[6] for fila in programaciones],
+            [fila[7] for fila in programaciones],
+            [fila[8] for fila in programaciones],
+            fechas
+        ).sum(axis=1)
+        zona_idx = np.array([zona_indices[fila[1]] for fila in programaciones])
+        duracion = np.array([fila[3] for fila in programaciones], dtype=float)
+        caudal = np.array([float(fila[4]) for fila in programaciones])
+        sugeridas = duraciones_sugeridas(
+            litros_zona, zona_idx, ocurrencias, caudal, duracion, capacidad_zona[zona_idx]
+        )
+        for indice, fila in enumerate(programaciones):
+            por_zona[zona_idx[indice]].append({
+                'id': fila[0],
+                'nombre': fila[2],
+                'caudal_litros_minuto': float(fila[4]),
+                'ocurrencias': int(ocurrencias[indice]),
+                'duracion_actual': fila[3],
+                'duracion_sugerida': int(sugeridas[indice]) or None,
+                'litros_programados': round(float(ocurrencias[indice] * caudal[indice] * duracion[indice]), 2),
+            })
+
+    maximo_diario = litros.max(axis=1)
+    for indice, (zona_id, nombre, tipo_zona, _, capacidad) in enumerate(zonas):
+        zona = {
+            'zona': zona_id,
+            'zona_nombre': nombre,
+            'tipo_zona': tipo_zona,
+            'coeficiente_cultivo': float(coeficientes[indice]),
+            'litros_totales': round(float(litros_zona[indice]), 2),
+            'litros_promedio_dia': round(float(litros_zona[indice] / len(fechas)), 2),
+            'litros_max_dia': round(float(maximo_diario[indice]), 2),
+            'capacidad_agua_litros': float(capacidad),
+            'capacidad_suficiente': bool(capacidad_zona[indice] >= maximo_diario[indice]),
+            'programaciones': por_zona[indice],
+        }
+        if detalle:
+            zona['litros_por_dia'] = np.round(litros[indice], 2).tolist()
+        resultado['zonas'].append(zona)
+    return resultado
+
+
+def leer_archivo_clima(contenido, formato):
+    """
+    Convierte el contenido de un archivo climático en filas.
+
+    `formato` es 'json' (lista de objetos) o 'csv' (con cabecera y las
+    columnas de CAMPOS_CLIMA). Lanza ValueError si no se puede leer.
+    """
+    if formato == 'json':
+        try:
+            filas = json.loads(contenido)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f'JSON inválido: {exc}')
+        if isinstance(filas, dict):
+            filas = filas.get('registros')
+        if not isinstance(filas, list):
+            raise ValueError('El JSON debe ser una lista de registros.')
+        return filas
+
+    if formato == 'csv':
+        try:
+            return [
+                {clave: valor for clave, valor in fila.items() if clave and valor not in (None, '')}
+                for fila in csv.DictReader(io.StringIO(contenido))
+            ]
+        except csv.Error as exc:
+            raise ValueError(f'CSV inválido: {exc}')
+
+    raise ValueError('Formato no soportado; use json o csv.')
+
+
+def importar_clima(filas, batch_size=500):
+    """
+    Valida y guarda registros climáticos, reemplazando los de fechas ya
+    cargadas.
+
+    Devuelve una tupla (guardados, errores) donde errores es una lista de
+    {'fila': índice, 'errores': {...}}.
+    """
+    validos = {}
+    errores = []
+    for indice, fila in enumerate(filas):
+        if not isinstance(fila, dict):
+            errores.append({'fila': indice, 'errores': {'non_field_errors': ['La fila debe ser un objeto.']}})
+            continue
+
+        serializer = RegistroClimaImportSerializer(data=fila)
+        if not serializer.is_valid():
+            errores.append({'fila': indice, 'errores': serializer.errors})
+            continue
+
+        registro = RegistroClima(**serializer.validated_data)
+        try:
+            registro.full_clean(validate_unique=False)
+        except ValidationError as exc:
+            errores.append({'fila': indice, 'errores': exc.message_dict})
+            continue
+
+        # Si una fecha se repite en el archivo prevalece la última fila
+        validos[registro.fecha] = registro
+
+    opciones = {'update_conflicts': True, 'update_fields': CAMPOS_CLIMA[1:]}
+    if connection.features.supports_update_conflicts_with_target:
+        opciones['unique_fields'] = ['fecha']
+
+    with transaction.atomic():
+        RegistroClima.objects.bulk_create(list(validos.values()), batch_size=batch_size, **opciones)
+
+    return len(validos), errores
@@ -1,5 +1,5 @@
 import django_filters
-from .models import Zona
+from .models import Zona, RegistroClima
 
 
 class ZonaFilter(django_filters.FilterSet):
@@ -23,3 +23,13 @@ class ZonaFilter(django_filters.FilterSet):
             'capacidad_min', 'capacidad_max',
             'fecha_creacion_desde', 'fecha_creacion_hasta'
         ]
+
+
+class RegistroClimaFilter(django_filters.FilterSet):
+    """Filtros para los registros climáticos"""
+    fecha_desde = django_filters.DateFilter(field_name='fecha', lookup_expr='gte')
+    fecha_hasta = django_filters.DateFilter(field_name='fecha', lookup_expr='lte')
+    
+    class Meta:
+        model = RegistroClima
+        fields = ['fecha_desde', 'fecha_hasta']
@@ -0,0 +1,33 @@
+import csv
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from zonas_riego.evapotranspiracion import importar_clima, leer_archivo_clima
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga registros climáticos diarios desde un archivo CSV (fecha, temperatura_min, '
+        'temperatura_max, precipitacion_mm, et0_mm, fuente) o JSON. Las fechas existentes se reemplazan'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .json')
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        if not ruta.exists():
+            raise CommandError(f'No existe el archivo {ruta}')
+
+        try:
+            filas = leer_archivo_clima(ruta.read_text(encoding='utf-8-sig'), ruta.suffix.lower().lstrip('.'))
+        except (ValueError, csv.Error) as exc:
+            raise CommandError(f'No se pudo leer {ruta}: {exc}')
+
+        guardados, errores = importar_clima(filas)
+
+        for error in errores:
+            self.stderr.write(f"Fila {error['fila']}: {json.dumps(error['errores'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f'{guardados} registros climáticos guardados, {len(errores)} filas con errores.'
+        ))
@@ -0,0 +1,123 @@
+import math
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from config.cache import incrementar_version
+from consumo_agua.models import Consumo, Medidor
+from programaciones.models import Programacion
+from sensores.models import Lectura, Sensor
+from zonas_riego import datos_sinteticos
+from zonas_riego.models import Zona
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos a escala (zonas, programaciones, sensores con curvas diarias '
+        'de humedad y medidores con consumo diario) con bulk_create. Con --semilla la carga es reproducible'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zonas', type=int, default=100, help='Cantidad de zonas (por defecto 100)')
+        parser.add_argument(
+            '--programaciones-por-zona', type=int, default=10,
+            help='Programaciones de cada zona (por defecto 10)'
+        )
+        parser.add_argument('--sensores-por-zona', type=int, default=2, help='Sensores de humedad por zona (por defecto 2)')
+        parser.add_argument('--dias', type=int, default=30, help='Días de lecturas y consumo hasta ayer (por defecto 30)')
+        parser.add_argument(
+            '--intervalo', type=int, default=15,
+            help='Minutos entre lecturas de un sensor; debe dividir 1440 (por defecto 15)'
+        )
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por inserción masiva (por defecto 5000)')
+        parser.add_argument(
+            '--procesos', type=int, default=1,
+            help='Procesos que generan las lecturas en paralelo (por defecto 1; con SQLite siempre 1)'
+        )
+        parser.add_argument('--semilla', type=int, help='Semilla del generador; sin ella se elige una al azar')
+        parser.add_argument(
+            '--prefijo', default='GEN',
+            help='Prefijo de los nombres de zonas, sensores y medidores generados (por defecto GEN)'
+        )
+        parser.add_argument(
+            '--limpiar', action='store_true',
+            help='Elimina antes los datos generados con el mismo prefijo'
+        )
+
+    def handle(self, *args, **options):
+        prefijo = options['prefijo']
+        intervalo = options['intervalo']
+        if intervalo < 1 or 1440 % intervalo:
+            raise CommandError('--intervalo debe dividir 1440 (1, 5, 10, 15, 30, 60...).')
+        if min(options['zonas'], options['dias'], options['lote']) < 1:
+            raise CommandError('--zonas, --dias y --lote deben ser mayores que 0.')
+
+        procesos = max(1, options['procesos'])
+        if procesos > 1 and connection.vendor == 'sqlite':
+            self.stderr.write('SQLite no admite escrituras concurrentes: se usa un solo proceso.')
+            procesos = 1
+
+        if options['limpiar']:
+            self.limpiar(prefijo)
+        elif self.existen(prefijo):
+            raise CommandError(f'Ya hay datos generados con el prefijo "{prefijo}": use --limpiar u otro --prefijo.')
+
+        semilla = options['semilla']
+        if semilla is None:
+            semilla = datos_sinteticos.nueva_semilla()
+        rng = np.random.default_rng(semilla)
+        lote = options['lote']
+        dias = options['dias']
+        inicio = time.perf_counter()
+
+        with transaction.atomic():
+            zonas = datos_sinteticos.generar_zonas(rng, prefijo, options['zonas'], lote)
+            programaciones, riego_zonas = datos_sinteticos.generar_programaciones(
+                rng, zonas, options['programaciones_por_zona'], dias, lote
+            )
+            sensores = datos_sinteticos.generar_sensores(prefijo, zonas, options['sensores_por_zona'], lote)
+            medidores, consumos = datos_sinteticos.generar_medidores(rng, prefijo, zonas, riego_zonas, dias, lote)
+        self.stdout.write(
+            f'{len(zonas)} zonas, {programaciones} programaciones, {len(sensores)} sensores, '
+            f'{medidores} medidores y {consumos} consumos en {time.perf_counter() - inicio:.1f} s.'
+        )
+
+        lecturas_previstas = len(sensores) * dias * (1440 // intervalo)
+        # Varias tareas por proceso para repartir bien la carga y mostrar el avance
+        por_tarea = max(1, min(50, math.ceil(len(sensores) / (procesos * 4))))
+        tareas = datos_sinteticos.tareas_lecturas(sensores, riego_zonas, por_tarea)
+        inicio_lecturas = time.perf_counter()
+
+        def progreso(total):
+            transcurrido = time.perf_counter() - inicio_lecturas
+            self.stdout.write(
+                f'  {total}/{lecturas_previstas} lecturas ({total / transcurrido:,.0f} filas/s)'
+                if transcurrido else f'  {total}/{lecturas_previstas} lecturas'
+            )
+
+        try:
+            lecturas = datos_sinteticos.ejecutar_tareas_lecturas(
+                tareas, semilla, dias, intervalo, lote, procesos,
+                progreso=progreso if options['verbosity'] > 1 else None,
+            )
+        finally:
+            # bulk_create no emite post_save: se invalidan los snapshots a mano
+            incrementar_version(Zona, Programacion, Sensor, Lectura, Medidor, Consumo)
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{lecturas} lecturas generadas con {procesos} proceso(s) en {duracion:.1f} s '
+            f'(semilla {semilla}).'
+        ))
+
+    def existen(self, prefijo):
+        return Zona.objects.filter(nombre__startswith=f'{prefijo} Zona ').exists()
+
+    def limpiar(self, prefijo):
+        with transaction.atomic():
+            # Lecturas, consumos y programaciones se eliminan en cascada
+            Sensor.objects.filter(nombre__startswith=f'{prefijo} Sensor ').delete()
+            Medidor.objects.filter(numero_serie__startswith=f'{prefijo}-MED-').delete()
+            Zona.objects.filter(nombre__startswith=f'{prefijo} Zona ').delete()
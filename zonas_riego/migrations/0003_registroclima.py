@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:23
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('zonas_riego', '0002_delete_sensor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroClima',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('temperatura_min', models.DecimalField(decimal_places=2, help_text='Temperatura mínima (°C)', max_digits=5)),
+                ('temperatura_max', models.DecimalField(decimal_places=2, help_text='Temperatura máxima (°C)', max_digits=5)),
+                ('precipitacion_mm', models.DecimalField(decimal_places=2, default=0, help_text='Precipitación del día en mm', max_digits=6, validators=[django.core.validators.MinValueValidator(0)])),
+                ('et0_mm', models.DecimalField(blank=True, decimal_places=2, help_text='ET₀ medida en mm/día; si se omite se estima con Hargreaves', max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(0)])),
+                ('fuente', models.CharField(blank=True, max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Registro Climático',
+                'verbose_name_plural': 'Registros Climáticos',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
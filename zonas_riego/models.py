@@ -21,6 +21,16 @@ class Zona(models.Model):
         ('mantenimiento', 'Mantenimiento'),
     ]
     
+    # Coeficiente de cultivo (Kc) por tipo de zona, relativo a la
+    # evapotranspiración de referencia
+    COEFICIENTE_CULTIVO = {
+        'jardin': 0.8,
+        'huerto': 1.0,
+        'cesped': 0.95,
+        'cultivo': 1.1,
+        'ornamental': 0.6,
+    }
+    
     nombre = models.CharField(max_length=100, unique=True)
     descripcion = models.TextField(blank=True, null=True)
     tipo_zona = models.CharField(max_length=20, choices=TIPO_ZONA_CHOICES, default='jardin')
@@ -64,3 +74,48 @@ class Zona(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+class RegistroClima(models.Model):
+    """
+    Registro meteorológico diario usado para estimar la evapotranspiración
+    de referencia (ET₀) y el requerimiento hídrico de las zonas
+    """
+    fecha = models.DateField(unique=True)
+    temperatura_min = models.DecimalField(max_digits=5, decimal_places=2, help_text="Temperatura mínima (°C)")
+    temperatura_max = models.DecimalField(max_digits=5, decimal_places=2, help_text="Temperatura máxima (°C)")
+    precipitacion_mm = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        default=0,
+        validators=[MinValueValidator(0)],
+        help_text="Precipitación del día en mm"
+    )
+    et0_mm = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(0)],
+        help_text="ET₀ medida en mm/día; si se omite se estima con Hargreaves"
+    )
+    fuente = models.CharField(max_length=100, blank=True)
+    
+    class Meta:
+        verbose_name = 'Registro Climático'
+        verbose_name_plural = 'Registros Climáticos'
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"Clima {self.fecha}: {self.temperatura_min}-{self.temperatura_max} °C"
+    
+    def clean(self):
+        """Validaciones personalizadas"""
+        super().clean()
+        if (
+            self.temperatura_min is not None and self.temperatura_max is not None
+            and self.temperatura_max < self.temperatura_min
+        ):
+            raise ValidationError({
+                'temperatura_max': 'La temperatura máxima no puede ser menor que la mínima.'
+            })
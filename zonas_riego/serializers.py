@@ -1,9 +1,12 @@
 from rest_framework import serializers
-from .models import Zona
+from .models import Zona, RegistroClima
 from django.utils import timezone
+from datetime import timedelta
+from config.campos import CamposDinamicosSerializerMixin
+from config.serializacion import ListaRapidaSerializer
 
 
-class ZonaSerializer(serializers.ModelSerializer):
+class ZonaSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """Serializer para el modelo Zona"""
     tipo_zona_display = serializers.CharField(source='get_tipo_zona_display', read_only=True)
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
@@ -18,6 +21,8 @@ class ZonaSerializer(serializers.ModelSerializer):
             'consumo_estimado'
         ]
         read_only_fields = ['fecha_creacion', 'fecha_actualizacion']
+        dependencias = {'consumo_estimado': ['capacidad_agua_litros', 'area_m2']}
+        list_serializer_class = ListaRapidaSerializer
     
     def get_consumo_estimado(self, obj):
         """Calcula el consumo estimado por m2"""
@@ -72,10 +77,128 @@ class ZonaSerializer(serializers.ModelSerializer):
         return data
 
 
-class ZonaSimpleSerializer(serializers.ModelSerializer):
+class ZonaSimpleSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """Serializer simple para listar zonas sin detalles completos"""
     tipo_zona_display = serializers.CharField(source='get_tipo_zona_display', read_only=True)
     
     class Meta:
         model = Zona
         fields = ['id', 'nombre', 'tipo_zona', 'tipo_zona_display', 'estado', 'area_m2']
+        list_serializer_class = ListaRapidaSerializer
+
+
+class ZonaTableroSerializer(ZonaSimpleSerializer):
+    """
+    Serializer para el tablero de zonas. Espera las anotaciones y el prefetch
+    `programaciones_vigentes` que prepara ZonaViewSet.tablero.
+    """
+    programaciones_activas = serializers.IntegerField(read_only=True)
+    proxima_ejecucion = serializers.SerializerMethodField()
+    litros_planificados_hoy = serializers.SerializerMethodField()
+    ultima_humedad = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
+    ultima_lectura = serializers.DateTimeField(read_only=True)
+    consumo_7_dias_m3 = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    
+    class Meta(ZonaSimpleSerializer.Meta):
+        fields = ZonaSimpleSerializer.Meta.fields + [
+            'activa', 'programaciones_activas', 'proxima_ejecucion', 'litros_planificados_hoy',
+            'ultima_humedad', 'ultima_lectura', 'consumo_7_dias_m3'
+        ]
+    
+    def get_proxima_ejecucion(self, obj):
+        """Próximo riego entre las programaciones vigentes de la zona"""
+        ahora = self.context.get('ahora') or timezone.now()
+        proximas = [
+            inicio for inicio in (
+                programacion.proxima_ejecucion(ahora) for programacion in obj.programaciones_vigentes
+            )
+            if inicio is not None
+        ]
+        return min(proximas) if proximas else None
+    
+    def get_litros_planificados_hoy(self, obj):
+        """Litros de las programaciones que riegan hoy"""
+        hoy = timezone.localtime(self.context.get('ahora')).date()
+        return sum(
+            programacion.consumo_total_litros
+            for programacion in obj.programaciones_vigentes
+            if programacion.ocurre_en(hoy)
+        )
+
+
+class PeriodoAgregadoSerializer(serializers.Serializer):
+    """Parámetros de los endpoints agregados por zona"""
+    fecha_min = serializers.DateField(required=False)
+    fecha_max = serializers.DateField(required=False)
+    periodo = serializers.ChoiceField(choices=['dia', 'semana', 'mes'], required=False)
+    zona = serializers.IntegerField(required=False, min_value=1)
+    
+    def validate(self, data):
+        fecha_min = data.get('fecha_min')
+        fecha_max = data.get('fecha_max')
+        if fecha_min and fecha_max and fecha_max < fecha_min:
+            raise serializers.ValidationError({
+                'fecha_max': 'La fecha máxima debe ser posterior a la fecha mínima.'
+            })
+        return data
+
+
+class SimulacionParametrosSerializer(serializers.Serializer):
+    """Parámetros del simulador de balance hídrico"""
+    horizonte_dias = serializers.IntegerField(required=False, default=7, min_value=1, max_value=30)
+    umbral = serializers.FloatField(required=False, default=30, min_value=0, max_value=100)
+    dias_calibracion = serializers.IntegerField(required=False, default=3, min_value=1, max_value=30)
+    zona = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+
+class RequerimientoParametrosSerializer(serializers.Serializer):
+    """Parámetros del cálculo de requerimiento hídrico por evapotranspiración"""
+    fecha_inicio = serializers.DateField(required=False)
+    fecha_fin = serializers.DateField(required=False)
+    zona = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    detalle = serializers.BooleanField(required=False, default=False)
+    
+    DIAS_POR_DEFECTO = 30
+    DIAS_MAXIMOS = 366
+    
+    def validate(self, data):
+        fecha_inicio = data.setdefault('fecha_inicio', timezone.localdate())
+        fecha_fin = data.setdefault('fecha_fin', fecha_inicio + timedelta(days=self.DIAS_POR_DEFECTO - 1))
+        if fecha_fin < fecha_inicio:
+            raise serializers.ValidationError({
+                'fecha_fin': 'La fecha de fin debe ser posterior a la fecha de inicio.'
+            })
+        if (fecha_fin - fecha_inicio).days >= self.DIAS_MAXIMOS:
+            raise serializers.ValidationError({
+                'fecha_fin': f'El período no puede superar {self.DIAS_MAXIMOS} días.'
+            })
+        return data
+
+
+class RegistroClimaSerializer(serializers.ModelSerializer):
+    """Serializer para los registros climáticos diarios"""
+    
+    class Meta:
+        model = RegistroClima
+        fields = ['id', 'fecha', 'temperatura_min', 'temperatura_max', 'precipitacion_mm', 'et0_mm', 'fuente']
+        read_only_fields = ['id']
+    
+    def validate(self, data):
+        """Validaciones cruzadas"""
+        temperatura_min = data.get('temperatura_min', getattr(self.instance, 'temperatura_min', None))
+        temperatura_max = data.get('temperatura_max', getattr(self.instance, 'temperatura_max', None))
+        if temperatura_min is not None and temperatura_max is not None and temperatura_max < temperatura_min:
+            raise serializers.ValidationError({
+                'temperatura_max': 'La temperatura máxima no puede ser menor que la mínima.'
+            })
+        return data
+
+
+class RegistroClimaImportSerializer(RegistroClimaSerializer):
+    """
+    Serializer para la carga masiva de clima: las fechas ya existentes se
+    reemplazan, por lo que no se valida su unicidad
+    """
+    
+    class Meta(RegistroClimaSerializer.Meta):
+        extra_kwargs = {'fecha': {'validators': []}}
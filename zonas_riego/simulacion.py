@@ -0,0 +1,228 @@
+"""Simulador del balance hídrico del suelo por zona.
+
+Todas las zonas se modelan a la vez como arreglos de NumPy: la humedad de
+cada zona (en % de la lámina útil) avanza hora a hora sumando el riego de
+sus programaciones y restando una pérdida por evapotranspiración que depende
+del tipo de zona (Zona.COEFICIENTE_CULTIVO), de un perfil diurno y de un
+factor de calibración estimado a partir de las lecturas recientes.
+"""
+import math
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Q
+from django.utils import timezone
+
+from programaciones.models import Programacion
+from programaciones.ocurrencias import matriz_ocurrencias
+from sensores.models import Lectura
+from .models import Zona
+
+# Evapotranspiración de referencia (mm/día) y lámina de agua útil del suelo (mm)
+ET_REFERENCIA_MM_DIA = 5.0
+LAMINA_UTIL_MM = 60.0
+HUMEDAD_INICIAL_POR_DEFECTO = 50.0
+
+# Rango admitido para el factor de calibración observado/modelado
+CALIBRACION_MIN = 0.25
+CALIBRACION_MAX = 4.0
+
+# Intervalo máximo entre lecturas consecutivas para estimar el secado (horas)
+INTERVALO_MAX_CALIBRACION_H = 6.0
+
+# Reparto horario de la pérdida diaria: casi toda ocurre con luz solar
+_HORAS = np.arange(24)
+PERFIL_DIURNO = np.clip(np.sin(np.pi * (_HORAS - 6) / 12), 0, None) + 0.05
+PERFIL_DIURNO = PERFIL_DIURNO / PERFIL_DIURNO.sum()
+
+
+def expandir_programaciones(programaciones, zona_indices, inicio, horas):
+    """
+    Litros aplicados por zona y hora en el horizonte.
+
+    `programaciones` son tuplas (zona_id, hora_inicio, duracion_minutos,
+    caudal_litros_minuto, frecuencia, dias_semana, fecha_inicio, fecha_fin);
+    `inicio` es el datetime local (en punto) de la hora 0. Las ocurrencias se
+    calculan con matriz_ocurrencias desde el día anterior a `inicio`, cuyos
+    riegos pueden seguir pasada la medianoche.
+    """
+    litros = np.zeros((len(zona_indices), horas))
+    programaciones = [fila for fila in programaciones if fila[0] in zona_indices]
+    if not programaciones:
+        return litros
+
+    dias = horas // 24 + 2
+    fechas = [inicio.date() + timedelta(days=offset) for offset in range(-1, dias)]
+    ocurre = matriz_ocurrencias(
+        [fila[4] for fila in programaciones],
+        [fila[5] for fila in programaciones],
+        [fila[6] for fila in programaciones],
+        [fila[7] for fila in programaciones],
+        fechas
+    )
+
+    zona = np.array([zona_indices[fila[0]] for fila in programaciones])
+    hora = np.array([fila[1].hour for fila in programaciones])
+    minuto = np.array([fila[1].minute for fila in programaciones])
+    duracion = np.array([fila[2] for fila in programaciones], dtype=float)
+    caudal = np.array([float(fila[3]) for fila in programaciones])
+
+    programacion_idx, dia_idx = np.nonzero(ocurre)
+    if programacion_idx.size == 0:
+        return litros
+
+    # Se reparte el riego entre las franjas horarias que ocupa (la fila 0 es el día anterior)
+    hora_base = (dia_idx - 1) * 24 + hora[programacion_idx] - inicio.hour
+    minuto_inicio = minuto[programacion_idx]
+    minuto_fin = minuto_inicio + duracion[programacion_idx]
+    caudal_ocurrencia = caudal[programacion_idx]
+    zona_ocurrencia = zona[programacion_idx]
+    franjas = math.ceil((minuto_inicio.max() + duracion.max()) / 60)
+    for franja in range(franjas):
+        minutos = np.clip(
+            np.minimum(minuto_fin, 60 * (franja + 1)) - np.maximum(minuto_inicio, 60 * franja), 0, 60
+        )
+        hora_destino = hora_base + franja
+        validas = (minutos > 0) & (hora_destino >= 0) & (hora_destino < horas)
+        np.add.at(
+            litros,
+            (zona_ocurrencia[validas], hora_destino[validas]),
+            caudal_ocurrencia[validas] * minutos[validas]
+        )
+
+    return litros
+
+
+def calibrar(zona_idx, sensor_idx, horas, humedad, coeficientes, n_zonas):
+    """
+    Estima por zona el factor observado/modelado de pérdida y la humedad actual.
+
+    Recibe las lecturas ordenadas por zona, sensor y tiempo (`horas` en
+    horas desde un origen común). La tasa de secado observada se obtiene de
+    los tramos entre lecturas consecutivas de un mismo sensor en los que la
+    humedad baja (sin riego): entre sensores distintos la diferencia
+    incluiría el desfase entre ellos. La humedad actual es el promedio de
+    la última lectura de cada sensor de la zona.
+    """
+    calibracion = np.ones(n_zonas)
+    humedad_actual = np.full(n_zonas, HUMEDAD_INICIAL_POR_DEFECTO)
+    if zona_idx.size == 0:
+        return calibracion, humedad_actual
+
+    mismo_sensor = (zona_idx[1:] == zona_idx[:-1]) & (sensor_idx[1:] == sensor_idx[:-1])
+
+    # Última lectura de cada sensor, promediada por zona
+    ultima = np.r_[~mismo_sensor, True]
+    sensores_zona = np.bincount(zona_idx[ultima], minlength=n_zonas)
+    suma_ultimas = np.bincount(zona_idx[ultima], weights=humedad[ultima], minlength=n_zonas)
+    con_lecturas = sensores_zona > 0
+    humedad_actual[con_lecturas] = suma_ultimas[con_lecturas] / sensores_zona[con_lecturas]
+
+    delta_h = np.diff(humedad)
+    delta_t = np.diff(horas)
+    secado = mismo_sensor & (delta_h < 0) & (delta_t > 0) & (delta_t <= INTERVALO_MAX_CALIBRACION_H)
+    zonas_secado = zona_idx[1:][secado]
+    perdida_observada = np.bincount(zonas_secado, weights=-delta_h[secado], minlength=n_zonas)
+    horas_observadas = np.bincount(zonas_secado, weights=delta_t[secado], minlength=n_zonas)
+
+    con_datos = horas_observadas > 0
+    tasa_modelada = ET_REFERENCIA_MM_DIA * coeficientes / 24 / LAMINA_UTIL_MM * 100
+    calibracion[con_datos] = np.clip(
+        perdida_observada[con_datos] / horas_observadas[con_datos] / tasa_modelada[con_datos],
+        CALIBRACION_MIN,
+        CALIBRACION_MAX
+    )
+    return calibracion, humedad_actual
+
+
+def simular(humedad_inicial, area_m2, coeficientes, calibracion, litros, umbral, hora_inicial=0):
+    """
+    Avanza el balance hídrico hora a hora para todas las zonas a la vez.
+
+    Devuelve un diccionario de arreglos por zona: humedad mínima y final y la
+    primera hora (índice) en que la humedad queda por debajo de `umbral`
+    (-1 si no ocurre en el horizonte).
+    """
+    n_zonas, horas = litros.shape
+    entrada = litros / (area_m2[:, None] * LAMINA_UTIL_MM) * 100
+    perdida_diaria = ET_REFERENCIA_MM_DIA * coeficientes * calibracion / LAMINA_UTIL_MM * 100
+    perdida_horaria = perdida_diaria[:, None] * np.roll(PERFIL_DIURNO, -hora_inicial)[None, :]
+
+    humedad = humedad_inicial.astype(float).copy()
+    minima = humedad.copy()
+    cruce = np.full(n_zonas, -1)
+    for hora in range(horas):
+        humedad += entrada[:, hora] - perdida_horaria[:, hora % 24]
+        np.clip(humedad, 0, 100, out=humedad)
+        np.minimum(minima, humedad, out=minima)
+        nuevos = (humedad < umbral) & (cruce < 0)
+        cruce[nuevos] = hora
+
+    return {'humedad_minima': minima, 'humedad_final': humedad, 'cruce_umbral': cruce}
+
+
+def simular_zonas(horizonte_dias=7, umbral=30, zona_ids=None, dias_calibracion=3, ahora=None):
+    """
+    Carga zonas, programaciones vigentes y lecturas recientes (una consulta
+    cada una) y simula el horizonte pedido. Devuelve una lista de resultados
+    por zona.
+    """
+    ahora = timezone.localtime(ahora)
+    inicio = ahora.replace(minute=0, second=0, microsecond=0)
+    horas = horizonte_dias * 24
+
+    zonas = Zona.objects.filter(activa=True)
+    if zona_ids:
+        zonas = zonas.filter(id__in=zona_ids)
+    zonas = list(zonas.order_by('id').values_list('id', 'nombre', 'area_m2', 'tipo_zona'))
+    if not zonas:
+        return []
+
+    zona_indices = {fila[0]: indice for indice, fila in enumerate(zonas)}
+    area = np.array([float(fila[2]) for fila in zonas])
+    coeficientes = np.array([Zona.COEFICIENTE_CULTIVO.get(fila[3], 1.0) for fila in zonas])
+
+    fin = inicio + timedelta(hours=horas)
+    programaciones = (
+        Programacion.objects
+        .filter(zona_id__in=zona_indices, activa=True, fecha_inicio__lte=fin.date())
+        .filter(Q(fecha_fin__gte=inicio.date() - timedelta(days=1)) | Q(fecha_fin__isnull=True))
+        .values_list(
+            'zona_id', 'hora_inicio', 'duracion_minutos', 'caudal_litros_minuto',
+            'frecuencia', 'dias_semana', 'fecha_inicio', 'fecha_fin'
+        )
+    )
+    litros = expandir_programaciones(list(programaciones), zona_indices, inicio, horas)
+
+    lecturas = list(
+        Lectura.objects
+        .filter(sensor__zona_id__in=zona_indices, fecha_hora__gte=ahora - timedelta(days=dias_calibracion))
+        .order_by('sensor__zona_id', 'sensor_id', 'fecha_hora')
+        .values_list('sensor__zona_id', 'sensor_id', 'fecha_hora', 'humedad')
+    )
+    zona_idx = np.array([zona_indices[fila[0]] for fila in lecturas], dtype=np.int64)
+    sensor_idx = np.array([fila[1] for fila in lecturas], dtype=np.int64)
+    horas_lectura = np.array([(fila[2] - ahora).total_seconds() / 3600 for fila in lecturas])
+    humedad = np.array([float(fila[3]) for fila in lecturas])
+    calibracion, humedad_inicial = calibrar(
+        zona_idx, sensor_idx, horas_lectura, humedad, coeficientes, len(zonas)
+    )
+
+    resultado = simular(humedad_inicial, area, coeficientes, calibracion, litros, umbral, inicio.hour)
+
+    return [
+        {
+            'zona': zona_id,
+            'zona_nombre': nombre,
+            'humedad_inicial': round(float(humedad_inicial[indice]), 2),
+            'humedad_minima': round(float(resultado['humedad_minima'][indice]), 2),
+            'humedad_final': round(float(resultado['humedad_final'][indice]), 2),
+            'litros_programados': round(float(litros[indice].sum()), 2),
+            'calibracion': round(float(calibracion[indice]), 3),
+            'cruce_umbral': (
+                inicio + timedelta(hours=int(resultado['cruce_umbral'][indice]) + 1)
+                if resultado['cruce_umbral'][indice] >= 0 else None
+            ),
+        }
+        for indice, (zona_id, nombre, _, _) in enumerate(zonas)
+    ]
@@ -1,3 +1,714 @@
-from django.test import TestCase
+import csv
+from contextlib import ExitStack
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+import math
+import time as reloj
+from unittest import mock
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from rest_framework import status
+from config.replicas import reactivar_replicas
+from config.testing import PresupuestoConsultasMixin
+from config.cache import comprobar_cache_compartida, version_modelo
+from .datos_sinteticos import curva_humedad
+from .evapotranspiracion import (
+    duraciones_sugeridas,
+    et0_hargreaves,
+    radiacion_extraterrestre,
+    requerimiento_litros,
+)
+from .models import Zona, RegistroClima
+from .simulacion import (
+    ET_REFERENCIA_MM_DIA,
+    LAMINA_UTIL_MM,
+    PERFIL_DIURNO,
+    expandir_programaciones,
+    simular,
+)
+from programaciones.models import Programacion
+from programaciones.ocurrencias import DURACION_MAXIMA_MINUTOS
+from programaciones.views import ProgramacionViewSet
+from sensores.models import Sensor, Lectura
+from consumo_agua.models import Medidor, Consumo
 
-# Create your tests here.
+
+class ZonasAPITestCase(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        tipos = [tipo for tipo, _ in Zona.TIPO_ZONA_CHOICES]
+        self.zonas = [
+            Zona.objects.create(
+                nombre=f'Zona {indice}',
+                tipo_zona=tipos[indice % len(tipos)],
+                area_m2=100,
+                capacidad_agua_litros=5000,
+                ubicacion=f'Sector {indice}'
+            )
+            for indice in range(8)
+        ]
+
+    def test_presupuesto_consultas_listado(self):
+        with self.assertPresupuestoConsultas(2):
+            resp = self.client.get('/api/zonas/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['count'], 8)
+
+    def test_get_condicional(self):
+        resp = self.client.get('/api/zonas/?ordering=area_m2')
+        etag = resp['ETag']
+        self.assertIn('Last-Modified', resp)
+
+        # El 304 se resuelve sin consultas ni serialización
+        with self.assertPresupuestoConsultas(0):
+            resp = self.client.get('/api/zonas/?ordering=area_m2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp['ETag'], etag)
+
+        # Otra página u otros filtros tienen su propio ETag
+        resp = self.client.get('/api/zonas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        zona = self.zonas[0]
+        detalle = self.client.get(f'/api/zonas/{zona.id}/')
+        zona.nombre = 'Zona renombrada'
+        zona.save()
+
+        resp = self.client.get('/api/zonas/?ordering=area_m2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp['ETag'], etag)
+        resp = self.client.get(f'/api/zonas/{zona.id}/', HTTP_IF_NONE_MATCH=detalle['ETag'])
+        self.assertEqual(resp.data['nombre'], 'Zona renombrada')
+
+    def test_sin_cache_compartida_no_hay_validadores_ni_snapshots(self):
+        with self.settings(CACHE_COMPARTIDA=False):
+            resp = self.client.get('/api/zonas/')
+            self.assertNotIn('ETag', resp)
+            self.assertNotIn('Last-Modified', resp)
+            resp = self.client.get('/api/zonas/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+            self.client.get('/api/zonas/estadisticas/')
+            with self.assertPresupuestoConsultas(1) as registro:
+                self.client.get('/api/zonas/estadisticas/')
+            self.assertEqual(registro.total, 1)
+
+            self.assertEqual([aviso.id for aviso in comprobar_cache_compartida(None)], ['config.W001'])
+        self.assertEqual(comprobar_cache_compartida(None), [])
+
+    def test_campos_solicitados(self):
+        with self.assertPresupuestoConsultas(2) as registro:
+            resp = self.client.get('/api/zonas/?fields=id,nombre,estado')
+        self.assertEqual(set(resp.data['results'][0]), {'id', 'nombre', 'estado'})
+        self.assertNotIn('ubicacion', ' '.join(registro.plantillas))
+
+        # Con ?fields= se puede elegir cualquier campo del serializer completo
+        resp = self.client.get(f'/api/zonas/{self.zonas[0].id}/?fields=nombre,consumo_estimado')
+        self.assertEqual(resp.data, {'nombre': 'Zona 0', 'consumo_estimado': 50.0})
+
+    def test_presupuesto_consultas_detalle(self):
+        zona = self.zonas[0]
+        with self.assertPresupuestoConsultas(1):
+            resp = self.client.get(f'/api/zonas/{zona.id}/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        with self.assertPresupuestoConsultas(1):
+            resp = self.client.get(f'/api/zonas/{zona.id}/resumen/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_presupuesto_consultas_estadisticas(self):
+        with self.assertPresupuestoConsultas(1):
+            resp = self.client.get('/api/zonas/estadisticas/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['total_zonas'], 8)
+        self.assertEqual(resp.data['zonas_por_tipo'], {'jardin': 2, 'huerto': 2, 'cesped': 2, 'cultivo': 1, 'ornamental': 1})
+        self.assertEqual(resp.data['zonas_por_estado'], {'activa': 8})
+
+        # Segunda petición servida desde el snapshot
+        with self.assertPresupuestoConsultas(0):
+            self.client.get('/api/zonas/estadisticas/')
+
+    def test_estadisticas_se_invalidan_al_escribir(self):
+        self.client.get('/api/zonas/estadisticas/')
+        zona = self.zonas[0]
+        zona.estado = 'mantenimiento'
+        zona.save()
+
+        resp = self.client.get('/api/zonas/estadisticas/')
+        self.assertEqual(resp.data['zonas_por_estado'], {'activa': 7, 'mantenimiento': 1})
+
+        zona.delete()
+        resp = self.client.get('/api/zonas/estadisticas/')
+        self.assertEqual(resp.data['total_zonas'], 7)
+
+    @override_settings(INSTRUMENTACION_SQL={'ACTIVA': True, 'CABECERAS': True})
+    def test_cabeceras_de_instrumentacion(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        resp = client.get('/api/zonas/')
+        self.assertEqual(resp['X-DB-Query-Count'], '2')
+        self.assertIn('X-DB-Query-Time-ms', resp)
+        self.assertEqual(resp['X-DB-N-Plus-One'], '0')
+
+    def test_tablero_con_consultas_fijas(self):
+        hoy = timezone.localdate()
+        for zona in self.zonas:
+            Programacion.objects.create(
+                zona=zona, nombre='Riego diario', hora_inicio=time(23, 59), duracion_minutos=10,
+                frecuencia='diaria', fecha_inicio=hoy - timedelta(days=10), caudal_litros_minuto=5
+            )
+            Programacion.objects.create(
+                zona=zona, nombre='Riego pausado', hora_inicio=time(6, 0), duracion_minutos=10,
+                frecuencia='diaria', fecha_inicio=hoy - timedelta(days=10), caudal_litros_minuto=5,
+                activa=False
+            )
+            sensor = Sensor.objects.create(nombre=f'Sensor {zona.nombre}', tipo='HUMEDAD', zona=zona)
+            Lectura.objects.create(sensor=sensor, humedad=30, fecha_hora=timezone.now() - timedelta(hours=2))
+            Lectura.objects.create(sensor=sensor, humedad=45, fecha_hora=timezone.now() - timedelta(hours=1))
+            medidor = Medidor.objects.create(
+                numero_serie=f'MED-{zona.id}', zona=zona, instalado=date(2024, 1, 1)
+            )
+            Consumo.objects.create(medidor=medidor, fecha=hoy, volumen_m3=2)
+            Consumo.objects.create(medidor=medidor, fecha=hoy - timedelta(days=3), volumen_m3=1.5)
+            Consumo.objects.create(medidor=medidor, fecha=hoy - timedelta(days=30), volumen_m3=9)
+
+        with self.assertPresupuestoConsultas(3):
+            resp = self.client.get('/api/zonas/tablero/')
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['count'], 8)
+        fila = resp.data['results'][0]
+        self.assertEqual(fila['programaciones_activas'], 1)
+        self.assertEqual(fila['litros_planificados_hoy'], 50.0)
+        self.assertEqual(fila['ultima_humedad'], '45.00')
+        self.assertEqual(fila['consumo_7_dias_m3'], '3.50')
+        self.assertIsNotNone(fila['proxima_ejecucion'])
+
+    def test_agregados_de_humedad_y_consumo_por_zona(self):
+        zona_a, zona_b = self.zonas[:2]
+        hoy = timezone.localdate()
+        ahora = timezone.now()
+        for zona, humedades in [(zona_a, [20, 40]), (zona_b, [60])]:
+            for indice in range(2):
+                sensor = Sensor.objects.create(nombre=f'S{zona.id}-{indice}', tipo='HUMEDAD', zona=zona)
+                for humedad in humedades:
+                    Lectura.objects.create(sensor=sensor, humedad=humedad, fecha_hora=ahora)
+            medidor = Medidor.objects.create(numero_serie=f'M{zona.id}', zona=zona, instalado=date(2024, 1, 1))
+            Consumo.objects.create(medidor=medidor, fecha=hoy, volumen_m3=2)
+            Consumo.objects.create(medidor=medidor, fecha=hoy - timedelta(days=40), volumen_m3=5)
+        Lectura.objects.create(
+            sensor=Sensor.objects.create(nombre='Sin zona', tipo='HUMEDAD'), humedad=99, fecha_hora=ahora
+        )
+
+        with self.assertPresupuestoConsultas(1):
+            resp = self.client.get('/api/zonas/humedad/')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([(fila['zona'], fila['avg_humedad'], fila['lecturas']) for fila in resp.data], [
+            (zona_a.id, 30, 4), (zona_b.id, 60, 2)
+        ])
+
+        with self.assertPresupuestoConsultas(1):
+            resp = self.client.get(f'/api/zonas/consumo/?fecha_min={hoy - timedelta(days=7)}')
+        self.assertEqual([(fila['zona'], fila['total_m3']) for fila in resp.data], [(zona_a.id, 2), (zona_b.id, 2)])
+
+        resp = self.client.get(f'/api/zonas/consumo/?zona={zona_a.id}&periodo=mes')
+        self.assertEqual(sum(fila['total_m3'] for fila in resp.data), 7)
+        self.assertIn('periodo', resp.data[0])
+
+        resp = self.client.get('/api/zonas/consumo/?periodo=anio')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SimulacionTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        hoy = timezone.localdate()
+        self.regada = Zona.objects.create(nombre='Césped regado', tipo_zona='cesped', area_m2=100, capacidad_agua_litros=5000)
+        self.seca = Zona.objects.create(nombre='Césped seco', tipo_zona='cesped', area_m2=100, capacidad_agua_litros=5000)
+        Programacion.objects.create(
+            zona=self.regada, nombre='Riego diario', hora_inicio=time(6, 0), duracion_minutos=30,
+            frecuencia='diaria', fecha_inicio=hoy - timedelta(days=5), caudal_litros_minuto=20
+        )
+
+    def test_simulacion_detecta_zonas_que_bajan_del_umbral(self):
+        resp = self.client.get('/api/zonas/simulacion/?horizonte_dias=7&umbral=30')
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resultados = {fila['zona']: fila for fila in resp.data}
+        self.assertIsNone(resultados[self.regada.id]['cruce_umbral'])
+        self.assertEqual(resultados[self.regada.id]['litros_programados'], 600 * 7)
+        self.assertIsNotNone(resultados[self.seca.id]['cruce_umbral'])
+        self.assertLess(resultados[self.seca.id]['humedad_final'], resultados[self.regada.id]['humedad_final'])
+
+    def test_simulacion_calibra_con_lecturas(self):
+        sensor = Sensor.objects.create(nombre='Sensor seco', tipo='HUMEDAD', zona=self.seca)
+        ahora = timezone.now()
+        Lectura.objects.bulk_create([
+            Lectura(sensor=sensor, humedad=60 - 2 * indice, fecha_hora=ahora - timedelta(hours=10 - indice))
+            for indice in range(10)
+        ])
+
+        resp = self.client.get(f'/api/zonas/simulacion/?zona={self.seca.id}&horizonte_dias=2')
+
+        self.assertEqual(len(resp.data), 1)
+        self.assertEqual(resp.data[0]['humedad_inicial'], 42.0)
+        self.assertEqual(resp.data[0]['calibracion'], 4.0)
+
+        # Un segundo sensor con otro desfase y la misma tasa de secado no cambia
+        # la calibración: las diferencias solo se toman dentro de cada sensor
+        otro = Sensor.objects.create(nombre='Sensor seco 2', tipo='HUMEDAD', zona=self.seca)
+        Lectura.objects.bulk_create([
+            Lectura(sensor=otro, humedad=30 - 2 * indice, fecha_hora=ahora - timedelta(hours=10 - indice, minutes=1))
+            for indice in range(10)
+        ])
+        resp = self.client.get(f'/api/zonas/simulacion/?zona={self.seca.id}&horizonte_dias=2')
+        self.assertEqual(resp.data[0]['calibracion'], 4.0)
+        self.assertEqual(resp.data[0]['humedad_inicial'], 27.0)
+
+    def test_simulacion_coincide_con_referencia_escalar(self):
+        zonas, dias = 40, 10
+        horas = dias * 24
+        rng = np.random.default_rng(0)
+        frecuencias = ['diaria', 'semanal', 'quincenal', 'mensual', 'personalizada']
+        programaciones = [
+            (indice % zonas, time(int(rng.integers(0, 23)), int(rng.integers(0, 60))),
+             int(rng.integers(1, 1441)), float(rng.uniform(1, 20)), frecuencias[indice % 5],
+             [0, 3], date(2025, 1, int(rng.integers(1, 28))), None)
+            for indice in range(200)
+        ]
+        inicio = timezone.make_aware(datetime(2025, 3, 1, 5))
+        humedad_inicial = rng.uniform(20, 80, zonas)
+        area = rng.uniform(50, 500, zonas)
+        coeficientes = rng.uniform(0.5, 1.2, zonas)
+        calibracion = rng.uniform(0.5, 2.0, zonas)
+
+        litros = expandir_programaciones(programaciones, {indice: indice for indice in range(zonas)}, inicio, horas)
+        resultado = simular(humedad_inicial, area, coeficientes, calibracion, litros, 30, inicio.hour)
+
+        # Referencia minuto a minuto con Programacion.ocurre_en
+        esperado = np.zeros((zonas, horas))
+        for zona, hora_inicio, duracion, caudal, frecuencia, dias_semana, fecha_inicio, fecha_fin in programaciones:
+            programacion = Programacion(
+                frecuencia=frecuencia, dias_semana=dias_semana, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin
+            )
+            for dia in range(-1, dias + 1):
+                if not programacion.ocurre_en(inicio.date() + timedelta(days=dia)):
+                    continue
+                comienzo = dia * 1440 + (hora_inicio.hour - inicio.hour) * 60 + hora_inicio.minute
+                for minuto in range(comienzo, comienzo + duracion):
+                    if 0 <= minuto // 60 < horas:
+                        esperado[zona, minuto // 60] += caudal
+        np.testing.assert_allclose(litros, esperado)
+
+        for zona in range(zonas):
+            humedad = minima = humedad_inicial[zona]
+            cruce = -1
+            perdida = ET_REFERENCIA_MM_DIA * coeficientes[zona] * calibracion[zona] / LAMINA_UTIL_MM * 100
+            for hora in range(horas):
+                humedad += esperado[zona, hora] / (area[zona] * LAMINA_UTIL_MM) * 100
+                humedad -= perdida * PERFIL_DIURNO[(hora + inicio.hour) % 24]
+                humedad = min(max(humedad, 0), 100)
+                minima = min(minima, humedad)
+                if cruce < 0 and humedad < 30:
+                    cruce = hora
+            self.assertAlmostEqual(resultado['humedad_final'][zona], humedad)
+            self.assertAlmostEqual(resultado['humedad_minima'][zona], minima)
+            self.assertEqual(resultado['cruce_umbral'][zona], cruce)
+
+
+    def test_riegos_largos_y_desde_el_dia_anterior(self):
+        # Riego diario de 10 horas desde las 20:00: el del día anterior sigue hasta las 6:00
+        programaciones = [(0, time(20, 0), 600, 2.0, 'diaria', [], date(2025, 1, 1), None)]
+        inicio = timezone.make_aware(datetime(2025, 3, 1))
+        litros = expandir_programaciones(programaciones, {0: 0}, inicio, 48)[0]
+
+        esperado = np.zeros(48)
+        esperado[[*range(0, 6), *range(20, 30), *range(44, 48)]] = 120
+        np.testing.assert_allclose(litros, esperado)
+        self.assertEqual(litros.sum(), 2.0 * (360 + 600 + 240))
+
+
+class GenerarDatosTestCase(TestCase):
+    def generar(self, **opciones):
+        opciones = {'zonas': 3, 'programaciones_por_zona': 4, 'sensores_por_zona': 2, 'dias': 2,
+                    'intervalo': 60, 'lote': 50, 'semilla': 7, 'stdout': StringIO(), **opciones}
+        call_command('generar_datos', **opciones)
+        return list(
+            Lectura.objects.filter(sensor__nombre__startswith='GEN ')
+            .order_by('sensor__nombre', 'fecha_hora').values_list('sensor__nombre', 'fecha_hora', 'humedad')
+        )
+
+    def test_genera_volumenes_indicados(self):
+        version = version_modelo(Lectura)
+
+        lecturas = self.generar()
+
+        self.assertEqual(Zona.objects.count(), 3)
+        self.assertEqual(Programacion.objects.count(), 12)
+        self.assertEqual(Sensor.objects.count(), 6)
+        self.assertEqual(len(lecturas), 6 * 2 * 24)
+        self.assertEqual(Consumo.objects.count(), 3 * 2)
+        self.assertTrue(all(0 <= humedad <= 100 for _, _, humedad in lecturas))
+        for programacion in Programacion.objects.select_related('zona'):
+            programacion.full_clean()
+        self.assertNotEqual(version_modelo(Lectura), version)
+
+    def test_misma_semilla_mismos_datos(self):
+        primera = self.generar()
+        zonas = list(Zona.objects.values_list('nombre', 'area_m2', 'capacidad_agua_litros'))
+
+        self.assertEqual(self.generar(limpiar=True), primera)
+        self.assertEqual(list(Zona.objects.values_list('nombre', 'area_m2', 'capacidad_agua_litros')), zonas)
+        self.assertNotEqual(self.generar(limpiar=True, semilla=8), primera)
+
+    def test_prefijo_existente_exige_limpiar(self):
+        self.generar()
+        with self.assertRaises(CommandError):
+            self.generar()
+
+    def test_curva_sube_con_el_riego_y_baja_de_dia(self):
+        humedad = curva_humedad(np.random.default_rng(0), 3, 60, 6 * 60)
+
+        self.assertEqual(humedad.shape, (3, 24))
+        # Tras el riego de las 6:00 se seca más rápido a mediodía que de noche
+        self.assertGreater(humedad[:, 0].min(), humedad[:, -1].max())
+        self.assertGreater((humedad[:, 4] - humedad[:, 8]).mean(), (humedad[:, 16] - humedad[:, 20]).mean())
+
+
+class EvapotranspiracionTestCase(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        self.inicio = date(2025, 12, 1)
+
+    def test_radiacion_y_hargreaves(self):
+        # Ejemplo 8 de FAO-56: 20° S el 3 de septiembre
+        radiacion = radiacion_extraterrestre(246, -20)
+        self.assertAlmostEqual(float(radiacion), 32.2, places=1)
+        self.assertAlmostEqual(float(et0_hargreaves(10.0, 30.0, radiacion)), 5.11, places=2)
+
+    def test_requerimientos_y_duracion_sugerida(self):
+        zona = Zona.objects.create(nombre='Césped', tipo_zona='cesped', area_m2=100, capacidad_agua_litros=5000)
+        programacion = Programacion.objects.create(
+            zona=zona, nombre='Riego diario', hora_inicio=time(7, 0), duracion_minutos=30,
+            frecuencia='diaria', fecha_inicio=date(2025, 1, 1), caudal_litros_minuto=10
+        )
+        RegistroClima.objects.bulk_create([
+            RegistroClima(
+                fecha=self.inicio + timedelta(days=dia), temperatura_min=12, temperatura_max=28,
+                et0_mm=5, precipitacion_mm=10 if dia == 0 else 0
+            )
+            for dia in range(10)
+        ])
+
+        with self.assertPresupuestoConsultas(3):
+            resp = self.client.get(
+                '/api/zonas/requerimientos/?fecha_inicio=2025-12-01&fecha_fin=2025-12-10&detalle=true'
+            )
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['dias_sin_clima'], 0)
+        resultado = resp.data['zonas'][0]
+        # La lluvia efectiva del primer día (8 mm) cubre la demanda de césped (0.95 x 5 mm)
+        self.assertEqual(resultado['litros_por_dia'][0], 0)
+        self.assertAlmostEqual(resultado['litros_totales'], 9 * 0.95 * 5 * 100 / 0.85, places=1)
+        sugerencia = resultado['programaciones'][0]
+        self.assertEqual(sugerencia['id'], programacion.id)
+        self.assertEqual(sugerencia['ocurrencias'], 10)
+        self.assertEqual(sugerencia['duracion_sugerida'], 51)
+
+    def test_requerimientos_estima_et0_sin_medicion(self):
+        Zona.objects.create(nombre='Huerto', tipo_zona='huerto', area_m2=10, capacidad_agua_litros=500)
+        RegistroClima.objects.create(fecha=self.inicio, temperatura_min=10, temperatura_max=30)
+
+        resp = self.client.get('/api/zonas/requerimientos/?fecha_inicio=2025-12-01&fecha_fin=2025-12-02')
+
+        self.assertEqual(resp.data['dias_sin_clima'], 1)
+        self.assertGreater(resp.data['et0_total_mm'], 5)
+        self.assertEqual(resp.data['zonas'][0]['programaciones'], [])
+
+    def test_importar_clima_json_y_csv(self):
+        resp = self.client.post('/api/clima/importar/', [
+            {'fecha': '2025-12-01', 'temperatura_min': 10, 'temperatura_max': 25},
+            {'fecha': '2025-12-02', 'temperatura_min': 20, 'temperatura_max': 15},
+        ], format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['guardados'], 1)
+        self.assertEqual(resp.data['errores'][0]['fila'], 1)
+
+        archivo = SimpleUploadedFile(
+            'clima.csv',
+            b'fecha,temperatura_min,temperatura_max,precipitacion_mm,et0_mm\n'
+            b'2025-12-01,11,26,2.5,\n2025-12-03,9,24,0,4.8\n',
+            content_type='text/csv'
+        )
+        resp = self.client.post('/api/clima/importar/', {'archivo': archivo}, format='multipart')
+
+        self.assertEqual(resp.data['guardados'], 2)
+        self.assertEqual(RegistroClima.objects.count(), 2)
+        self.assertEqual(RegistroClima.objects.get(fecha=self.inicio).temperatura_min, 11)
+
+        # Un CSV que el módulo csv no puede leer es un 400, no un 500
+        archivo = SimpleUploadedFile(
+            'clima.csv', b'fecha,temperatura_min\n"' + b'x' * (csv.field_size_limit() + 1) + b'",1\n',
+            content_type='text/csv'
+        )
+        resp = self.client.post('/api/clima/importar/', {'archivo': archivo}, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('CSV inválido', resp.data['error'])
+
+    def test_temporada_coincide_con_referencia_escalar(self):
+        zonas, dias, n_programaciones = 30, 60, 80
+        rng = np.random.default_rng(0)
+        et0 = rng.uniform(2, 7, dias)
+        lluvia = np.where(rng.random(dias) < 0.2, rng.uniform(0, 10, dias), 0)
+        coeficientes = rng.uniform(0.6, 1.1, zonas)
+        area = rng.uniform(10, 500, zonas)
+        zona_idx = rng.integers(0, zonas, n_programaciones)
+        ocurrencias = rng.integers(0, 10, n_programaciones)
+        caudal = np.where(rng.random(n_programaciones) < 0.1, 0, rng.uniform(1, 20, n_programaciones))
+        duracion = rng.integers(5, 120, n_programaciones).astype(float)
+        capacidad = rng.uniform(100, 20000, n_programaciones)
+
+        litros = requerimiento_litros(et0, lluvia, coeficientes, area, 0.85)
+        sugeridas = duraciones_sugeridas(litros.sum(axis=1), zona_idx, ocurrencias, caudal, duracion, capacidad)
+
+        for zona in range(zonas):
+            for dia in range(dias):
+                esperado = max(coeficientes[zona] * et0[dia] - lluvia[dia], 0) * area[zona] / 0.85
+                self.assertAlmostEqual(litros[zona, dia], esperado)
+
+        programado = [0.0] * zonas
+        for indice in range(n_programaciones):
+            programado[zona_idx[indice]] += ocurrencias[indice] * caudal[indice] * duracion[indice]
+        for indice in range(n_programaciones):
+            zona = zona_idx[indice]
+            if not ocurrencias[indice] or not caudal[indice]:
+                self.assertEqual(sugeridas[indice], 0)
+                continue
+            factor = litros[zona].sum() / programado[zona]
+            maxima = max(min(math.floor(capacidad[indice] / caudal[indice]), DURACION_MAXIMA_MINUTOS), 1)
+            self.assertEqual(sugeridas[indice], min(max(math.ceil(duracion[indice] * factor), 1), maxima))
+
+
+class ReplicasLecturaTestCase(TransactionTestCase):
+    """
+    'default' hace de primaria y 'replica_prueba' (config/settings_test.py) de
+    réplica: en los tests es un espejo de la misma base, así que se comprueba
+    en qué conexión se ejecuta cada consulta
+    """
+    databases = {'default', 'replica_prueba'}
+
+    def setUp(self):
+        cache.clear()
+        reactivar_replicas()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        Zona.objects.create(nombre='Primaria', area_m2=100, capacidad_agua_litros=5000)
+
+    def lee_de_replica(self, peticion=None, *parches):
+        """Indica si las zonas se consultaron en la réplica (con `parches` aplicados)"""
+        with CaptureQueriesContext(connections['replica_prueba']) as consultas, ExitStack() as pila:
+            for parche in parches:
+                pila.enter_context(parche)
+            if peticion is None:
+                resp = self.client.get('/api/zonas/')
+                self.assertEqual(resp.status_code, status.HTTP_200_OK)
+                self.assertEqual([zona['nombre'] for zona in resp.data['results']], ['Primaria'])
+            else:
+                peticion()
+        return any('zonas_riego_zona' in consulta['sql'] for consulta in consultas.captured_queries)
+
+    def test_lecturas_en_replica(self):
+        self.assertFalse(self.lee_de_replica())
+        with self.settings(REPLICAS_LECTURA={'ALIAS': ['replica_prueba']}):
+            self.assertTrue(self.lee_de_replica())
+            # Fuera de una petición se lee de la primaria
+            self.assertFalse(self.lee_de_replica(lambda: list(Zona.objects.all())))
+
+    def test_lo_cacheado_no_sale_de_la_replica(self):
+        with self.settings(REPLICAS_LECTURA={'ALIAS': ['replica_prueba']}):
+            resp = self.client.get('/api/zonas/')
+            self.assertNotIn('ETag', resp)
+            self.assertNotIn('Last-Modified', resp)
+
+            # El snapshot se calcula con la primaria
+            self.assertFalse(self.lee_de_replica(lambda: self.client.get('/api/zonas/estadisticas/')))
+
+        self.assertIn('ETag', self.client.get('/api/zonas/'))
+
+    def test_escritura_fija_el_cliente_a_la_primaria(self):
+        with self.settings(REPLICAS_LECTURA={'ALIAS': ['replica_prueba'], 'FIJAR_SEGUNDOS': 5}):
+            resp = self.client.post('/api/zonas/', {
+                'nombre': 'Nueva', 'area_m2': '50.00', 'capacidad_agua_litros': '1000.00'
+            }, format='json')
+            self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(resp.cookies['bd_primaria']['max-age'], 5)
+            Zona.objects.filter(nombre='Nueva').delete()
+
+            # El mismo cliente lee de la primaria; sin la cookie vuelve a la réplica
+            self.assertFalse(self.lee_de_replica())
+            del self.client.cookies['bd_primaria']
+            self.assertTrue(self.lee_de_replica())
+
+            # Los clientes sin cookies reenvían el plazo de la cabecera
+            hasta = resp['X-BD-Primaria']
+            self.assertLessEqual(int(hasta) - reloj.time(), 5)
+            self.client.credentials(HTTP_X_BD_PRIMARIA=hasta)
+            self.assertFalse(self.lee_de_replica())
+            for vencido in (str(int(reloj.time()) - 1), str(int(reloj.time()) + 3600), 'x'):
+                self.client.credentials(HTTP_X_BD_PRIMARIA=vencido)
+                self.assertTrue(self.lee_de_replica())
+
+    def test_replica_caida_usa_la_primaria(self):
+        replica = connections['replica_prueba']
+        with self.settings(REPLICAS_LECTURA={'ALIAS': ['replica_prueba'], 'SUSPENSION_SEGUNDOS': 60}):
+            caida = mock.patch.object(replica, 'ensure_connection', side_effect=OperationalError('sin conexión'))
+            self.assertFalse(self.lee_de_replica(None, caida))
+            # Suspendida: no se reintenta hasta que pase SUSPENSION_SEGUNDOS
+            conectar = mock.Mock()
+            self.assertFalse(self.lee_de_replica(None, mock.patch.object(replica, 'ensure_connection', conectar)))
+            conectar.assert_not_called()
+
+            reactivar_replicas()
+            self.assertTrue(self.lee_de_replica())
+
+
+class OperacionesMasivasTestCase(PresupuestoConsultasMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='tester', password='clave-segura-123')
+        self.client.force_authenticate(user=self.user)
+        self.zona = Zona.objects.create(nombre='Sector Norte', area_m2=100, capacidad_agua_litros=1000)
+        self.programaciones = [
+            Programacion.objects.create(
+                zona=self.zona, nombre=f'Riego {indice}', hora_inicio=time(6, indice),
+                duracion_minutos=10, frecuencia='diaria', fecha_inicio=date(2025, 1, 1),
+                caudal_litros_minuto=5
+            )
+            for indice in range(5)
+        ]
+
+    def test_creacion_masiva_valida_todas_las_filas(self):
+        filas = [
+            {'nombre': f'Masiva {indice}', 'area_m2': '50.00', 'capacidad_agua_litros': '1000.00'}
+            for indice in range(20)
+        ]
+        version = version_modelo(Zona)
+        with self.assertPresupuestoConsultas(4):
+            resp = self.client.post('/api/zonas/masivo/', filas, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(resp.data), 20)
+        self.assertEqual(Zona.objects.filter(nombre__startswith='Masiva').count(), 20)
+        self.assertNotEqual(version_modelo(Zona), version)
+
+        # Una fila inválida (ratio de capacidad) impide guardar las demás
+        filas = [
+            {'nombre': 'Otra 1', 'area_m2': '50.00', 'capacidad_agua_litros': '1000.00'},
+            {'nombre': 'Otra 2', 'area_m2': '10.00', 'capacidad_agua_litros': '5000.00'},
+        ]
+        resp = self.client.post('/api/zonas/masivo/', filas, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['fila'] for error in resp.data['errores']], [1])
+        self.assertFalse(Zona.objects.filter(nombre__startswith='Otra').exists())
+
+    def test_actualizacion_masiva_por_id_con_reglas_del_modelo(self):
+        cambios = [
+            {'id': programacion.id, 'hora_inicio': '07:30:00'} for programacion in self.programaciones[:3]
+        ]
+        resp = self.client.patch('/api/programaciones/masivo/', cambios, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['actualizados'], 3)
+        self.assertEqual(
+            Programacion.objects.filter(hora_inicio=time(7, 30)).count(), 3
+        )
+
+        # Programacion.clean(): el consumo supera la capacidad de la zona
+        cambios = [
+            {'id': self.programaciones[0].id, 'prioridad': 5},
+            {'id': self.programaciones[1].id, 'duracion_minutos': 300},
+            {'id': 999999, 'prioridad': 2},
+        ]
+        resp = self.client.patch('/api/programaciones/masivo/', cambios, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['fila'] for error in resp.data['errores']], [1, 2])
+        self.assertIn('duracion_minutos', resp.data['errores'][0]['errores'])
+        self.assertEqual(Programacion.objects.get(pk=self.programaciones[0].id).prioridad, 1)
+
+    def test_actualizacion_y_borrado_por_filtro(self):
+        otra = Zona.objects.create(nombre='Sector Sur', area_m2=100, capacidad_agua_litros=1000)
+        Programacion.objects.create(
+            zona=otra, nombre='Riego sur', hora_inicio=time(20, 0), duracion_minutos=10,
+            frecuencia='diaria', fecha_inicio=date(2025, 1, 1), caudal_litros_minuto=5
+        )
+        antes = Programacion.objects.get(pk=self.programaciones[0].id).fecha_actualizacion
+
+        resp = self.client.patch(f'/api/programaciones/masivo/?zona={self.zona.id}', {'activa': False}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['actualizados'], 5)
+        self.assertFalse(Programacion.objects.filter(zona=self.zona, activa=True).exists())
+        self.assertTrue(Programacion.objects.get(zona=otra).activa)
+        self.assertGreater(Programacion.objects.get(pk=self.programaciones[0].id).fecha_actualizacion, antes)
+
+        # Sin filtros no se toca la tabla completa
+        resp = self.client.delete('/api/programaciones/masivo/')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.patch('/api/programaciones/masivo/', {'activa': True}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        ids = ','.join(str(programacion.id) for programacion in self.programaciones[:2])
+        resp = self.client.delete(f'/api/programaciones/masivo/?ids={ids}')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['eliminados'], 2)
+        self.assertEqual(Programacion.objects.count(), 4)
+
+    def test_limite_de_filas_por_filtro(self):
+        url = f'/api/programaciones/masivo/?zona={self.zona.id}'
+        with mock.patch.object(ProgramacionViewSet, 'MASIVO_MAX_FILAS', 4):
+            resp = self.client.patch(url, {'activa': False}, format='json')
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            resp = self.client.delete(url)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Programacion.objects.filter(zona=self.zona, activa=True).count(), 5)
+
+        with mock.patch.object(ProgramacionViewSet, 'MASIVO_MAX_FILAS', 5):
+            resp = self.client.delete(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['eliminados'], 5)
+
+    def test_sensores_y_medidores(self):
+        resp = self.client.post('/api/sensores/masivo/', [
+            {'nombre': f'Sensor {indice}', 'tipo': 'HUMEDAD', 'zona': self.zona.id} for indice in range(4)
+        ], format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        resp = self.client.patch(
+            f'/api/sensores/masivo/?zona={self.zona.id}', {'ubicacion': 'Cabecera'}, format='json'
+        )
+        self.assertEqual(resp.data['actualizados'], 4)
+
+        resp = self.client.post('/api/medidores/masivo/', [
+            {'numero_serie': 'MED-1', 'instalado': '2025-01-01'},
+            {'numero_serie': 'MED-1', 'instalado': '2025-01-01'},
+        ], format='json')
+        # Duplicado dentro del lote: se informa en las dos filas y no se guarda nada
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['fila'] for error in resp.data['errores']], [0, 1])
+        self.assertFalse(Medidor.objects.exists())
+        resp = self.client.delete('/api/medidores/masivo/?numero_serie=MED')
+        self.assertEqual(resp.data['eliminados'], 0)
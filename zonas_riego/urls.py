@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ZonaViewSet
+from .views import ZonaViewSet, RegistroClimaViewSet
 
 router = DefaultRouter()
 router.register(r'zonas', ZonaViewSet, basename='zona')
+router.register(r'clima', RegistroClimaViewSet, basename='clima')
 
 app_name = 'zonas_riego'
 
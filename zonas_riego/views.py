@@ -2,18 +2,36 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Count, Avg, Sum, Q
+from config.authentication import CachedJWTAuthentication
+from django.db.models import Count, Avg, Sum, Q, OuterRef, Subquery, Prefetch
+from django.db.models.functions import Coalesce, TruncDay, TruncWeek, TruncMonth
 from django.utils import timezone
-from datetime import timedelta
-from .models import Zona
-from .serializers import ZonaSerializer, ZonaSimpleSerializer
-from .filters import ZonaFilter
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from django_filters.rest_framework import DjangoFilterBackend
+from datetime import datetime, time, timedelta
+from .models import Zona, RegistroClima
+from .serializers import (
+    ZonaSerializer,
+    ZonaSimpleSerializer,
+    ZonaTableroSerializer,
+    PeriodoAgregadoSerializer,
+    SimulacionParametrosSerializer,
+    RequerimientoParametrosSerializer,
+    RegistroClimaSerializer,
+)
+from .simulacion import simular_zonas
+from .evapotranspiracion import calcular_requerimientos, leer_archivo_clima, importar_clima
+from programaciones.models import Programacion
+from sensores.models import Lectura
+from consumo_agua.models import Consumo
+from .filters import ZonaFilter, RegistroClimaFilter
+from config.cache import snapshot
+from config.condicional import GetCondicionalMixin
+from config.campos import CamposDinamicosViewSetMixin
+from config.masivo import OperacionesMasivasMixin
+from config.documentacion import openapi, swagger_auto_schema
 
 
-class ZonaViewSet(viewsets.ModelViewSet):
+class ZonaViewSet(OperacionesMasivasMixin, GetCondicionalMixin, CamposDinamicosViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Zonas de Riego
     
@@ -26,6 +44,12 @@ class ZonaViewSet(viewsets.ModelViewSet):
     - DELETE /api/zonas/{id}/ - Eliminar una zona
     - GET /api/zonas/estadisticas/ - Estadísticas generales
     - GET /api/zonas/{id}/resumen/ - Resumen de una zona específica
+    - GET /api/zonas/tablero/ - Tablero paginado con datos en vivo de cada zona
+    - GET /api/zonas/humedad/ - Humedad promedio por zona (y período)
+    - GET /api/zonas/consumo/ - Consumo total en m³ por zona (y período)
+    - GET /api/zonas/simulacion/ - Simulación de humedad del suelo por zona
+    - GET /api/zonas/requerimientos/ - Requerimiento hídrico por evapotranspiración y duraciones sugeridas
+    - POST/PATCH/DELETE /api/zonas/masivo/ - Creación, actualización y borrado masivos
     """
     queryset = Zona.objects.all()
     serializer_class = ZonaSerializer
@@ -35,12 +59,12 @@ class ZonaViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nombre', 'area_m2', 'capacidad_agua_litros', 'fecha_creacion']
     ordering = ['nombre']
 
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get_serializer_class(self):
-        """Usar serializer simple para listado"""
-        if self.action == 'list':
+        """Usar serializer simple para listado, salvo que se elijan campos con ?fields="""
+        if self.action == 'list' and not self.seleccion_de_campos():
             return ZonaSimpleSerializer
         return ZonaSerializer
     
@@ -75,9 +99,22 @@ class ZonaViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Endpoint para obtener estadísticas generales de zonas"""
+        stats = snapshot('zonas:estadisticas', [Zona], self.calcular_estadisticas)
+        return Response(stats)
+    
+    def calcular_estadisticas(self):
+        """Calcula todas las estadísticas con una única consulta agregada"""
         queryset = self.get_queryset()
         
-        # Estadísticas básicas
+        conteos_tipo = {
+            f'tipo_{tipo_key}': Count('id', filter=Q(tipo_zona=tipo_key))
+            for tipo_key, _ in Zona.TIPO_ZONA_CHOICES
+        }
+        conteos_estado = {
+            f'estado_{estado_key}': Count('id', filter=Q(estado=estado_key))
+            for estado_key, _ in Zona.ESTADO_CHOICES
+        }
+        
         stats = queryset.aggregate(
             total_zonas=Count('id'),
             zonas_activas=Count('id', filter=Q(activa=True)),
@@ -86,28 +123,28 @@ class ZonaViewSet(viewsets.ModelViewSet):
             capacidad_total_litros=Sum('capacidad_agua_litros'),
             promedio_area_m2=Avg('area_m2'),
             promedio_capacidad_litros=Avg('capacidad_agua_litros'),
+            **conteos_tipo,
+            **conteos_estado,
         )
         
         # Zonas por tipo
         zonas_por_tipo = {}
-        for tipo_choice in Zona.TIPO_ZONA_CHOICES:
-            tipo_key = tipo_choice[0]
-            count = queryset.filter(tipo_zona=tipo_key).count()
+        for tipo_key, _ in Zona.TIPO_ZONA_CHOICES:
+            count = stats.pop(f'tipo_{tipo_key}')
             if count > 0:
                 zonas_por_tipo[tipo_key] = count
         
         # Zonas por estado
         zonas_por_estado = {}
-        for estado_choice in Zona.ESTADO_CHOICES:
-            estado_key = estado_choice[0]
-            count = queryset.filter(estado=estado_key).count()
+        for estado_key, _ in Zona.ESTADO_CHOICES:
+            count = stats.pop(f'estado_{estado_key}')
             if count > 0:
                 zonas_por_estado[estado_key] = count
         
         stats['zonas_por_tipo'] = zonas_por_tipo
         stats['zonas_por_estado'] = zonas_por_estado
         
-        return Response(stats)
+        return stats
     
     @swagger_auto_schema(
         operation_description="Obtener resumen detallado de una zona específica",
@@ -150,3 +187,356 @@ class ZonaViewSet(viewsets.ModelViewSet):
         }
         
         return Response(data)
+    
+    def get_tablero_queryset(self, ahora):
+        """
+        Zonas con los datos del tablero resueltos en la misma consulta
+        (subconsultas correlacionadas) más un prefetch de programaciones vigentes.
+        """
+        hoy = timezone.localtime(ahora).date()
+        
+        programaciones_activas = (
+            Programacion.objects
+            .filter(zona=OuterRef('pk'), activa=True)
+            .order_by()
+            .values('zona')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        ultima_lectura = (
+            Lectura.objects
+            .filter(sensor__zona=OuterRef('pk'))
+            .order_by('-fecha_hora')
+        )
+        consumo_7_dias = (
+            Consumo.objects
+            .filter(medidor__zona=OuterRef('pk'), fecha__gt=hoy - timedelta(days=7), fecha__lte=hoy)
+            .order_by()
+            .values('medidor__zona')
+            .annotate(total=Sum('volumen_m3'))
+            .values('total')
+        )
+        vigentes = Programacion.objects.filter(
+            activa=True,
+            fecha_inicio__lte=hoy + timedelta(days=62)
+        ).filter(
+            Q(fecha_fin__gte=hoy) | Q(fecha_fin__isnull=True)
+        ).order_by()
+        
+        return self.filter_queryset(self.get_queryset()).annotate(
+            programaciones_activas=Coalesce(Subquery(programaciones_activas), 0),
+            ultima_humedad=Subquery(ultima_lectura.values('humedad')[:1]),
+            ultima_lectura=Subquery(ultima_lectura.values('fecha_hora')[:1]),
+            consumo_7_dias_m3=Subquery(consumo_7_dias),
+        ).prefetch_related(
+            Prefetch('programaciones', queryset=vigentes, to_attr='programaciones_vigentes')
+        )
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Tablero paginado de zonas: programaciones activas, próximo riego, litros planificados "
+            "para hoy, última humedad y consumo de los últimos 7 días. Se resuelve con un número "
+            "fijo de consultas independientemente de la cantidad de zonas."
+        ),
+        responses={200: ZonaTableroSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'])
+    def tablero(self, request):
+        """Endpoint con el tablero de todas las zonas"""
+        ahora = timezone.now()
+        queryset = self.get_tablero_queryset(ahora)
+        contexto = {**self.get_serializer_context(), 'ahora': ahora}
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = ZonaTableroSerializer(page, many=True, context=contexto)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = ZonaTableroSerializer(queryset, many=True, context=contexto)
+        return Response(serializer.data)
+    
+    TRUNCADO_PERIODO = {
+        'dia': TruncDay,
+        'semana': TruncWeek,
+        'mes': TruncMonth,
+    }
+    
+    def get_periodo(self, request):
+        """Valida los parámetros fecha_min, fecha_max, periodo y zona de los agregados"""
+        serializer = PeriodoAgregadoSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Humedad promedio de las lecturas de los sensores de cada zona. "
+            "Filtros: fecha_min, fecha_max, zona. Con `periodo` (dia, semana, mes) se agrupa también por período."
+        ),
+        manual_parameters=[
+            openapi.Parameter('fecha_min', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date'),
+            openapi.Parameter('fecha_max', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date'),
+            openapi.Parameter('periodo', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['dia', 'semana', 'mes']),
+            openapi.Parameter('zona', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def humedad(self, request):
+        """Endpoint con la humedad promedio por zona en una sola consulta agrupada"""
+        params = self.get_periodo(request)
+        queryset = Lectura.objects.filter(sensor__zona__isnull=False)
+        
+        if params.get('zona'):
+            queryset = queryset.filter(sensor__zona=params['zona'])
+        if params.get('fecha_min'):
+            queryset = queryset.filter(
+                fecha_hora__gte=timezone.make_aware(datetime.combine(params['fecha_min'], time.min))
+            )
+        if params.get('fecha_max'):
+            queryset = queryset.filter(
+                fecha_hora__lt=timezone.make_aware(datetime.combine(params['fecha_max'] + timedelta(days=1), time.min))
+            )
+        
+        campos = ['sensor__zona', 'sensor__zona__nombre']
+        if params.get('periodo'):
+            queryset = queryset.annotate(periodo=self.TRUNCADO_PERIODO[params['periodo']]('fecha_hora'))
+            campos.append('periodo')
+        
+        filas = (
+            queryset.order_by()
+            .values(*campos)
+            .annotate(avg_humedad=Avg('humedad'), lecturas=Count('id'))
+            .order_by(*campos)
+        )
+        
+        return Response([
+            {
+                'zona': fila['sensor__zona'],
+                'zona_nombre': fila['sensor__zona__nombre'],
+                **({'periodo': fila['periodo']} if 'periodo' in fila else {}),
+                'avg_humedad': fila['avg_humedad'],
+                'lecturas': fila['lecturas'],
+            }
+            for fila in filas
+        ])
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Consumo total (m³) de los medidores de cada zona. "
+            "Filtros: fecha_min, fecha_max, zona. Con `periodo` (dia, semana, mes) se agrupa también por período."
+        ),
+        manual_parameters=[
+            openapi.Parameter('fecha_min', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date'),
+            openapi.Parameter('fecha_max', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date'),
+            openapi.Parameter('periodo', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['dia', 'semana', 'mes']),
+            openapi.Parameter('zona', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def consumo(self, request):
+        """Endpoint con el consumo total por zona en una sola consulta agrupada"""
+        params = self.get_periodo(request)
+        queryset = Consumo.objects.filter(medidor__zona__isnull=False)
+        
+        if params.get('zona'):
+            queryset = queryset.filter(medidor__zona=params['zona'])
+        if params.get('fecha_min'):
+            queryset = queryset.filter(fecha__gte=params['fecha_min'])
+        if params.get('fecha_max'):
+            queryset = queryset.filter(fecha__lte=params['fecha_max'])
+        
+        campos = ['medidor__zona', 'medidor__zona__nombre']
+        if params.get('periodo'):
+            queryset = queryset.annotate(periodo=self.TRUNCADO_PERIODO[params['periodo']]('fecha'))
+            campos.append('periodo')
+        
+        filas = (
+            queryset.order_by()
+            .values(*campos)
+            .annotate(total_m3=Sum('volumen_m3'), registros=Count('id'))
+            .order_by(*campos)
+        )
+        
+        return Response([
+            {
+                'zona': fila['medidor__zona'],
+                'zona_nombre': fila['medidor__zona__nombre'],
+                **({'periodo': fila['periodo']} if 'periodo' in fila else {}),
+                'total_m3': fila['total_m3'],
+                'registros': fila['registros'],
+            }
+            for fila in filas
+        ])
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Simula hora a hora la humedad del suelo de todas las zonas activas según sus "
+            "programaciones, su tipo y la calibración obtenida de las lecturas recientes. "
+            "Indica cuándo cada zona bajaría del umbral de humedad."
+        ),
+        query_serializer=SimulacionParametrosSerializer,
+        responses={
+            200: openapi.Response(
+                description="Resultado de la simulación por zona",
+                examples={
+                    "application/json": [
+                        {
+                            "zona": 1,
+                            "zona_nombre": "Jardín Principal",
+                            "humedad_inicial": 45.0,
+                            "humedad_minima": 28.4,
+                            "humedad_final": 52.1,
+                            "litros_programados": 2100.0,
+                            "calibracion": 1.12,
+                            "cruce_umbral": "2025-11-24T15:00:00-03:00"
+                        }
+                    ]
+                }
+            )
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def simulacion(self, request):
+        """Endpoint con la simulación del balance hídrico de las zonas"""
+        serializer = SimulacionParametrosSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        
+        resultados = simular_zonas(
+            horizonte_dias=params['horizonte_dias'],
+            umbral=params['umbral'],
+            zona_ids=params.get('zona'),
+            dias_calibracion=params['dias_calibracion'],
+        )
+        return Response(resultados)
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Litros de riego que necesita cada zona activa en el período según la evapotranspiración "
+            "de referencia (registros climáticos), el coeficiente de cultivo de su tipo y la lluvia "
+            "efectiva. Sugiere además la duración de cada programación vigente según su caudal."
+        ),
+        query_serializer=RequerimientoParametrosSerializer,
+        responses={
+            200: openapi.Response(
+                description="Requerimiento hídrico por zona",
+                examples={
+                    "application/json": {
+                        "fecha_inicio": "2025-12-01",
+                        "fecha_fin": "2025-12-30",
+                        "dias": 30,
+                        "dias_sin_clima": 0,
+                        "et0_total_mm": 168.3,
+                        "precipitacion_efectiva_mm": 0.0,
+                        "zonas": [
+                            {
+                                "zona": 1,
+                                "zona_nombre": "Jardín Principal",
+                                "tipo_zona": "cesped",
+                                "coeficiente_cultivo": 0.95,
+                                "litros_totales": 18810.0,
+                                "litros_promedio_dia": 627.0,
+                                "litros_max_dia": 720.5,
+                                "capacidad_agua_litros": 5000.0,
+                                "capacidad_suficiente": True,
+                                "programaciones": [
+                                    {"id": 1, "nombre": "Riego mañana", "caudal_litros_minuto": 10.0, "ocurrencias": 30,
+                                     "duracion_actual": 30, "duracion_sugerida": 63, "litros_programados": 9000.0}
+                                ]
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: "Parámetros inválidos"
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def requerimientos(self, request):
+        """Endpoint con el requerimiento hídrico de las zonas en un período"""
+        serializer = RequerimientoParametrosSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        
+        resultado = calcular_requerimientos(
+            params['fecha_inicio'],
+            params['fecha_fin'],
+            zona_ids=params.get('zona'),
+            detalle=params['detalle'],
+        )
+        return Response(resultado)
+
+
+class RegistroClimaViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar los registros climáticos diarios
+    
+    Endpoints:
+    - GET /api/clima/ - Listar registros (filtros: fecha_desde, fecha_hasta)
+    - POST /api/clima/ - Crear un registro
+    - GET/PUT/PATCH/DELETE /api/clima/{id}/ - Detalle, actualización y borrado
+    - POST /api/clima/importar/ - Cargar registros desde JSON o un archivo CSV/JSON
+    """
+    queryset = RegistroClima.objects.all()
+    serializer_class = RegistroClimaSerializer
+    filterset_class = RegistroClimaFilter
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    ordering_fields = ['fecha']
+    ordering = ['-fecha']
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    
+    IMPORTACION_MAX_FILAS = 10000
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Cargar registros climáticos en bloque. Acepta una lista JSON de registros o un archivo "
+            "`archivo` (.csv con cabecera o .json) enviado como multipart. Las fechas ya cargadas se "
+            "reemplazan."
+        ),
+        responses={
+            201: openapi.Response(
+                description="Resultado de la carga",
+                examples={
+                    "application/json": {
+                        "total": 2,
+                        "guardados": 1,
+                        "errores": [{"fila": 1, "errores": {"temperatura_max": ["Este campo es requerido."]}}]
+                    }
+                }
+            ),
+            400: "Petición inválida o ningún registro válido"
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """Endpoint para cargar registros climáticos en bloque"""
+        archivo = request.FILES.get('archivo')
+        if archivo is not None:
+            formato = archivo.name.rsplit('.', 1)[-1].lower()
+            try:
+                filas = leer_archivo_clima(archivo.read().decode('utf-8-sig'), formato)
+            except (UnicodeDecodeError, ValueError) as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            filas = request.data
+            if isinstance(filas, dict):
+                filas = filas.get('registros')
+        
+        if not isinstance(filas, list) or not filas:
+            return Response(
+                {'error': 'Debe enviar una lista de registros o un archivo.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(filas) > self.IMPORTACION_MAX_FILAS:
+            return Response(
+                {'error': f'No se pueden cargar más de {self.IMPORTACION_MAX_FILAS} registros por petición.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        guardados, errores = importar_clima(filas)
+        
+        return Response(
+            {'total': len(filas), 'guardados': guardados, 'errores': errores},
+            status=status.HTTP_201_CREATED if guardados else status.HTTP_400_BAD_REQUEST
+        )